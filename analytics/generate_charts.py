@@ -0,0 +1,655 @@
+# file: analytics/generate_charts.py
+"""
+Builds the charts in data/charts from the source workbooks in one run
+(the figures that used to be made cell by cell in data/previow.ipynb).
+
+    python -m analytics.generate_charts [--out data/charts] [--workers N] [--force] [--only PATTERN ...]
+
+Each workbook is parsed once, then read from the Arrow cache
+(analytics/workbooks.py) while it does not change. The sheets are reshaped to
+one row per (employee, package) and every chart's numbers come out of
+groupbys / crosstabs over that frame (aggregate), with no per-row
+apply and no loop over departments. The figures are then drawn in a
+process pool: at 300 dpi a figure costs far more than its numbers, and
+matplotlib only draws on one core per process. Only charts whose
+inputs changed since the last run are drawn (see "Build graph").
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from fnmatch import fnmatch
+from itertools import repeat
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from analytics.workbooks import load_workbook, read_sheet  # noqa: E402
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+CHARTS_DIR = DATA_DIR / "charts"
+DPI = 300
+
+BREAKDOWN = "Breakdown to divisions.xlsx"
+RATES = "Rate Comparison.xlsx"
+
+PACKAGES = ["GTL", "GCI", "GPA", "GHS", "GMM"]
+# Package columns followed by the FWMI bar (GHS/GMM rows on the FWMI plan)
+BUCKETS = PACKAGES + ["FWMI"]
+PLAN_TIERS = ["PLAN 1", "PLAN 2", "PLAN 3"]
+
+PREMIUM = {p: f"{p} Premium" for p in PACKAGES}
+# GTL is exempt from GST
+PREMIUM_GST = {"GTL": "GTL Premium", **{p: f"{p} Premium with GST" for p in PACKAGES[1:]}}
+
+VALID_PLANS = {
+    "GTL": ["PLAN 1", "PLAN 2"],
+    "GCI": ["PLAN 1", "PLAN 2"],
+    "GPA": ["PLAN 1", "PLAN 2", "PLAN 3"],
+    "GHS": ["PLAN 1", "PLAN 2", "PLAN 3", "FWMI"],
+    "GMM": ["PLAN 1", "PLAN 2", "PLAN 3", "FWMI"],
+}
+_VALID_PAIRS = pd.MultiIndex.from_tuples(
+    [(pkg, plan) for pkg, plans in VALID_PLANS.items() for plan in plans], names=["Package", "Plan"],
+)
+
+PLAN_NAMES = {
+    "PLAN 1": "Assistant Managers & Above",
+    "PLAN 2": "Engineers, Secretaries, and Executives",
+    "PLAN 3": "Assistant Engineers & Below",
+    "FWMI": "S-Pass & Work Permit Only",
+}
+
+EMPLOYMENT_TYPES = ["SINGAPOREAN", "SINGAPORE PR", "LONG TERM VISIT PASS", "S PASS", "WORK PERMIT"]
+
+AGE_BINS = [0, 29, 39, 49, 120]
+AGE_LABELS = ["<30", "30-39", "40-49", "50+"]
+
+# Group headers in Rate Comparison.xlsx -> category (SMM is the GMM line)
+RATE_CATEGORIES = {"GTL": "GTL", "GCI": "GCI", "GPA": "GPA", "GHS": "GHS", "FWMI": "FWMI", "SMM": "GMM"}
+
+BUCKET_COLORS = ["#6495ED", "#3CB371", "#FFA500", "#1E90FF", "#DC143C", "#800080"]
+TIER_COLORS = {
+    "GTL": ["#6A5ACD", "#48C9B0", "#F5B041"],
+    "GCI": ["#1F77B4", "#FF7F0E", "#2CA02C"],
+    "GPA": ["#9B59B6", "#5DADE2", "#58D68D"],
+    "GHS": ["#3498DB", "#1ABC9C", "#F4D03F", "#E67E22"],
+    "GMM": ["#1F618D", "#52BE80", "#F4D03F", "#E67E22"],
+}
+PLAN_COLORS = ["#6495ED", "#3CB371", "#FFA500", "#800080"]
+INSURER_COLORS = ["#3c8dbc", "#dd4b39", "#605ca8"]
+
+
+# ---------------------------
+# Loading
+# ---------------------------
+
+def _clean(frame: pd.DataFrame) -> pd.DataFrame:
+    frame.columns = frame.columns.str.strip()
+    for col in PACKAGES:
+        frame[col] = frame[col].str.strip().str.upper()
+    premiums = [c for c in {*PREMIUM.values(), *PREMIUM_GST.values()} if c in frame.columns]
+    frame[premiums] = frame[premiums].apply(pd.to_numeric, errors="coerce").fillna(0)
+    return frame
+
+
+def _rates(raw: pd.DataFrame) -> pd.DataFrame:
+    """
+    Premium before/after GST per category and insurer, from the quote
+    layout of Rate Comparison.xlsx (insurer names on the first row,
+    field names on the second, one block of rows per category).
+    """
+    insurers = raw.iloc[0].ffill().astype(str).str.split(" - ").str[0]
+    fields = raw.iloc[1].astype(str).str.strip()
+    body = raw.iloc[2:]
+    loc = body[0].astype(str).str.strip()
+
+    # A category owns its header row and the rows up to its Sub Total
+    header = loc.isin(RATE_CATEGORIES.keys()) & body[1].isna()
+    marker = loc.map(RATE_CATEGORIES).where(header)
+    marker = marker.mask(loc.str.contains("Total", case=False), "")
+    category = marker.ffill()
+    rows = body[category.notna() & (category != "")]
+
+    columns = {}
+    for stage in ("Before", "After"):
+        picked = fields == f"Premium {stage.lower()} GST"
+        for idx in fields.index[picked]:
+            columns[f"{insurers[idx]} {stage} GST"] = pd.to_numeric(rows[idx], errors="coerce")
+    table = pd.DataFrame(columns).fillna(0)
+    return table.groupby(category[rows.index], sort=False).sum().rename_axis("Category")
+
+
+def load_sources(data_dir: Path = DATA_DIR) -> Dict[str, pd.DataFrame]:
+    """Every sheet the charts are built from, through the workbook cache."""
+    breakdown = load_workbook(data_dir / BREAKDOWN, {"General": 0, "Div": 2})
+    general = _clean(breakdown["General"])
+    general["Employment Type"] = general["Employment Type"].str.strip().str.upper()
+    div = _clean(breakdown["Div"])
+    div = div[div["Dept"] != "Grand Total"].reset_index(drop=True)
+    rates = _rates(read_sheet(data_dir / RATES, header=None))
+    return {"general": general, "div": div, "rates": rates}
+
+
+# ---------------------------
+# Aggregation
+# ---------------------------
+
+def _long(frame: pd.DataFrame, values: Dict[str, Dict[str, str]], keep: List[str], weight: Optional[str] = None):
+    """
+    One row per (source row, package) that has a plan. `values` maps an
+    output column to the per-package source column it is taken from.
+    """
+    n, k = len(frame), len(PACKAGES)
+    data = {
+        "row": np.tile(np.arange(n), k),
+        "Package": np.repeat(PACKAGES, n),
+        # column-major ravel stacks the package columns one after another
+        "Plan": frame[PACKAGES].to_numpy().ravel(order="F"),
+        "Weight": np.tile(frame[weight].to_numpy() if weight else np.ones(n, dtype=int), k),
+    }
+    for col in keep:
+        data[col] = np.tile(frame[col].to_numpy(), k)
+    for name, columns in values.items():
+        data[name] = frame[[columns[p] for p in PACKAGES]].to_numpy().ravel(order="F")
+    long = pd.DataFrame(data)
+    long = long[long["Plan"].notna()]
+    long["Bucket"] = long["Package"].where(long["Plan"] != "FWMI", "FWMI")
+    return long
+
+
+def _package_totals(long: pd.DataFrame, premium: str, departments) -> Dict[str, pd.DataFrame]:
+    """
+    Premium and headcount per department x bucket. An employee on FWMI
+    for both GHS and GMM pays into the FWMI bar twice but counts once.
+    """
+    counted = ~((long["Bucket"] == "FWMI") & long.duplicated(["row", "Bucket"]))
+    grouped = (
+        long.assign(Headcount=long["Weight"].where(counted, 0))
+        .groupby(["Dept", "Bucket"])[[premium, "Headcount"]].sum()
+    )
+    return {
+        "premium": grouped[premium].unstack(fill_value=0).reindex(index=departments, columns=BUCKETS, fill_value=0),
+        "headcount": grouped["Headcount"].unstack(fill_value=0).reindex(index=departments, columns=BUCKETS, fill_value=0),
+    }
+
+
+def aggregate(sources: Dict[str, pd.DataFrame]) -> Dict[str, object]:
+    """The numbers behind every chart, keyed by table name."""
+    general, div, rates = sources["general"], sources["div"], sources["rates"]
+    departments = pd.unique(general["Dept"])
+    divisions = pd.unique(div["Dept"])
+
+    long = _long(general, {"Premium": PREMIUM, "PremiumGST": PREMIUM_GST}, keep=["Dept", "Employment Type"])
+    by_tier = long.groupby(["Package", "Plan"])
+    tier_premium = by_tier["Premium"].sum()
+    tier_premium_gst = by_tier["PremiumGST"].sum()
+
+    valid = long[pd.MultiIndex.from_arrays([long["Package"], long["Plan"]]).isin(_VALID_PAIRS)]
+    full_index = pd.MultiIndex.from_tuples(
+        [(d, pkg, plan) for d in sorted(departments) for pkg, plan in _VALID_PAIRS],
+        names=["Department", "Package", "Plan"],
+    )
+    headcount = (
+        valid.groupby(["Dept", "Package", "Plan"])["Weight"].sum()
+        .rename_axis(["Department", "Package", "Plan"])
+        .reindex(full_index, fill_value=0)
+    )
+
+    fwmi = long[long["Bucket"] == "FWMI"].drop_duplicates("row")
+    employment = pd.concat([
+        pd.crosstab(valid["Package"], valid["Employment Type"]),
+        pd.crosstab(fwmi["Bucket"], fwmi["Employment Type"]),
+    ]).reindex(index=BUCKETS, columns=EMPLOYMENT_TYPES).fillna(0).astype(int)
+
+    div_long = _long(div, {"PremiumGST": PREMIUM_GST}, keep=["Dept"], weight="HC")
+    div_premium = div[list(PREMIUM_GST.values())]
+
+    return {
+        "tier_premium": tier_premium,
+        "tier_headcount": by_tier.size(),
+        "tier_premium_by_name": tier_premium_gst.rename(index=PLAN_NAMES, level="Plan"),
+        "age": pd.cut(general["Age Grp"], bins=AGE_BINS, labels=AGE_LABELS).value_counts().sort_index(),
+        "department_gst": _package_totals(long, "PremiumGST", departments),
+        "department": _package_totals(long, "Premium", departments),
+        "headcount": headcount,
+        "employment_package": employment,
+        "employment_division": pd.crosstab(general["Dept"], general["Employment Type"]).reindex(
+            index=departments, columns=pd.unique(general["Employment Type"]), fill_value=0,
+        ),
+        "division": _package_totals(div_long, "PremiumGST", divisions),
+        "division_total": div_premium.sum(axis=1).groupby(div["Dept"]).sum().reindex(divisions),
+        "division_plans": (
+            (div_premium > 0).mul(div["HC"], axis=0).groupby(div["Dept"]).sum()
+            .set_axis(PACKAGES, axis=1).reindex(divisions)
+        ),
+        "rates": rates,
+    }
+
+
+# ---------------------------
+# Rendering
+# ---------------------------
+# Each function takes the slice of aggregate() it draws and returns the
+# figure; they run in the worker processes, so they only get picklable
+# pandas objects.
+
+def _grid(fig_size, count, rows=3, cols=3):
+    fig, axes = plt.subplots(rows, cols, figsize=fig_size)
+    axes = axes.flatten()
+    for ax in axes[count:]:
+        fig.delaxes(ax)
+    return fig, axes
+
+
+def _department_label(ax, name, label="Department"):
+    ax.text(0.02, 0.93, f"{label}: {name}", transform=ax.transAxes, fontsize=10, fontweight="bold")
+
+
+def render_tier_premium(data):
+    package, sums = data
+    fig, ax = plt.subplots(figsize=(8, 5))
+    sums.plot(kind="bar", ax=ax, color=TIER_COLORS[package][:len(sums)])
+    ax.set_title(f"Total {package} Premium by Plan Tier")
+    ax.set_xlabel(f"{package} Plan Tier")
+    ax.set_ylabel("Total Premium")
+    ax.tick_params(axis="x", rotation=0)
+    ax.grid(axis="y", linestyle="--", alpha=0.5)
+    return fig
+
+
+def render_tier_headcount(data):
+    package, counts = data
+    fig, ax = plt.subplots(figsize=(8, 5))
+    counts.plot(kind="bar", ax=ax, color=TIER_COLORS[package][:len(counts)])
+    ax.set_title(f"Headcount by {package} Plan Tier")
+    ax.set_xlabel(f"{package} Plan Tier")
+    ax.set_ylabel("Number of Employees")
+    ax.tick_params(axis="x", rotation=0)
+    ax.grid(axis="y", linestyle="--", alpha=0.5)
+    return fig
+
+
+def render_tier_premium_by_name(data):
+    package, sums = data
+    fig, ax = plt.subplots(figsize=(10, 6))
+    sums.sort_values().plot(kind="bar", ax=ax, color=TIER_COLORS[package][:len(sums)])
+    ax.set_title(f"Total {package} Premium (With GST) by Plan Name", fontsize=14)
+    ax.set_xlabel("Plan Type", fontsize=12)
+    ax.set_ylabel("Total Premium (SGD)", fontsize=12)
+    plt.setp(ax.get_xticklabels(), rotation=20, ha="right")
+    ax.grid(axis="y", linestyle="--", alpha=0.5)
+    return fig
+
+
+def render_age(counts):
+    fig, ax = plt.subplots(figsize=(8, 5))
+    counts.plot(kind="bar", ax=ax, color=["#85C1E9", "#5DADE2", "#2E86C1", "#1B4F72"])
+    ax.set_title("Age Distribution of Employees")
+    ax.set_xlabel("Age Group")
+    ax.set_ylabel("Number of Employees")
+    ax.tick_params(axis="x", rotation=0)
+    ax.grid(axis="y", linestyle="--", alpha=0.5)
+    return fig
+
+
+def render_department_premium(totals):
+    premium = totals["premium"]
+    fig, axes = _grid((18, 12), len(premium))
+    for ax, (dept, values) in zip(axes, premium.iterrows()):
+        bars = ax.bar(BUCKETS, values, color=BUCKET_COLORS)
+        top = values.max() if values.max() > 0 else 1
+        ax.set_ylim(0, top * 1.15)
+        for bar in bars:
+            ax.text(bar.get_x() + bar.get_width() / 2, bar.get_height() + top * 0.02,
+                    f"{int(bar.get_height())}", ha="center", fontsize=8)
+        _department_label(ax, dept)
+        ax.set_ylabel("Premium Amount ($)")
+        ax.set_xticks(range(len(BUCKETS)), BUCKETS, rotation=30)
+    fig.tight_layout()
+    return fig
+
+
+def render_premium_vs_headcount(totals):
+    premium, headcount = totals["premium"], totals["headcount"]
+    fig, axes = _grid((18, 12), len(premium))
+    for ax, (dept, values) in zip(axes, premium.iterrows()):
+        bars = ax.bar(BUCKETS, values, color=BUCKET_COLORS)
+        top = values.max() if values.max() > 0 else 1
+        ax.set_ylim(0, top * 1.2)
+        for bar, count in zip(bars, headcount.loc[dept]):
+            ax.text(bar.get_x() + bar.get_width() / 2, bar.get_height() + top * 0.02,
+                    str(int(count)), ha="center", fontsize=9, fontweight="bold")
+        _department_label(ax, dept)
+        ax.set_ylabel("Premium ($)")
+        ax.set_xticks(range(len(BUCKETS)), BUCKETS, rotation=25)
+    fig.tight_layout()
+    return fig
+
+
+def render_department_headcount(data):
+    dept, counts = data
+    table = counts.unstack("Plan", fill_value=0)
+    plans = [p for p in PLAN_TIERS + ["FWMI"] if p in table.columns]
+    x = np.arange(len(table.index))
+    width = 0.18
+    fig, ax = plt.subplots(figsize=(12, 6))
+    for i, plan in enumerate(plans):
+        ax.bar(x + i * width, table[plan], width, label=plan, color=PLAN_COLORS[i])
+        for xi, value in zip(x + i * width, table[plan]):
+            if value > 0:
+                ax.text(xi, value + 0.5, str(value), ha="center", fontsize=9)
+    ax.set_title(f"Department {dept} - Headcount by Package & Plan", fontsize=14, fontweight="bold")
+    ax.set_xticks(x + width, table.index)
+    ax.set_ylabel("Headcount")
+    ax.legend(title="Plan Tier")
+    fig.tight_layout()
+    return fig
+
+
+def render_package_by_department(data):
+    package, counts = data
+    table = counts.unstack("Plan", fill_value=0).reindex(columns=VALID_PLANS[package])
+    fig, ax = plt.subplots(figsize=(12, 6))
+    table.plot(kind="bar", ax=ax, width=0.8, color=PLAN_COLORS[:len(table.columns)])
+    ax.set_title(f"{package} Headcount by Department and Plan Tier", fontsize=14, fontweight="bold")
+    ax.set_xlabel("Department")
+    ax.set_ylabel("Headcount")
+    ax.tick_params(axis="x", rotation=0)
+    ax.legend(title="Plan Tier")
+    ax.grid(axis="y", linestyle="--", alpha=0.5)
+    fig.tight_layout()
+    return fig
+
+
+def render_employment_package(table):
+    fig, ax = plt.subplots(figsize=(16, 8))
+    table.plot(kind="bar", ax=ax, width=0.8)
+    ax.set_title("Headcount Distribution by Employment Type for Each Insurance Package",
+                 fontsize=16, fontweight="bold")
+    ax.set_xlabel("Insurance Package", fontsize=13)
+    ax.set_ylabel("Headcount", fontsize=13)
+    ax.tick_params(axis="x", rotation=0, labelsize=12)
+    ax.legend(title="Employment Type", fontsize=10, title_fontsize=11)
+    ax.grid(axis="y", linestyle="--", alpha=0.5)
+    fig.tight_layout()
+    return fig
+
+
+def render_employment_division(table):
+    fig, axes = _grid((18, 12), len(table))
+    for ax, (dept, counts) in zip(axes, table.iterrows()):
+        bars = ax.bar(counts.index, counts.values, color=BUCKET_COLORS[:len(counts)])
+        for bar in bars:
+            ax.text(bar.get_x() + bar.get_width() / 2, bar.get_height() + 0.5,
+                    str(int(bar.get_height())), ha="center", fontsize=10, fontweight="bold")
+        _department_label(ax, dept, "Division")
+        ax.set_ylim(0, max(counts.max(), 1) * 1.2)
+        ax.set_xticks(range(len(counts)), counts.index, rotation=25, fontsize=9)
+    fig.tight_layout()
+    return fig
+
+
+def render_division_total(totals):
+    fig, ax = plt.subplots(figsize=(12, 6))
+    ax.bar(totals.index, totals.values, color="steelblue")
+    for x, y in zip(totals.index, totals.values):
+        ax.text(x, y, f"{y:,.0f}", ha="center", va="bottom")
+    ax.set_title("Total Premiums Across Divisions")
+    ax.set_xlabel("Division")
+    ax.set_ylabel("Total Premium ($)")
+    fig.tight_layout()
+    return fig
+
+
+def render_division_plans(table):
+    fig, ax = plt.subplots(figsize=(12, 7))
+    for package in table.columns:
+        ax.plot(table.index, table[package], marker="o", linewidth=2, label=package)
+    ax.set_title("Plan Distribution Across Divisions (Headcount)")
+    ax.set_xlabel("Division")
+    ax.set_ylabel("Total Headcount")
+    ax.legend(title="Plan")
+    ax.grid(axis="y", linestyle="--", alpha=0.3)
+    fig.tight_layout()
+    return fig
+
+
+def render_rates(rates):
+    after = rates[[c for c in rates.columns if c.endswith("After GST")]]
+    fig, ax = plt.subplots(figsize=(10, 6))
+    after.plot(kind="bar", ax=ax, color=INSURER_COLORS)
+    ax.set_ylabel("Premium After GST")
+    ax.set_title("Premium Comparison by Category and Insurer")
+    ax.tick_params(axis="x", rotation=0)
+    ax.grid(axis="y", linestyle="--", alpha=0.4)
+    fig.tight_layout()
+    return fig
+
+
+def render_rate_totals(rates):
+    totals = rates[[c for c in rates.columns if c.endswith("After GST")]].sum()
+    totals.index = totals.index.str.replace("After GST", "Total After GST")
+    fig, ax = plt.subplots(figsize=(7, 5))
+    totals.plot(kind="bar", ax=ax, color=INSURER_COLORS)
+    ax.set_ylabel("Total Premium After GST")
+    ax.set_title("Total Premium Comparison (" + " vs ".join(totals.index.str.split(" ").str[0]) + ")")
+    ax.tick_params(axis="x", rotation=10)
+    ax.grid(axis="y", linestyle="--", alpha=0.4)
+    fig.tight_layout()
+    return fig
+
+
+# ---------------------------
+# Chart set
+# ---------------------------
+# Every chart names the source columns its numbers come from
+# ({source: columns}, None for the whole table), so a run can tell
+# which charts an edit to a workbook affects.
+
+GENERAL_PLANS = ("Dept", *PACKAGES)
+DIV_PREMIUMS = ("Dept", "HC", *PACKAGES, *PREMIUM_GST.values())
+
+
+class Chart(NamedTuple):
+    path: str                   # relative to the output directory
+    render: Callable            # module-level, so it pickles by name
+    data: object
+    inputs: Dict[str, Optional[tuple]]
+
+
+def charts(tables: Dict[str, object]) -> List[Chart]:
+    """Every chart of the set with the numbers it is drawn from."""
+    out = []
+    for package in PACKAGES:
+        out.append(Chart(f"{package}_premium_distribution.png", render_tier_premium,
+                         (package, tables["tier_premium"].loc[package]),
+                         {"general": (package, PREMIUM[package])}))
+    out.append(Chart("GHS_headcount_distribution.png", render_tier_headcount,
+                     ("GHS", tables["tier_headcount"].loc["GHS"]), {"general": ("GHS",)}))
+    for package in ("GHS", "GMM"):
+        out.append(Chart(f"{package}_premium_by_plan_name.png", render_tier_premium_by_name,
+                         (package, tables["tier_premium_by_name"].loc[package]),
+                         {"general": (package, PREMIUM_GST[package])}))
+    out += [
+        Chart("age_distribution.png", render_age, tables["age"], {"general": ("Age Grp",)}),
+        Chart("department_package_premium_corrected.png", render_department_premium, tables["department_gst"],
+              {"general": (*GENERAL_PLANS, *PREMIUM_GST.values())}),
+        Chart("department_premium_vs_headcount_fixed.png", render_premium_vs_headcount, tables["department"],
+              {"general": (*GENERAL_PLANS, *PREMIUM.values())}),
+        Chart("division_premium_headcounts_corrected.png", render_premium_vs_headcount, tables["division"],
+              {"div": DIV_PREMIUMS}),
+        Chart("employment_package_distribution.png", render_employment_package, tables["employment_package"],
+              {"general": (*PACKAGES, "Employment Type")}),
+        Chart("employment_type_by_division.png", render_employment_division, tables["employment_division"],
+              {"general": ("Dept", "Employment Type")}),
+        Chart("total_premiums_across_divisions.png", render_division_total, tables["division_total"],
+              {"div": ("Dept", *PREMIUM_GST.values())}),
+        Chart("plan_distribution_across_divisions.png", render_division_plans, tables["division_plans"],
+              {"div": ("Dept", "HC", *PREMIUM_GST.values())}),
+        Chart("premium_comparison_dashboard.png", render_rates, tables["rates"], {"rates": None}),
+        Chart("total_premium_comparison.png", render_rate_totals, tables["rates"], {"rates": None}),
+    ]
+    headcount = tables["headcount"]
+    for dept, counts in headcount.groupby(level="Department"):
+        out.append(Chart(f"department_{dept}_grouped_headcount_chart.png", render_department_headcount,
+                         (dept, counts.droplevel("Department")), {"general": GENERAL_PLANS}))
+    for package, counts in headcount.groupby(level="Package", sort=False):
+        out.append(Chart(f"division_distribution/{package}_by_dept.png", render_package_by_department,
+                         (package, counts.droplevel("Package")), {"general": ("Dept", package)}))
+    return out
+
+
+# ---------------------------
+# Build graph
+# ---------------------------
+# Like make: a chart is drawn again only when the hash of its inputs
+# (its source columns, and this module's code) differs from the one
+# recorded in the manifest when it was last drawn, or its file is gone.
+
+MANIFEST = ".manifest.json"
+
+
+class InputHasher:
+    """Hashes source columns, each at most once per run."""
+
+    def __init__(self, sources: Dict[str, pd.DataFrame]):
+        self.sources = sources
+        self._columns: Dict[tuple, bytes] = {}
+        self._code = hashlib.blake2b(Path(__file__).read_bytes(), digest_size=16).digest()
+
+    def _column(self, source: str, column) -> bytes:
+        key = (source, column)
+        if key not in self._columns:
+            values = pd.util.hash_pandas_object(self.sources[source][column], index=False).to_numpy()
+            self._columns[key] = hashlib.blake2b(values.tobytes(), digest_size=16).digest()
+        return self._columns[key]
+
+    def key(self, chart: Chart) -> str:
+        digest = hashlib.blake2b(self._code, digest_size=16)
+        digest.update(f"{DPI}".encode())
+        for source, columns in sorted(chart.inputs.items()):
+            for column in columns or self.sources[source].columns:
+                digest.update(f"{source}:{column}".encode())
+                digest.update(self._column(source, column))
+        return digest.hexdigest()
+
+
+def load_manifest(out_dir: Path) -> Dict[str, dict]:
+    try:
+        return json.loads((out_dir / MANIFEST).read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(out_dir: Path, manifest: Dict[str, dict]):
+    out_dir.mkdir(parents=True, exist_ok=True)
+    tmp = out_dir / f"{MANIFEST}.tmp"
+    tmp.write_text(json.dumps(manifest, indent=1, sort_keys=True))
+    os.replace(tmp, out_dir / MANIFEST)
+
+
+def _selected(chart: Chart, only: Optional[List[str]]) -> bool:
+    return not only or any(fnmatch(chart.path, p) or fnmatch(Path(chart.path).stem, p) for p in only)
+
+
+def outdated(items: List[Chart], keys: Dict[str, str], manifest: Dict[str, dict], out_dir: Path) -> List[Chart]:
+    return [
+        chart for chart in items
+        if manifest.get(chart.path, {}).get("inputs") != keys[chart.path] or not (out_dir / chart.path).exists()
+    ]
+
+
+# ---------------------------
+# Batch
+# ---------------------------
+
+def _render(chart: Chart, out_dir: Path) -> str:
+    fig = chart.render(chart.data)
+    fig.savefig(out_dir / chart.path, dpi=DPI, bbox_inches="tight")
+    plt.close(fig)
+    return chart.path
+
+
+def render_all(items: List[Chart], out_dir: Path, workers: Optional[int] = None) -> List[str]:
+    """Draw every chart; in `workers` processes (default: one per CPU)."""
+    for chart in items:
+        (out_dir / chart.path).parent.mkdir(parents=True, exist_ok=True)
+    workers = min(workers or os.cpu_count() or 1, len(items))
+    if workers <= 1:
+        return [_render(chart, out_dir) for chart in items]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_render, items, repeat(out_dir)))
+
+
+def generate(
+    data_dir: Path = DATA_DIR,
+    out_dir: Path = CHARTS_DIR,
+    workers: Optional[int] = None,
+    force: bool = False,
+    only: Optional[List[str]] = None,
+) -> dict:
+    """
+    Draw the charts whose inputs changed since the last run into
+    out_dir (all of them with `force`), limited to the paths matching
+    `only` (glob patterns). Returns what was drawn and the timings.
+    """
+    timings = {}
+    start = time.perf_counter()
+    sources = load_sources(data_dir)
+    timings["load"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    items = [chart for chart in charts(aggregate(sources)) if _selected(chart, only)]
+    hasher = InputHasher(sources)
+    keys = {chart.path: hasher.key(chart) for chart in items}
+    manifest = load_manifest(out_dir)
+    todo = items if force else outdated(items, keys, manifest, out_dir)
+    timings["plan"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    rendered = render_all(todo, out_dir, workers) if todo else []
+    timings["render"] = time.perf_counter() - start
+
+    now = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    for path in rendered:
+        manifest[path] = {"inputs": keys[path], "rendered_at": now}
+    if rendered:
+        save_manifest(out_dir, manifest)
+    return {"rendered": rendered, "selected": len(items), **timings}
+
+
+# ---------------------------
+# CLI
+# ---------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m analytics.generate_charts")
+    parser.add_argument("--data", type=Path, default=DATA_DIR, help="directory with the source workbooks")
+    parser.add_argument("--out", type=Path, default=CHARTS_DIR)
+    parser.add_argument("--workers", type=int, default=None, help="render processes (default: one per CPU)")
+    parser.add_argument("--force", action="store_true", help="draw every selected chart, changed or not")
+    parser.add_argument("--only", nargs="+", metavar="PATTERN",
+                        help="charts whose path or name matches, e.g. 'department_*' GHS_premium_distribution")
+    args = parser.parse_args(argv)
+
+    result = generate(args.data, args.out, args.workers, args.force, args.only)
+    for path in result["rendered"]:
+        print(f"  drew {path}")
+    print(f"{len(result['rendered'])} of {result['selected']} charts drawn in {args.out} "
+          f"({result['selected'] - len(result['rendered'])} up to date): load {result['load']:.2f}s, "
+          f"plan {result['plan']:.2f}s, render {result['render']:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
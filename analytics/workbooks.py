@@ -0,0 +1,196 @@
+# file: analytics/workbooks.py
+"""
+Cached reads of the Excel workbooks in data/.
+
+read_excel parses the whole workbook XML on every call; for the
+workbooks here that is hundreds of milliseconds per sheet, every chart
+run and every notebook session. Here a sheet is converted once into an
+uncompressed Arrow IPC (Feather v2) file under CACHE_DIR, and later
+reads memory-map that file: numeric and string columns are handed to
+pandas without copying or parsing.
+
+    from analytics.workbooks import read_sheet
+    df = read_sheet("data/headcount_per_plan.xlsx")
+
+A cache file records the source's size, mtime and content hash. When
+size and mtime still match, the cache is used as is. When they do not,
+the source is hashed: same content (a copy or a touch) only refreshes
+the recorded mtime, different content re-converts the sheet.
+
+Arrow columns have one type, so a sheet column that holds both text
+and numbers (e.g. a free-text column with 0 for "none", or any column
+read with header=None) comes back as text; use pd.to_numeric on it.
+"""
+import hashlib
+import json
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+import pandas as pd
+import pyarrow as pa
+from pyarrow import feather
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+CACHE_DIR = Path(os.getenv("ANALYTICS_CACHE_DIR", DATA_DIR / ".cache"))
+
+# Bump when the conversion changes, so older cache files are redone
+FORMAT_VERSION = 1
+_META_KEY = b"analytics.source"
+
+Sheet = Union[str, int]
+
+
+class CacheStats:
+    def __init__(self):
+        self.hits = 0           # size and mtime matched
+        self.rehashed = 0       # mtime moved, content unchanged
+        self.converted = 0      # parsed from the workbook
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "rehashed": self.rehashed, "converted": self.converted}
+
+
+cache_stats = CacheStats()
+
+
+# ---------------------------
+# Cache files
+# ---------------------------
+
+def _file_hash(path: Path) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _cache_path(source: Path, sheet: Sheet, header, cache_dir: Path) -> Path:
+    # Same file name in two directories must not share a cache file
+    where = hashlib.blake2b(str(source.resolve()).encode(), digest_size=4).hexdigest()
+    name = re.sub(r"[^\w.-]+", "_", f"{source.stem}-{where}-{sheet}-h{header}")
+    return cache_dir / f"{name}.arrow"
+
+
+def _to_table(df: pd.DataFrame) -> pa.Table:
+    df = df.copy()
+    # Text for mixed text/number columns; Arrow needs one type per column
+    for col in df.columns[df.dtypes == object]:
+        try:
+            pa.array(df[col], from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+    df.columns = [str(c) for c in df.columns]
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    # Blank cells stay NaN rather than becoming Arrow nulls: a float
+    # column with nulls is copied (to fill in NaN) on every read
+    for i, col in enumerate(df.columns):
+        if df[col].dtype.kind == "f":
+            table = table.set_column(i, table.field(i), pa.array(df[col].to_numpy(), from_pandas=False))
+    return table
+
+
+def _write(table: pa.Table, target: Path, meta: dict):
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), _META_KEY: json.dumps(meta, default=str).encode()})
+    target.parent.mkdir(parents=True, exist_ok=True)
+    # Written aside and renamed, so readers never see half a file
+    fd, tmp = tempfile.mkstemp(dir=target.parent, suffix=".tmp")
+    os.close(fd)
+    try:
+        feather.write_feather(table, tmp, compression="uncompressed")
+        os.replace(tmp, target)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def _open(target: Path):
+    """(table, recorded source key) from a memory-mapped cache file, or None."""
+    try:
+        table = feather.read_table(target, memory_map=True)
+        meta = json.loads(table.schema.metadata[_META_KEY])
+    except (OSError, KeyError, ValueError, pa.ArrowInvalid):
+        return None
+    if meta.get("format") != FORMAT_VERSION:
+        return None
+    return table, meta
+
+
+def _to_frame(table: pa.Table, meta: dict) -> pd.DataFrame:
+    # split_blocks keeps each column on its own buffer instead of
+    # consolidating (copying) them into 2-D blocks
+    df = table.to_pandas(split_blocks=True)
+    df.columns = meta["columns"]
+    return df
+
+
+# ---------------------------
+# Reading
+# ---------------------------
+
+def load_workbook(
+    path, sheets: Dict[Sheet, int], cache_dir: Optional[Path] = None,
+) -> Dict[Sheet, pd.DataFrame]:
+    """
+    Several sheets of one workbook ({sheet: header row}); the workbook
+    is parsed at most once, and only if one of them is not cached.
+    """
+    source = Path(path)
+    cache_dir = Path(cache_dir or CACHE_DIR)
+    stat = source.stat()
+    content_hash = None
+    out, stale = {}, []
+
+    for sheet, header in sheets.items():
+        target = _cache_path(source, sheet, header, cache_dir)
+        cached = _open(target)
+        if cached is None:
+            stale.append(sheet)
+            continue
+        table, meta = cached
+        if (meta["size"], meta["mtime_ns"]) == (stat.st_size, stat.st_mtime_ns):
+            cache_stats.hits += 1
+        else:
+            content_hash = content_hash or _file_hash(source)
+            if meta["hash"] != content_hash:
+                stale.append(sheet)
+                continue
+            cache_stats.rehashed += 1
+            meta = {**meta, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+            _write(table, target, meta)
+        out[sheet] = _to_frame(table, meta)
+
+    if stale:
+        content_hash = content_hash or _file_hash(source)
+        workbook = pd.ExcelFile(source)
+        for sheet in stale:
+            header = sheets[sheet]
+            df = workbook.parse(sheet, header=header)
+            meta = {
+                "format": FORMAT_VERSION, "source": str(source), "sheet": sheet, "header": header,
+                "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "hash": content_hash,
+                "columns": list(df.columns),
+            }
+            target = _cache_path(source, sheet, header, cache_dir)
+            _write(_to_table(df), target, meta)
+            cache_stats.converted += 1
+            # Read back so a fresh conversion returns what later hits will
+            out[sheet] = _to_frame(*_open(target))
+    return {sheet: out[sheet] for sheet in sheets}
+
+
+def read_sheet(path, sheet: Sheet = 0, header: Optional[int] = 0, cache_dir: Optional[Path] = None) -> pd.DataFrame:
+    """pd.read_excel(path, sheet_name=sheet, header=header), through the cache."""
+    return load_workbook(path, {sheet: header}, cache_dir)[sheet]
+
+
+def clear_cache(cache_dir: Optional[Path] = None) -> int:
+    """Delete every cache file; returns how many there were."""
+    files = list(Path(cache_dir or CACHE_DIR).glob("*.arrow"))
+    for f in files:
+        f.unlink()
+    return len(files)
@@ -4,10 +4,12 @@ from fastapi import APIRouter, HTTPException, Depends
 from fastapi.security import OAuth2PasswordRequestForm
 
 from app.auth.auth_service import (
-    authenticate_user,
+    authenticate_user_async,
     create_access_token,
     get_current_user,
+    token_claims,
 )
+from app.auth.login_pool import LoginPoolBusy
 
 # Create router for auth endpoints
 router = APIRouter()
@@ -16,14 +18,22 @@ router = APIRouter()
 # LOGIN ENDPOINT
 # ---------------------------
 @router.post("/login")
-def login(form_data: OAuth2PasswordRequestForm = Depends()):
-    user = authenticate_user(form_data.username, form_data.password)
+async def login(form_data: OAuth2PasswordRequestForm = Depends()):
+    try:
+        user = await authenticate_user_async(form_data.username, form_data.password)
+    except LoginPoolBusy:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many logins in progress, please retry",
+            headers={"Retry-After": "1"},
+        )
 
     if not user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
+    # role/uid are informational; authorization re-checks the user
     access_token = create_access_token(
-        data={"sub": user.username}
+        data=token_claims(user)
     )
 
     return {
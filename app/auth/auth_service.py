@@ -1,16 +1,24 @@
 # file: app/auth/auth_service.py
 
+import hashlib
+import os
 from datetime import datetime, timedelta
-from typing import Optional
+from itertools import chain
+from typing import NamedTuple, Optional
 
-from fastapi import HTTPException, status
+from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from passlib.context import CryptContext
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session as OrmSession
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.database.database import engine
+from app.database.database import engine, get_async_session
 from app.models.models import User   # make sure this path is correct
+from app.auth.login_pool import LoginPool
+from app.services.cache import MISSING, TTLCache
 
 # -----------------------------
 # JWT CONFIGURATION
@@ -22,7 +30,16 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 60
 # -----------------------------
 # PASSWORD HASHING
 # -----------------------------
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Hashes made with a different cost are upgraded on the next login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
 
 def verify_password(plain_password, hashed):
     return pwd_context.verify(plain_password, hashed)
@@ -49,6 +66,75 @@ def create_access_token(data: dict, expires_delta: Optional[int] = None):
 # -----------------------------
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
+# -----------------------------
+# PRINCIPAL CACHE
+# -----------------------------
+# Authenticated users are cached by token subject for a short TTL, so
+# protected endpoints don't hit the DB on every request. Entries are
+# dropped as soon as a change to a user's role, password or username
+# commits (see the session hooks below).
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+
+principal_cache = TTLCache(
+    "principal",
+    maxsize=PRINCIPAL_CACHE_SIZE,
+    ttl=PRINCIPAL_CACHE_TTL,
+)
+
+
+class CurrentUser(NamedTuple):
+    """What protected endpoints get from get_current_user."""
+    user_id: int
+    username: str
+    role: str
+    password_version: str
+
+
+def password_version(password_hash: str) -> str:
+    """Short fingerprint of the hash; tokens carry it so a password
+    change revokes tokens issued before it."""
+    return hashlib.sha256(password_hash.encode()).hexdigest()[:12]
+
+
+def token_claims(user) -> dict:
+    return {
+        "sub": user.username,
+        "role": user.role,
+        "uid": user.user_id,
+        "pv": password_version(user.password_hash),
+    }
+
+
+def invalidate_user(username: Optional[str] = None):
+    """Forget one cached user, or all of them when username is None."""
+    principal_cache.invalidate(username)
+
+
+async def _load_principal(session: AsyncSession, username: str):
+    # Read before the lookup: a change committed while the row is being
+    # read must not be overwritten by what the read returned
+    generation = principal_cache.generation
+    cached = principal_cache.get(username)
+    if cached is not MISSING:
+        return cached
+
+    result = await session.exec(
+        select(User).where(User.username == username)
+    )
+    user = result.first()
+
+    principal = None
+    if user is not None:
+        principal = CurrentUser(
+            user_id=user.user_id,
+            username=user.username,
+            role=user.role,
+            password_version=password_version(user.password_hash),
+        )
+    principal_cache.set(username, principal, generation)
+    return principal
+
 # -----------------------------
 # VALIDATE USER CREDENTIALS
 # -----------------------------
@@ -61,15 +147,51 @@ def authenticate_user(username: str, password: str):
         if not user:
             return None
 
-        if not verify_password(password, user.password_hash):
+        valid, new_hash = pwd_context.verify_and_update(password, user.password_hash)
+        if not valid:
             return None
 
+        # Cost settings changed since this hash was made: upgrade it.
+        # The password fingerprint changes too, so older tokens of this
+        # user are revoked; the caller issues a fresh one.
+        if new_hash:
+            user.password_hash = new_hash
+            session.add(user)
+            session.commit()
+            session.refresh(user)
+
         return user
 
+# -----------------------------
+# LOGIN WORKER POOL
+# -----------------------------
+# bcrypt is deliberately slow, so logins run in a bounded pool instead of
+# the event loop / shared threadpool. Excess logins get a 503.
+LOGIN_WORKERS = int(os.getenv("LOGIN_WORKERS", str(os.cpu_count() or 2)))
+LOGIN_MAX_PENDING = int(os.getenv("LOGIN_MAX_PENDING", "64"))
+
+login_pool = LoginPool(LOGIN_WORKERS, LOGIN_MAX_PENDING)
+
+
+def configure_login_pool(workers: int, max_pending: int = LOGIN_MAX_PENDING):
+    """Replace the login pool (used by benchmarks and tuning)."""
+    global login_pool
+    old, login_pool = login_pool, LoginPool(workers, max_pending)
+    old.shutdown()
+    return login_pool
+
+
+async def authenticate_user_async(username: str, password: str):
+    """authenticate_user() on the login pool. May raise LoginPoolBusy."""
+    return await login_pool.submit(authenticate_user, username, password)
+
 # -----------------------------
 # GET CURRENT USER
 # -----------------------------
-def get_current_user(token: str = oauth2_scheme):
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    session: AsyncSession = Depends(get_async_session),
+):
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
@@ -77,15 +199,65 @@ def get_current_user(token: str = oauth2_scheme):
         if username is None:
             raise HTTPException(status_code=401, detail="Invalid token")
 
-        with Session(engine) as session:
-            user = session.exec(
-                select(User).where(User.username == username)
-            ).first()
+    except JWTError:
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
 
-            if user is None:
-                raise HTTPException(status_code=401, detail="User not found")
+    user = await _load_principal(session, username)
 
-            return user
+    if user is None:
+        raise HTTPException(status_code=401, detail="User not found")
 
-    except JWTError:
+    # Token issued before the last password change
+    if payload.get("pv", user.password_version) != user.password_version:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
+
+    return user
+
+# -----------------------------
+# CACHE INVALIDATION HOOKS
+# -----------------------------
+_FLAG = "changed_usernames"
+_AUTH_FIELDS = ("username", "role", "password_hash")
+
+
+@event.listens_for(OrmSession, "after_flush")
+def _track_user_changes(session, flush_context):
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if not isinstance(obj, User):
+            continue
+
+        state = inspect(obj)
+        history = [state.attrs[f].history for f in _AUTH_FIELDS]
+        if obj in session.dirty and not any(h.has_changes() for h in history):
+            continue
+
+        # New users too: a cached "not found" must not outlive signup
+        names = session.info.setdefault(_FLAG, set())
+        names.add(obj.username)
+        names.update(history[0].deleted or ())   # old username
+
+
+@event.listens_for(OrmSession, "do_orm_execute")
+def _track_bulk_user_writes(orm_execute_state):
+    state = orm_execute_state
+    if state.is_update or state.is_delete:
+        table = getattr(state.statement, "table", None)
+        if table is not None and table.name == User.__tablename__:
+            state.session.info[_FLAG] = None   # can't tell which: drop all
+
+
+@event.listens_for(OrmSession, "after_commit")
+def _invalidate_users_on_commit(session):
+    if _FLAG not in session.info:
+        return
+    names = session.info.pop(_FLAG)
+    if names is None:
+        invalidate_user()
+    else:
+        for name in names:
+            invalidate_user(name)
+
+
+@event.listens_for(OrmSession, "after_rollback")
+def _forget_users_on_rollback(session):
+    session.info.pop(_FLAG, None)
@@ -0,0 +1,76 @@
+# file: app/auth/login_pool.py
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class LoginPoolBusy(Exception):
+    """Raised when the login queue is full; the caller should retry."""
+
+
+class LoginPool:
+    """
+    Bounded thread pool for bcrypt work.
+
+    At most `workers` hashes run at once and at most `max_pending` logins
+    may be waiting or running; beyond that submit() fails fast with
+    LoginPoolBusy instead of letting the queue (and latency) grow.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="login")
+        self._lock = threading.Lock()
+
+        self.pending = 0        # queued + running
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_total = 0.0   # seconds spent queued, summed
+        self.wait_max = 0.0
+
+    async def submit(self, fn, *args):
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise LoginPoolBusy()
+            self.pending += 1
+
+        enqueued = time.perf_counter()
+
+        def task():
+            waited = time.perf_counter() - enqueued
+            with self._lock:
+                self.running += 1
+                self.wait_total += waited
+                self.wait_max = max(self.wait_max, waited)
+            try:
+                return fn(*args)
+            finally:
+                with self._lock:
+                    self.running -= 1
+                    self.pending -= 1
+                    self.completed += 1
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, task)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "running": self.running,
+                "queued": self.pending - self.running,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "avg_queue_wait_ms": round(self.wait_total / self.completed * 1000, 2)
+                if self.completed else None,
+                "max_queue_wait_ms": round(self.wait_max * 1000, 2),
+            }
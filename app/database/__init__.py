@@ -1,2 +1,2 @@
 # leave empty OR export only DB utilities
-from .database import init_db, get_session, engine
+from .database import init_db, get_session, engine, get_async_session, async_engine
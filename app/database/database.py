@@ -1,7 +1,14 @@
 # app/database/database.py
 
-from sqlmodel import SQLModel, create_engine, Session
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlmodel import create_engine, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 import os
+import threading
+import time
 
 # Read from .env (local) or environment variables (VM)
 DATABASE_URL = os.getenv("DATABASE_URL")
@@ -10,21 +17,214 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     DATABASE_URL = "sqlite:///./local.db"
 
-# SQLite requires special connection arguments
-connect_args = {"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
+# Async driver for the same database: aiosqlite locally, aiomysql on the VM
+def _async_url(url: str) -> str:
+    scheme, rest = url.split("://", 1)
+    if scheme.startswith("sqlite"):
+        return f"sqlite+aiosqlite://{rest}"
+    if scheme.startswith("mysql"):
+        return f"mysql+aiomysql://{rest}"
+    return url
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or _async_url(DATABASE_URL)
+
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
+IS_SQLITE_MEMORY = IS_SQLITE and (":memory:" in DATABASE_URL or DATABASE_URL == "sqlite://")
+
+
+def _env_bool(name: str, default: str) -> bool:
+    return os.getenv(name, default).lower() in ("1", "true", "yes", "on")
+
+
+# -----------------------------
+# ENGINE CONFIGURATION (env vars)
+# -----------------------------
+DB_ECHO = _env_bool("DB_ECHO", "0")                          # log every SQL statement
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))   # seconds to wait for a connection
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))   # below MySQL wait_timeout
+DB_POOL_PRE_PING = _env_bool("DB_POOL_PRE_PING", "1")
+
+# "upgrade": apply pending migrations on startup (fine for a single local
+# process). "check": only verify the schema version; run
+# `python -m app.database.migrations upgrade` as a deploy step instead.
+# Either way a database without schema_version (new, or made before
+# versioning) is upgraded on startup.
+DB_STARTUP_MODE = os.getenv("DB_STARTUP_MODE", "upgrade" if IS_SQLITE else "check")
+
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")  # readers don't block the writer
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")  # safe with WAL, fewer fsyncs
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+
+# -----------------------------
+# POOL METRICS
+# -----------------------------
+class PoolMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record_wait(self, seconds: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+
+    def record_connect(self):
+        with self._lock:
+            self.connects += 1
+
+
+pool_metrics = PoolMetrics()
+async_pool_metrics = PoolMetrics()
+
+
+class _WaitTimingMixin:
+    """Records how long callers wait for a pooled connection."""
+    metrics: PoolMetrics
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeout:
+            self.metrics.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        self.metrics.record_wait(time.perf_counter() - start)
+        return conn
+
+
+class InstrumentedQueuePool(_WaitTimingMixin, QueuePool):
+    metrics = pool_metrics
+
+
+class InstrumentedAsyncQueuePool(_WaitTimingMixin, AsyncAdaptedQueuePool):
+    metrics = async_pool_metrics
+
+
+# -----------------------------
+# ENGINE
+# -----------------------------
+engine_kwargs = {"echo": DB_ECHO}
+
+if IS_SQLITE:
+    # SQLite requires special connection arguments
+    engine_kwargs["connect_args"] = {"check_same_thread": False}
+
+pool_kwargs = {}
+if not IS_SQLITE_MEMORY:
+    pool_kwargs = dict(
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+    )
 
 # Create engine
 engine = create_engine(
     DATABASE_URL,
-    echo=True,           # Show SQL logs for debugging
-    connect_args=connect_args
+    **engine_kwargs,
+    **pool_kwargs,
+    **({"poolclass": InstrumentedQueuePool} if pool_kwargs else {}),
+)
+
+# Async engine (same database) for the hot read endpoints
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    **engine_kwargs,
+    **pool_kwargs,
+    **({"poolclass": InstrumentedAsyncQueuePool} if pool_kwargs else {}),
 )
 
+
+@event.listens_for(engine, "connect")
+def _on_connect(dbapi_connection, connection_record):
+    pool_metrics.record_connect()
+    _apply_pragmas(dbapi_connection)
+
+
+@event.listens_for(async_engine.sync_engine, "connect")
+def _on_async_connect(dbapi_connection, connection_record):
+    async_pool_metrics.record_connect()
+    _apply_pragmas(dbapi_connection)
+
+
+def _apply_pragmas(dbapi_connection):
+    if IS_SQLITE:
+        cursor = dbapi_connection.cursor()
+        if not IS_SQLITE_MEMORY:
+            cursor.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.close()
+
+
+def pool_stats(pool=None, metrics=None):
+    """Live pool state plus checkout/wait counters since startup."""
+    pool = pool or engine.pool
+    metrics = metrics or pool_metrics
+    stats = {
+        "pool": type(pool).__name__,
+        "status": pool.status(),
+        "connects": metrics.connects,
+        "checkouts": metrics.checkouts,
+        "timeouts": metrics.timeouts,
+        "avg_wait_ms": round(metrics.wait_total / metrics.checkouts * 1000, 3)
+        if metrics.checkouts else None,
+        "max_wait_ms": round(metrics.wait_max * 1000, 3),
+    }
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+        )
+    return stats
+
+
+def async_pool_stats():
+    return pool_stats(async_engine.pool, async_pool_metrics)
+
+
 def init_db():
-    """Create tables based on SQLModel metadata."""
-    SQLModel.metadata.create_all(engine)
+    """Migrate or check the schema on startup, depending on DB_STARTUP_MODE."""
+    from app.database import migrations
+
+    if DB_STARTUP_MODE == "check":
+        with engine.connect() as conn:
+            versioned = migrations.current_version(conn) is not None
+        if versioned:
+            migrations.check_schema(engine)
+            return
+    migrations.upgrade(engine)
+
 
 def get_session():
     """Provide a database session via dependency injection."""
     with Session(engine) as session:
         yield session
+
+
+async def get_async_session():
+    """Provide an AsyncSession via dependency injection (hot read paths)."""
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
+
+
+# Session hooks that keep derived tables (the coverage snapshot, the
+# compliance re-check queue, the report cube) in step with their sources. Every process
+# that writes through a Session needs them, so they are registered with
+# the engine rather than by a router.
+import app.services.coverage_snapshot  # noqa: E402,F401
+import app.services.compliance_service  # noqa: E402,F401
+import app.services.coverage_report  # noqa: E402,F401
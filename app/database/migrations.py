@@ -0,0 +1,422 @@
+# file: app/database/migrations.py
+"""
+Versioned schema migrations.
+
+The database records the migrations it has run in `schema_version`.
+Startup only reads that table (see DB_STARTUP_MODE in database.py)
+instead of reflecting every table, so boot time does not grow with the
+schema.
+
+    python -m app.database.migrations upgrade        # apply pending migrations
+    python -m app.database.migrations current        # version of the database
+    python -m app.database.migrations history        # all known migrations
+    python -m app.database.migrations sync-indexes   # retry skipped unique indexes
+    python -m app.database.migrations schema mysql   # DDL of the current models
+
+A new database is created straight from the models and stamped with the
+latest version. Older databases without `schema_version` (made by
+create_all) start from migration 1, which creates the tables as they
+were when versioning started (BASE_SCHEMA, frozen: it never follows the
+models). Migrations must be safe to run on such a database, so each
+step checks before it adds anything.
+
+To change the schema: edit the model, then append a @migration with the
+next version number that makes the same change to existing databases.
+"""
+import argparse
+import logging
+from datetime import datetime, timezone
+from typing import Callable, List, NamedTuple, Optional
+
+from sqlalchemy import (
+    Column, DateTime, Float, ForeignKey, Integer, MetaData, String, Table, Text,
+    func, inspect, select,
+)
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.schema import CreateIndex, CreateTable
+from sqlmodel import SQLModel
+
+logger = logging.getLogger(__name__)
+
+# Kept out of SQLModel.metadata so create_all()/drop_all() leave it alone
+schema_version = Table(
+    "schema_version",
+    MetaData(),
+    Column("version", Integer, primary_key=True, autoincrement=False),
+    Column("name", String(200), nullable=False),
+    Column("applied_at", DateTime(timezone=True), nullable=False),
+)
+
+
+class SchemaVersionError(RuntimeError):
+    """The database schema does not match the version the code expects."""
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    apply: Callable[[Connection], None]
+
+
+MIGRATIONS: List[Migration] = []
+
+
+def migration(version: int, name: str):
+    def register(fn):
+        MIGRATIONS.append(Migration(version, name, fn))
+        return fn
+    return register
+
+
+# ---------------------------
+# Helpers for migration steps
+# ---------------------------
+
+def _quote(conn: Connection, name: str) -> str:
+    return conn.dialect.identifier_preparer.quote(name)
+
+
+def _add_column(conn: Connection, table: str, column: str, ddl: str):
+    """ALTER TABLE ... ADD COLUMN unless the column is already there."""
+    existing = {c["name"] for c in inspect(conn).get_columns(table)}
+    if column in existing:
+        return
+    conn.exec_driver_sql(
+        f"ALTER TABLE {_quote(conn, table)} ADD COLUMN {_quote(conn, column)} {ddl}"
+    )
+
+
+def _existing_index_names(inspector, table_name: str):
+    names = {ix["name"] for ix in inspector.get_indexes(table_name)}
+    # MySQL reports UNIQUE constraints as indexes, SQLite separately
+    names.update(uc["name"] for uc in inspector.get_unique_constraints(table_name))
+    return names
+
+
+def _duplicate_count(conn: Connection, index) -> int:
+    """Number of value combinations that occur more than once."""
+    columns = list(index.columns)
+    dupes = (
+        select(*columns)
+        .where(*[c.isnot(None) for c in columns])
+        .group_by(*columns)
+        .having(func.count() > 1)
+        .subquery()
+    )
+    return conn.execute(select(func.count()).select_from(dupes)).scalar_one()
+
+
+def _sync_indexes(conn: Connection, metadata=SQLModel.metadata, only=None):
+    report = {}
+    inspector = inspect(conn)
+    tables = set(inspector.get_table_names())
+
+    for table in metadata.sorted_tables:
+        if table.name not in tables:
+            continue
+        existing = _existing_index_names(inspector, table.name)
+
+        for index in sorted(table.indexes, key=lambda ix: ix.name):
+            if only is not None and index.name not in only:
+                continue
+            if index.name in existing:
+                report[index.name] = "exists"
+                continue
+
+            if index.unique:
+                dupes = _duplicate_count(conn, index)
+                if dupes:
+                    report[index.name] = f"skipped: {dupes} duplicate values"
+                    logger.warning(
+                        "Not creating unique index %s: %d duplicate values in %s",
+                        index.name, dupes, table.name,
+                    )
+                    continue
+
+            index.create(conn)
+            report[index.name] = "created"
+            logger.info("Created index %s on %s", index.name, table.name)
+
+    return report
+
+
+def sync_indexes(engine: Engine, metadata=SQLModel.metadata):
+    """
+    Create every index declared in `metadata` that the database lacks.
+    A unique index is skipped while its columns hold duplicates; clean
+    them up and run this again.
+    Returns {index_name: "created" | "exists" | "skipped: ..."}.
+    """
+    with engine.begin() as conn:
+        return _sync_indexes(conn, metadata)
+
+
+# ---------------------------
+# Base schema (version 1)
+# ---------------------------
+# The tables when versioning started, without the indexes of migration 2.
+# Frozen: change the schema with a new migration, never here.
+
+BASE_SCHEMA = MetaData()
+
+Table(
+    "user", BASE_SCHEMA,
+    Column("user_id", Integer, primary_key=True),
+    Column("username", String(255), nullable=False),
+    Column("password_hash", String(255), nullable=False),
+    Column("role", String(255), nullable=False),
+)
+Table(
+    "employee", BASE_SCHEMA,
+    Column("employee_id", Integer, primary_key=True),
+    Column("user_id", Integer, ForeignKey("user.user_id"), nullable=False),
+    Column("employee_code", String(255), nullable=False),
+    Column("name", String(255)),
+    Column("department", String(255)),
+    Column("age", Integer),
+    Column("gender", String(255)),
+)
+Table(
+    "policycategory", BASE_SCHEMA,
+    Column("category_id", Integer, primary_key=True),
+    Column("category_name", String(255), nullable=False),
+)
+Table(
+    "plan", BASE_SCHEMA,
+    Column("plan_id", Integer, primary_key=True),
+    Column("plan_name", String(255), nullable=False),
+    Column("insurer_id", Integer, ForeignKey("user.user_id")),
+)
+Table(
+    "plantier", BASE_SCHEMA,
+    Column("tier_id", Integer, primary_key=True),
+    Column("plan_id", Integer, ForeignKey("plan.plan_id"), nullable=False),
+    Column("category_id", Integer, ForeignKey("policycategory.category_id"), nullable=False),
+    Column("sum_insured", Float),
+)
+Table(
+    "biddinground", BASE_SCHEMA,
+    Column("round_id", Integer, primary_key=True),
+    Column("round_name", String(255), nullable=False),
+    Column("start_date", String(255)),
+    Column("end_date", String(255)),
+)
+Table(
+    "bid", BASE_SCHEMA,
+    Column("bid_id", Integer, primary_key=True),
+    Column("round_id", Integer, ForeignKey("biddinground.round_id"), nullable=False),
+    Column("insurer_id", Integer, ForeignKey("user.user_id"), nullable=False),
+    Column("category_id", Integer, ForeignKey("policycategory.category_id"), nullable=False),
+    Column("premium", Float, nullable=False),
+)
+Table(
+    "employeeplan", BASE_SCHEMA,
+    Column("employee_id", Integer, ForeignKey("employee.employee_id"), primary_key=True),
+    Column("plan_id", Integer, ForeignKey("plan.plan_id"), primary_key=True),
+)
+Table(
+    "importjob", BASE_SCHEMA,
+    Column("job_id", Integer, primary_key=True),
+    Column("filename", String(255), nullable=False),
+    Column("file_path", String(255), nullable=False),
+    Column("chunk_size", Integer, nullable=False),
+    Column("status", String(255), nullable=False),
+    Column("rows_processed", Integer, nullable=False),
+    Column("employees_created", Integer, nullable=False),
+    Column("plan_links_created", Integer, nullable=False),
+    Column("error_count", Integer, nullable=False),
+    Column("errors", Text),
+    Column("created_at", DateTime, nullable=False),
+    Column("started_at", DateTime),
+    Column("finished_at", DateTime),
+)
+
+
+# ---------------------------
+# Migrations
+# ---------------------------
+
+@migration(1, "base tables")
+def _base_tables(conn: Connection):
+    # Databases made by create_all() before versioning may lack tables
+    # added later (e.g. importjob); create only what is missing.
+    BASE_SCHEMA.create_all(conn, checkfirst=True)
+
+
+@migration(2, "indexes on hot lookup columns")
+def _hot_lookup_indexes(conn: Connection):
+    _sync_indexes(conn, only={
+        "ix_user_username",
+        "ix_employee_user_id",
+        "ix_employee_employee_code",
+        "ix_employee_department_id",
+        "ix_employeeplan_plan_id",
+        "ix_plan_insurer_id",
+        "ix_policycategory_category_name",
+        "uq_plantier_plan_category",
+        "ix_plantier_category_id",
+        "uq_bid_round_insurer_category",
+        "ix_bid_insurer_id",
+        "ix_bid_category_id",
+    })
+
+
+@migration(3, "employee.active")
+def _employee_active(conn: Connection):
+    _add_column(conn, "employee", "active", "BOOLEAN NOT NULL DEFAULT 1")
+
+
+@migration(4, "employee coverage snapshot")
+def _coverage_snapshot(conn: Connection):
+    from app.models import EmployeeCoverageSnapshot
+    from app.services.coverage_snapshot import rebuild
+
+    EmployeeCoverageSnapshot.__table__.create(conn, checkfirst=True)
+    rebuild(conn)
+
+
+@migration(5, "employee.pass_type and compliance engine tables")
+def _compliance(conn: Connection):
+    from app.models import ComplianceDirty, ComplianceRule, ComplianceRun, ComplianceViolation
+    from app.services.compliance_service import add_default_rules
+
+    _add_column(conn, "employee", "pass_type", "VARCHAR(20)")
+    for model in (ComplianceRule, ComplianceViolation, ComplianceDirty, ComplianceRun):
+        model.__table__.create(conn, checkfirst=True)
+    add_default_rules(conn)
+
+
+@migration(6, "department in coverage snapshot, coverage report cube")
+def _coverage_cube(conn: Connection):
+    from app.models import CoverageCube
+    from app.services import coverage_report, coverage_snapshot
+
+    _add_column(conn, "employeecoveragesnapshot", "department", "VARCHAR(255)")
+    coverage_snapshot.rebuild(conn)
+    CoverageCube.__table__.create(conn, checkfirst=True)
+    coverage_report.rebuild(conn)
+
+
+@migration(7, "bid.version and bid idempotency keys")
+def _bid_versions(conn: Connection):
+    from app.models import BidSubmission
+
+    _add_column(conn, "bid", "version", "INTEGER NOT NULL DEFAULT 1")
+    BidSubmission.__table__.create(conn, checkfirst=True)
+
+
+# ---------------------------
+# Runner
+# ---------------------------
+
+def head() -> int:
+    return max(m.version for m in MIGRATIONS)
+
+
+def current_version(conn: Connection) -> Optional[int]:
+    """Latest applied version, or None for an unversioned database."""
+    if not inspect(conn).has_table(schema_version.name):
+        return None
+    return conn.execute(select(func.max(schema_version.c.version))).scalar()
+
+
+def _stamp(conn: Connection, m: Migration):
+    conn.execute(schema_version.insert().values(
+        version=m.version, name=m.name, applied_at=datetime.now(timezone.utc),
+    ))
+
+
+def upgrade(engine: Engine, target: Optional[int] = None) -> List[Migration]:
+    """Apply pending migrations up to `target` (default: latest). Returns them."""
+    target = head() if target is None else target
+
+    with engine.begin() as conn:
+        version = current_version(conn)
+        fresh = version is None and not inspect(conn).get_table_names()
+        schema_version.create(conn, checkfirst=True)
+
+        if fresh and target == head():
+            # Nothing to migrate: build the current schema directly
+            SQLModel.metadata.create_all(conn)
+            for m in MIGRATIONS:
+                _stamp(conn, m)
+            logger.info("Created schema at version %d", target)
+            return list(MIGRATIONS)
+
+    pending = [m for m in MIGRATIONS if (version or 0) < m.version <= target]
+    for m in pending:
+        # One transaction per step (MySQL commits DDL implicitly anyway)
+        with engine.begin() as conn:
+            logger.info("Applying migration %d: %s", m.version, m.name)
+            m.apply(conn)
+            _stamp(conn, m)
+    return pending
+
+
+def check_schema(engine: Engine) -> int:
+    """Raise SchemaVersionError unless the database is at the latest version."""
+    with engine.connect() as conn:
+        version = current_version(conn)
+    if version != head():
+        raise SchemaVersionError(
+            f"Database schema is at version {version}, this code expects {head()}. "
+            "Run: python -m app.database.migrations upgrade"
+        )
+    return version
+
+
+def schema_ddl(dialect_name: str) -> str:
+    """CREATE statements for the current models plus schema_version."""
+    from sqlalchemy.dialects import registry
+
+    dialect = registry.load(dialect_name)()
+    statements = []
+    for table in [*SQLModel.metadata.sorted_tables, schema_version]:
+        statements.append(str(CreateTable(table).compile(dialect=dialect)).strip())
+        for index in sorted(table.indexes, key=lambda ix: ix.name):
+            statements.append(str(CreateIndex(index).compile(dialect=dialect)).strip())
+    return ";\n\n".join(statements) + ";\n"
+
+
+# ---------------------------
+# CLI
+# ---------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.database.migrations")
+    commands = parser.add_subparsers(dest="command", required=True)
+    up = commands.add_parser("upgrade", help="apply pending migrations")
+    up.add_argument("--to", type=int, help="stop at this version")
+    commands.add_parser("current", help="show the database version")
+    commands.add_parser("history", help="list migrations")
+    commands.add_parser("sync-indexes", help="create missing declared indexes")
+    ddl = commands.add_parser("schema", help="print DDL for the current models")
+    ddl.add_argument("dialect", nargs="?", default="mysql")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    import app.models  # noqa: F401  (register all tables)
+
+    if args.command == "schema":
+        print(schema_ddl(args.dialect), end="")
+        return
+
+    from app.database.database import DATABASE_URL, engine
+
+    if args.command == "upgrade":
+        applied = upgrade(engine, args.to)
+        print(f"{DATABASE_URL}: applied {len(applied)} migration(s)")
+    elif args.command == "current":
+        with engine.connect() as conn:
+            version = current_version(conn)
+        print(f"{DATABASE_URL}: version {version} (latest {head()})")
+    elif args.command == "history":
+        for m in MIGRATIONS:
+            print(f"{m.version:>4}  {m.name}")
+    elif args.command == "sync-indexes":
+        for name, status in sync_indexes(engine).items():
+            print(f"  {name:40} {status}")
+
+
+if __name__ == "__main__":
+    main()
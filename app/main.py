@@ -2,11 +2,16 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.database.database import init_db
 from app.routers import importer
+from app.services.import_job_service import resume_jobs, shutdown_workers
+from app.auth import auth_service
+from app.services.etags import ETagMiddleware
+from app.services.analytics_service import render_pool
+from app.services.compliance_service import compliance_scheduler
 
 
 # Routers
 from app.auth.auth import router as auth_router
-from app.routers import employee, admin, insurer, bidding, coverage, test_auth
+from app.routers import employee, admin, insurer, bidding, coverage, analytics, simulation, test_auth
 
 
 app = FastAPI(
@@ -23,13 +28,27 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
+# ETag / Cache-Control headers and 304 metrics (see services/etags.py)
+app.add_middleware(ETagMiddleware)
+
 
 # Initialize DB on startup
 @app.on_event("startup")
 def on_startup():
     init_db()
+    resume_jobs()
+    compliance_scheduler.start()
+
+
+@app.on_event("shutdown")
+def on_shutdown():
+    shutdown_workers()
+    compliance_scheduler.shutdown()
+    auth_service.login_pool.shutdown()
+    render_pool.shutdown()
 
 
 # Routers
@@ -39,6 +58,8 @@ app.include_router(admin.router, prefix="/admin", tags=["Admin"])
 app.include_router(insurer.router, prefix="/insurer", tags=["Insurer"])
 app.include_router(bidding.router, prefix="/bidding", tags=["Bidding"])
 app.include_router(coverage.router, prefix="/coverage", tags=["Coverage"])
+app.include_router(analytics.router, prefix="/analytics", tags=["Analytics"])
+app.include_router(simulation.router, prefix="/simulation", tags=["Simulation"])
 app.include_router(auth_router, prefix="/auth", tags=["Auth"])
 app.include_router(importer.router)
 
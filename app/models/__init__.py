@@ -1,2 +1,11 @@
-from .models import User, Employee, PolicyCategory, Plan, PlanTier, BiddingRound, Bid
+from .models import (
+    User, Employee, PolicyCategory, Plan, PlanTier, BiddingRound, Bid,
+    EmployeeRead, BidItem, BidRead,
+    AgeBandChange, PremiumChange, Scenario, ScenarioGrid, SimulationRequest,
+)
 from app.models.employee_plan import EmployeePlan
+from app.models.import_job import ImportJob
+from app.models.coverage_snapshot import EmployeeCoverageSnapshot
+from app.models.compliance import ComplianceRule, ComplianceViolation, ComplianceDirty, ComplianceRun
+from app.models.coverage_cube import CoverageCube
+from app.models.bid_submission import BidSubmission
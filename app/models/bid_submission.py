@@ -0,0 +1,25 @@
+# file: app/models/bid_submission.py
+
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import Column, Index, Text
+from sqlmodel import SQLModel, Field
+
+
+class BidSubmission(SQLModel, table=True):
+    """
+    Idempotency record: the response to an insurer's bid request sent
+    with an Idempotency-Key, replayed when the same key is sent again.
+    request_hash: a key reused for a different request is rejected.
+    """
+    __table_args__ = (
+        Index("uq_bidsubmission_insurer_key", "insurer_id", "idempotency_key", unique=True),
+    )
+
+    submission_id: Optional[int] = Field(default=None, primary_key=True)
+    insurer_id: int = Field(foreign_key="user.user_id")
+    idempotency_key: str = Field(max_length=100)
+    request_hash: str = Field(max_length=64)
+    response: str = Field(sa_column=Column(Text, nullable=False))  # JSON
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
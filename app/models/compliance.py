@@ -0,0 +1,59 @@
+# file: app/models/compliance.py
+
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import Index
+from sqlmodel import SQLModel, Field
+
+
+class ComplianceRule(SQLModel, table=True):
+    """
+    Minimum sum insured an employee with `pass_type` must hold in
+    `category_id` (best tier across all their plans).
+    e.g. WP / FWMI / 60000
+    """
+    __table_args__ = (
+        Index("uq_compliancerule_pass_category", "pass_type", "category_id", unique=True),
+    )
+
+    rule_id: Optional[int] = Field(default=None, primary_key=True)
+    pass_type: str
+    category_id: int = Field(foreign_key="policycategory.category_id")
+    min_sum_insured: float
+
+
+class ComplianceViolation(SQLModel, table=True):
+    """
+    Latest result of the compliance engine: one row per employee per
+    rule they fail. coverage is NULL when they have no tier at all.
+    """
+    employee_id: int = Field(primary_key=True)
+    rule_id: int = Field(primary_key=True)
+    pass_type: str
+    category_id: int = Field(index=True)
+    coverage: Optional[float] = None
+    min_sum_insured: float
+
+
+class ComplianceDirty(SQLModel, table=True):
+    """Employees to re-check on the next incremental run."""
+    employee_id: int = Field(primary_key=True)
+    marked_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+class ComplianceRun(SQLModel, table=True):
+    """
+    mode: "full" or "incremental"; status: "running", "completed", "failed"
+    max_employee_id: employees above it are new to the next run.
+    rules_hash: a different hash forces the next run to be full.
+    """
+    run_id: Optional[int] = Field(default=None, primary_key=True)
+    mode: str
+    status: str = "running"
+    employees_checked: int = 0
+    violations: int = 0
+    max_employee_id: int = 0
+    rules_hash: str = ""
+    started_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    finished_at: Optional[datetime] = None
@@ -0,0 +1,43 @@
+# file: app/models/coverage_cube.py
+
+from typing import Optional
+
+from sqlalchemy import Index
+from sqlmodel import SQLModel, Field
+
+
+class CoverageCube(SQLModel, table=True):
+    """
+    Pre-aggregated coverage report: headcount and total sum insured for
+    every combination of category, department, insurer and plan.
+
+    `cuboid` names the dimensions a row is grouped by, comma separated
+    and sorted (e.g. "category,department"; "" is the grand total).
+    Dimensions outside the cuboid are NULL; inside it a missing
+    department is stored as "" and a plan without insurer as 0.
+    `cell` is the cuboid and its values in one string, the key the
+    incremental refresh upserts cells on.
+
+    Derived data only. It is kept up to date by
+    app/services/coverage_report.py and can be rebuilt at any time.
+    """
+    __table_args__ = (
+        Index("uq_coveragecube_cell_key", "cell", unique=True),
+        Index(
+            "ix_coveragecube_slice",
+            "cuboid", "category_id", "department", "insurer_id", "plan_id",
+        ),
+    )
+
+    cube_id: Optional[int] = Field(default=None, primary_key=True)
+    cell: str = Field(max_length=400)
+    cuboid: str = Field(max_length=50)
+
+    category_id: Optional[int] = None
+    department: Optional[str] = None
+    insurer_id: Optional[int] = None
+    plan_id: Optional[int] = None
+
+    # distinct employees covered in the cell
+    headcount: int = 0
+    total_sum_insured: float = 0
@@ -0,0 +1,42 @@
+# file: app/models/coverage_snapshot.py
+
+from typing import Optional
+
+from sqlalchemy import Index
+from sqlmodel import SQLModel, Field
+
+
+class EmployeeCoverageSnapshot(SQLModel, table=True):
+    """
+    Read model behind the self-service coverage endpoints: the
+    Employee -> EmployeePlan -> Plan -> PlanTier -> PolicyCategory walk,
+    flattened to one row per employee per category of each assigned plan
+    (category columns are NULL for a plan without tiers).
+
+    Derived data only. It is kept up to date by
+    app/services/coverage_snapshot.py and can be rebuilt at any time.
+    """
+    __table_args__ = (
+        # username -> user_id -> this range, in response order
+        Index("ix_coveragesnapshot_user", "user_id", "employee_id", "plan_id", "tier_id"),
+        Index("ix_coveragesnapshot_employee", "employee_id"),
+        Index("ix_coveragesnapshot_plan", "plan_id"),
+        Index("ix_coveragesnapshot_category", "category_id"),
+    )
+
+    snapshot_id: Optional[int] = Field(default=None, primary_key=True)
+
+    employee_id: int
+    user_id: int
+    employee_name: Optional[str] = None
+    employee_code: str
+    department: Optional[str] = None
+
+    plan_id: int
+    plan_name: str
+    insurer_id: Optional[int] = None
+
+    tier_id: Optional[int] = None
+    category_id: Optional[int] = None
+    category_name: Optional[str] = None
+    sum_insured: Optional[float] = None
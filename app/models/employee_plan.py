@@ -14,5 +14,6 @@ class EmployeePlan(SQLModel, table=True):
     )
     plan_id: int = Field(
         foreign_key="plan.plan_id",
-        primary_key=True
+        primary_key=True,
+        index=True,     # plan -> employees (the PK only covers employee_id first)
     )
@@ -0,0 +1,29 @@
+# file: app/models/import_job.py
+
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import Column, Text
+from sqlmodel import SQLModel, Field
+
+
+class ImportJob(SQLModel, table=True):
+    """
+    Background employee import.
+    status: "queued", "running", "completed", "failed", "cancelled"
+    """
+    job_id: Optional[int] = Field(default=None, primary_key=True)
+    filename: str
+    file_path: str      # spooled upload, removed when the job finishes
+    chunk_size: int
+
+    status: str = "queued"
+    rows_processed: int = 0
+    employees_created: int = 0
+    plan_links_created: int = 0
+    error_count: int = 0
+    errors: Optional[str] = Field(default=None, sa_column=Column(Text))  # JSON list
+
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
@@ -1,6 +1,7 @@
 # file: app/models/models.py
 
-from typing import Optional, List
+from typing import Dict, List, Optional
+from sqlalchemy import Index, text
 from sqlmodel import SQLModel, Field, Relationship
 
 from app.models.employee_plan import EmployeePlan
@@ -11,7 +12,7 @@ from app.models.employee_plan import EmployeePlan
 # =========================
 class User(SQLModel, table=True):
     user_id: Optional[int] = Field(default=None, primary_key=True)
-    username: str
+    username: str = Field(unique=True, index=True)
     password_hash: str
     role: str  # "employee", "admin", "insurer"
 
@@ -30,14 +31,21 @@ class Employee(SQLModel, table=True):
       - a User (login)
       - many Plans via EmployeePlan link table
     """
+    __table_args__ = (
+        # department filter + keyset paging on employee_id
+        Index("ix_employee_department_id", "department", "employee_id"),
+    )
+
     employee_id: Optional[int] = Field(default=None, primary_key=True)
-    user_id: int = Field(foreign_key="user.user_id")
+    user_id: int = Field(foreign_key="user.user_id", index=True)
 
-    employee_code: str
+    employee_code: str = Field(unique=True, index=True)
     name: Optional[str] = None
     department: Optional[str] = None
     age: Optional[int] = None
     gender: Optional[str] = None
+    pass_type: Optional[str] = None   # "WP", "S-Pass", "EP"; None for locals
+    active: bool = Field(default=True, sa_column_kwargs={"server_default": text("1")})
 
     # Relationships
     user: Optional[User] = Relationship(back_populates="employee")
@@ -55,7 +63,7 @@ class Employee(SQLModel, table=True):
 # =========================
 class PolicyCategory(SQLModel, table=True):
     category_id: Optional[int] = Field(default=None, primary_key=True)
-    category_name: str
+    category_name: str = Field(unique=True, index=True)
 
     plan_tiers: List["PlanTier"] = Relationship(back_populates="category")
     bids: List["Bid"] = Relationship(back_populates="category")
@@ -67,7 +75,7 @@ class PolicyCategory(SQLModel, table=True):
 class Plan(SQLModel, table=True):
     plan_id: Optional[int] = Field(default=None, primary_key=True)
     plan_name: str
-    insurer_id: Optional[int] = Field(default=None, foreign_key="user.user_id")
+    insurer_id: Optional[int] = Field(default=None, foreign_key="user.user_id", index=True)
 
     insurer: Optional[User] = Relationship(back_populates="insurer_plans")
     plan_tiers: List["PlanTier"] = Relationship(back_populates="plan")
@@ -83,9 +91,14 @@ class Plan(SQLModel, table=True):
 #  PLAN TIER
 # =========================
 class PlanTier(SQLModel, table=True):
+    # One sum insured per category per plan; also serves plan_id lookups
+    __table_args__ = (
+        Index("uq_plantier_plan_category", "plan_id", "category_id", unique=True),
+    )
+
     tier_id: Optional[int] = Field(default=None, primary_key=True)
     plan_id: int = Field(foreign_key="plan.plan_id")
-    category_id: int = Field(foreign_key="policycategory.category_id")
+    category_id: int = Field(foreign_key="policycategory.category_id", index=True)
     sum_insured: Optional[float] = None
 
     plan: Plan = Relationship(back_populates="plan_tiers")
@@ -108,11 +121,18 @@ class BiddingRound(SQLModel, table=True):
 #  BID
 # =========================
 class Bid(SQLModel, table=True):
+    # One bid per insurer per category per round; also serves round_id lookups
+    __table_args__ = (
+        Index("uq_bid_round_insurer_category", "round_id", "insurer_id", "category_id", unique=True),
+    )
+
     bid_id: Optional[int] = Field(default=None, primary_key=True)
     round_id: int = Field(foreign_key="biddinground.round_id")
-    insurer_id: int = Field(foreign_key="user.user_id")
-    category_id: int = Field(foreign_key="policycategory.category_id")
+    insurer_id: int = Field(foreign_key="user.user_id", index=True)
+    category_id: int = Field(foreign_key="policycategory.category_id", index=True)
     premium: float
+    # +1 on every revision; updates compare-and-swap on it
+    version: int = Field(default=1, sa_column_kwargs={"server_default": text("1")})
 
     round: BiddingRound = Relationship(back_populates="bids")
     insurer: User = Relationship(back_populates="bids")
@@ -131,6 +151,7 @@ class EmployeeCreate(SQLModel):
     department: Optional[str] = None
     age: Optional[int] = None
     gender: Optional[str] = None
+    pass_type: Optional[str] = None
     user_id: int
     plan_ids: List[int] = []   # list of plan IDs (many-to-many)
 
@@ -144,4 +165,99 @@ class EmployeeUpdate(SQLModel):
     department: Optional[str] = None
     age: Optional[int] = None
     gender: Optional[str] = None
+    pass_type: Optional[str] = None
     plan_ids: Optional[List[int]] = None
+
+
+class EmployeeRead(SQLModel):
+    """
+    What the API returns for an Employee: columns only, no relationships.
+    """
+    employee_id: int
+    user_id: int
+    employee_code: str
+    name: Optional[str] = None
+    department: Optional[str] = None
+    age: Optional[int] = None
+    gender: Optional[str] = None
+    pass_type: Optional[str] = None
+    active: bool = True
+
+
+# =========================
+#  BID SCHEMAS (for API)
+# =========================
+class BidRead(SQLModel):
+    """
+    What the API returns for a Bid: columns only, no relationships.
+    """
+    bid_id: int
+    round_id: int
+    insurer_id: int
+    category_id: int
+    premium: float
+    version: int
+
+
+class BidItem(SQLModel):
+    """
+    One category of a bulk submission. `version` is the version of the
+    existing bid being revised (required then); leave it out for a new
+    bid.
+    """
+    category_id: int
+    premium: float
+    version: Optional[int] = None
+
+
+# =========================
+#  SIMULATION SCHEMAS (for API)
+# =========================
+class PremiumChange(SQLModel):
+    """
+    Bid premiums changed by `pct` percent (+5 = 5% dearer). Leave out
+    category / insurer_id to apply to every category / insurer.
+    """
+    pct: float
+    category: Optional[str] = None
+    insurer_id: Optional[int] = None
+
+
+class AgeBandChange(SQLModel):
+    """
+    Premiums of the employees in an age band (e.g. "50-59", see
+    simulation_service.AGE_BANDS) changed by `pct` percent.
+    """
+    band: str
+    pct: float
+    category: Optional[str] = None
+
+
+class Scenario(SQLModel):
+    """
+    One renewal scenario. `carriers` moves every employee covered in a
+    category to one insurer ({"GHS": 3}); categories not listed stay
+    with their current insurers. Changes compound.
+    """
+    name: Optional[str] = None
+    carriers: Dict[str, int] = {}
+    premium_changes: List[PremiumChange] = []
+    age_changes: List[AgeBandChange] = []
+
+
+class ScenarioGrid(SQLModel):
+    """
+    Every combination of the listed carrier options, e.g.
+    {"GHS": [null, 2, 3], "GTL": [null, 2]} gives 6 scenarios (null
+    keeps the current insurers). The changes apply to each of them.
+    """
+    carriers: Dict[str, List[Optional[int]]]
+    premium_changes: List[PremiumChange] = []
+    age_changes: List[AgeBandChange] = []
+
+
+class SimulationRequest(SQLModel):
+    scenarios: List[Scenario] = []
+    grid: Optional[ScenarioGrid] = None
+    by_department: bool = False
+    top: Optional[int] = Field(default=None, ge=1)   # only the N cheapest scenarios
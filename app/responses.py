@@ -0,0 +1,47 @@
+# file: app/responses.py
+"""
+JSON rendered with orjson for the list endpoints.
+
+Whatever an endpoint returns goes through jsonable_encoder (or
+response_model validation) and then json.dumps; for a 10k-row list that
+is most of the request's CPU time. Hot endpoints build plain dicts from
+column-only selects and return them in a FastJSONResponse, which skips
+both steps.
+
+Deliberately not the app's default_response_class: endpoints with a
+response_model already serialize through pydantic-core, and a custom
+default class turns that path off.
+"""
+from decimal import Decimal
+from itertools import islice
+from typing import Iterable, Iterator
+
+import orjson
+from fastapi.responses import JSONResponse
+
+# Lines per chunk of an NDJSON stream; one send per row dominates otherwise
+NDJSON_CHUNK_ROWS = 500
+
+
+def _default(value):
+    # MySQL returns DECIMAL for some aggregates
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content, newline: bool = False) -> bytes:
+    option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_APPEND_NEWLINE if newline else 0)
+    return orjson.dumps(content, default=_default, option=option)
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+def ndjson_lines(rows: Iterable[dict], chunk_rows: int = NDJSON_CHUNK_ROWS) -> Iterator[bytes]:
+    """One JSON object per line, for StreamingResponse, sent in chunks of lines."""
+    rows = iter(rows)
+    while chunk := list(islice(rows, chunk_rows)):
+        yield b"".join(dumps(row, newline=True) for row in chunk)
@@ -1,7 +1,13 @@
 # file: api/routers/admin.py
 
-from fastapi import APIRouter, Depends
-from app.auth.auth_service import get_current_user
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from app.auth import auth_service
+from app.database.database import pool_stats, async_pool_stats
+from app.responses import FastJSONResponse, ndjson_lines
+from app.auth.auth_service import get_current_user, principal_cache
 from app.services.admin_service import (
     create_employee,
     update_employee,
@@ -9,6 +15,20 @@ from app.services.admin_service import (
     get_fwmi_non_compliant,
     generate_coverage_report
 )
+from app.services.compliance_service import (
+    compliance_scheduler,
+    delete_rule,
+    iter_violations,
+    last_run,
+    list_rules,
+    list_violations,
+    parse_cursor,
+    run_compliance,
+    set_rule,
+)
+from app.services import analytics_service, simulation_service
+from app.services.etags import etag_stats, invalidate_etags
+from app.services.reference_cache import reference_cache, invalidate_reference_data
 
 router = APIRouter()
 
@@ -45,18 +65,124 @@ def deactivate_employee_endpoint(
     verify_admin(current_user)
     return deactivate_employee(emp_id)
 
+def _cursor(after: Optional[str]):
+    try:
+        return parse_cursor(after)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
 # GET non-compliance
 @router.get("/fwmi/non-compliant")
 def fwmi_non_compliant(
+    after: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
     current_user = Depends(get_current_user)
 ):
     verify_admin(current_user)
-    return get_fwmi_non_compliant()
+    return FastJSONResponse(get_fwmi_non_compliant(_cursor(after), limit))
+
+# Compliance engine: rules per pass type and category
+@router.get("/compliance/rules")
+def compliance_rules(
+    current_user = Depends(get_current_user)
+):
+    verify_admin(current_user)
+    return list_rules()
+
+@router.put("/compliance/rules")
+def put_compliance_rule(
+    pass_type: str,
+    category: str,
+    min_sum_insured: float = Query(..., ge=0),
+    current_user = Depends(get_current_user)
+):
+    verify_admin(current_user)
+    return set_rule(pass_type, category, min_sum_insured)
+
+@router.delete("/compliance/rules/{rule_id}")
+def delete_compliance_rule(
+    rule_id: int,
+    current_user = Depends(get_current_user)
+):
+    verify_admin(current_user)
+    return delete_rule(rule_id)
+
+# Re-check employees (incremental: only those changed since the last run)
+@router.post("/compliance/run")
+def compliance_run(
+    mode: str = Query("incremental", pattern="^(full|incremental)$"),
+    current_user = Depends(get_current_user)
+):
+    verify_admin(current_user)
+    return run_compliance(mode)
+
+# Violations from the last run, paginated or streamed as NDJSON
+@router.get("/compliance/violations")
+def compliance_violations(
+    after: Optional[str] = Query(None, description="Cursor: next_cursor of the previous page"),
+    limit: int = Query(100, ge=1, le=1000),
+    pass_type: Optional[str] = None,
+    category: Optional[str] = None,
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    current_user = Depends(get_current_user)
+):
+    verify_admin(current_user)
+    cursor = _cursor(after)
+
+    if format == "ndjson":
+        rows = iter_violations(cursor, pass_type, category)
+        return StreamingResponse(ndjson_lines(rows), media_type="application/x-ndjson")
+
+    page = list_violations(cursor, limit, pass_type, category)
+    page["last_run"] = last_run()
+    return FastJSONResponse(page)
 
 # Coverage report
+# e.g. ?by=category,department  or  ?by=plan&category=FWMI
 @router.get("/coverage/report")
 def coverage_report(
+    by: str = Query("category", description="comma separated: category, department, insurer, plan"),
+    category: Optional[str] = None,
+    department: Optional[str] = None,
+    insurer_id: Optional[int] = None,
+    plan_id: Optional[int] = None,
+    current_user = Depends(get_current_user)
+):
+    verify_admin(current_user)
+    report = generate_coverage_report(
+        [d.strip() for d in by.split(",")],
+        category=category, department=department,
+        insurer_id=insurer_id, plan_id=plan_id,
+    )
+    if "error" in report:
+        raise HTTPException(status_code=400, detail=report["error"])
+    return FastJSONResponse(report)
+
+# Cache / performance metrics
+@router.get("/metrics")
+def metrics(
+    current_user = Depends(get_current_user)
+):
+    verify_admin(current_user)
+    return {
+        "reference_cache": reference_cache.stats(),
+        "principal_cache": principal_cache.stats(),
+        "login_pool": auth_service.login_pool.stats(),
+        "db_pool": pool_stats(),
+        "db_async_pool": async_pool_stats(),
+        "etags": etag_stats.stats(),
+        "analytics": analytics_service.stats(),
+        "simulation_model_cache": simulation_service.model_cache.stats(),
+        "compliance_scheduler": compliance_scheduler.stats(),
+    }
+
+# Drop cached plans/tiers/categories and outdate every ETag
+# (e.g. after editing the DB by hand)
+@router.post("/cache/invalidate")
+def invalidate_cache(
     current_user = Depends(get_current_user)
 ):
     verify_admin(current_user)
-    return generate_coverage_report()
+    invalidate_reference_data()
+    invalidate_etags()
+    return {"message": "Reference data cache cleared"}
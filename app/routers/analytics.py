@@ -0,0 +1,86 @@
+# file: app/routers/analytics.py
+
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import Response
+from app.auth.auth_service import get_current_user
+from app.responses import FastJSONResponse
+from app.services.analytics_charts import MEDIA_TYPES
+from app.services.analytics_service import get_chart, get_series_async
+from app.services.etags import not_modified
+from app.services.render_pool import RenderPoolBusy
+
+router = APIRouter()
+
+# ?format=json returns the series, png/svg the chart drawn from it
+FORMAT = Query("json", pattern="^(json|png|svg)$")
+
+
+def _retry_later(detail: str):
+    raise HTTPException(status_code=503, detail=detail, headers={"Retry-After": "1"})
+
+
+# HR dashboards: admin only
+def verify_admin(current_user):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access only")
+
+
+async def _respond(name: str, fmt: str, **params):
+    if fmt == "json":
+        series = await get_series_async(name, **params)
+    else:
+        try:
+            series = await get_chart(name, fmt, **params)
+        except RenderPoolBusy:
+            _retry_later("Too many charts being drawn, please retry")
+        except BrokenProcessPool:
+            # A render worker died; the pool starts a new one on the next submit
+            _retry_later("Chart renderer restarted, please retry")
+    if isinstance(series, dict):
+        if "error" in series:
+            raise HTTPException(status_code=404, detail=series["error"])
+        return FastJSONResponse(series)
+    return Response(series, media_type=MEDIA_TYPES[fmt])
+
+
+# GET /analytics/department-premium?round_id=3&format=png
+# Premium and headcount per department
+@router.get("/department-premium")
+async def department_premium(
+    request: Request,
+    round_id: Optional[int] = None,
+    format: str = FORMAT,
+    current_user = Depends(get_current_user),
+):
+    verify_admin(current_user)
+    not_modified(request, "analytics")
+    return await _respond("department-premium", format, round_id=round_id)
+
+
+# Premium per department and category, with department totals
+@router.get("/division-premiums")
+async def division_premiums(
+    request: Request,
+    round_id: Optional[int] = None,
+    format: str = FORMAT,
+    current_user = Depends(get_current_user),
+):
+    verify_admin(current_user)
+    not_modified(request, "analytics")
+    return await _respond("division-premiums", format, round_id=round_id)
+
+
+# Employees per plan and department, e.g. ?category=GHS
+@router.get("/plan-distribution")
+async def plan_distribution(
+    request: Request,
+    category: Optional[str] = None,
+    format: str = FORMAT,
+    current_user = Depends(get_current_user),
+):
+    verify_admin(current_user)
+    not_modified(request, "analytics")
+    return await _respond("plan-distribution", format, category=category)
@@ -1,18 +1,71 @@
 # file: api/routers/bidding.py
 
-from fastapi import APIRouter, Depends
+import asyncio
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.auth.auth_service import get_current_user
+from app.database.database import get_async_session
+from app.models import BidRead
+from app.responses import FastJSONResponse
 from app.services.bidding_service import (
-    get_bids_for_round,
+    get_bids_for_round_async,
     compare_bids
 )
+from app.services.leaderboard import leaderboard_broker
+
+# Comment line sent when idle so proxies keep the stream open
+SSE_KEEPALIVE_SECONDS = 15
 
 router = APIRouter()
 
-@router.get("/round/{round_id}/bids")
-def bids_for_round(round_id: int, current_user = Depends(get_current_user)):
-    return get_bids_for_round(round_id)
+@router.get("/round/{round_id}/bids", response_model=List[BidRead])
+async def bids_for_round(
+    round_id: int,
+    current_user = Depends(get_current_user),
+    session: AsyncSession = Depends(get_async_session),
+):
+    return FastJSONResponse(await get_bids_for_round_async(session, round_id))
 
 @router.get("/round/{round_id}/compare")
 def bidding_comparison(round_id: int, current_user = Depends(get_current_user)):
-    return compare_bids(round_id)
+    comparison = compare_bids(round_id)
+    if "error" in comparison:
+        raise HTTPException(status_code=404, detail=comparison["error"])
+    return FastJSONResponse(comparison)
+
+# GET /bidding/round/{round_id}/stream  (Server-Sent Events)
+# A "snapshot" event with the current ranking, then a "delta" event per
+# committed bid: the bid with its new rank and the bids whose rank moved.
+@router.get("/round/{round_id}/stream")
+async def leaderboard_stream(
+    round_id: int,
+    request: Request,
+    current_user = Depends(get_current_user),
+):
+    queue = await leaderboard_broker.subscribe(round_id)
+    if queue is None:
+        raise HTTPException(status_code=404, detail="Bidding round not found")
+
+    async def events():
+        try:
+            while not await request.is_disconnected():
+                try:
+                    message = await asyncio.wait_for(queue.get(), SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if message is None:
+                    # too far behind; the client reconnects and gets a fresh snapshot
+                    break
+                yield f"data: {message}\n\n"
+        finally:
+            leaderboard_broker.unsubscribe(round_id, queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
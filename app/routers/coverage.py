@@ -1,11 +1,15 @@
 # file: api/routers/coverage.py
 
-from fastapi import APIRouter
-from app.services.coverage_service import get_category_limits
+from fastapi import APIRouter, Depends, Request
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.database.database import get_async_session
+from app.services.coverage_service import get_category_limits_async
+from app.services.etags import not_modified
 
 router = APIRouter()
 
 # GET /coverage/plan/{plan_id}
 @router.get("/plan/{plan_id}")
-def category_limits(plan_id: int):
-    return get_category_limits(plan_id)
+async def category_limits(plan_id: int, request: Request, session: AsyncSession = Depends(get_async_session)):
+    not_modified(request, "reference")
+    return await get_category_limits_async(session, plan_id)
@@ -1,25 +1,74 @@
 # file: app/routers/employee.py
 
-from typing import List
+from typing import Optional
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import Session, select, delete
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.database.database import engine
+from app.auth.auth_service import get_current_user
+from app.database.database import engine, get_async_session
 from app.models.models import (
     Employee,
     EmployeeCreate,
+    EmployeeRead,
     EmployeeUpdate,
 )
 from app.models.employee_plan import EmployeePlan
+from app.responses import FastJSONResponse, ndjson_lines
+from app.services.etags import not_modified
+from app.services.employee_service import (
+    get_employee_coverage_async,
+    get_ward_class_and_limits_async,
+    parse_fields,
+    list_employees_page,
+    iter_employees,
+)
 
 router = APIRouter()
 
 
+# =========================
+#  MY COVERAGE (self-service)
+# =========================
+@router.get("/me/coverage")
+async def my_coverage(
+    request: Request,
+    current_user = Depends(get_current_user),
+    session: AsyncSession = Depends(get_async_session),
+):
+    """
+    Coverage of the logged-in employee, grouped by plan and category.
+    """
+    not_modified(request, "coverage", scope=current_user.user_id)
+    return await get_employee_coverage_async(session, current_user.username)
+
+
+@router.get("/me/ward")
+async def my_ward_class(
+    request: Request,
+    current_user = Depends(get_current_user),
+    session: AsyncSession = Depends(get_async_session),
+):
+    """
+    GHS ward class and annual limit of the logged-in employee.
+    """
+    not_modified(request, "coverage", scope=current_user.user_id)
+    return await get_ward_class_and_limits_async(session, current_user.username)
+
+
 # =========================
 #  CREATE EMPLOYEE
 # =========================
-@router.post("/", response_model=Employee)
+def _code_taken(session: Session, employee_code: str) -> bool:
+    return session.exec(
+        select(Employee.employee_id).where(Employee.employee_code == employee_code)
+    ).first() is not None
+
+
+@router.post("/", response_model=EmployeeRead)
 def create_employee(data: EmployeeCreate):
     """
     Create a new employee and link to one or more plans.
@@ -33,9 +82,19 @@ def create_employee(data: EmployeeCreate):
             department=data.department,
             age=data.age,
             gender=data.gender,
+            pass_type=data.pass_type,
         )
+        if _code_taken(session, data.employee_code):
+            raise HTTPException(status_code=409, detail="Employee code already exists")
         session.add(employee)
-        session.commit()
+        try:
+            session.commit()
+        except IntegrityError:
+            session.rollback()
+            # Taken in the meantime, or another constraint (e.g. unknown user_id)
+            if _code_taken(session, data.employee_code):
+                raise HTTPException(status_code=409, detail="Employee code already exists")
+            raise HTTPException(status_code=400, detail="Invalid employee: unknown user_id")
         session.refresh(employee)
 
         # 2) Link Employee to Plans via EmployeePlan
@@ -52,23 +111,40 @@ def create_employee(data: EmployeeCreate):
 
 
 # =========================
-#  LIST ALL EMPLOYEES
+#  LIST EMPLOYEES (paginated)
 # =========================
-@router.get("/", response_model=List[Employee])
-def list_employees():
+@router.get("/")
+def list_employees(
+    after: Optional[int] = Query(None, description="Cursor: last employee_id of the previous page"),
+    limit: int = Query(100, ge=1, le=1000),
+    department: Optional[str] = None,
+    plan_id: Optional[int] = None,
+    fields: Optional[str] = Query(None, description="Comma separated, e.g. name,department"),
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+):
     """
-    Return all employees.
-    Note: each Employee will include its related Plans.
+    Return employees ordered by employee_id, one page at a time.
+    Pass `next_cursor` back as `after` to get the next page.
+
+    format=ndjson streams every matching employee (one JSON object per
+    line) instead of a single page; `limit` is ignored.
     """
-    with Session(engine) as session:
-        employees = session.exec(select(Employee)).all()
-        return employees
+    try:
+        columns = parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if format == "ndjson":
+        rows = iter_employees(columns, after, department, plan_id)
+        return StreamingResponse(ndjson_lines(rows), media_type="application/x-ndjson")
+
+    return FastJSONResponse(list_employees_page(columns, after, limit, department, plan_id))
 
 
 # =========================
 #  GET SINGLE EMPLOYEE
 # =========================
-@router.get("/{employee_id}", response_model=Employee)
+@router.get("/{employee_id}", response_model=EmployeeRead)
 def get_employee(employee_id: int):
     """
     Return one employee by ID, including its Plans.
@@ -83,7 +159,7 @@ def get_employee(employee_id: int):
 # =========================
 #  UPDATE EMPLOYEE
 # =========================
-@router.put("/{employee_id}", response_model=Employee)
+@router.put("/{employee_id}", response_model=EmployeeRead)
 def update_employee(employee_id: int, data: EmployeeUpdate):
     """
     Update basic employee info and optionally replace their plan list.
@@ -96,7 +172,7 @@ def update_employee(employee_id: int, data: EmployeeUpdate):
         update_data = data.dict(exclude_unset=True)
 
         # 1) Update simple fields
-        simple_fields = ["name", "department", "age", "gender"]
+        simple_fields = ["name", "department", "age", "gender", "pass_type"]
         for field in simple_fields:
             if field in update_data:
                 setattr(employee, field, update_data[field])
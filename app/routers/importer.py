@@ -1,94 +1,53 @@
 # app/routers/importer.py
 
-import pandas as pd
-import io
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
-from sqlmodel import Session
-from typing import List
+from fastapi import APIRouter, UploadFile, File, HTTPException, Query
 
-from app.database.database import get_session
-from app.models.models import Employee
-from app.models.employee_plan import EmployeePlan
+from app.services.import_service import IMPORT_CHUNK_SIZE
+from app.services.import_job_service import (
+    spool_upload,
+    create_job,
+    get_job,
+    list_jobs,
+    cancel_job,
+)
 
 router = APIRouter(prefix="/import", tags=["Import"])
 
 
-@router.post("/employees")
-async def import_employees(
+# Returns as soon as the upload is on disk; a background worker
+# runs the import (see import_job_service).
+@router.post("/employees", status_code=202)
+def import_employees(
     file: UploadFile = File(...),
-    session: Session = Depends(get_session)
+    chunk_size: int = Query(IMPORT_CHUNK_SIZE, ge=1, le=50000),
 ):
     """
-    Import employees from Excel file.
+    Queue an employee import from an Excel ('General' sheet) or CSV file.
     Supports multi-plan via 'Plan IDs' column (comma separated).
-    """
-
-    # 1️⃣ Read Excel safely
-    try:
-        contents = await file.read()
-        df = pd.read_excel(io.BytesIO(contents), sheet_name="General")
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Excel read error: {str(e)}")
-
-    # 2️⃣ Check required columns
-    required_cols = ["Employee Code", "Name", "Department", "Age", "Gender"]
-    missing = [c for c in required_cols if c not in df.columns]
-
-    if missing:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Missing required columns: {missing}"
-        )
-
-    created_count = 0
 
-    # 3️⃣ Process each row
-    for _, row in df.iterrows():
-
-        # Create employee record
-        employee = Employee(
-            employee_code=row["Employee Code"],
-            name=row["Name"],
-            department=row.get("Department"),
-            age=int(row["Age"]) if not pd.isna(row["Age"]) else None,
-            gender=row.get("Gender"),
-            user_id=1  # TODO: assign appropriate user later
-        )
-
-        session.add(employee)
-        session.commit()
-        session.refresh(employee)
-
-        # 4️⃣ Handle multiple plan IDs
-        if "Plan IDs" in df.columns:
-            if not pd.isna(row["Plan IDs"]):
-
-                # Split (case: "1,2, 3")
-                raw_values = str(row["Plan IDs"]).split(",")
+    Poll GET /import/jobs/{job_id} for progress and row errors.
+    """
+    filename = file.filename or ""
+    path = spool_upload(file.file, filename)
+    return create_job(path, filename, chunk_size)
 
-                plan_ids: List[int] = []
-                for value in raw_values:
-                    value = value.strip()
 
-                    # Convert from str/float to int
-                    try:
-                        plan_ids.append(int(float(value)))
-                    except:
-                        continue  # skip invalid values
+@router.get("/jobs")
+def import_jobs(limit: int = Query(50, ge=1, le=500)):
+    return list_jobs(limit)
 
-                # Create EmployeePlan links
-                for pid in plan_ids:
-                    link = EmployeePlan(
-                        employee_id=employee.employee_id,
-                        plan_id=pid
-                    )
-                    session.add(link)
 
-                session.commit()
+@router.get("/jobs/{job_id}")
+def import_job_status(job_id: int):
+    job = get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return job
 
-        created_count += 1
 
-    return {
-        "message": "Excel import completed successfully",
-        "employees_created": created_count
-    }
+@router.post("/jobs/{job_id}/cancel")
+def cancel_import_job(job_id: int):
+    job = cancel_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return job
@@ -1,23 +1,46 @@
 # file: api/routers/insurer.py
 
-from fastapi import APIRouter, Depends, HTTPException
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
 from app.auth.auth_service import get_current_user
+from app.models import BidItem
+from app.services import insurer_service
+from app.services.etags import not_modified
 from app.services.insurer_service import (
     get_required_categories,
     submit_bid,
+    submit_bids,
     update_bid
 )
 
 router = APIRouter()
 
+_ERROR_STATUS = {
+    insurer_service.BID_NOT_FOUND: 404,
+    insurer_service.ROUND_NOT_FOUND: 404,
+    insurer_service.ROUND_CLOSED: 403,
+    insurer_service.CATEGORY_NOT_FOUND: 404,
+    insurer_service.DUPLICATE_BID: 409,
+    insurer_service.VERSION_CONFLICT: 409,
+    insurer_service.VERSION_REQUIRED: 428,
+    insurer_service.KEY_REUSED: 422,
+}
+
 def verify_insurer(current_user):
     if current_user.role != "insurer":
         raise HTTPException(status_code=403, detail="Insurer access only")
 
+def _result(result: dict):
+    if "error" in result:
+        raise HTTPException(status_code=_ERROR_STATUS.get(result["error"], 400), detail=result)
+    return result
+
 # GET /insurer/categories
 @router.get("/categories")
-def categories(current_user = Depends(get_current_user)):
+def categories(request: Request, current_user = Depends(get_current_user)):
     verify_insurer(current_user)
+    not_modified(request, "reference")
     return get_required_categories()
 
 # POST /insurer/bid
@@ -26,17 +49,45 @@ def new_bid(
     category_id: int,
     round_id: int,
     premium: float,
+    idempotency_key: Optional[str] = Header(None, max_length=100),
     current_user = Depends(get_current_user)
 ):
     verify_insurer(current_user)
-    return submit_bid(current_user.user_id, category_id, round_id, premium)
+    return _result(submit_bid(current_user.user_id, category_id, round_id, premium, idempotency_key))
 
-# PUT /insurer/bid/{bid_id}
+def _base_version(version: Optional[int], if_match: Optional[str]) -> int:
+    """The version a revision is based on: ?version=, or If-Match: <version>."""
+    if version is None and if_match is not None:
+        tag = if_match.strip().removeprefix("W/").strip('"')
+        if not tag.isdigit():
+            raise HTTPException(status_code=400, detail="If-Match must be the bid version")
+        version = int(tag)
+    if version is None:
+        raise HTTPException(status_code=428, detail={"error": insurer_service.VERSION_REQUIRED})
+    return version
+
+# PUT /insurer/bid/{bid_id}?premium=...&version=<version the change is based on>
+# (or the version in an If-Match header)
 @router.put("/bid/{bid_id}")
 def modify_bid(
     bid_id: int,
     premium: float,
+    version: Optional[int] = None,
+    if_match: Optional[str] = Header(None),
+    idempotency_key: Optional[str] = Header(None, max_length=100),
+    current_user = Depends(get_current_user)
+):
+    verify_insurer(current_user)
+    version = _base_version(version, if_match)
+    return _result(update_bid(bid_id, premium, current_user.user_id, version, idempotency_key))
+
+# POST /insurer/round/{round_id}/bids  (all categories, one transaction)
+@router.post("/round/{round_id}/bids")
+def bulk_bids(
+    round_id: int,
+    items: List[BidItem],
+    idempotency_key: Optional[str] = Header(None, max_length=100),
     current_user = Depends(get_current_user)
 ):
     verify_insurer(current_user)
-    return update_bid(bid_id, premium)
+    return _result(submit_bids(current_user.user_id, round_id, items, idempotency_key))
@@ -0,0 +1,38 @@
+# file: app/routers/simulation.py
+
+from fastapi import APIRouter, Depends, HTTPException
+from app.auth.auth_service import get_current_user
+from app.models import SimulationRequest
+from app.responses import FastJSONResponse
+from app.services.simulation_service import describe, simulate
+
+router = APIRouter()
+
+# HR renewal planning: admin only
+def verify_admin(current_user):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access only")
+
+def _result(result: dict):
+    if "error" in result:
+        status = 404 if result["error"] == "Bidding round not found" else 400
+        raise HTTPException(status_code=status, detail=result["error"])
+    return FastJSONResponse(result)
+
+# GET /simulation/round/{round_id}
+# Categories, age bands, departments and bids a scenario can refer to,
+# and the round's cost with the current carriers
+@router.get("/round/{round_id}")
+def simulation_model(round_id: int, current_user = Depends(get_current_user)):
+    verify_admin(current_user)
+    return _result(describe(round_id))
+
+# POST /simulation/round/{round_id}
+# e.g. {"scenarios": [{"carriers": {"GHS": 3}},
+#                     {"age_changes": [{"band": "60+", "pct": 15}]}],
+#       "grid": {"carriers": {"GHS": [null, 2, 3], "GTL": [null, 2, 3]}},
+#       "top": 10}
+@router.post("/round/{round_id}")
+def run_simulation(round_id: int, request: SimulationRequest, current_user = Depends(get_current_user)):
+    verify_admin(current_user)
+    return _result(simulate(round_id, request))
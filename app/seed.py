@@ -14,6 +14,7 @@ from app.models.models import (
 )
 from app.models.employee_plan import EmployeePlan
 from app.auth.auth_service import hash_password
+from app.services.compliance_service import add_default_rules
 
 
 def seed_data():
@@ -76,6 +77,10 @@ def seed_data():
         session.add_all(categories)
         session.commit()
 
+        # ---- COMPLIANCE RULES (FWMI minimum for WP / S-Pass) ----
+        add_default_rules(session.connection())
+        session.commit()
+
         cat_gtl = session.exec(
             select(PolicyCategory).where(PolicyCategory.category_name == "GTL")
         ).first()
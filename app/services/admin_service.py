@@ -1,13 +1,14 @@
 # file: api/services/admin_service.py
-from sqlmodel import Session, select, func
+from sqlmodel import Session, select
 from app.database.database import engine
+from app.services.compliance_service import last_run, list_violations
+from app.services.coverage_report import coverage_report
 # from api.database.database import SessionLocal
 from app.models import (
     User, Employee, Plan, PlanTier,
     PolicyCategory, Bid
 )
 
-MIN_FWMI_AMOUNT = 15000   # Example MOM requirement
 
 # ---------------------------
 # Employee CRUD
@@ -65,42 +66,22 @@ def assign_plan_based_on_designation(employee: Employee):
 # FWMI Compliance
 # ---------------------------
 
-def get_fwmi_non_compliant():
-    with Session(engine) as session:
-        result = session.exec(
-            select(Employee, PlanTier)
-            .join(Plan, Plan.plan_id == Employee.plan_id)
-            .join(PlanTier, PlanTier.plan_id == Plan.plan_id)
-            .join(PolicyCategory, PolicyCategory.category_id == PlanTier.category_id)
-            .where(
-                PolicyCategory.category_name == "FWMI",
-                PlanTier.sum_insured < MIN_FWMI_AMOUNT
-            )
-        ).all()
-
-        return [
-            {
-                "employee_id": emp.employee_id,
-                "employee_name": emp.name,
-                "coverage": tier.sum_insured
-            }
-            for emp, tier in result
-        ]
+def get_fwmi_non_compliant(after=None, limit: int = 100):
+    """
+    WP / S-Pass holders below the FWMI minimum (see ComplianceRule), as
+    of the latest compliance run. Read only: runs are scheduled (see
+    compliance_service.compliance_scheduler) or started by an admin.
+    """
+    page = list_violations(after, limit, category="FWMI")
+    run = last_run()
+    page["checked_at"] = run["finished_at"] if run else None
+    return page
 
 
 # ---------------------------
 # Coverage Reports
 # ---------------------------
 
-def generate_coverage_report():
-    with Session(engine) as session:
-        report = session.exec(
-            select(
-                PolicyCategory.category_name,
-                func.count(PlanTier.tier_id)
-            )
-            .join(PlanTier, PlanTier.category_id == PolicyCategory.category_id)
-            .group_by(PolicyCategory.category_name)
-        ).all()
-
-        return [{"category": c, "count": cnt} for c, cnt in report]
+def generate_coverage_report(by=("category",), **filters):
+    """Headcount and sum insured from the precomputed cube (see coverage_report)."""
+    return coverage_report(by, **filters)
@@ -0,0 +1,114 @@
+# file: app/services/analytics_charts.py
+"""
+Figures for the /analytics endpoints, drawn from the JSON series that
+analytics_service returns (so what a chart shows is exactly what the
+JSON format of the same URL returns).
+
+Runs in the render pool's worker processes. Figures are built with the
+object API (matplotlib.figure.Figure), not pyplot: no global figure
+state, nothing to close.
+"""
+import io
+
+from matplotlib.figure import Figure
+
+PNG_DPI = 120
+
+CATEGORY_COLORS = ["#4E79A7", "#F28E2B", "#E15759", "#76B7B2", "#59A14F", "#EDC948", "#B07AA1", "#FF9DA7"]
+
+MEDIA_TYPES = {"png": "image/png", "svg": "image/svg+xml"}
+
+
+def _bar_labels(ax, x, values, fmt="{:,.0f}"):
+    for xi, value in zip(x, values):
+        if value:
+            ax.text(xi, value, fmt.format(value), ha="center", va="bottom", fontsize=8)
+
+
+def _headroom(ax, values, share=1.2):
+    top = max(values, default=0)
+    ax.set_ylim(0, top * share if top > 0 else 1)
+
+
+def _outside_legend(ax, title, count):
+    # Beside the plot, in columns of 20; savefig(bbox_inches="tight") keeps it
+    ax.legend(title=title, loc="upper left", bbox_to_anchor=(1.01, 1), ncol=max(1, -(-count // 20)))
+
+
+def _department_axis(ax, departments):
+    ax.set_xticks(range(len(departments)), departments, rotation=30, ha="right")
+    ax.set_xlabel("Department")
+
+
+def department_premium(series) -> Figure:
+    x = range(len(series["departments"]))
+    fig = Figure(figsize=(12, 6))
+    ax = fig.subplots()
+    ax.bar(x, series["premium"], color="steelblue", label="Premium")
+    _bar_labels(ax, x, series["premium"])
+    _headroom(ax, series["premium"])
+    ax.set_ylabel("Premium ($)")
+    _department_axis(ax, series["departments"])
+
+    heads = ax.twinx()
+    heads.plot(x, series["headcount"], color="darkorange", marker="o", linewidth=2, label="Headcount")
+    heads.set_ylabel("Headcount")
+    _headroom(heads, series["headcount"])
+
+    ax.set_title(f"Department Premium vs Headcount (round {series['round_id']})")
+    fig.legend(loc="upper right", bbox_to_anchor=(1, 1), bbox_transform=ax.transAxes, ncol=2)
+    fig.tight_layout()
+    return fig
+
+
+def division_premiums(series) -> Figure:
+    x = range(len(series["departments"]))
+    fig = Figure(figsize=(12, 6))
+    ax = fig.subplots()
+    bottom = [0.0] * len(series["departments"])
+    for i, category in enumerate(series["categories"]):
+        values = series["premium"][category]
+        ax.bar(x, values, bottom=bottom, label=category, color=CATEGORY_COLORS[i % len(CATEGORY_COLORS)])
+        bottom = [b + v for b, v in zip(bottom, values)]
+    _bar_labels(ax, x, series["total"])
+    _headroom(ax, series["total"], 1.1)
+    ax.set_title(f"Total Premiums Across Divisions (round {series['round_id']})")
+    ax.set_ylabel("Total Premium ($)")
+    _department_axis(ax, series["departments"])
+    _outside_legend(ax, "Category", len(series["categories"]))
+    fig.tight_layout()
+    return fig
+
+
+def plan_distribution(series) -> Figure:
+    x = range(len(series["departments"]))
+    fig = Figure(figsize=(12, 7))
+    ax = fig.subplots()
+    for plan in series["plans"]:
+        ax.plot(x, series["headcount"][plan], marker="o", linewidth=2, label=plan)
+    title = "Plan Distribution Across Divisions (Headcount)"
+    if series["category"]:
+        title += f" - {series['category']}"
+    ax.set_title(title)
+    ax.set_ylabel("Headcount")
+    _department_axis(ax, series["departments"])
+    if series["plans"]:
+        _outside_legend(ax, "Plan", len(series["plans"]))
+    ax.grid(axis="y", linestyle="--", alpha=0.3)
+    fig.tight_layout()
+    return fig
+
+
+CHARTS = {
+    "department-premium": department_premium,
+    "division-premiums": division_premiums,
+    "plan-distribution": plan_distribution,
+}
+
+
+def render(name: str, series: dict, fmt: str) -> bytes:
+    """The chart as PNG or SVG bytes."""
+    fig = CHARTS[name](series)
+    buf = io.BytesIO()
+    fig.savefig(buf, format=fmt, dpi=PNG_DPI, bbox_inches="tight")
+    return buf.getvalue()
@@ -0,0 +1,273 @@
+# file: app/services/analytics_service.py
+"""
+Dashboard aggregates computed from the live tables (the numbers behind
+the static PNGs in data/charts, kept current): premium and headcount
+per department, premium per department and category, and employees
+per plan and department.
+
+A premium is what the plan's insurer bid for the category in a round,
+per covered employee (as in the bid comparison): an employee on a plan
+pays, for every category the plan has a tier in, the bid of the plan's
+insurer for that category. The round defaults to the latest one with
+bids.
+
+Caching: series and rendered charts are cached in-process under a key
+that includes the "analytics" change counter of services/etags.py, which
+moves when a transaction writing Bid, Employee, EmployeePlan, Plan,
+PlanTier or PolicyCategory commits. A write therefore makes the next
+request recompute, no explicit invalidation needed; the old entries age
+out. As with ETags, writes made through another API worker are not
+seen by this one's counter, so entries also expire after
+ANALYTICS_CACHE_TTL seconds. POST /admin/cache/invalidate moves every
+counter.
+
+Rendering: the figure is drawn by analytics_charts in the render pool's
+worker processes, never on the event loop. Concurrent requests for the
+same chart and data version share one render.
+"""
+import asyncio
+import os
+from typing import Dict, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import and_, func
+from sqlmodel import Session, select
+
+from app.database.database import engine
+from app.models import BiddingRound, Bid, Employee, EmployeePlan, Plan, PlanTier, PolicyCategory
+from app.services import analytics_charts
+from app.services.cache import MISSING, TTLCache
+from app.services.etags import change_versions
+from app.services.render_pool import RenderPool
+
+ANALYTICS_CACHE_TTL = float(os.getenv("ANALYTICS_CACHE_TTL", "300"))
+ANALYTICS_CACHE_SIZE = int(os.getenv("ANALYTICS_CACHE_SIZE", "256"))
+ANALYTICS_CHART_CACHE_SIZE = int(os.getenv("ANALYTICS_CHART_CACHE_SIZE", "64"))
+ANALYTICS_CACHE_ENABLED = os.getenv("ANALYTICS_CACHE_ENABLED", "1") == "1"
+
+# Render processes; each holds its own matplotlib (~60 MB)
+ANALYTICS_RENDER_WORKERS = int(os.getenv("ANALYTICS_RENDER_WORKERS", "2"))
+ANALYTICS_RENDER_MAX_PENDING = int(os.getenv("ANALYTICS_RENDER_MAX_PENDING", "16"))
+
+series_cache = TTLCache(
+    "analytics",
+    maxsize=ANALYTICS_CACHE_SIZE,
+    ttl=ANALYTICS_CACHE_TTL,
+    enabled=ANALYTICS_CACHE_ENABLED,
+)
+chart_cache = TTLCache(
+    "analytics_charts",
+    maxsize=ANALYTICS_CHART_CACHE_SIZE,
+    ttl=ANALYTICS_CACHE_TTL,
+    enabled=ANALYTICS_CACHE_ENABLED,
+)
+render_pool = RenderPool(ANALYTICS_RENDER_WORKERS, ANALYTICS_RENDER_MAX_PENDING)
+
+# Label for employees without a department
+UNASSIGNED = "Unassigned"
+
+_department = func.coalesce(Employee.department, UNASSIGNED)
+
+
+def data_version() -> int:
+    return change_versions.get(("analytics",))[0]
+
+
+# ---------------------------
+# Queries
+# ---------------------------
+
+def _round(session: Session, round_id: Optional[int]):
+    """(round_id, error): the given round, or the latest one with bids."""
+    if round_id is None:
+        return session.exec(select(func.max(Bid.round_id))).one(), None
+    if session.get(BiddingRound, round_id) is None:
+        return None, "Bidding round not found"
+    return round_id, None
+
+
+def _headcount(session: Session) -> Dict[str, int]:
+    rows = session.exec(
+        select(_department, func.count())
+        .where(Employee.active)
+        .group_by(_department)
+    ).all()
+    return dict(rows)
+
+
+def _premiums(session: Session, round_id: Optional[int]):
+    """(department, category, premium) for every department and category with a covered employee."""
+    return session.exec(
+        select(
+            _department,
+            PolicyCategory.category_name,
+            func.coalesce(func.sum(Bid.premium), 0.0),
+        )
+        .select_from(Employee)
+        .join(EmployeePlan, EmployeePlan.employee_id == Employee.employee_id)
+        .join(Plan, Plan.plan_id == EmployeePlan.plan_id)
+        .join(PlanTier, PlanTier.plan_id == Plan.plan_id)
+        .join(PolicyCategory, PolicyCategory.category_id == PlanTier.category_id)
+        .outerjoin(Bid, and_(
+            Bid.round_id == round_id,
+            Bid.insurer_id == Plan.insurer_id,
+            Bid.category_id == PlanTier.category_id,
+        ))
+        .where(Employee.active)
+        .group_by(_department, PolicyCategory.category_name)
+    ).all()
+
+
+# ---------------------------
+# Series
+# ---------------------------
+# Every series lists departments in the same (sorted) order, with one
+# value per department in each list.
+
+def department_premium(session: Session, round_id: Optional[int] = None) -> dict:
+    """Total premium and active headcount per department."""
+    round_id, error = _round(session, round_id)
+    if error:
+        return {"error": error}
+    headcount = _headcount(session)
+    premium: Dict[str, float] = {}
+    for department, _, value in _premiums(session, round_id):
+        premium[department] = premium.get(department, 0.0) + value
+
+    departments = sorted(headcount.keys() | premium.keys())
+    premiums = [round(premium.get(d, 0.0), 2) for d in departments]
+    heads = [headcount.get(d, 0) for d in departments]
+    return {
+        "round_id": round_id,
+        "departments": departments,
+        "headcount": heads,
+        "premium": premiums,
+        "premium_per_head": [round(p / h, 2) if h else None for p, h in zip(premiums, heads)],
+    }
+
+
+def division_premiums(session: Session, round_id: Optional[int] = None) -> dict:
+    """Premium per department, split by category, and the department totals."""
+    round_id, error = _round(session, round_id)
+    if error:
+        return {"error": error}
+    rows = _premiums(session, round_id)
+    departments = sorted({r[0] for r in rows})
+    categories = sorted({r[1] for r in rows})
+    index = {d: i for i, d in enumerate(departments)}
+
+    premium = {c: [0.0] * len(departments) for c in categories}
+    for department, category, value in rows:
+        premium[category][index[department]] = round(value, 2)
+    return {
+        "round_id": round_id,
+        "departments": departments,
+        "categories": categories,
+        "premium": premium,
+        "total": [round(sum(premium[c][i] for c in categories), 2) for i in range(len(departments))],
+    }
+
+
+def plan_distribution(session: Session, category: Optional[str] = None) -> dict:
+    """Active employees per plan and department; with `category`, only plans covering it."""
+    stmt = (
+        select(_department, Plan.plan_name, func.count(func.distinct(Employee.employee_id)))
+        .select_from(Employee)
+        .join(EmployeePlan, EmployeePlan.employee_id == Employee.employee_id)
+        .join(Plan, Plan.plan_id == EmployeePlan.plan_id)
+        .where(Employee.active)
+        .group_by(_department, Plan.plan_name)
+    )
+    if category is not None:
+        category_id = session.exec(
+            select(PolicyCategory.category_id).where(PolicyCategory.category_name == category)
+        ).first()
+        if category_id is None:
+            return {"error": "Category not found"}
+        stmt = stmt.where(Plan.plan_id.in_(
+            select(PlanTier.plan_id).where(PlanTier.category_id == category_id)
+        ))
+    rows = session.exec(stmt).all()
+
+    departments = sorted({r[0] for r in rows})
+    plans = sorted({r[1] for r in rows})
+    index = {d: i for i, d in enumerate(departments)}
+    headcount = {p: [0] * len(departments) for p in plans}
+    for department, plan, count in rows:
+        headcount[plan][index[department]] = count
+    return {"category": category, "departments": departments, "plans": plans, "headcount": headcount}
+
+
+SERIES = {
+    "department-premium": department_premium,
+    "division-premiums": division_premiums,
+    "plan-distribution": plan_distribution,
+}
+
+
+# ---------------------------
+# Cached access
+# ---------------------------
+
+def get_series(name: str, version: Optional[int] = None, **params) -> dict:
+    """
+    The series, from the cache when the data has not changed since it
+    was computed. `version` is read before querying (a write racing
+    with the query then only costs one extra recomputation).
+    """
+    version = data_version() if version is None else version
+    key = (name, tuple(sorted(params.items())), version)
+    series = series_cache.get(key)
+    if series is MISSING:
+        with Session(engine) as session:
+            series = SERIES[name](session, **params)
+        if "error" not in series:
+            series_cache.set(key, series)
+    return series
+
+
+async def get_series_async(name: str, **params) -> dict:
+    return await run_in_threadpool(get_series, name, **params)
+
+
+# Renders in progress: cache key -> task, so concurrent misses draw once
+_rendering: Dict[tuple, asyncio.Task] = {}
+
+
+async def _render(key, name: str, fmt: str, version: int, params: dict):
+    series = await run_in_threadpool(get_series, name, version, **params)
+    if "error" in series:
+        return series
+    image = await render_pool.submit(analytics_charts.render, name, series, fmt)
+    chart_cache.set(key, image)
+    return image
+
+
+async def get_chart(name: str, fmt: str, **params):
+    """
+    The chart as PNG/SVG bytes, or {"error": ...}. May raise
+    RenderPoolBusy.
+    """
+    version = data_version()
+    key = (name, fmt, tuple(sorted(params.items())), version)
+    image = chart_cache.get(key)
+    if image is not MISSING:
+        return image
+
+    task = _rendering.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_render(key, name, fmt, version, params))
+        _rendering[key] = task
+        task.add_done_callback(lambda _: _rendering.pop(key, None))
+    # A client that goes away does not cancel the render the others wait for
+    return await asyncio.shield(task)
+
+
+def stats() -> dict:
+    return {
+        "data_version": data_version(),
+        "series_cache": series_cache.stats(),
+        "chart_cache": chart_cache.stats(),
+        "render_pool": render_pool.stats(),
+        "rendering": len(_rendering),
+    }
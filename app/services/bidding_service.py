@@ -1,30 +1,124 @@
 # file: api/services/bidding_service.py
+from sqlalchemy import and_, func
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.database.database import engine
-from app.models import Bid, BiddingRound, PolicyCategory, User
+from app.models import Bid, BiddingRound, CoverageCube, PolicyCategory, User
 # from api.database.database import SessionLocal
 
+# Columns of BidRead; selected directly so listings skip building ORM objects
+BID_COLUMNS = (Bid.bid_id, Bid.round_id, Bid.insurer_id, Bid.category_id, Bid.premium, Bid.version)
+
+
+def _bids_query(round_id: int):
+    return select(*BID_COLUMNS).where(Bid.round_id == round_id).order_by(Bid.bid_id)
+
+
 def get_bids_for_round(round_id: int):
     with Session(engine) as session:
-        bids = session.exec(
-            select(Bid).where(Bid.round_id == round_id)
-        ).all()
-        return bids
+        return [dict(row) for row in session.execute(_bids_query(round_id)).mappings()]
+
+
+async def get_bids_for_round_async(session: AsyncSession, round_id: int):
+    result = await session.execute(_bids_query(round_id))
+    return [dict(row) for row in result.mappings()]
+
+
+# -------------------------------------------------
+# Bid comparison
+#   One statement ranks every bid of the round within its category,
+#   prices it at the current headcount of that category (CoverageCube)
+#   and totals each insurer's package. Premiums are annual, per
+#   covered employee.
+# -------------------------------------------------
+BID_FIELDS = (
+    "bid_id", "insurer_id", "insurer", "category_id", "category", "premium",
+    "rank", "best_premium", "above_best", "headcount", "projected_cost",
+)
+
+
+def _comparison_query(round_id: int):
+    required = select(func.count()).select_from(PolicyCategory).scalar_subquery()
+    by_category = dict(partition_by=Bid.category_id)
+
+    ranked = (
+        select(
+            Bid.bid_id,
+            Bid.insurer_id,
+            User.username.label("insurer"),
+            Bid.category_id,
+            PolicyCategory.category_name.label("category"),
+            Bid.premium,
+            func.rank().over(order_by=Bid.premium, **by_category).label("rank"),
+            func.min(Bid.premium).over(**by_category).label("best_premium"),
+            func.coalesce(CoverageCube.headcount, 0).label("headcount"),
+        )
+        .join(User, User.user_id == Bid.insurer_id)
+        .join(PolicyCategory, PolicyCategory.category_id == Bid.category_id)
+        .outerjoin(CoverageCube, and_(
+            CoverageCube.cuboid == "category",
+            CoverageCube.category_id == Bid.category_id,
+        ))
+        .where(Bid.round_id == round_id)
+        .subquery()
+    )
+
+    projected = ranked.c.premium * ranked.c.headcount
+    by_insurer = dict(partition_by=ranked.c.insurer_id)
+    return (
+        select(
+            ranked,
+            (ranked.c.premium - ranked.c.best_premium).label("above_best"),
+            projected.label("projected_cost"),
+            func.sum(projected).over(**by_insurer).label("package_cost"),
+            func.count().over(**by_insurer).label("categories_quoted"),
+            required.label("required_categories"),
+        )
+        .order_by(ranked.c.category, ranked.c.rank, ranked.c.insurer_id)
+    )
 
 
 def compare_bids(round_id: int):
+    """
+    bids: every bid with its rank in the category, the best premium and
+    the projected annual cost; packages: each insurer's total, complete
+    packages (all categories quoted) first, cheapest first;
+    cheapest_package: the best complete package from one insurer;
+    cheapest_mix: the cheapest insurer per category combined.
+    """
     with Session(engine) as session:
-        bids = session.exec(
-            select(Bid, User)
-            .join(User, User.user_id == Bid.insurer_id)
-            .where(Bid.round_id == round_id)
-        ).all()
-
-        result = []
-        for bid, insurer in bids:
-            result.append({
-                "insurer": insurer.username,
-                "category": bid.category_id,
-                "premium": bid.premium
-            })
-        return result
+        if session.get(BiddingRound, round_id) is None:
+            return {"error": "Bidding round not found"}
+        rows = session.execute(_comparison_query(round_id)).mappings().all()
+
+    bids, packages, mix = [], {}, {}
+    for row in rows:
+        bid = {f: row[f] for f in BID_FIELDS}
+        bids.append(bid)
+        # rows come cheapest first within each category
+        mix.setdefault(row["category_id"], bid)
+        packages.setdefault(row["insurer_id"], {
+            "insurer_id": row["insurer_id"],
+            "insurer": row["insurer"],
+            "categories_quoted": row["categories_quoted"],
+            "complete": row["categories_quoted"] == row["required_categories"],
+            "projected_cost": row["package_cost"],
+        })
+
+    packages = sorted(packages.values(), key=lambda p: (not p["complete"], p["projected_cost"], p["insurer_id"]))
+    for rank, package in enumerate(packages, start=1):
+        package["rank"] = rank
+
+    required = rows[0]["required_categories"] if rows else None
+    return {
+        "round_id": round_id,
+        "required_categories": required,
+        "bids": bids,
+        "packages": packages,
+        "cheapest_package": packages[0] if packages and packages[0]["complete"] else None,
+        "cheapest_mix": {
+            "complete": len(mix) == required,
+            "projected_cost": sum(b["projected_cost"] for b in mix.values()),
+            "bids": list(mix.values()),
+        },
+    }
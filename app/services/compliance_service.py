@@ -0,0 +1,481 @@
+# file: app/services/compliance_service.py
+"""
+Compliance engine: checks every employee against the ComplianceRule of
+their pass type (e.g. WP / S-Pass must hold FWMI of at least $60,000).
+
+An employee's coverage in a category is their best PlanTier across all
+plans linked through EmployeePlan. All employees are evaluated in one
+INSERT ... SELECT; only failures are stored (ComplianceViolation) and
+read back page by page.
+
+Incremental runs re-check only:
+  - employees whose links, plans, tiers or record changed since the last
+    run (marked in ComplianceDirty by the coverage snapshot hooks), and
+  - employees created since the last run (employee_id watermark).
+A change to the rules, or no earlier run, makes the run a full one.
+
+The API process runs an incremental pass every COMPLIANCE_INTERVAL
+seconds while changes are pending (compliance_scheduler), so reads of
+the violations never write. Without it (COMPLIANCE_INTERVAL=0), run
+passes from cron:
+
+    python -m app.services.compliance_service [full|incremental]
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timezone
+from typing import Iterator, Optional, Set
+
+from sqlalchemy import and_, delete, func, insert, literal, or_, tuple_
+from sqlalchemy.engine import Connection
+from sqlmodel import Session, select
+
+from app.database.database import engine
+from app.models import (
+    ComplianceDirty,
+    ComplianceRule,
+    ComplianceRun,
+    ComplianceViolation,
+    Employee,
+    EmployeePlan,
+    PlanTier,
+    PolicyCategory,
+)
+from app.services import coverage_snapshot
+
+logger = logging.getLogger(__name__)
+
+# Employees re-checked per statement in incremental runs
+CHECK_BATCH_SIZE = 1000
+
+# Violation rows per round trip when streaming an export
+EXPORT_BATCH_SIZE = 1000
+
+# Seconds between background incremental passes (0 = off)
+COMPLIANCE_INTERVAL = float(os.getenv("COMPLIANCE_INTERVAL", "60"))
+
+# MOM minimum annual FWMI claim limit for WP and S-Pass holders
+DEFAULT_RULES = [
+    ("WP", "FWMI", 60000),
+    ("S-Pass", "FWMI", 60000),
+]
+
+VIOLATION_COLUMNS = (
+    "employee_id", "rule_id", "pass_type", "category_id", "coverage", "min_sum_insured",
+)
+
+
+# ---------------------------
+# Rules
+# ---------------------------
+
+def _rule_dict(rule: ComplianceRule, category_name: str):
+    return {
+        "rule_id": rule.rule_id,
+        "pass_type": rule.pass_type,
+        "category": category_name,
+        "min_sum_insured": rule.min_sum_insured,
+    }
+
+
+def list_rules():
+    with Session(engine) as session:
+        rows = session.exec(
+            select(ComplianceRule, PolicyCategory.category_name)
+            .join(PolicyCategory, PolicyCategory.category_id == ComplianceRule.category_id)
+            .order_by(ComplianceRule.pass_type, PolicyCategory.category_name)
+        ).all()
+        return [_rule_dict(rule, name) for rule, name in rows]
+
+
+def set_rule(pass_type: str, category: str, min_sum_insured: float):
+    """Create or update the rule for (pass_type, category)."""
+    with Session(engine) as session:
+        category_id = session.exec(
+            select(PolicyCategory.category_id)
+            .where(PolicyCategory.category_name == category)
+        ).first()
+        if category_id is None:
+            return {"error": f"Unknown category: {category}"}
+
+        rule = session.exec(
+            select(ComplianceRule).where(
+                ComplianceRule.pass_type == pass_type,
+                ComplianceRule.category_id == category_id,
+            )
+        ).first() or ComplianceRule(pass_type=pass_type, category_id=category_id)
+        rule.min_sum_insured = min_sum_insured
+        session.add(rule)
+        session.commit()
+        session.refresh(rule)
+        return _rule_dict(rule, category)
+
+
+def delete_rule(rule_id: int):
+    with Session(engine) as session:
+        rule = session.get(ComplianceRule, rule_id)
+        if not rule:
+            return {"error": "Rule not found"}
+        session.delete(rule)
+        session.commit()
+        return {"message": "Rule deleted"}
+
+
+def add_default_rules(conn: Connection):
+    """Insert DEFAULT_RULES whose category exists and has no rule yet."""
+    categories = dict(conn.execute(
+        select(PolicyCategory.category_name, PolicyCategory.category_id)
+    ).all())
+    existing = set(conn.execute(
+        select(ComplianceRule.pass_type, ComplianceRule.category_id)
+    ).all())
+    rows = [
+        {"pass_type": p, "category_id": categories[c], "min_sum_insured": amount}
+        for p, c, amount in DEFAULT_RULES
+        if c in categories and (p, categories[c]) not in existing
+    ]
+    if rows:
+        conn.execute(insert(ComplianceRule), rows)
+
+
+def _rules_hash(conn: Connection) -> str:
+    rules = conn.execute(
+        select(ComplianceRule.rule_id, ComplianceRule.pass_type,
+               ComplianceRule.category_id, ComplianceRule.min_sum_insured)
+        .order_by(ComplianceRule.rule_id)
+    ).all()
+    return hashlib.sha256(json.dumps([list(r) for r in rules]).encode()).hexdigest()[:16]
+
+
+# ---------------------------
+# Evaluation (set-based)
+# ---------------------------
+
+def _violations_query(employee_filter=None):
+    """One row per (employee, rule) that fails, for all matching employees."""
+    best = (
+        select(
+            EmployeePlan.employee_id,
+            PlanTier.category_id,
+            func.max(PlanTier.sum_insured).label("sum_insured"),
+        )
+        .join(PlanTier, PlanTier.plan_id == EmployeePlan.plan_id)
+        .group_by(EmployeePlan.employee_id, PlanTier.category_id)
+    )
+    if employee_filter is not None:
+        best = best.where(employee_filter(EmployeePlan.employee_id))
+    best = best.subquery("best")
+
+    stmt = (
+        select(
+            Employee.employee_id,
+            ComplianceRule.rule_id,
+            ComplianceRule.pass_type,
+            ComplianceRule.category_id,
+            best.c.sum_insured,
+            ComplianceRule.min_sum_insured,
+        )
+        .join(ComplianceRule, ComplianceRule.pass_type == Employee.pass_type)
+        .outerjoin(best, and_(
+            best.c.employee_id == Employee.employee_id,
+            best.c.category_id == ComplianceRule.category_id,
+        ))
+        .where(
+            Employee.active == True,  # noqa: E712
+            or_(best.c.sum_insured.is_(None),
+                best.c.sum_insured < ComplianceRule.min_sum_insured),
+        )
+    )
+    if employee_filter is not None:
+        stmt = stmt.where(employee_filter(Employee.employee_id))
+    return stmt
+
+
+def _check(conn: Connection, employee_filter=None):
+    target = ComplianceViolation.__table__
+    stmt = delete(target)
+    if employee_filter is not None:
+        stmt = stmt.where(employee_filter(target.c.employee_id))
+    conn.execute(stmt)
+    conn.execute(insert(target).from_select(
+        VIOLATION_COLUMNS, _violations_query(employee_filter)
+    ))
+
+
+def _last_run(conn: Connection):
+    return conn.execute(
+        select(ComplianceRun)
+        .where(ComplianceRun.status == "completed")
+        .order_by(ComplianceRun.run_id.desc())
+        .limit(1)
+    ).first()
+
+
+def _run_full(conn: Connection, cutoff: datetime) -> int:
+    _check(conn)
+    conn.execute(delete(ComplianceDirty).where(ComplianceDirty.marked_at <= cutoff))
+    return conn.execute(select(func.count()).select_from(Employee)).scalar_one()
+
+
+def _run_incremental(conn: Connection, cutoff: datetime, watermark: int) -> int:
+    dirty = conn.execute(
+        select(ComplianceDirty.employee_id).where(ComplianceDirty.marked_at <= cutoff)
+    ).scalars().all()
+
+    checked = 0
+    for i in range(0, len(dirty), CHECK_BATCH_SIZE):
+        batch = dirty[i:i + CHECK_BATCH_SIZE]
+        _check(conn, lambda col: col.in_(batch))
+        conn.execute(delete(ComplianceDirty).where(
+            ComplianceDirty.employee_id.in_(batch),
+            ComplianceDirty.marked_at <= cutoff,
+        ))
+        checked += len(batch)
+
+    # New employees: one range, whatever path created them
+    _check(conn, lambda col: col > watermark)
+    checked += conn.execute(
+        select(func.count()).where(Employee.employee_id > watermark)
+    ).scalar_one()
+    return checked
+
+
+def run_compliance(mode: str = "incremental"):
+    """Evaluate the rules ("full" or "incremental") and record the run."""
+    cutoff = datetime.now(timezone.utc)
+
+    with engine.begin() as conn:
+        rules_hash = _rules_hash(conn)
+        last = _last_run(conn)
+        if last is None or last.rules_hash != rules_hash:
+            mode = "full"
+
+        run = ComplianceRun(mode=mode, rules_hash=rules_hash, started_at=cutoff)
+        run.max_employee_id = conn.execute(
+            select(func.coalesce(func.max(Employee.employee_id), 0))
+        ).scalar_one()
+
+        if mode == "full":
+            run.employees_checked = _run_full(conn, cutoff)
+        else:
+            run.employees_checked = _run_incremental(conn, cutoff, last.max_employee_id)
+
+        run.violations = conn.execute(
+            select(func.count()).select_from(ComplianceViolation)
+        ).scalar_one()
+        run.status = "completed"
+        run.finished_at = datetime.now(timezone.utc)
+        conn.execute(insert(ComplianceRun).values(
+            **run.model_dump(exclude={"run_id"})
+        ))
+
+    return last_run()
+
+
+def last_run():
+    with Session(engine) as session:
+        run = session.exec(
+            select(ComplianceRun).order_by(ComplianceRun.run_id.desc()).limit(1)
+        ).first()
+        if not run:
+            return None
+        return run.model_dump()
+
+
+def pending_changes() -> bool:
+    """Whether an incremental run now would have anything to do."""
+    with engine.connect() as conn:
+        last = _last_run(conn)
+        if last is None or last.rules_hash != _rules_hash(conn):
+            return True
+        if conn.execute(select(ComplianceDirty.employee_id).limit(1)).first():
+            return True
+        return conn.execute(
+            select(Employee.employee_id).where(Employee.employee_id > last.max_employee_id).limit(1)
+        ).first() is not None
+
+
+# ---------------------------
+# Scheduled runs
+# ---------------------------
+
+class ComplianceScheduler:
+    """
+    Background thread running an incremental pass every `interval`
+    seconds, skipped when nothing changed since the last run.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+        self.runs = 0
+        self.failures = 0
+
+    def start(self):
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="compliance", daemon=True)
+        self._thread.start()
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self.run_pending()
+
+    def run_pending(self) -> bool:
+        """One incremental pass if changes are pending. True if it ran."""
+        try:
+            if not pending_changes():
+                return False
+            run_compliance("incremental")
+        except Exception:
+            self.failures += 1
+            logger.exception("Scheduled compliance run failed")
+            return False
+        self.runs += 1
+        return True
+
+    def shutdown(self):
+        self._stop.set()
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout=5)
+
+    def stats(self):
+        return {
+            "interval_seconds": self.interval,
+            "running": self._thread is not None,
+            "runs": self.runs,
+            "failures": self.failures,
+        }
+
+
+compliance_scheduler = ComplianceScheduler(COMPLIANCE_INTERVAL)
+
+
+# ---------------------------
+# Change tracking
+# ---------------------------
+
+def _mark_dirty(conn: Connection, employee_ids: Optional[Set[int]]):
+    """Coverage snapshot listener: queue employees for the next run."""
+    now = datetime.now(timezone.utc)
+    if employee_ids is None:
+        conn.execute(delete(ComplianceDirty))
+        conn.execute(insert(ComplianceDirty).from_select(
+            ["employee_id", "marked_at"],
+            select(Employee.employee_id, literal(now, ComplianceDirty.__table__.c.marked_at.type)),
+        ))
+        return
+
+    ids = sorted(employee_ids)
+    for i in range(0, len(ids), CHECK_BATCH_SIZE):
+        batch = ids[i:i + CHECK_BATCH_SIZE]
+        conn.execute(delete(ComplianceDirty).where(ComplianceDirty.employee_id.in_(batch)))
+        conn.execute(insert(ComplianceDirty), [
+            {"employee_id": e, "marked_at": now} for e in batch
+        ])
+
+
+coverage_snapshot.CHANGE_LISTENERS.append(_mark_dirty)
+
+
+# ---------------------------
+# Results (keyset pagination)
+# ---------------------------
+
+def parse_cursor(cursor: Optional[str]):
+    """'<employee_id>:<rule_id>' -> (employee_id, rule_id); raises ValueError."""
+    if not cursor:
+        return None
+    employee_id, rule_id = cursor.split(":")
+    return int(employee_id), int(rule_id)
+
+
+def _page_query(after, limit, pass_type, category):
+    stmt = (
+        select(
+            ComplianceViolation.employee_id,
+            Employee.employee_code,
+            Employee.name,
+            ComplianceViolation.pass_type,
+            PolicyCategory.category_name,
+            ComplianceViolation.coverage,
+            ComplianceViolation.min_sum_insured,
+            ComplianceViolation.rule_id,
+        )
+        .join(Employee, Employee.employee_id == ComplianceViolation.employee_id)
+        .join(PolicyCategory, PolicyCategory.category_id == ComplianceViolation.category_id)
+    )
+    if after is not None:
+        stmt = stmt.where(
+            tuple_(ComplianceViolation.employee_id, ComplianceViolation.rule_id) > after
+        )
+    if pass_type is not None:
+        stmt = stmt.where(ComplianceViolation.pass_type == pass_type)
+    if category is not None:
+        stmt = stmt.where(PolicyCategory.category_name == category)
+    return stmt.order_by(
+        ComplianceViolation.employee_id, ComplianceViolation.rule_id
+    ).limit(limit)
+
+
+def _violation_dict(r):
+    return {
+        "employee_id": r.employee_id,
+        "employee_code": r.employee_code,
+        "employee_name": r.name,
+        "pass_type": r.pass_type,
+        "category": r.category_name,
+        "coverage": r.coverage,
+        "required": r.min_sum_insured,
+        "shortfall": r.min_sum_insured - (r.coverage or 0),
+    }
+
+
+def list_violations(
+    after=None,
+    limit: int = 100,
+    pass_type: Optional[str] = None,
+    category: Optional[str] = None,
+):
+    """One page of stored violations; pass next_cursor back as `after`."""
+    with Session(engine) as session:
+        rows = session.exec(_page_query(after, limit, pass_type, category)).all()
+
+    items = [_violation_dict(r) for r in rows]
+    next_cursor = (
+        f"{rows[-1].employee_id}:{rows[-1].rule_id}" if len(rows) == limit else None
+    )
+    return {"items": items, "next_cursor": next_cursor}
+
+
+def iter_violations(
+    after=None,
+    pass_type: Optional[str] = None,
+    category: Optional[str] = None,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> Iterator[dict]:
+    """Every stored violation, fetched in keyset batches."""
+    while True:
+        page = list_violations(after, batch_size, pass_type, category)
+        yield from page["items"]
+        if page["next_cursor"] is None:
+            return
+        after = parse_cursor(page["next_cursor"])
+
+
+# ---------------------------
+# CLI
+# ---------------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m app.services.compliance_service")
+    parser.add_argument("mode", nargs="?", default="incremental", choices=["full", "incremental"])
+    args = parser.parse_args()
+    print(run_compliance(args.mode))
@@ -0,0 +1,336 @@
+# file: app/services/coverage_report.py
+"""
+Coverage report cubes: headcount and total sum insured by category,
+department, insurer and plan, for every combination of those
+dimensions (16 cuboids, see CoverageCube).
+
+Cells are aggregated from EmployeeCoverageSnapshot. A distinct
+headcount adds up over disjoint sets of employees, so a commit that
+touches a few employees only has to subtract what those employees
+contributed before the snapshot refresh and add what they contribute
+after it; the rest of the cube is left alone. Large changes (more than
+INCREMENTAL_LIMIT employees, or a full snapshot rebuild) recompute the
+cube instead.
+
+A report reads the rows of a single cuboid through one index range,
+so its cost depends on the number of cells, not on the number of
+employees. Rebuild on a schedule after changing the tables outside
+the app:
+
+    python -m app.services.coverage_report rebuild
+    python -m app.services.coverage_report check     # count drifted cells
+"""
+import argparse
+from collections import defaultdict
+from itertools import combinations
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import pandas as pd
+from sqlalchemy import delete, func, insert
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Connection
+from sqlmodel import Session, select
+
+from app.database.database import engine
+from app.models import Plan, PolicyCategory, User
+from app.models.coverage_cube import CoverageCube
+from app.models.coverage_snapshot import EmployeeCoverageSnapshot as Snapshot
+from app.services import coverage_snapshot
+
+# Employees aggregated per statement
+AGGREGATE_BATCH_SIZE = 1000
+
+# Above this many affected employees a full rebuild is cheaper
+INCREMENTAL_LIMIT = 20_000
+
+# Snapshot rows from which the rollup is done with pandas
+PANDAS_MIN_ROWS = 5_000
+
+# Dimension -> snapshot expression (see CoverageCube for the "" / 0)
+DIMENSIONS = {
+    "category": Snapshot.category_id,
+    "department": func.coalesce(Snapshot.department, ""),
+    "insurer": func.coalesce(Snapshot.insurer_id, 0),
+    "plan": Snapshot.plan_id,
+}
+CUBE_COLUMNS = {
+    "category": CoverageCube.category_id,
+    "department": CoverageCube.department,
+    "insurer": CoverageCube.insurer_id,
+    "plan": CoverageCube.plan_id,
+}
+_DIMENSION_NAMES = list(DIMENSIONS)
+CUBOIDS = [
+    dims
+    for n in range(len(DIMENSIONS) + 1)
+    for dims in combinations(sorted(DIMENSIONS), n)
+]
+
+# (cuboid dims, values of those dims) -> [headcount, total_sum_insured]
+Cells = Dict[Tuple[Tuple[str, ...], tuple], List[float]]
+
+
+def _cuboid_name(dims: Iterable[str]) -> str:
+    return ",".join(sorted(dims))
+
+
+# ---------------------------
+# Aggregating
+# ---------------------------
+
+def _rollup_python(rows) -> Cells:
+    cells: Cells = defaultdict(lambda: [0, 0.0])
+    for dims in CUBOIDS:
+        positions = [_DIMENSION_NAMES.index(d) + 1 for d in dims]
+        counted = set()     # (employee, key): count each employee once per cell
+        for row in rows:
+            key = tuple(row[p] for p in positions)
+            cell = cells[dims, key]
+            cell[1] += row[-1] or 0
+            if (row[0], key) not in counted:
+                counted.add((row[0], key))
+                cell[0] += 1
+    return cells
+
+
+def _rollup_pandas(rows) -> Cells:
+    df = pd.DataFrame(rows, columns=["employee_id", *_DIMENSION_NAMES, "sum_insured"])
+    cells: Cells = {}
+    if df.empty:
+        return cells
+    cells[(), ()] = [int(df["employee_id"].nunique()), float(df["sum_insured"].sum())]
+    for dims in CUBOIDS[1:]:
+        grouped = (
+            df.groupby(list(dims), sort=False)
+            .agg(headcount=("employee_id", "nunique"), total=("sum_insured", "sum"))
+            .reset_index()
+        )
+        # tolist() for plain Python values the DB driver accepts
+        columns = [grouped[c].tolist() for c in [*dims, "headcount", "total"]]
+        for *key, headcount, total in zip(*columns):
+            cells[dims, tuple(key)] = [headcount, total]
+    return cells
+
+
+def _aggregate(conn: Connection, employee_ids: Optional[Iterable[int]] = None) -> Cells:
+    """Cells of all cuboids over these employees (default: everyone)."""
+    stmt = (
+        select(Snapshot.employee_id, *DIMENSIONS.values(), Snapshot.sum_insured)
+        .where(Snapshot.category_id.isnot(None))
+    )
+    if employee_ids is None:
+        rows = conn.execute(stmt).all()
+    else:
+        ids = sorted(employee_ids)
+        rows = [
+            row
+            for i in range(0, len(ids), AGGREGATE_BATCH_SIZE)
+            for row in conn.execute(stmt.where(Snapshot.employee_id.in_(ids[i:i + AGGREGATE_BATCH_SIZE])))
+        ]
+    # pandas has a fixed cost per group-by that only pays off on bulk changes
+    if len(rows) < PANDAS_MIN_ROWS:
+        return _rollup_python(rows)
+    return _rollup_pandas(rows)
+
+
+def _cell_key(dims, key) -> str:
+    return "|".join([_cuboid_name(dims), *map(str, key)])
+
+
+def _cube_row(dims, key, headcount, total) -> dict:
+    row = {
+        "cell": _cell_key(dims, key),
+        "cuboid": _cuboid_name(dims),
+        "headcount": headcount,
+        "total_sum_insured": round(total, 2),
+    }
+    values = dict(zip(dims, key))
+    for d, column in CUBE_COLUMNS.items():
+        row[column.key] = values.get(d)
+    return row
+
+
+def rebuild(conn: Connection) -> int:
+    """Recompute every cell. Does not commit. Returns the cell count."""
+    rows = [_cube_row(dims, key, h, t) for (dims, key), (h, t) in _aggregate(conn).items()]
+    conn.execute(delete(CoverageCube))
+    if rows:
+        conn.execute(insert(CoverageCube), rows)
+    return len(rows)
+
+
+def _stored_cells(conn: Connection):
+    """cell key -> (headcount, total) of every stored cell."""
+    stmt = select(CoverageCube.cell, CoverageCube.headcount, CoverageCube.total_sum_insured)
+    return {cell: (headcount, total) for cell, headcount, total in conn.execute(stmt)}
+
+
+def _add_statement(conn: Connection):
+    """
+    INSERT a cell, or add its headcount and total to the stored cell.
+    The addition runs in SQL, so concurrent commits touching the same
+    cell (the grand total "" always) each apply their delta.
+    """
+    table = CoverageCube.__table__
+    if conn.dialect.name == "mysql":
+        stmt = mysql_insert(table)
+        return stmt.on_duplicate_key_update(
+            headcount=table.c.headcount + stmt.inserted.headcount,
+            total_sum_insured=func.round(table.c.total_sum_insured + stmt.inserted.total_sum_insured, 2),
+        )
+    stmt = (postgresql_insert if conn.dialect.name == "postgresql" else sqlite_insert)(table)
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.cell],
+        set_={
+            "headcount": table.c.headcount + stmt.excluded.headcount,
+            "total_sum_insured": func.round(table.c.total_sum_insured + stmt.excluded.total_sum_insured, 2),
+        },
+    )
+
+
+def apply_delta(conn: Connection, old: Cells, new: Cells):
+    """Move the cube from `old` to `new` contributions. Does not commit."""
+    rows = []
+    for dims, key in set(old) | set(new):
+        h_old, t_old = old.get((dims, key), (0, 0.0))
+        h_new, t_new = new.get((dims, key), (0, 0.0))
+        if h_old != h_new or abs(t_old - t_new) > 0.005:
+            rows.append(_cube_row(dims, key, h_new - h_old, t_new - t_old))
+    if not rows:
+        return
+
+    conn.execute(_add_statement(conn), rows)
+    # Cells nobody is covered in any more
+    cells = [row["cell"] for row in rows]
+    for i in range(0, len(cells), AGGREGATE_BATCH_SIZE):
+        conn.execute(
+            delete(CoverageCube).where(
+                CoverageCube.cell.in_(cells[i:i + AGGREGATE_BATCH_SIZE]),
+                CoverageCube.headcount <= 0,
+            )
+        )
+
+
+def drift(conn: Connection) -> int:
+    """Cells that differ from a full recomputation (0 = in sync)."""
+    fresh = {_cell_key(*cell): (h, round(t, 2)) for cell, (h, t) in _aggregate(conn).items()}
+    stored = {cell: (h, round(t, 2)) for cell, (h, t) in _stored_cells(conn).items()}
+    return sum(1 for cell in set(fresh) | set(stored) if fresh.get(cell) != stored.get(cell))
+
+
+# ---------------------------
+# Snapshot hooks
+# ---------------------------
+# The affected employees' old cells are read before the snapshot
+# refresh and kept on the connection until the refresh is done.
+
+_PENDING = "coverage_cube_before"
+
+
+def _before_refresh(conn: Connection, employee_ids: Optional[Set[int]]):
+    if employee_ids is None or len(employee_ids) > INCREMENTAL_LIMIT:
+        conn.info[_PENDING] = None
+    else:
+        conn.info[_PENDING] = _aggregate(conn, employee_ids)
+
+
+def _after_refresh(conn: Connection, employee_ids: Optional[Set[int]]):
+    old = conn.info.pop(_PENDING, None)
+    if old is None:
+        rebuild(conn)
+    else:
+        apply_delta(conn, old, _aggregate(conn, employee_ids))
+
+
+coverage_snapshot.BEFORE_REFRESH_LISTENERS.append(_before_refresh)
+coverage_snapshot.CHANGE_LISTENERS.append(_after_refresh)
+
+
+# ---------------------------
+# Slicing
+# ---------------------------
+
+def coverage_report(by: Iterable[str] = ("category",), category: Optional[str] = None,
+                    department: Optional[str] = None, insurer_id: Optional[int] = None,
+                    plan_id: Optional[int] = None):
+    """
+    Cells grouped by the `by` dimensions, optionally filtered on any
+    dimension (a filtered dimension is also grouped by).
+    """
+    by = [d for d in by if d]
+    unknown = [d for d in by if d not in DIMENSIONS]
+    if unknown:
+        return {"error": f"Unknown dimension(s): {', '.join(unknown)}. Use {', '.join(DIMENSIONS)}"}
+
+    filters = {"category": category, "department": department, "insurer": insurer_id, "plan": plan_id}
+    filters = {d: v for d, v in filters.items() if v is not None}
+    dims = sorted(set(by) | set(filters))
+
+    with Session(engine) as session:
+        stmt = (
+            select(
+                CoverageCube,
+                PolicyCategory.category_name,
+                Plan.plan_name,
+                User.username,
+            )
+            .outerjoin(PolicyCategory, PolicyCategory.category_id == CoverageCube.category_id)
+            .outerjoin(Plan, Plan.plan_id == CoverageCube.plan_id)
+            .outerjoin(User, User.user_id == CoverageCube.insurer_id)
+            .where(CoverageCube.cuboid == _cuboid_name(dims))
+            .order_by(*[CUBE_COLUMNS[d] for d in dims])
+        )
+        if "category" in filters:
+            stmt = stmt.where(PolicyCategory.category_name == filters["category"])
+        if "department" in filters:
+            stmt = stmt.where(CoverageCube.department == filters["department"])
+        if "insurer" in filters:
+            stmt = stmt.where(CoverageCube.insurer_id == filters["insurer"])
+        if "plan" in filters:
+            stmt = stmt.where(CoverageCube.plan_id == filters["plan"])
+
+        rows = []
+        for cell, category_name, plan_name, insurer_name in session.exec(stmt):
+            row = {}
+            if "category" in dims:
+                row["category"] = category_name
+            if "department" in dims:
+                row["department"] = cell.department or None
+            if "insurer" in dims:
+                row["insurer_id"] = cell.insurer_id or None
+                row["insurer"] = insurer_name
+            if "plan" in dims:
+                row["plan_id"] = cell.plan_id
+                row["plan"] = plan_name
+            row["headcount"] = cell.headcount
+            row["total_sum_insured"] = cell.total_sum_insured
+            rows.append(row)
+
+        return {"by": dims, "rows": rows}
+
+
+# ---------------------------
+# CLI
+# ---------------------------
+
+def main(argv=None):
+    from app.database.database import DATABASE_URL
+
+    parser = argparse.ArgumentParser(prog="python -m app.services.coverage_report")
+    parser.add_argument("command", choices=["rebuild", "check"])
+    args = parser.parse_args(argv)
+
+    with Session(engine) as session:
+        conn = session.connection()
+        if args.command == "rebuild":
+            cells = rebuild(conn)
+            session.commit()
+            print(f"{DATABASE_URL}: rebuilt coverage cube ({cells} cells)")
+        else:
+            print(f"{DATABASE_URL}: {drift(conn)} coverage cube cells out of sync")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,26 @@
 # file: api/services/coverage_service.py
-from sqlmodel import Session, select
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.database.database import engine
-from app.models import PolicyCategory, PlanTier
+from app.services.reference_cache import get_plan, get_plan_async
 # from api.database.database import SessionLocal
 
+
+def _limits(plan):
+    if not plan:
+        return []
+
+    return [
+        {"category": t["category"], "sum_insured": t["sum_insured"]}
+        for t in plan["tiers"]
+    ]
+
+
 def get_category_limits(plan_id: int):
     with Session(engine) as session:
-        tiers = session.exec(
-            select(PlanTier).where(PlanTier.plan_id == plan_id)
-        ).all()
+        # Plan tiers come from the reference cache (one joined query on a miss)
+        return _limits(get_plan(session, plan_id))
+
 
-        result = []
-        for t in tiers:
-            category = session.get(PolicyCategory, t.category_id)
-            result.append({
-                "category": category.category_name,
-                "sum_insured": t.sum_insured
-            })
-        return result
+async def get_category_limits_async(session: AsyncSession, plan_id: int):
+    return _limits(await get_plan_async(session, plan_id))
@@ -0,0 +1,281 @@
+# file: app/services/coverage_snapshot.py
+"""
+Maintains EmployeeCoverageSnapshot, the read model used by the
+self-service coverage and ward endpoints.
+
+Writes to EmployeePlan, Employee, Plan, PlanTier and PolicyCategory are
+tracked on the session (ORM changes and bulk insert/update/delete
+statements alike). Just before the transaction commits, the snapshot
+rows of every affected employee are rebuilt in the same transaction,
+so readers never see the snapshot out of step with the source tables.
+
+Full rebuild (e.g. after changing the tables outside the app):
+
+    python -m app.services.coverage_snapshot rebuild
+    python -m app.services.coverage_snapshot check     # count drifted rows
+"""
+import argparse
+from itertools import chain
+from typing import Callable, Iterable, List, Optional, Set
+
+from sqlalchemy import delete, event, func, insert, inspect, select, union
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session as OrmSession
+from sqlmodel import Session
+
+from app.models import Employee, EmployeePlan, Plan, PlanTier, PolicyCategory, User
+from app.models.coverage_snapshot import EmployeeCoverageSnapshot as Snapshot
+
+# Employees refreshed per DELETE + INSERT ... SELECT round trip
+REFRESH_BATCH_SIZE = 500
+
+SNAPSHOT_COLUMNS = (
+    "employee_id", "user_id", "employee_name", "employee_code", "department",
+    "plan_id", "plan_name", "insurer_id",
+    "tier_id", "category_id", "category_name", "sum_insured",
+)
+
+
+# ---------------------------
+# Building rows
+# ---------------------------
+
+def _source_query():
+    """The snapshot rows as computed from the source tables."""
+    return (
+        select(
+            Employee.employee_id,
+            Employee.user_id,
+            Employee.name,
+            Employee.employee_code,
+            Employee.department,
+            Plan.plan_id,
+            Plan.plan_name,
+            Plan.insurer_id,
+            PlanTier.tier_id,
+            PolicyCategory.category_id,
+            PolicyCategory.category_name,
+            PlanTier.sum_insured,
+        )
+        .select_from(Employee)
+        .join(EmployeePlan, EmployeePlan.employee_id == Employee.employee_id)
+        .join(Plan, Plan.plan_id == EmployeePlan.plan_id)
+        .outerjoin(PlanTier, PlanTier.plan_id == Plan.plan_id)
+        .outerjoin(PolicyCategory, PolicyCategory.category_id == PlanTier.category_id)
+    )
+
+
+def _insert_from_source(conn: Connection, where=None):
+    source = _source_query()
+    if where is not None:
+        source = source.where(where)
+    conn.execute(
+        insert(Snapshot.__table__).from_select(SNAPSHOT_COLUMNS, source)
+    )
+
+
+def refresh_employees(conn: Connection, employee_ids: Iterable[int]) -> int:
+    """Rebuild the snapshot rows of these employees. Does not commit."""
+    ids = sorted(set(employee_ids))
+    for i in range(0, len(ids), REFRESH_BATCH_SIZE):
+        batch = ids[i:i + REFRESH_BATCH_SIZE]
+        conn.execute(delete(Snapshot.__table__).where(Snapshot.employee_id.in_(batch)))
+        _insert_from_source(conn, Employee.employee_id.in_(batch))
+    return len(ids)
+
+
+def rebuild(conn: Connection) -> int:
+    """Recompute the whole snapshot. Does not commit. Returns the row count."""
+    conn.execute(delete(Snapshot.__table__))
+    _insert_from_source(conn)
+    return conn.execute(select(func.count()).select_from(Snapshot.__table__)).scalar_one()
+
+
+def drift(conn: Connection) -> int:
+    """Rows that differ between the snapshot and the source tables (0 = in sync)."""
+    stored = select(*[getattr(Snapshot, c) for c in SNAPSHOT_COLUMNS])
+    source = _source_query()
+    missing = source.except_(stored).subquery()
+    extra = stored.except_(source).subquery()
+    return sum(
+        conn.execute(select(func.count()).select_from(q)).scalar_one()
+        for q in (missing, extra)
+    )
+
+
+def _affected_employees(conn: Connection, changes: dict) -> Set[int]:
+    employees = set(changes["employees"])
+
+    plans = set(changes["plans"])
+    if changes["categories"]:
+        cats = list(changes["categories"])
+        plans.update(conn.execute(union(
+            select(PlanTier.plan_id).where(PlanTier.category_id.in_(cats)),
+            select(Snapshot.plan_id).where(Snapshot.category_id.in_(cats)),
+        )).scalars())
+
+    plans = list(plans)
+    for i in range(0, len(plans), REFRESH_BATCH_SIZE):
+        batch = plans[i:i + REFRESH_BATCH_SIZE]
+        employees.update(conn.execute(union(
+            select(EmployeePlan.employee_id).where(EmployeePlan.plan_id.in_(batch)),
+            select(Snapshot.employee_id).where(Snapshot.plan_id.in_(batch)),
+        )).scalars())
+    return employees
+
+
+# ---------------------------
+# Change tracking hooks
+# ---------------------------
+# Affected keys are collected on the session while it flushes/executes
+# and the snapshot is refreshed in before_commit, inside the same
+# transaction. "all" means the scope could not be worked out.
+
+_FLAG = "coverage_snapshot_changes"
+
+# Other derived data that depends on the same tables (compliance
+# results, report cubes) registers here. Called in the committing
+# transaction with the affected employee ids, or None when every
+# employee may be affected: BEFORE_REFRESH_LISTENERS while the snapshot
+# still holds the old rows, CHANGE_LISTENERS once it holds the new ones.
+BEFORE_REFRESH_LISTENERS: List[Callable[[Connection, Optional[Set[int]]], None]] = []
+CHANGE_LISTENERS: List[Callable[[Connection, Optional[Set[int]]], None]] = []
+
+# table -> (change kind, key column); employee.user_id etc. are copied
+# into the snapshot, so any employee update counts.
+_TRACKED = {
+    EmployeePlan.__tablename__: ("employees", "employee_id"),
+    Employee.__tablename__: ("employees", "employee_id"),
+    Plan.__tablename__: ("plans", "plan_id"),
+    PlanTier.__tablename__: ("plans", "plan_id"),
+    PolicyCategory.__tablename__: ("categories", "category_id"),
+}
+
+
+def _changes(session) -> dict:
+    return session.info.setdefault(
+        _FLAG, {"employees": set(), "plans": set(), "categories": set(), "all": False}
+    )
+
+
+def _keys(obj, column: str) -> List[int]:
+    """Current and previous value of the key attribute."""
+    history = inspect(obj).attrs[column].history
+    return [k for k in chain([getattr(obj, column)], history.deleted or ()) if k is not None]
+
+
+@event.listens_for(OrmSession, "after_flush")
+def _track_flush(session, flush_context):
+    for obj in chain(session.new, session.dirty, session.deleted):
+        tracked = _TRACKED.get(getattr(obj, "__tablename__", None))
+        if tracked is None or (obj in session.dirty and not session.is_modified(obj)):
+            continue
+        kind, column = tracked
+        _changes(session)[kind].update(_keys(obj, column))
+
+
+@event.listens_for(OrmSession, "do_orm_execute")
+def _track_bulk_write(orm_execute_state):
+    state = orm_execute_state
+    if not (state.is_insert or state.is_update or state.is_delete):
+        return
+    table = getattr(state.statement, "table", None)
+    tracked = _TRACKED.get(getattr(table, "name", None))
+    if tracked is None:
+        return
+
+    kind, column = tracked
+    changes = _changes(state.session)
+
+    if state.is_insert:
+        if table.name == Employee.__tablename__:
+            return  # a new employee has no plan links yet
+        params = state.parameters
+        rows = params if isinstance(params, list) else [params or {}]
+        if rows and all(column in row for row in rows):
+            changes[kind].update(row[column] for row in rows)
+        else:
+            changes["all"] = True   # e.g. insert().values(...)
+        return
+
+    # UPDATE/DELETE: look up the rows the statement is about to touch
+    whereclause = state.statement.whereclause
+    if whereclause is None:
+        changes["all"] = True
+        return
+    keys = state.session.connection().execute(
+        select(table.c[column]).where(whereclause)
+    ).scalars()
+    changes[kind].update(keys)
+
+
+@event.listens_for(OrmSession, "before_commit")
+def _refresh_before_commit(session):
+    # before_commit runs ahead of the final flush; flush first so the
+    # last changes are tracked and visible to the refresh queries.
+    session.flush()
+    changes = session.info.pop(_FLAG, None)
+    if not changes:
+        return
+
+    conn = session.connection()
+    employee_ids = None if changes["all"] else _affected_employees(conn, changes)
+
+    for listener in BEFORE_REFRESH_LISTENERS:
+        listener(conn, employee_ids)
+
+    if employee_ids is None:
+        rebuild(conn)
+    else:
+        refresh_employees(conn, employee_ids)
+
+    for listener in CHANGE_LISTENERS:
+        listener(conn, employee_ids)
+
+
+@event.listens_for(OrmSession, "after_rollback")
+def _forget_on_rollback(session):
+    session.info.pop(_FLAG, None)
+
+
+# ---------------------------
+# Lookups
+# ---------------------------
+
+def coverage_rows_query(username: str):
+    """All snapshot rows of a user, in response order (one index range)."""
+    return (
+        select(
+            User.user_id,
+            *[getattr(Snapshot, c) for c in SNAPSHOT_COLUMNS if c != "user_id"],
+        )
+        .select_from(User)
+        .outerjoin(Snapshot, Snapshot.user_id == User.user_id)
+        .where(User.username == username)
+        .order_by(Snapshot.employee_id, Snapshot.plan_id, Snapshot.tier_id)
+    )
+
+
+# ---------------------------
+# CLI
+# ---------------------------
+
+def main(argv=None):
+    from app.database.database import DATABASE_URL, engine
+
+    parser = argparse.ArgumentParser(prog="python -m app.services.coverage_snapshot")
+    parser.add_argument("command", choices=["rebuild", "check"])
+    args = parser.parse_args(argv)
+
+    with Session(engine) as session:
+        conn = session.connection()
+        if args.command == "rebuild":
+            rows = rebuild(conn)
+            session.commit()
+            print(f"{DATABASE_URL}: rebuilt coverage snapshot ({rows} rows)")
+        else:
+            print(f"{DATABASE_URL}: {drift(conn)} snapshot rows out of sync")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,158 @@
+import logging
+from types import SimpleNamespace
+from typing import Iterator, List, Optional
+
+from sqlalchemy import exists, select as sql_select
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.database.database import engine
 
-from app.models import (
-    User, Employee, Plan, PlanTier,
-    PolicyCategory
-)
+from app.models import User, Employee, EmployeePlan
+from app.services.coverage_snapshot import coverage_rows_query
+
+logger = logging.getLogger(__name__)
+
+
+# -------------------------------------------------
+# 0. Shared loader
+#    Normal case: one index range on the coverage snapshot.
+#    Error cases (no employee / no plan) use the source tables.
+# -------------------------------------------------
+def _employee_plans_query(username: str):
+    # Outer joins keep a row even when a link is missing, so the error
+    # cases are told apart without extra queries.
+    return (
+        select(
+            User.user_id,
+            Employee.employee_id,
+            Employee.name,
+            Employee.employee_code,
+            EmployeePlan.plan_id,
+        )
+        .select_from(User)
+        .outerjoin(Employee, Employee.user_id == User.user_id)
+        .outerjoin(EmployeePlan, EmployeePlan.employee_id == Employee.employee_id)
+        .where(User.username == username)
+        .order_by(Employee.employee_id, EmployeePlan.plan_id)
+    )
+
+
+def _check_employee(rows):
+    """Returns (employee, plan_ids) or ({"error": ...}, None)."""
+    # 1. Find user
+    if not rows:
+        return {"error": "User not found"}, None
+
+    # 2. Find employee record (first one, as before)
+    employee = rows[0]
+    if employee.employee_id is None:
+        return {"error": "Not an employee"}, None
+
+    plan_ids = [
+        r.plan_id for r in rows
+        if r.employee_id == employee.employee_id and r.plan_id is not None
+    ]
+    return employee, plan_ids
+
+
+def _from_snapshot(rows):
+    """
+    Returns (employee, plans, coverage) from snapshot rows, or None when
+    the user has no snapshot rows (unknown user, not an employee or no
+    plan) and the error has to be worked out from the source tables.
+    """
+    if not rows or rows[0].employee_id is None:
+        return None
+
+    # 2. Employee (first one, as before)
+    first = rows[0]
+    employee = SimpleNamespace(name=first.employee_name, employee_code=first.employee_code)
+    rows = [r for r in rows if r.employee_id == first.employee_id]
+
+    # 3. Assigned plans, 4. their tiers
+    plans = {}
+    for r in rows:
+        plans.setdefault(r.plan_id, {
+            "plan_id": r.plan_id,
+            "plan_name": r.plan_name,
+            "insurer_id": r.insurer_id,
+        })
+    coverage = [
+        {
+            "category": r.category_name,
+            "sum_insured": r.sum_insured,
+            "plan": r.plan_name,
+        }
+        for r in rows
+        if r.category_id is not None
+    ]
+    return employee, list(plans.values()), coverage
+
+
+def _source_error(rows, username: str):
+    employee, plan_ids = _check_employee(rows)
+    if plan_ids is None:
+        return employee
+    if plan_ids:
+        # Only possible after writes that bypassed the app
+        logger.warning(
+            "Coverage snapshot missing for %s; run: python -m app.services.coverage_snapshot rebuild",
+            username,
+        )
+        return {"error": "Coverage is being updated, please try again later"}
+    return {"error": "No plan assigned"}
+
+
+def _error_from_source(session: Session, username: str):
+    return _source_error(session.exec(_employee_plans_query(username)).all(), username)
+
+
+async def _error_from_source_async(session: AsyncSession, username: str):
+    result = await session.exec(_employee_plans_query(username))
+    return _source_error(result.all(), username)
+
+
+def _load_coverage(session: Session, username: str):
+    loaded = _from_snapshot(session.exec(coverage_rows_query(username)).all())
+    if loaded is None:
+        return _error_from_source(session, username), None, None
+    return loaded
+
+
+async def _load_coverage_async(session: AsyncSession, username: str):
+    result = await session.exec(coverage_rows_query(username))
+    loaded = _from_snapshot(result.all())
+    if loaded is None:
+        return await _error_from_source_async(session, username), None, None
+    return loaded
+
+
+def _coverage_response(employee, plans, coverage):
+    # Employees can hold several plans; the first one is reported
+    # as the assigned plan and `plans` lists all of them.
+    return {
+        "employee_name": employee.name,
+        "employee_code": employee.employee_code,
+        "assigned_plan": plans[0]["plan_name"],
+        "insurer_id": plans[0]["insurer_id"],
+        "plans": plans,
+        "coverage": coverage
+    }
+
+
+def _ward_response(coverage):
+    # Only GHS tiers; with several plans the highest limit applies
+    ghs = [c for c in coverage if c["category"] == "GHS"]
+    if not ghs:
+        return {"error": "No hospitalisation coverage (GHS) for this plan"}
+
+    tier = max(ghs, key=lambda c: c["sum_insured"] or 0)
+
+    return {
+        "ward_class": "B1/B2/A (depends on your model)",  # update as needed
+        "annual_limit": tier["sum_insured"],
+        "category": "GHS – Hospitalisation Plan"
+    }
 
 
 # -------------------------------------------------
@@ -12,46 +160,17 @@ from app.models import (
 # -------------------------------------------------
 def get_employee_coverage(username: str):
     with Session(engine) as session:
+        employee, plans, coverage = _load_coverage(session, username)
+        if plans is None:
+            return employee
+        return _coverage_response(employee, plans, coverage)
 
-        # 1. Find user
-        user = session.exec(
-            select(User).where(User.username == username)
-        ).first()
-        if not user:
-            return {"error": "User not found"}
-
-        # 2. Find employee record
-        employee = session.exec(
-            select(Employee).where(Employee.user_id == user.user_id)
-        ).first()
-        if not employee:
-            return {"error": "Not an employee"}
-
-        # 3. Load assigned plan
-        plan = session.get(Plan, employee.plan_id)
-        if not plan:
-            return {"error": "No plan assigned"}
-
-        # 4. Load plan tiers (GTL, GCI, GPA, GHS, etc.)
-        tiers = session.exec(
-            select(PlanTier).where(PlanTier.plan_id == plan.plan_id)
-        ).all()
 
-        coverage = []
-        for tier in tiers:
-            category = session.get(PolicyCategory, tier.category_id)
-            coverage.append({
-                "category": category.category_name,
-                "sum_insured": tier.sum_insured
-            })
-
-        return {
-            "employee_name": employee.name,
-            "employee_code": employee.employee_code,
-            "assigned_plan": plan.plan_name,
-            "insurer_id": plan.insurer_id,
-            "coverage": coverage
-        }
+async def get_employee_coverage_async(session: AsyncSession, username: str):
+    employee, plans, coverage = await _load_coverage_async(session, username)
+    if plans is None:
+        return employee
+    return _coverage_response(employee, plans, coverage)
 
 
 # -------------------------------------------------
@@ -59,47 +178,99 @@ def get_employee_coverage(username: str):
 # -------------------------------------------------
 def get_ward_class_and_limits(username: str):
     with Session(engine) as session:
+        employee, plans, coverage = _load_coverage(session, username)
+        if plans is None:
+            return employee
+        return _ward_response(coverage)
 
-        # 1. Find user
-        user = session.exec(
-            select(User).where(User.username == username)
-        ).first()
-        if not user:
-            return {"error": "User not found"}
-
-        # 2. Find employee
-        employee = session.exec(
-            select(Employee).where(Employee.user_id == user.user_id)
-        ).first()
-        if not employee:
-            return {"error": "Not an employee"}
-
-        # 3. Load plan
-        plan = session.get(Plan, employee.plan_id)
-        if not plan:
-            return {"error": "No plan assigned"}
-
-        # 4. Load only GHS category
-        ghs_category = session.exec(
-            select(PolicyCategory).where(PolicyCategory.category_name == "GHS")
-        ).first()
-        if not ghs_category:
-            return {"error": "No GHS category defined"}
-
-        tier = session.exec(
-            select(PlanTier)
-            .where(PlanTier.plan_id == plan.plan_id)
-            .where(PlanTier.category_id == ghs_category.category_id)
-        ).first()
-
-        if not tier:
-            return {"error": "No hospitalisation coverage (GHS) for this plan"}
-
-        return {
-            "ward_class": "B1/B2/A (depends on your model)",  # update as needed
-            "annual_limit": tier.sum_insured,
-            "category": "GHS – Hospitalisation Plan"
-        }
+
+async def get_ward_class_and_limits_async(session: AsyncSession, username: str):
+    employee, plans, coverage = await _load_coverage_async(session, username)
+    if plans is None:
+        return employee
+    return _ward_response(coverage)
+
+
+# -------------------------------------------------
+# 3. Employee listing (keyset pagination)
+# -------------------------------------------------
+# Columns clients may ask for with ?fields=; employee_id is always sent
+# because it is the pagination cursor.
+EMPLOYEE_FIELDS = ("employee_id", "employee_code", "name", "department", "age", "gender", "pass_type", "active", "user_id")
+
+# Rows fetched per round trip when streaming a full export
+EXPORT_BATCH_SIZE = 1000
+
+
+def parse_fields(fields: Optional[str]) -> List[str]:
+    """'name,age' -> ['employee_id', 'name', 'age']; raises ValueError."""
+    if not fields:
+        return list(EMPLOYEE_FIELDS)
+
+    wanted = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in wanted if f not in EMPLOYEE_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {unknown}")
+    return ["employee_id"] + [f for f in dict.fromkeys(wanted) if f != "employee_id"]
+
+
+def _employees_query(columns, after, limit, department, plan_id):
+    # sqlalchemy's select, run with session.execute: rows stay tuples even
+    # for ?fields=employee_id (sqlmodel's select returns bare scalars for
+    # a single column)
+    stmt = sql_select(*[getattr(Employee, c) for c in columns])
+    if after is not None:
+        stmt = stmt.where(Employee.employee_id > after)
+    if department is not None:
+        stmt = stmt.where(Employee.department == department)
+    if plan_id is not None:
+        stmt = stmt.where(
+            exists().where(
+                EmployeePlan.employee_id == Employee.employee_id,
+                EmployeePlan.plan_id == plan_id,
+            )
+        )
+    return stmt.order_by(Employee.employee_id).limit(limit)
+
+
+def list_employees_page(
+    columns: List[str],
+    after: Optional[int] = None,
+    limit: int = 100,
+    department: Optional[str] = None,
+    plan_id: Optional[int] = None,
+):
+    """
+    One page of employees after the `after` cursor, as plain dicts.
+    next_cursor is None on the last page.
+    """
+    with Session(engine) as session:
+        rows = session.execute(
+            _employees_query(columns, after, limit, department, plan_id)
+        ).all()
+
+    items = [dict(zip(columns, row)) for row in rows]
+    next_cursor = items[-1]["employee_id"] if len(items) == limit else None
+    return {"items": items, "next_cursor": next_cursor}
+
+
+def iter_employees(
+    columns: List[str],
+    after: Optional[int] = None,
+    department: Optional[str] = None,
+    plan_id: Optional[int] = None,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> Iterator[dict]:
+    """
+    Every matching employee, fetched in keyset batches so memory stays
+    bounded however large the table is.
+    """
+    while True:
+        page = list_employees_page(columns, after, batch_size, department, plan_id)
+        yield from page["items"]
+        if page["next_cursor"] is None:
+            return
+        after = page["next_cursor"]
 
 
 # # file: api/services/employee_service.py
@@ -0,0 +1,217 @@
+# file: app/services/etags.py
+"""
+Conditional GET (ETag / If-None-Match) for responses that only change
+when their data does.
+
+Each entity family has a change counter, bumped after a transaction
+that wrote one of the family's tables commits (same session hooks as
+the reference cache). An endpoint calls not_modified() before touching
+the database. The ETag is built from the counters of the families the
+response depends on, so when the client's If-None-Match still matches,
+the request ends with 304 there, without a query or serialization.
+ETagMiddleware adds the ETag and Cache-Control headers to the full
+responses and counts how many conditional requests ended in 304 (see
+/admin/metrics).
+
+The counters live in the process. Tags carry a per-process id, so a
+tag from another worker or before a restart never matches. With
+several workers, a write made through one worker is not seen by the
+others' counters: run one worker, or set ETAGS_ENABLED=0. Writes made
+outside the app: POST /admin/cache/invalidate bumps every family.
+"""
+import hashlib
+import os
+import secrets
+import threading
+from itertools import chain
+from typing import Dict, Iterable, Optional
+
+from fastapi import HTTPException, Request
+from sqlalchemy import event
+from sqlalchemy.orm import Session as OrmSession
+from starlette.datastructures import MutableHeaders
+
+from app.models import Bid, Employee, EmployeePlan, Plan, PlanTier, PolicyCategory, User
+
+ETAGS_ENABLED = os.getenv("ETAGS_ENABLED", "1") == "1"
+
+# Clients may keep a copy but must revalidate it on every use
+CACHE_CONTROL = "private, no-cache"
+
+FAMILIES = {
+    # plans, tiers and categories (/coverage/plan, /insurer/categories)
+    "reference": (Plan, PlanTier, PolicyCategory),
+    # what the employee coverage snapshot is built from (/employee/me/...)
+    "coverage": (Employee, EmployeePlan, Plan, PlanTier, PolicyCategory, User),
+    # premiums and headcounts behind the dashboards (/analytics/...)
+    "analytics": (Bid, Employee, EmployeePlan, Plan, PlanTier, PolicyCategory),
+}
+_TABLE_FAMILIES: Dict[str, set] = {}
+for _family, _models in FAMILIES.items():
+    for _model in _models:
+        _TABLE_FAMILIES.setdefault(_model.__tablename__, set()).add(_family)
+
+# Tags from another process (or before a restart) never match
+_PROCESS_ID = secrets.token_hex(4)
+
+
+# ---------------------------
+# Change counters
+# ---------------------------
+
+class ChangeVersions:
+    def __init__(self, families: Iterable[str]):
+        self._versions = dict.fromkeys(families, 0)
+        self._lock = threading.Lock()
+
+    def get(self, families: Iterable[str]) -> tuple:
+        return tuple(self._versions[f] for f in families)
+
+    def bump(self, families: Iterable[str]):
+        with self._lock:
+            for family in families:
+                self._versions[family] += 1
+
+    def stats(self) -> dict:
+        return dict(self._versions)
+
+
+change_versions = ChangeVersions(FAMILIES)
+
+
+class ETagStats:
+    """Per family: tagged responses, conditional requests, 304s."""
+
+    def __init__(self):
+        self._counts: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, families: Iterable[str], conditional: bool, not_modified: bool):
+        with self._lock:
+            for family in families:
+                counts = self._counts.setdefault(family, {"responses": 0, "conditional": 0, "not_modified": 0})
+                counts["responses"] += 1
+                counts["conditional"] += conditional
+                counts["not_modified"] += not_modified
+
+    def stats(self) -> dict:
+        with self._lock:
+            out = {}
+            for family, counts in self._counts.items():
+                ratio = counts["not_modified"] / counts["responses"] if counts["responses"] else None
+                out[family] = {**counts, "not_modified_ratio": round(ratio, 4) if ratio is not None else None}
+            return {"enabled": ETAGS_ENABLED, "versions": change_versions.stats(), "families": out}
+
+
+etag_stats = ETagStats()
+
+
+# ---------------------------
+# Endpoint check
+# ---------------------------
+
+def _etag(request: Request, families, scope) -> str:
+    # A tag is only valid for the URL (and user) it was issued for
+    target = f"{request.url.path}?{request.url.query}|{scope}"
+    key = hashlib.blake2b(target.encode(), digest_size=6).hexdigest()
+    versions = ".".join(str(v) for v in change_versions.get(families))
+    return f'W/"{_PROCESS_ID}-{key}-{versions}"'
+
+
+def _matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = {tag.strip() for tag in if_none_match.split(",")}
+    # weak comparison: W/"x" matches "x"
+    return "*" in tags or etag in tags or etag[2:] in tags
+
+
+def not_modified(request: Request, *families: str, scope=None):
+    """
+    Call before any DB access (after the auth checks). Raises 304 when
+    the client's copy is current; otherwise the response gets tagged
+    with the versions read here, before the data is queried, so a write
+    racing with the query only costs the client one extra refresh.
+    `scope` separates per-user responses served from the same URL.
+    """
+    if not ETAGS_ENABLED:
+        return
+    etag = _etag(request, families, scope)
+    request.state.etag = etag
+    request.state.etag_families = families
+    if _matches(request.headers.get("if-none-match"), etag):
+        raise HTTPException(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
+
+class ETagMiddleware:
+    """Adds ETag / Cache-Control to tagged 200 responses and counts 304s."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        async def send_tagged(message):
+            if message["type"] == "http.response.start":
+                state = scope.get("state") or {}
+                etag = state.get("etag")
+                if etag is not None:
+                    status = message["status"]
+                    if status == 200:
+                        headers = MutableHeaders(scope=message)
+                        headers["ETag"] = etag
+                        headers["Cache-Control"] = CACHE_CONTROL
+                    if status in (200, 304):
+                        conditional = any(k == b"if-none-match" for k, _ in scope["headers"])
+                        etag_stats.record(state["etag_families"], conditional, status == 304)
+            await send(message)
+
+        await self.app(scope, receive, send_tagged)
+
+
+# ---------------------------
+# Change tracking
+# ---------------------------
+# Families are only flagged on the session; counters move once the
+# transaction commits, so a tag never covers a rolled-back change.
+
+_FLAG = "etag_families_changed"
+
+
+def _flag(session, table_name: Optional[str]):
+    families = _TABLE_FAMILIES.get(table_name)
+    if families:
+        session.info.setdefault(_FLAG, set()).update(families)
+
+
+@event.listens_for(OrmSession, "after_flush")
+def _track_flush(session, flush_context):
+    for obj in chain(session.new, session.dirty, session.deleted):
+        _flag(session, getattr(obj, "__tablename__", None))
+
+
+@event.listens_for(OrmSession, "do_orm_execute")
+def _track_bulk_write(orm_execute_state):
+    state = orm_execute_state
+    if state.is_insert or state.is_update or state.is_delete:
+        table = getattr(state.statement, "table", None)
+        _flag(state.session, getattr(table, "name", None))
+
+
+@event.listens_for(OrmSession, "after_commit")
+def _bump_on_commit(session):
+    families = session.info.pop(_FLAG, None)
+    if families:
+        change_versions.bump(families)
+
+
+@event.listens_for(OrmSession, "after_rollback")
+def _forget_on_rollback(session):
+    session.info.pop(_FLAG, None)
+
+
+def invalidate_etags():
+    """After changing the tables outside the app."""
+    change_versions.bump(FAMILIES)
@@ -0,0 +1,248 @@
+# file: app/services/import_job_service.py
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import BinaryIO
+
+from sqlmodel import Session, select
+
+from app.database.database import engine
+from app.models import ImportJob
+from app.services.import_service import ImportFormatError, import_employees_file
+
+# Each import holds one write transaction for its whole run, so keep this
+# at 1 on SQLite (it only allows one writer at a time).
+IMPORT_WORKERS = int(os.getenv("IMPORT_WORKERS", "1"))
+
+# Uploads are kept here until their job finishes, so queued jobs
+# survive a restart. Must be on persistent storage in production.
+IMPORT_SPOOL_DIR = os.getenv(
+    "IMPORT_SPOOL_DIR", os.path.join(tempfile.gettempdir(), "tcx3901-imports")
+)
+
+# Row errors returned by the status endpoint (the job keeps all of them)
+MAX_ERRORS_IN_STATUS = 100
+
+ACTIVE_STATUSES = ("queued", "running")
+
+logger = logging.getLogger(__name__)
+
+_executor = ThreadPoolExecutor(max_workers=IMPORT_WORKERS, thread_name_prefix="import")
+
+# Progress of running jobs. Kept in memory: the import's own transaction
+# holds the write lock, so progress can't be written to the job row.
+_running = {}
+_running_lock = threading.Lock()
+
+
+class ImportCancelled(Exception):
+    pass
+
+
+# ---------------------------
+# Job lifecycle
+# ---------------------------
+
+def spool_upload(source: BinaryIO, filename: str) -> str:
+    """Copy an upload into IMPORT_SPOOL_DIR and return the new path."""
+    os.makedirs(IMPORT_SPOOL_DIR, exist_ok=True)
+    suffix = os.path.splitext(filename)[1]
+    with tempfile.NamedTemporaryFile(
+        dir=IMPORT_SPOOL_DIR, suffix=suffix, delete=False
+    ) as tmp:
+        shutil.copyfileobj(source, tmp, 1024 * 1024)
+        return tmp.name
+
+
+def create_job(file_path: str, filename: str, chunk_size: int):
+    with Session(engine) as session:
+        job = ImportJob(filename=filename, file_path=file_path, chunk_size=chunk_size)
+        session.add(job)
+        session.commit()
+        session.refresh(job)
+
+    _executor.submit(_run_job, job.job_id)
+    return job_status(job)
+
+
+def cancel_job(job_id: int):
+    with _running_lock:
+        live = _running.get(job_id)
+        if live:
+            # The worker stops at its next chunk and rolls back
+            live["cancel"].set()
+
+    with Session(engine) as session:
+        job = session.get(ImportJob, job_id)
+        if not job:
+            return None
+
+        if job.status == "queued":
+            job.status = "cancelled"
+            job.finished_at = datetime.now(timezone.utc)
+            session.add(job)
+            session.commit()
+            session.refresh(job)
+            _remove_upload(job.file_path)
+
+        return job_status(job)
+
+
+def resume_jobs():
+    """Re-queue jobs interrupted by a restart (call on startup)."""
+    with Session(engine) as session:
+        jobs = session.exec(
+            select(ImportJob)
+            .where(ImportJob.status.in_(ACTIVE_STATUSES))
+            .order_by(ImportJob.job_id)
+        ).all()
+
+        for job in jobs:
+            # A running job's transaction was rolled back when the
+            # process died, so it is safe to start it over.
+            if os.path.exists(job.file_path):
+                job.status = "queued"
+                job.rows_processed = 0
+            else:
+                job.status = "failed"
+                job.errors = json.dumps(["Upload was lost before the job finished"])
+                job.finished_at = datetime.now(timezone.utc)
+            session.add(job)
+
+        session.commit()
+        queued = [job.job_id for job in jobs if job.status == "queued"]
+
+    for job_id in queued:
+        _executor.submit(_run_job, job_id)
+    if queued:
+        logger.info("Resumed import jobs: %s", queued)
+
+
+def shutdown_workers():
+    _executor.shutdown(wait=False, cancel_futures=True)
+
+
+# ---------------------------
+# Worker
+# ---------------------------
+
+def _remove_upload(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _update_job(job_id: int, **fields):
+    with Session(engine) as session:
+        job = session.get(ImportJob, job_id)
+        for key, value in fields.items():
+            setattr(job, key, value)
+        session.add(job)
+        session.commit()
+        session.refresh(job)
+        return job
+
+
+def _run_job(job_id: int):
+    # Register first so a cancel racing with start-up is not lost
+    live = {"cancel": threading.Event(), "rows_processed": 0}
+    with _running_lock:
+        _running[job_id] = live
+
+    with Session(engine) as session:
+        job = session.get(ImportJob, job_id)
+        if not job or job.status != "queued":
+            with _running_lock:
+                _running.pop(job_id, None)
+            return  # cancelled while waiting
+        file_path, filename, chunk_size = job.file_path, job.filename, job.chunk_size
+
+    _update_job(job_id, status="running", started_at=datetime.now(timezone.utc))
+
+    def progress(result):
+        live["rows_processed"] = result["rows_processed"]
+        if live["cancel"].is_set():
+            raise ImportCancelled()
+
+    final = {}
+    try:
+        with Session(engine) as session:
+            result = import_employees_file(
+                session, file_path, filename, chunk_size=chunk_size, progress=progress
+            )
+        final = {
+            "status": "completed",
+            "rows_processed": result["rows_processed"],
+            "employees_created": result["employees_created"],
+            "plan_links_created": result["plan_links_created"],
+            "error_count": len(result["errors"]),
+            "errors": json.dumps(result["errors"]),
+        }
+    except ImportCancelled:
+        final = {"status": "cancelled", "rows_processed": live["rows_processed"]}
+    except ImportFormatError as e:
+        final = {"status": "failed", "errors": json.dumps([str(e)])}
+    except Exception as e:
+        logger.exception("Import job %s failed", job_id)
+        final = {"status": "failed", "errors": json.dumps([f"Import failed: {e}"])}
+    finally:
+        final["finished_at"] = datetime.now(timezone.utc)
+        _update_job(job_id, **final)
+        with _running_lock:
+            _running.pop(job_id, None)
+        _remove_upload(file_path)
+
+
+# ---------------------------
+# Status
+# ---------------------------
+
+def job_status(job: ImportJob):
+    with _running_lock:
+        live = _running.get(job.job_id)
+        rows = live["rows_processed"] if live else job.rows_processed
+        cancelling = bool(live and live["cancel"].is_set())
+
+    throughput = None
+    if job.started_at:
+        end = job.finished_at or datetime.now(timezone.utc)
+        elapsed = (end - job.started_at).total_seconds()
+        if elapsed > 0:
+            throughput = round(rows / elapsed, 1)
+
+    errors = json.loads(job.errors) if job.errors else []
+
+    return {
+        "job_id": job.job_id,
+        "filename": job.filename,
+        "status": "cancelling" if cancelling else job.status,
+        "rows_processed": rows,
+        "employees_created": job.employees_created,
+        "plan_links_created": job.plan_links_created,
+        "rows_per_second": throughput,
+        "error_count": job.error_count or len(errors),
+        "errors": errors[:MAX_ERRORS_IN_STATUS],
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
+
+
+def get_job(job_id: int):
+    with Session(engine) as session:
+        job = session.get(ImportJob, job_id)
+        return job_status(job) if job else None
+
+
+def list_jobs(limit: int = 50):
+    with Session(engine) as session:
+        jobs = session.exec(
+            select(ImportJob).order_by(ImportJob.job_id.desc()).limit(limit)
+        ).all()
+        return [job_status(job) for job in jobs]
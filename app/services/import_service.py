@@ -0,0 +1,372 @@
+# file: app/services/import_service.py
+import csv
+import logging
+import os
+from typing import Callable, Iterable, Iterator, List, Optional, Set
+
+import pandas as pd
+from openpyxl import load_workbook
+from sqlalchemy import insert
+from sqlmodel import Session, select
+
+from app.models import Employee, Plan
+from app.models.employee_plan import EmployeePlan
+
+# Rows written per executemany batch. Can be overridden per request.
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "1000"))
+
+# Employee codes bound per IN (...) lookup, whatever the chunk size
+LOOKUP_BATCH_SIZE = 1000
+
+REQUIRED_COLUMNS = ["Employee Code", "Name", "Department", "Age", "Gender"]
+PLAN_IDS_COLUMN = "Plan IDs"
+PASS_TYPE_COLUMN = "Pass Type"   # optional: WP, S-Pass, EP; blank for locals
+
+# Header sits on the first sheet row, so data starts on row 2
+FIRST_DATA_ROW = 2
+
+# TODO: assign appropriate user later
+DEFAULT_USER_ID = 1
+
+logger = logging.getLogger(__name__)
+
+
+class ImportFormatError(ValueError):
+    """The uploaded file cannot be read or lacks required columns."""
+
+
+# ---------------------------
+# Column coercion (vectorized)
+# ---------------------------
+
+def _text_column(series: pd.Series) -> pd.Series:
+    """Strip strings, keep missing values as None."""
+    text = series.astype("string").str.strip()
+    text = text.mask(text == "")
+    return text.astype(object).where(text.notna(), None)
+
+
+def _code_column(series: pd.Series) -> pd.Series:
+    """Employee codes read as numbers (1001.0) are written back as '1001'."""
+    numeric = pd.to_numeric(series, errors="coerce")
+    integral = numeric.notna() & (numeric % 1 == 0)
+
+    codes = _text_column(series)
+    codes[integral] = numeric[integral].astype("int64").astype(str)
+    return codes
+
+
+def _plan_links(df: pd.DataFrame, known_plan_ids: Set[int]):
+    """
+    Explode the comma separated 'Plan IDs' column into one row per link.
+    Returns (links, bad_values) where both are indexed by the source row.
+    """
+    if PLAN_IDS_COLUMN not in df.columns:
+        empty = pd.Series(dtype="int64")
+        return empty, pd.Series(dtype=object)
+
+    raw = df[PLAN_IDS_COLUMN].dropna().astype(str).str.split(",").explode()
+    raw = raw.str.strip()
+    raw = raw[raw != ""]
+
+    numeric = pd.to_numeric(raw, errors="coerce")
+    valid = numeric.notna() & (numeric % 1 == 0)
+    valid &= numeric.where(valid, -1).isin(known_plan_ids)
+
+    links = numeric[valid].astype("int64")
+    # "1,1" links the row to plan 1 once
+    links = links[~pd.MultiIndex.from_arrays([links.index, links]).duplicated()]
+    return links, raw[~valid]
+
+
+def prepare_chunk(df: pd.DataFrame, known_plan_ids: Set[int]):
+    """
+    Validate and coerce one chunk of the employee sheet.
+    The chunk index must hold the sheet row numbers (used in error reports).
+
+    Returns (employees, plan_links, errors):
+      - employees: DataFrame of insertable rows
+      - plan_links: Series of plan_id indexed by the same row numbers
+      - errors: list of {"row", "errors"} for rejected rows
+    """
+    codes = _code_column(df["Employee Code"])
+    age_raw = df["Age"]
+    age = pd.to_numeric(age_raw, errors="coerce")
+
+    checks = {
+        "Employee Code is required": codes.isna(),
+        "Age must be a whole number": age_raw.notna() & (age.isna() | (age % 1 != 0)),
+        "Age must not be negative": age < 0,
+    }
+
+    links, bad_plan_values = _plan_links(df, known_plan_ids)
+
+    rejected = pd.Series(False, index=df.index)
+    for mask in checks.values():
+        rejected |= mask
+    rejected[bad_plan_values.index.unique()] = True
+
+    errors = []
+    for row in rejected[rejected].index:
+        messages = [msg for msg, mask in checks.items() if mask[row]]
+        if row in bad_plan_values.index:
+            values = bad_plan_values.loc[[row]].tolist()
+            messages.append(f"Unknown or invalid plan IDs: {values}")
+        errors.append({"row": int(row), "errors": messages})
+
+    age = age.astype("Int64").astype(object)
+
+    employees = pd.DataFrame({
+        "employee_code": codes,
+        "name": _text_column(df["Name"]),
+        "department": _text_column(df["Department"]),
+        "age": age.where(age.notna(), None),
+        "gender": _text_column(df["Gender"]),
+        "pass_type": _text_column(df[PASS_TYPE_COLUMN])
+        if PASS_TYPE_COLUMN in df.columns else None,
+    })[~rejected]
+
+    links = links[~links.index.isin(rejected[rejected].index)]
+    return employees, links, errors
+
+
+def reject_taken_codes(session: Session, employees: pd.DataFrame, links: pd.Series):
+    """
+    Drop rows whose employee_code already exists (in the database, which
+    includes earlier chunks of this import, or earlier in the chunk).
+    Returns (employees, links, errors) like prepare_chunk().
+    """
+    codes = employees["employee_code"]
+    if codes.empty:
+        return employees, links, []
+
+    unique = codes.unique().tolist()
+    in_db = set()
+    for i in range(0, len(unique), LOOKUP_BATCH_SIZE):
+        in_db.update(session.exec(
+            select(Employee.employee_code)
+            .where(Employee.employee_code.in_(unique[i:i + LOOKUP_BATCH_SIZE]))
+        ).all())
+    taken = codes.isin(in_db) | codes.duplicated()
+    rows = taken[taken].index
+
+    errors = [{"row": int(row), "errors": ["Employee Code already exists"]} for row in rows]
+    return employees[~taken], links[~links.index.isin(rows)], errors
+
+
+# ---------------------------
+# Batched writes
+# ---------------------------
+
+def _insert_employees(session: Session, rows: List[dict]) -> List[int]:
+    """executemany INSERT, returning the new primary keys in input order."""
+    dialect = session.get_bind().dialect
+
+    if dialect.insert_executemany_returning_sort_by_parameter_order:
+        result = session.exec(
+            insert(Employee).returning(
+                Employee.employee_id, sort_by_parameter_order=True
+            ),
+            params=rows,
+        )
+        return list(result.scalars())
+
+    # MySQL has no RETURNING: one executemany, then the new ids by code
+    # (codes are unique, see reject_taken_codes)
+    session.exec(insert(Employee), params=rows)
+    codes = [row["employee_code"] for row in rows]
+    ids = {}
+    for i in range(0, len(codes), LOOKUP_BATCH_SIZE):
+        ids.update(session.exec(
+            select(Employee.employee_code, Employee.employee_id)
+            .where(Employee.employee_code.in_(codes[i:i + LOOKUP_BATCH_SIZE]))
+        ).all())
+    return [ids[code] for code in codes]
+
+
+def write_chunk(
+    session: Session,
+    employees: pd.DataFrame,
+    links: pd.Series,
+    user_id: int = DEFAULT_USER_ID,
+):
+    """Insert one prepared chunk. Does not commit."""
+    if employees.empty:
+        return 0, 0
+
+    rows = employees.assign(user_id=user_id).to_dict("records")
+    new_ids = pd.Series(_insert_employees(session, rows), index=employees.index)
+
+    link_rows = [
+        {"employee_id": int(emp_id), "plan_id": int(plan_id)}
+        for emp_id, plan_id in zip(new_ids[links.index], links)
+    ]
+    if link_rows:
+        session.exec(insert(EmployeePlan), params=link_rows)
+
+    return len(rows), len(link_rows)
+
+
+# ---------------------------
+# Chunked readers
+# ---------------------------
+
+def _header(values) -> List[str]:
+    return [
+        str(v).strip() if v is not None else f"Unnamed: {i}"
+        for i, v in enumerate(values)
+    ]
+
+
+def iter_excel_chunks(
+    path: str,
+    sheet_name: str = "General",
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+) -> Iterator[pd.DataFrame]:
+    """
+    Stream a worksheet with openpyxl read-only mode, `chunk_size` rows
+    at a time. Only one chunk is ever held in memory.
+    """
+    try:
+        workbook = load_workbook(path, read_only=True, data_only=True)
+    except Exception as e:
+        raise ImportFormatError(f"File read error: not an Excel workbook or a .csv file ({e})") from e
+
+    try:
+        if sheet_name not in workbook.sheetnames:
+            raise ImportFormatError(f"File read error: the workbook has no sheet named '{sheet_name}'")
+
+        rows = workbook[sheet_name].iter_rows(values_only=True)
+        columns = _header(next(rows, ()))
+        padding = (None,) * len(columns)
+
+        batch, row_numbers = [], []
+        for row_number, values in enumerate(rows, start=FIRST_DATA_ROW):
+            # read_excel drops blank rows too
+            if all(v is None for v in values):
+                continue
+            batch.append((values + padding)[:len(columns)])
+            row_numbers.append(row_number)
+
+            if len(batch) == chunk_size:
+                yield pd.DataFrame(batch, columns=columns, index=row_numbers)
+                batch, row_numbers = [], []
+
+        if batch:
+            yield pd.DataFrame(batch, columns=columns, index=row_numbers)
+    finally:
+        workbook.close()
+
+
+def iter_csv_chunks(
+    path: str,
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+) -> Iterator[pd.DataFrame]:
+    """Stream a CSV file with pandas' chunked reader."""
+    try:
+        reader = pd.read_csv(path, chunksize=chunk_size, dtype=object)
+        for chunk in reader:
+            chunk.index += FIRST_DATA_ROW
+            yield chunk
+    except pd.errors.EmptyDataError as e:
+        raise ImportFormatError("File read error: the CSV file is empty") from e
+    except (csv.Error, pd.errors.ParserError, UnicodeDecodeError) as e:
+        raise ImportFormatError(f"File read error: not a readable CSV file ({e})") from e
+
+
+def iter_employee_chunks(
+    path: str,
+    filename: str,
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+) -> Iterator[pd.DataFrame]:
+    """Pick a reader from the uploaded file name (.csv, otherwise Excel)."""
+    if filename.lower().endswith(".csv"):
+        return iter_csv_chunks(path, chunk_size)
+    return iter_excel_chunks(path, "General", chunk_size)
+
+
+# ---------------------------
+# Import pipeline
+# ---------------------------
+
+def missing_columns(columns: Iterable[str]) -> List[str]:
+    columns = set(columns)
+    return [c for c in REQUIRED_COLUMNS if c not in columns]
+
+
+def import_employee_chunks(
+    session: Session,
+    chunks: Iterable[pd.DataFrame],
+    user_id: int = DEFAULT_USER_ID,
+    progress: Optional[Callable[[dict], None]] = None,
+):
+    """
+    Import an iterable of DataFrame chunks in a single transaction.
+    Invalid rows are reported and skipped; they never abort the batch.
+
+    `progress`, if given, is called with the running totals after
+    every chunk.
+    """
+    known_plan_ids = set(session.exec(select(Plan.plan_id)).all())
+
+    result = {
+        "rows_processed": 0,
+        "employees_created": 0,
+        "plan_links_created": 0,
+        "errors": [],
+    }
+
+    try:
+        for chunk in chunks:
+            if result["rows_processed"] == 0:
+                missing = missing_columns(chunk.columns)
+                if missing:
+                    raise ImportFormatError(f"Missing required columns: {missing}")
+
+            employees, links, errors = prepare_chunk(chunk, known_plan_ids)
+            employees, links, taken = reject_taken_codes(session, employees, links)
+            errors = sorted(errors + taken, key=lambda e: e["row"])
+
+            created, linked = write_chunk(session, employees, links, user_id)
+
+            result["rows_processed"] += len(chunk)
+            result["employees_created"] += created
+            result["plan_links_created"] += linked
+            result["errors"].extend(errors)
+
+            logger.info("Employee import: %d rows processed", result["rows_processed"])
+            if progress:
+                progress(result)
+
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+
+    return result
+
+
+def import_employees_dataframe(
+    session: Session,
+    df: pd.DataFrame,
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+    user_id: int = DEFAULT_USER_ID,
+    progress: Optional[Callable[[dict], None]] = None,
+):
+    """Import an in-memory employee sheet in chunks of `chunk_size` rows."""
+    df = df.set_axis(pd.RangeIndex(FIRST_DATA_ROW, FIRST_DATA_ROW + len(df)))
+    chunks = (df.iloc[i:i + chunk_size] for i in range(0, len(df), chunk_size))
+    return import_employee_chunks(session, chunks, user_id, progress)
+
+
+def import_employees_file(
+    session: Session,
+    path: str,
+    filename: str,
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+    user_id: int = DEFAULT_USER_ID,
+    progress: Optional[Callable[[dict], None]] = None,
+):
+    """Stream an Excel/CSV file from disk into the database."""
+    chunks = iter_employee_chunks(path, filename, chunk_size)
+    return import_employee_chunks(session, chunks, user_id, progress)
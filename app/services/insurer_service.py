@@ -1,8 +1,55 @@
 # file: api/services/insurer_service.py
+"""
+Bid submission and revision.
+
+- Deadline: every insert/update carries the "round is open" condition
+  in the same statement, so a bid cannot land after end_date however
+  the requests interleave. Dates are compared as ISO strings in
+  BIDDING_TZ, with either "T" or a space before the time; a date-only
+  end_date is open until the end of that day.
+- Concurrency: Bid.version goes up by one per revision. Every revision
+  is sent with the version it was based on and only applies if nobody
+  else revised the bid in between (compare-and-swap); otherwise the
+  caller gets a conflict and should reload and retry. A revision
+  without a version is refused.
+- Retries: requests sent with an Idempotency-Key store their response
+  in BidSubmission in the same transaction; the same key replays it.
+- BID_LISTENERS are called with the committed bids after each
+  successful submission or revision (not for replays); the live
+  leaderboard registers here.
+"""
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Callable, List, Optional
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import exists, func, insert, literal, or_, update
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import Session, select
 from app.database.database import engine
 # from api.database.database import SessionLocal
-from app.models import PolicyCategory, Bid, BiddingRound
+from app.models import PolicyCategory, Bid, BiddingRound, BidItem, BidSubmission
+
+logger = logging.getLogger(__name__)
+
+BIDDING_TZ = ZoneInfo(os.getenv("BIDDING_TZ", "UTC"))
+
+# Called after commit with the list of bid dicts that changed
+BID_LISTENERS: List[Callable[[List[dict]], None]] = []
+
+# Error messages (the router maps them to status codes)
+BID_NOT_FOUND = "Bid not found"
+ROUND_NOT_FOUND = "Bidding round not found"
+ROUND_CLOSED = "Bidding round is closed"
+CATEGORY_NOT_FOUND = "Policy category not found"
+DUPLICATE_BID = "Bid already submitted for this category; update it instead"
+VERSION_CONFLICT = "Bid was revised by another request; reload it and retry"
+VERSION_REQUIRED = "Send the version of the bid this revision is based on"
+KEY_REUSED = "Idempotency-Key was already used for a different request"
+
 
 def get_required_categories():
     with Session(engine) as session:
@@ -12,25 +59,220 @@ def get_required_categories():
         return categories
 
 
-def submit_bid(insurer_id: int, category_id: int, round_id: int, premium: float):
-    with Session(engine) as session:
-        bid = Bid(
-            insurer_id=insurer_id,
-            category_id=category_id,
-            round_id=round_id,
-            premium=premium
+# ---------------------------
+# Helpers
+# ---------------------------
+
+def _iso(column):
+    # "2025-01-20 17:00:00" -> "2025-01-20T17:00:00"; " " sorts before "T"
+    return func.replace(column, " ", "T")
+
+
+def _open_round(round_id):
+    """SQL conditions on BiddingRound: this round, accepting bids now."""
+    now = datetime.now(BIDDING_TZ)
+    today, now_iso = now.date().isoformat(), now.strftime("%Y-%m-%dT%H:%M:%S")
+    return [
+        BiddingRound.round_id == round_id,
+        or_(BiddingRound.start_date.is_(None), _iso(BiddingRound.start_date) <= now_iso),
+        or_(
+            BiddingRound.end_date.is_(None),
+            _iso(BiddingRound.end_date) >= now_iso,
+            BiddingRound.end_date == today,     # date-only: open all day
+        ),
+    ]
+
+
+def _bid_dict(bid: Bid) -> dict:
+    return {
+        "bid_id": bid.bid_id,
+        "round_id": bid.round_id,
+        "insurer_id": bid.insurer_id,
+        "category_id": bid.category_id,
+        "premium": bid.premium,
+        "version": bid.version,
+    }
+
+
+def _round_error(session: Session, round_id: int) -> dict:
+    if session.get(BiddingRound, round_id) is None:
+        return {"error": ROUND_NOT_FOUND}
+    return {"error": ROUND_CLOSED}
+
+
+def _insert_error(session: Session, round_id: int, category_id: int) -> dict:
+    if session.get(PolicyCategory, category_id) is None:
+        return {"error": CATEGORY_NOT_FOUND}
+    return _round_error(session, round_id)
+
+
+def _insert_bid(session: Session, insurer_id: int, round_id: int, category_id: int, premium: float):
+    """Bid dict, or an error dict. Does not commit."""
+    source = (
+        select(literal(round_id), literal(insurer_id), literal(category_id), literal(premium), literal(1))
+        .select_from(BiddingRound)
+        .where(*_open_round(round_id), exists().where(PolicyCategory.category_id == category_id))
+    )
+    try:
+        inserted = session.exec(
+            insert(Bid).from_select(["round_id", "insurer_id", "category_id", "premium", "version"], source)
+        ).rowcount
+    except IntegrityError:
+        # Round and category exist (checked above): uq_bid_round_insurer_category
+        return {"error": DUPLICATE_BID}
+    if not inserted:
+        return _insert_error(session, round_id, category_id)
+
+    bid = session.exec(
+        select(Bid).where(
+            Bid.round_id == round_id, Bid.insurer_id == insurer_id, Bid.category_id == category_id,
         )
-        session.add(bid)
-        session.commit()
-        return bid
+    ).one()
+    return _bid_dict(bid)
 
 
-def update_bid(bid_id: int, premium: float):
+def _revise_bid(session: Session, insurer_id: int, bid_id: int, premium: float,
+                version: Optional[int]):
+    """Compare-and-swap revision. Bid dict, or an error dict. Does not commit."""
+    if version is None:
+        return {"error": VERSION_REQUIRED}
+    stmt = (
+        update(Bid)
+        .where(
+            Bid.bid_id == bid_id, Bid.insurer_id == insurer_id, Bid.version == version,
+            exists().where(*_open_round(Bid.round_id)),
+        )
+        .values(premium=premium, version=Bid.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    if session.exec(stmt).rowcount:
+        bid = session.get(Bid, bid_id, populate_existing=True)
+        return _bid_dict(bid)
+
+    # Nothing updated: say why
+    bid = session.get(Bid, bid_id, populate_existing=True)
+    if bid is None or bid.insurer_id != insurer_id:
+        return {"error": BID_NOT_FOUND}
+    if bid.version != version:
+        return {"error": VERSION_CONFLICT, "current": _bid_dict(bid)}
+    return _round_error(session, bid.round_id)
+
+
+def _request_hash(operation: str, payload) -> str:
+    body = json.dumps([operation, payload], sort_keys=True, default=str)
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+def _replay(session: Session, insurer_id: int, key: str, request_hash: str):
+    """Stored response for this key, KEY_REUSED error, or None."""
+    stored = session.exec(
+        select(BidSubmission).where(
+            BidSubmission.insurer_id == insurer_id, BidSubmission.idempotency_key == key,
+        )
+    ).first()
+    if stored is None:
+        return None
+    if stored.request_hash != request_hash:
+        return {"error": KEY_REUSED}
+    return json.loads(stored.response)
+
+
+def _notify(result: dict):
+    bids = result["bids"] if "bids" in result else [result]
+    for listener in BID_LISTENERS:
+        try:
+            listener(bids)
+        except Exception:
+            # the bid is committed; a listener failing must not fail the request
+            logger.exception("bid listener failed")
+
+
+def _run_once(insurer_id: int, key: Optional[str], operation: str, payload, apply):
+    """
+    Run `apply(session)` in one transaction. With an idempotency key,
+    a request already completed under that key (including a concurrent
+    one that won the race) gets the stored response instead.
+    """
+    request_hash = _request_hash(operation, payload)
     with Session(engine) as session:
-        bid = session.get(Bid, bid_id)
-        if not bid:
-            return {"error": "Bid not found"}
+        if key:
+            replay = _replay(session, insurer_id, key, request_hash)
+            if replay is not None:
+                return replay
+
+        result = apply(session)
+        if "error" not in result:
+            if key:
+                session.add(BidSubmission(
+                    insurer_id=insurer_id, idempotency_key=key,
+                    request_hash=request_hash, response=json.dumps(result),
+                ))
+            try:
+                session.commit()
+            except IntegrityError:
+                result = {"error": DUPLICATE_BID}
+            else:
+                _notify(result)
+                return result
+
+        session.rollback()
+        if key:
+            replay = _replay(session, insurer_id, key, request_hash)
+            if replay is not None:
+                return replay
+        return result
+
+
+# ---------------------------
+# Bids
+# ---------------------------
+
+def submit_bid(insurer_id: int, category_id: int, round_id: int, premium: float,
+               idempotency_key: Optional[str] = None):
+    payload = {"category_id": category_id, "round_id": round_id, "premium": premium}
+    return _run_once(
+        insurer_id, idempotency_key, "submit", payload,
+        lambda session: _insert_bid(session, insurer_id, round_id, category_id, premium),
+    )
+
+
+def update_bid(bid_id: int, premium: float, insurer_id: int, version: int,
+               idempotency_key: Optional[str] = None):
+    """`version`: the version the revision is based on."""
+    payload = {"bid_id": bid_id, "premium": premium, "version": version}
+    return _run_once(
+        insurer_id, idempotency_key, "update", payload,
+        lambda session: _revise_bid(session, insurer_id, bid_id, premium, version),
+    )
+
+
+def submit_bids(insurer_id: int, round_id: int, items: List[BidItem],
+                idempotency_key: Optional[str] = None):
+    """
+    Submit or revise this insurer's bids for several categories of a
+    round in one transaction: all of them apply, or none.
+    """
+    categories = [item.category_id for item in items]
+    if len(set(categories)) != len(categories):
+        return {"error": "Each category may appear only once"}
+
+    def apply(session: Session):
+        existing = {
+            bid.category_id: bid.bid_id
+            for bid in session.exec(
+                select(Bid).where(Bid.round_id == round_id, Bid.insurer_id == insurer_id)
+            )
+        }
+        bids = []
+        for item in items:
+            if item.category_id in existing:
+                result = _revise_bid(session, insurer_id, existing[item.category_id], item.premium, item.version)
+            else:
+                result = _insert_bid(session, insurer_id, round_id, item.category_id, item.premium)
+            if "error" in result:
+                return {**result, "category_id": item.category_id}
+            bids.append(result)
+        return {"round_id": round_id, "bids": bids}
 
-        bid.premium = premium
-        session.commit()
-        return bid
+    payload = {"round_id": round_id, "items": [item.model_dump() for item in items]}
+    return _run_once(insurer_id, idempotency_key, "bulk", payload, apply)
@@ -0,0 +1,265 @@
+# file: app/services/leaderboard.py
+"""
+Live bid leaderboard: an in-process broker that pushes ranking changes
+of a bidding round to subscribers (the SSE endpoint in the bidding
+router).
+
+- A round's ranking is loaded from the database once, when its first
+  subscriber arrives, and dropped when the last one leaves.
+- insurer_service calls publish() after a bid commits. The change is
+  applied to the in-memory ranking of its category and the resulting
+  delta is serialized once and queued to every subscriber; clients
+  never cause queries of their own.
+- All ranking state is touched only on the event loop thread; publish()
+  hands over with call_soon_threadsafe, so it is safe from the
+  threadpool that runs sync endpoints.
+- A subscriber whose queue fills up (client not reading) is dropped
+  rather than slowing down everyone else.
+
+The broker lives in one process: with several API workers, each worker
+only sees the bids its own requests committed.
+"""
+import asyncio
+import json
+from bisect import bisect_left, insort
+from typing import Dict, List, Optional, Set
+
+from fastapi.concurrency import run_in_threadpool
+from sqlmodel import Session, select
+
+from app.database.database import engine
+from app.models import Bid, BiddingRound, PolicyCategory, User
+from app.services import insurer_service
+
+# Messages buffered per subscriber before it is dropped
+SUBSCRIBER_QUEUE_SIZE = 256
+
+
+# ---------------------------
+# Ranking of one round
+# ---------------------------
+
+class CategoryRanking:
+    """Bids of one category ordered by (premium, insurer_id)."""
+
+    def __init__(self):
+        self.order: List[tuple] = []        # (premium, insurer_id, bid_id)
+        self.bids: Dict[int, dict] = {}     # bid_id -> bid
+
+    def ranks(self) -> Dict[int, int]:
+        """bid_id -> rank (1 = cheapest, ties share a rank)."""
+        ranks, rank, last = {}, 0, None
+        for position, (premium, _, bid_id) in enumerate(self.order, start=1):
+            if premium != last:
+                rank, last = position, premium
+            ranks[bid_id] = rank
+        return ranks
+
+    def apply(self, bid: dict) -> Optional[Dict[int, int]]:
+        """Insert or move a bid; returns the new ranks, None for a stale version."""
+        current = self.bids.get(bid["bid_id"])
+        if current is not None:
+            if current["version"] >= bid["version"]:
+                return None
+            key = (current["premium"], current["insurer_id"], current["bid_id"])
+            del self.order[bisect_left(self.order, key)]
+        self.bids[bid["bid_id"]] = bid
+        insort(self.order, (bid["premium"], bid["insurer_id"], bid["bid_id"]))
+        return self.ranks()
+
+
+class RoundLeaderboard:
+    def __init__(self, round_id: int):
+        self.round_id = round_id
+        self.categories: Dict[int, CategoryRanking] = {}
+        self.category_names: Dict[int, str] = {}
+        self.subscribers: Set[asyncio.Queue] = set()
+        self.pending: Optional[List[dict]] = []     # bids published while loading
+        self.snapshot_message: Optional[str] = None  # serialized once per change
+
+    def load(self, rows, category_names: Dict[int, str]):
+        self.category_names = category_names
+        for bid, insurer in rows:
+            self.categories.setdefault(bid.category_id, CategoryRanking()).apply({
+                "bid_id": bid.bid_id, "insurer_id": bid.insurer_id, "insurer": insurer,
+                "category_id": bid.category_id, "premium": bid.premium, "version": bid.version,
+            })
+        pending, self.pending = self.pending, None
+        return pending
+
+    def apply(self, bid: dict) -> Optional[dict]:
+        """Delta message for one committed bid, or None if nothing changed."""
+        ranking = self.categories.setdefault(bid["category_id"], CategoryRanking())
+        before = ranking.ranks()
+        after = ranking.apply(bid)
+        if after is None:
+            return None
+        self.snapshot_message = None
+        changed = [
+            {"bid_id": bid_id, "rank": rank}
+            for bid_id, rank in after.items() if before.get(bid_id) != rank
+        ]
+        return {
+            "type": "delta",
+            "round_id": self.round_id,
+            "category_id": bid["category_id"],
+            "bid": {**bid, "rank": after[bid["bid_id"]]},
+            "ranks": changed,                        # only bids whose rank moved
+            "best_premium": ranking.order[0][0],
+        }
+
+    def snapshot(self) -> str:
+        if self.snapshot_message is None:
+            self.snapshot_message = json.dumps(self._snapshot())
+        return self.snapshot_message
+
+    def _snapshot(self) -> dict:
+        categories = []
+        for category_id, ranking in sorted(self.categories.items()):
+            ranks = ranking.ranks()
+            categories.append({
+                "category_id": category_id,
+                "category": self.category_names.get(category_id),
+                "bids": [
+                    {**ranking.bids[bid_id], "rank": ranks[bid_id]}
+                    for _, _, bid_id in ranking.order
+                ],
+            })
+        return {"type": "snapshot", "round_id": self.round_id, "categories": categories}
+
+
+def _load_round(round_id: int):
+    """(bid rows, category names) of the round, or None if the round does not exist."""
+    with Session(engine) as session:
+        if session.get(BiddingRound, round_id) is None:
+            return None
+        rows = session.exec(
+            select(Bid, User.username)
+            .join(User, User.user_id == Bid.insurer_id)
+            .where(Bid.round_id == round_id)
+        ).all()
+        categories = dict(session.exec(select(PolicyCategory.category_id, PolicyCategory.category_name)).all())
+        return rows, categories
+
+
+def _insurer_names(insurer_ids) -> Dict[int, str]:
+    with Session(engine) as session:
+        return dict(session.exec(
+            select(User.user_id, User.username).where(User.user_id.in_(list(insurer_ids)))
+        ).all())
+
+
+# ---------------------------
+# Broker
+# ---------------------------
+
+class LeaderboardBroker:
+    def __init__(self):
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.rounds: Dict[int, RoundLeaderboard] = {}
+        self.insurer_names: Dict[int, str] = {}
+        self.loading: Dict[int, asyncio.Future] = {}
+        self.stats = {"loads": 0, "published": 0, "deliveries": 0, "dropped_subscribers": 0}
+
+    async def _board(self, round_id: int) -> Optional[RoundLeaderboard]:
+        """Loaded leaderboard of the round; concurrent first subscribers share one load."""
+        board = self.rounds.get(round_id)
+        if board is not None and board.pending is None:
+            return board
+        if round_id in self.loading:
+            return await asyncio.shield(self.loading[round_id])
+
+        board = self.rounds[round_id] = RoundLeaderboard(round_id)
+        loaded = self.loading[round_id] = self.loop.create_future()
+        try:
+            loaded_round = await run_in_threadpool(_load_round, round_id)
+            self.stats["loads"] += 1
+            if loaded_round is None:
+                board = None
+            else:
+                rows, category_names = loaded_round
+                self.insurer_names.update((bid.insurer_id, insurer) for bid, insurer in rows)
+                for bid in board.load(rows, category_names):
+                    board.apply(bid)
+        except BaseException as exc:
+            board = None
+            loaded.set_exception(exc)
+            raise
+        finally:
+            del self.loading[round_id]
+            if board is None:
+                self.rounds.pop(round_id, None)
+        loaded.set_result(board)
+        return board
+
+    async def subscribe(self, round_id: int) -> Optional[asyncio.Queue]:
+        """Queue of JSON messages, starting with a snapshot; None if no such round."""
+        self.loop = asyncio.get_running_loop()
+        board = await self._board(round_id)
+        if board is None:
+            return None
+
+        queue = asyncio.Queue(SUBSCRIBER_QUEUE_SIZE)
+        queue.put_nowait(board.snapshot())
+        board.subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, round_id: int, queue: asyncio.Queue):
+        board = self.rounds.get(round_id)
+        if board is None:
+            return
+        board.subscribers.discard(queue)
+        if not board.subscribers and board.pending is None:
+            del self.rounds[round_id]
+
+    def subscriber_count(self, round_id: Optional[int] = None) -> int:
+        boards = self.rounds.values() if round_id is None else [self.rounds.get(round_id)]
+        return sum(len(b.subscribers) for b in boards if b is not None)
+
+    def publish(self, bids: List[dict]):
+        """Called after a bid commit, from any thread."""
+        watched = [b for b in bids if b["round_id"] in self.rounds]
+        loop = self.loop
+        if not watched or loop is None or loop.is_closed():
+            return
+        unknown = {b["insurer_id"] for b in watched} - self.insurer_names.keys()
+        if unknown:
+            # once per new insurer, not per subscriber
+            self.insurer_names.update(_insurer_names(unknown))
+        watched = [{**b, "insurer": self.insurer_names.get(b["insurer_id"])} for b in watched]
+        loop.call_soon_threadsafe(self._fan_out, watched)
+
+    def _fan_out(self, bids: List[dict]):
+        for bid in bids:
+            board = self.rounds.get(bid["round_id"])
+            if board is None:
+                continue
+            bid = {k: v for k, v in bid.items() if k != "round_id"}
+            if board.pending is not None:
+                board.pending.append(bid)
+                continue
+            delta = board.apply(bid)
+            if delta is None:
+                continue
+            message = json.dumps(delta)
+            self.stats["published"] += 1
+            for queue in list(board.subscribers):
+                try:
+                    queue.put_nowait(message)
+                    self.stats["deliveries"] += 1
+                except asyncio.QueueFull:
+                    # slow client: drop it; None tells its stream to end
+                    board.subscribers.discard(queue)
+                    self.stats["dropped_subscribers"] += 1
+                    queue.get_nowait()
+                    queue.put_nowait(None)
+
+
+leaderboard_broker = LeaderboardBroker()
+
+
+def _publish(bids: List[dict]):
+    leaderboard_broker.publish(bids)
+
+
+insurer_service.BID_LISTENERS.append(_publish)
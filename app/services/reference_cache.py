@@ -0,0 +1,172 @@
+# file: app/services/reference_cache.py
+"""
+Read-through cache for reference data (Plan, PlanTier, PolicyCategory).
+
+These tables only change when a bidding round ends, so plan details are
+cached per plan_id. Any committed write to them, through the ORM or a
+bulk insert/update/delete statement, clears the cache (see the session
+hooks at the bottom). Call invalidate_reference_data() after changing
+the tables outside the app.
+"""
+import os
+from itertools import chain
+from typing import Dict, Iterable, List
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session as OrmSession
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models import Plan, PlanTier, PolicyCategory
+from app.services.cache import MISSING, TTLCache
+
+REFERENCE_CACHE_TTL = float(os.getenv("REFERENCE_CACHE_TTL", "300"))
+REFERENCE_CACHE_SIZE = int(os.getenv("REFERENCE_CACHE_SIZE", "1024"))
+REFERENCE_CACHE_ENABLED = os.getenv("REFERENCE_CACHE_ENABLED", "1") == "1"
+
+reference_cache = TTLCache(
+    "reference",
+    maxsize=REFERENCE_CACHE_SIZE,
+    ttl=REFERENCE_CACHE_TTL,
+    enabled=REFERENCE_CACHE_ENABLED,
+)
+
+REFERENCE_MODELS = (Plan, PlanTier, PolicyCategory)
+REFERENCE_TABLES = {model.__tablename__ for model in REFERENCE_MODELS}
+
+
+# ---------------------------
+# Lookups
+# ---------------------------
+
+def _plans_query(plan_ids: Iterable[int]):
+    return (
+        select(
+            Plan.plan_id,
+            Plan.plan_name,
+            Plan.insurer_id,
+            PolicyCategory.category_name,
+            PlanTier.sum_insured,
+        )
+        .outerjoin(PlanTier, PlanTier.plan_id == Plan.plan_id)
+        .outerjoin(PolicyCategory, PolicyCategory.category_id == PlanTier.category_id)
+        .where(Plan.plan_id.in_(plan_ids))
+        .order_by(Plan.plan_id, PlanTier.tier_id)
+    )
+
+
+def _group_plans(rows) -> Dict[int, dict]:
+    plans = {}
+    for r in rows:
+        plan = plans.setdefault(r.plan_id, {
+            "plan_id": r.plan_id,
+            "plan_name": r.plan_name,
+            "insurer_id": r.insurer_id,
+            "tiers": [],
+        })
+        if r.category_name is not None:
+            plan["tiers"].append({
+                "category": r.category_name,
+                "sum_insured": r.sum_insured,
+            })
+    return plans
+
+
+def _from_cache(plan_ids: List[int]):
+    """
+    Split plan_ids into (cached plans, ids still to load, cache
+    generation to store the loaded plans under).
+    """
+    generation = reference_cache.generation
+    plans, missing = {}, []
+    for plan_id in plan_ids:
+        cached = reference_cache.get(("plan", plan_id))
+        if cached is MISSING:
+            missing.append(plan_id)
+        elif cached is not None:
+            plans[plan_id] = cached
+    return plans, missing, generation
+
+
+def _store(plans: Dict[int, dict], missing: List[int], loaded: Dict[int, dict], generation: int):
+    for plan_id in missing:
+        # Unknown ids are cached as None too
+        reference_cache.set(("plan", plan_id), loaded.get(plan_id), generation)
+    plans.update(loaded)
+
+
+def get_plans(session: Session, plan_ids: Iterable[int]) -> Dict[int, dict]:
+    """
+    Plan details with their tiers, keyed by plan_id in the order asked
+    for. Cache misses are loaded together in one query. Unknown plan ids
+    are left out.
+    """
+    plan_ids = list(dict.fromkeys(plan_ids))
+    plans, missing, generation = _from_cache(plan_ids)
+
+    if missing:
+        loaded = _group_plans(session.exec(_plans_query(missing)).all())
+        _store(plans, missing, loaded, generation)
+
+    return {plan_id: plans[plan_id] for plan_id in plan_ids if plan_id in plans}
+
+
+async def get_plans_async(session: AsyncSession, plan_ids: Iterable[int]) -> Dict[int, dict]:
+    """get_plans() for an AsyncSession."""
+    plan_ids = list(dict.fromkeys(plan_ids))
+    plans, missing, generation = _from_cache(plan_ids)
+
+    if missing:
+        result = await session.exec(_plans_query(missing))
+        _store(plans, missing, _group_plans(result.all()), generation)
+
+    return {plan_id: plans[plan_id] for plan_id in plan_ids if plan_id in plans}
+
+
+def get_plan(session: Session, plan_id: int):
+    return get_plans(session, [plan_id]).get(plan_id)
+
+
+async def get_plan_async(session: AsyncSession, plan_id: int):
+    return (await get_plans_async(session, [plan_id])).get(plan_id)
+
+
+def invalidate_reference_data():
+    reference_cache.invalidate()
+
+
+# ---------------------------
+# Invalidation hooks
+# ---------------------------
+# Writes are only flagged on the session; the cache is cleared once the
+# transaction commits, so readers never see a rolled-back change.
+
+_FLAG = "reference_data_changed"
+
+
+@event.listens_for(OrmSession, "after_flush")
+def _track_flush(session, flush_context):
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, REFERENCE_MODELS):
+            session.info[_FLAG] = True
+            return
+
+
+@event.listens_for(OrmSession, "do_orm_execute")
+def _track_bulk_write(orm_execute_state):
+    state = orm_execute_state
+    if state.is_insert or state.is_update or state.is_delete:
+        table = getattr(state.statement, "table", None)
+        if table is not None and table.name in REFERENCE_TABLES:
+            state.session.info[_FLAG] = True
+
+
+@event.listens_for(OrmSession, "after_commit")
+def _invalidate_on_commit(session):
+    if session.info.pop(_FLAG, False):
+        invalidate_reference_data()
+
+
+@event.listens_for(OrmSession, "after_rollback")
+def _forget_on_rollback(session):
+    session.info.pop(_FLAG, None)
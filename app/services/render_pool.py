@@ -0,0 +1,106 @@
+# file: app/services/render_pool.py
+
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+
+class RenderPoolBusy(Exception):
+    """Raised when the render queue is full; the caller should retry."""
+
+
+class RenderPool:
+    """
+    Bounded process pool for chart rendering.
+
+    Drawing a figure is pure-Python CPU work that holds the GIL, so it
+    runs in worker processes rather than threads: the event loop and the
+    sync endpoints keep running while a chart is drawn. Same admission
+    rule as LoginPool: at most `max_pending` renders waiting or running,
+    beyond that submit() fails fast with RenderPoolBusy.
+
+    Workers are spawned (not forked from a process that already runs
+    threads) on the first submit, and only import the render function's
+    module. A worker that dies takes the pool with it; the next submit
+    starts a new one.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = None
+        self._lock = threading.Lock()
+
+        self.pending = 0        # queued + running
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.restarts = 0
+        self.time_total = 0.0   # seconds from submit to result, summed
+        self.time_max = 0.0
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    async def submit(self, fn, *args):
+        """fn(*args) in a worker process; fn and args must be picklable."""
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise RenderPoolBusy()
+            self.pending += 1
+
+        started = time.perf_counter()
+        pool = self._pool()
+        ok = False
+        try:
+            result = await asyncio.wrap_future(pool.submit(fn, *args))
+            ok = True
+            return result
+        except BrokenProcessPool:
+            with self._lock:
+                if self._executor is pool:
+                    self._executor = None
+                    self.restarts += 1
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.pending -= 1
+                if ok:
+                    self.completed += 1
+                    self.time_total += elapsed
+                    self.time_max = max(self.time_max, elapsed)
+                else:
+                    self.failed += 1
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "started": self._executor is not None,
+                "pending": self.pending,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "restarts": self.restarts,
+                "avg_render_ms": round(self.time_total / self.completed * 1000, 2)
+                if self.completed else None,
+                "max_render_ms": round(self.time_max * 1000, 2),
+            }
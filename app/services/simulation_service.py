@@ -0,0 +1,381 @@
+# file: app/services/simulation_service.py
+"""
+Premium cost simulation: what a bidding round would cost under
+renewal scenarios ("move GHS to insurer X", "insurer Y 8% dearer on
+GTL", "+15% for the 60+ band"), thousands of them at once.
+
+Pricing is the bid comparison's: every covered employee pays, for each
+category their plan has a tier in, the bid of the carrier (the plan's
+insurer) for that category, per year.
+
+The model of a round is a headcount tensor N[department, age band,
+category, insurer] (covered employees, from one GROUP BY) and the bid
+matrix P[insurer, category]. Cost is linear in headcount, so the
+employees x categories x insurers matrix of the whole workforce
+collapses to N without changing any result: employees who share a
+department, age band and carrier cost the same under every scenario.
+A batch of S scenarios is three arrays:
+
+    carrier[S, category]         insurer taking over the category, -1 = current ones
+    price[S, insurer, category]  factor on the bid premium
+    age[S, age band, category]   factor for an age band
+
+and the cost of every scenario per department and category is two
+einsums over N (see evaluate()), in chunks of SIMULATION_CHUNK
+scenarios. The model is cached per round and data version (the
+"analytics" family of services/etags.py), so a batch runs no SQL
+unless bids, plans or employees changed.
+
+    python -m benchmarks.bench_simulation     # scenarios/s at 50k employees
+"""
+import math
+import os
+import time
+from itertools import product
+from typing import List, NamedTuple, Optional
+
+import numpy as np
+from sqlalchemy import func
+from sqlmodel import Session, select
+
+from app.database.database import engine
+from app.models import (
+    Bid, BiddingRound, Employee, EmployeePlan, Plan, PlanTier, PolicyCategory,
+    Scenario, ScenarioGrid, SimulationRequest,
+)
+from app.services.analytics_service import ANALYTICS_CACHE_TTL, UNASSIGNED, data_version
+from app.services.cache import MISSING, TTLCache
+
+SIMULATION_MAX_SCENARIOS = int(os.getenv("SIMULATION_MAX_SCENARIOS", "20000"))
+
+# Scenarios per einsum; bounds the [S, department, age band, category] temporaries
+SIMULATION_CHUNK = 512
+
+# Lower bounds of the age bands after the first; employees without an age are "unknown"
+AGE_EDGES = (30, 40, 50, 60)
+AGE_BANDS = ["<30", "30-39", "40-49", "50-59", "60+", "unknown"]
+
+model_cache = TTLCache("simulation_model", maxsize=16, ttl=ANALYTICS_CACHE_TTL)
+
+
+class ScenarioError(ValueError):
+    """A scenario names a category, insurer or age band the round does not have."""
+
+
+class PremiumModel(NamedTuple):
+    round_id: int
+    categories: List[str]
+    insurers: List[Optional[int]]   # None: plans without an insurer (never priced)
+    departments: List[str]
+    employees: int                  # active employees
+    headcount: np.ndarray           # [department, age band, category, insurer], covered employees
+    premium: np.ndarray             # [insurer, category], 0 where not quoted
+    quoted: np.ndarray              # [insurer, category], bool
+
+
+class ScenarioBatch(NamedTuple):
+    names: List[str]
+    carrier: np.ndarray     # [scenario, category]
+    price: np.ndarray       # [scenario, insurer, category]
+    age: np.ndarray         # [scenario, age band, category]
+
+
+# ---------------------------
+# Model
+# ---------------------------
+
+def age_band(ages: np.ndarray) -> np.ndarray:
+    """Index into AGE_BANDS; ages are floats with NaN for unknown."""
+    bands = np.searchsorted(AGE_EDGES, ages, side="right")
+    return np.where(np.isnan(ages), len(AGE_BANDS) - 1, bands)
+
+
+def load_model(session: Session, round_id: int) -> PremiumModel:
+    department = func.coalesce(Employee.department, UNASSIGNED)
+    coverage = session.exec(
+        select(department, Employee.age, PlanTier.category_id, Plan.insurer_id, func.count())
+        .select_from(Employee)
+        .join(EmployeePlan, EmployeePlan.employee_id == Employee.employee_id)
+        .join(Plan, Plan.plan_id == EmployeePlan.plan_id)
+        .join(PlanTier, PlanTier.plan_id == Plan.plan_id)
+        .where(Employee.active)
+        .group_by(department, Employee.age, PlanTier.category_id, Plan.insurer_id)
+    ).all()
+    bids = session.exec(
+        select(Bid.insurer_id, Bid.category_id, Bid.premium).where(Bid.round_id == round_id)
+    ).all()
+    categories = session.exec(
+        select(PolicyCategory.category_id, PolicyCategory.category_name).order_by(PolicyCategory.category_id)
+    ).all()
+    employees = session.exec(select(func.count()).select_from(Employee).where(Employee.active)).one()
+
+    category_index = {category_id: i for i, (category_id, _) in enumerate(categories)}
+    insurers = sorted({r[3] for r in coverage} | {b[0] for b in bids}, key=lambda i: (i is None, i or 0))
+    insurer_index = {insurer: i for i, insurer in enumerate(insurers)}
+    departments = sorted({r[0] for r in coverage})
+    department_index = {d: i for i, d in enumerate(departments)}
+
+    headcount = np.zeros((len(departments), len(AGE_BANDS), len(categories), len(insurers)))
+    if coverage:
+        d = np.array([department_index[r[0]] for r in coverage])
+        a = age_band(np.array([np.nan if r[1] is None else r[1] for r in coverage], dtype=float))
+        c = np.array([category_index[r[2]] for r in coverage])
+        i = np.array([insurer_index[r[3]] for r in coverage])
+        np.add.at(headcount, (d, a, c, i), np.array([r[4] for r in coverage], dtype=float))
+
+    premium = np.zeros((len(insurers), len(categories)))
+    quoted = np.zeros(premium.shape, dtype=bool)
+    for insurer_id, category_id, value in bids:
+        premium[insurer_index[insurer_id], category_index[category_id]] = value
+        quoted[insurer_index[insurer_id], category_index[category_id]] = True
+
+    return PremiumModel(
+        round_id=round_id,
+        categories=[name for _, name in categories],
+        insurers=insurers,
+        departments=departments,
+        employees=employees,
+        headcount=headcount,
+        premium=premium,
+        quoted=quoted,
+    )
+
+
+def get_model(round_id: int):
+    """The round's model, or None if there is no such round."""
+    key = (round_id, data_version())
+    model = model_cache.get(key)
+    if model is MISSING:
+        with Session(engine) as session:
+            if session.get(BiddingRound, round_id) is None:
+                return None
+            model = load_model(session, round_id)
+        model_cache.set(key, model)
+    return model
+
+
+# ---------------------------
+# Scenarios
+# ---------------------------
+
+def _lookup(index: dict, key, what: str) -> int:
+    try:
+        return index[key]
+    except KeyError:
+        raise ScenarioError(f"Unknown {what}: {key}")
+
+
+def _indexes(model: PremiumModel):
+    """name -> position of the categories, insurers and age bands."""
+    return (
+        {name: i for i, name in enumerate(model.categories)},
+        {insurer: i for i, insurer in enumerate(model.insurers) if insurer is not None},
+        {name: i for i, name in enumerate(AGE_BANDS)},
+    )
+
+
+def _apply_changes(indexes, price, age, premium_changes, age_changes):
+    """Multiply the factor arrays of the scenarios `price`/`age` (views) by the changes."""
+    categories, insurers, bands = indexes
+    for change in premium_changes:
+        c = slice(None) if change.category is None else _lookup(categories, change.category, "category")
+        i = slice(None) if change.insurer_id is None else _lookup(insurers, change.insurer_id, "insurer")
+        price[..., i, c] *= 1 + change.pct / 100
+    for change in age_changes:
+        c = slice(None) if change.category is None else _lookup(categories, change.category, "category")
+        age[..., _lookup(bands, change.band, "age band"), c] *= 1 + change.pct / 100
+
+
+def _empty_batch(model: PremiumModel, count: int) -> ScenarioBatch:
+    categories, insurers = len(model.categories), len(model.insurers)
+    return ScenarioBatch(
+        names=[],
+        carrier=np.full((count, categories), -1, dtype=np.intp),
+        price=np.ones((count, insurers, categories)),
+        age=np.ones((count, len(AGE_BANDS), categories)),
+    )
+
+
+def _carrier_name(model: PremiumModel, carrier) -> str:
+    moves = [f"{model.categories[c]}->{model.insurers[i]}" for c, i in enumerate(carrier) if i >= 0]
+    return ", ".join(moves) or "current carriers"
+
+
+def encode_scenarios(model: PremiumModel, scenarios: List[Scenario]) -> ScenarioBatch:
+    batch = _empty_batch(model, len(scenarios))
+    indexes = categories, insurers, _ = _indexes(model)
+    for s, scenario in enumerate(scenarios):
+        for category, insurer_id in scenario.carriers.items():
+            batch.carrier[s, _lookup(categories, category, "category")] = _lookup(insurers, insurer_id, "insurer")
+        _apply_changes(indexes, batch.price[s], batch.age[s], scenario.premium_changes, scenario.age_changes)
+        batch.names.append(scenario.name or _carrier_name(model, batch.carrier[s]))
+    return batch
+
+
+def encode_grid(model: PremiumModel, grid: ScenarioGrid) -> ScenarioBatch:
+    indexes = categories, insurers, _ = _indexes(model)
+    columns = [_lookup(categories, category, "category") for category in grid.carriers]
+    options = [
+        [-1 if insurer_id is None else _lookup(insurers, insurer_id, "insurer") for insurer_id in choices]
+        for choices in grid.carriers.values()
+    ]
+    count = math.prod(len(o) for o in options) if options else 0
+    if count > SIMULATION_MAX_SCENARIOS:
+        raise ScenarioError(f"Grid has {count} scenarios, at most {SIMULATION_MAX_SCENARIOS}")
+
+    batch = _empty_batch(model, count)
+    if count:
+        batch.carrier[:, columns] = np.array(list(product(*options)), dtype=np.intp).reshape(count, len(columns))
+    _apply_changes(indexes, batch.price, batch.age, grid.premium_changes, grid.age_changes)
+    batch.names.extend(_carrier_name(model, carrier) for carrier in batch.carrier)
+    return batch
+
+
+def _concat(batches: List[ScenarioBatch]) -> ScenarioBatch:
+    return ScenarioBatch(
+        names=[name for b in batches for name in b.names],
+        carrier=np.concatenate([b.carrier for b in batches]),
+        price=np.concatenate([b.price for b in batches]),
+        age=np.concatenate([b.age for b in batches]),
+    )
+
+
+# ---------------------------
+# Evaluation
+# ---------------------------
+
+def evaluate(model: PremiumModel, batch: ScenarioBatch) -> np.ndarray:
+    """Cost of every scenario, [scenario, department, category]."""
+    headcount = model.headcount                         # d, a, c, i
+    covered = headcount.sum(axis=3)                     # d, a, c
+    count = len(batch.carrier)
+    out = np.empty((count, len(model.departments), len(model.categories)))
+    for start in range(0, count, SIMULATION_CHUNK):
+        chunk = slice(start, start + SIMULATION_CHUNK)
+        carrier, age = batch.carrier[chunk], batch.age[chunk]
+        priced = batch.price[chunk] * model.premium     # s, i, c
+        keep = carrier < 0                              # s, c
+
+        # categories left with their current carriers, repriced
+        current = np.einsum("daci,sic->sdac", headcount, priced, optimize=True)
+        # categories moved: everyone covered pays the new carrier's bid
+        target = np.take_along_axis(priced, np.maximum(carrier, 0)[:, None, :], axis=1)[:, 0, :]
+        per_head = np.where(keep[:, None, None, :], current, covered * np.where(keep, 0.0, target)[:, None, None, :])
+        out[chunk] = np.einsum("sdac,sac->sdc", per_head, age, optimize=True)
+    return out
+
+
+def unpriced(model: PremiumModel, batch: ScenarioBatch) -> np.ndarray:
+    """Covered employee-categories whose carrier has no bid in the round, per scenario."""
+    missing = ~model.quoted                                         # i, c
+    current = np.einsum("daci,ic->c", model.headcount, missing)     # c
+    covered = model.headcount.sum(axis=(0, 1, 3))                   # c
+    target = missing[np.maximum(batch.carrier, 0), np.arange(len(model.categories))]
+    return np.where(batch.carrier < 0, current, covered * target).sum(axis=1)
+
+
+# ---------------------------
+# API
+# ---------------------------
+
+def _summaries(costs, missing, baseline: float, by_department: bool, names, order) -> List[dict]:
+    """One result per scenario in `order`; costs is [scenario, department, category]."""
+    by_category = costs.sum(axis=1)
+    totals = by_category.sum(axis=1)
+    change = totals - baseline
+    change_pct = change / baseline * 100 if baseline else np.full(len(totals), np.nan)
+    departments = costs.sum(axis=2).round(2).tolist() if by_department else None
+
+    totals, change, by_category = totals.round(2).tolist(), change.round(2).tolist(), by_category.round(2).tolist()
+    change_pct, missing = change_pct.round(2).tolist(), missing.astype(int).tolist()
+    out = []
+    for s in order:
+        row = {
+            "index": s,
+            "name": names[s],
+            "total": totals[s],
+            "change": change[s],
+            "change_pct": change_pct[s] if baseline else None,
+            "by_category": by_category[s],
+            "unpriced": missing[s],
+        }
+        if by_department:
+            row["by_department"] = departments[s]
+        out.append(row)
+    return out
+
+
+def _baseline(model: PremiumModel):
+    batch = _empty_batch(model, 1)
+    return evaluate(model, batch), unpriced(model, batch)
+
+
+def describe(round_id: int) -> dict:
+    """Dimensions of the round's model (what scenarios can name) and its current cost."""
+    model = get_model(round_id)
+    if model is None:
+        return {"error": "Bidding round not found"}
+    costs, missing = _baseline(model)
+    bids = {
+        insurer: {model.categories[c]: float(model.premium[i, c]) for c in np.flatnonzero(model.quoted[i])}
+        for i, insurer in enumerate(model.insurers) if insurer is not None
+    }
+    return {
+        "round_id": round_id,
+        "employees": model.employees,
+        "categories": model.categories,
+        "age_bands": AGE_BANDS,
+        "departments": model.departments,
+        "bids": bids,
+        "baseline": _summaries(costs, missing, float(costs.sum()), True, ["current carriers"], [0])[0],
+    }
+
+
+def simulate(round_id: int, request: SimulationRequest) -> dict:
+    """
+    Cost of every scenario of the request against the round's current
+    cost. `unpriced` counts covered employee-categories left with a
+    carrier that did not bid for the category (priced at 0). With
+    `top`, only the N cheapest scenarios, fully priced ones first.
+    """
+    model = get_model(round_id)
+    if model is None:
+        return {"error": "Bidding round not found"}
+
+    started = time.perf_counter()
+    try:
+        parts = []
+        if request.scenarios:
+            parts.append(encode_scenarios(model, request.scenarios))
+        if request.grid is not None:
+            parts.append(encode_grid(model, request.grid))
+        count = sum(len(p.carrier) for p in parts)
+        if not count:
+            raise ScenarioError("No scenarios")
+        if count > SIMULATION_MAX_SCENARIOS:
+            raise ScenarioError(f"{count} scenarios, at most {SIMULATION_MAX_SCENARIOS}")
+    except ScenarioError as e:
+        return {"error": str(e)}
+    batch = _concat(parts)
+
+    costs = evaluate(model, batch)
+    missing = unpriced(model, batch)
+    base_costs, base_missing = _baseline(model)
+    baseline = float(base_costs.sum())
+    seconds = time.perf_counter() - started
+
+    order = range(count)
+    if request.top is not None:
+        order = np.lexsort((costs.sum(axis=(1, 2)), missing > 0))[:request.top].tolist()
+
+    by_department = request.by_department
+    return {
+        "round_id": round_id,
+        "employees": model.employees,
+        "categories": model.categories,
+        "departments": model.departments if by_department else None,
+        "baseline": _summaries(base_costs, base_missing, baseline, by_department, ["current carriers"], [0])[0],
+        "evaluated": count,
+        "seconds": round(seconds, 4),
+        "scenarios": _summaries(costs, missing, baseline, by_department, batch.names, order),
+    }
@@ -0,0 +1,71 @@
+# file: benchmarks/_common.py
+"""
+Shared helpers for the benchmark scripts.
+
+Importing this module points the app at a throwaway SQLite database
+(unless DATABASE_URL is already set), so benchmarks never touch local.db.
+"""
+import os
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+
+_tmpdir = tempfile.mkdtemp(prefix="tcx3901-bench-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmpdir}/bench.db")
+
+from sqlalchemy import event  # noqa: E402
+from sqlmodel import SQLModel  # noqa: E402
+
+from app.database.database import async_engine, engine  # noqa: E402
+from app.database.migrations import schema_version, upgrade  # noqa: E402
+import app.models  # noqa: E402,F401  (register all tables)
+
+
+def reset_database():
+    """Drop every table on the benchmark engine and build the latest schema."""
+    SQLModel.metadata.drop_all(engine)
+    schema_version.drop(engine, checkfirst=True)
+    upgrade(engine)
+
+
+@contextmanager
+def timer():
+    """Yields a dict whose 'seconds' key is filled in on exit."""
+    out = {}
+    start = time.perf_counter()
+    try:
+        yield out
+    finally:
+        out["seconds"] = time.perf_counter() - start
+
+
+def percentiles(samples):
+    """p50/p99 of a list of durations in seconds, reported in ms."""
+    ordered = sorted(samples)
+    p99_index = max(0, int(round(len(ordered) * 0.99)) - 1)
+    return {
+        "p50_ms": statistics.median(ordered) * 1000,
+        "p99_ms": ordered[p99_index] * 1000,
+    }
+
+
+@contextmanager
+def count_queries(binds=None):
+    """
+    Yields a list that collects every SQL statement sent to the sync and
+    async engines (or to `binds`).
+    """
+    binds = binds or [engine, async_engine.sync_engine]
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    for bind in binds:
+        event.listen(bind, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        for bind in binds:
+            event.remove(bind, "before_cursor_execute", before_cursor_execute)
@@ -0,0 +1,303 @@
+# file: benchmarks/bench_analytics.py
+"""
+Analytics endpoints (/analytics/...): aggregates from the live tables,
+cached per data version, charts drawn in the render pool.
+
+    python -m benchmarks.bench_analytics [--employees 50000] [--repeat 20]
+
+Times every endpoint as JSON and as PNG: first request (query, and
+render), cached request, and revalidation with If-None-Match. Fails
+(AssertionError) unless:
+- the JSON series equal the same numbers computed with pandas from the
+  raw tables,
+- a cached request or a 304 runs no SQL,
+- a committed bid change gives new numbers on the next request, while
+  a rolled-back one keeps the cached series,
+- concurrent requests for the same chart share one render, and the
+  event loop keeps answering other requests while a chart is drawn.
+"""
+import argparse
+import asyncio
+import itertools
+import random
+import time
+
+from benchmarks._common import count_queries, engine, percentiles, reset_database, timer
+
+import httpx
+import pandas as pd
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+from sqlmodel import Session, select
+
+from app.auth.auth_service import hash_password
+from app.main import app
+from app.models import Bid, BiddingRound, Employee, EmployeePlan, Plan, PlanTier, PolicyCategory, User
+from app.services import analytics_service
+
+INSURERS = 6
+PLANS = 40
+DEPARTMENTS = 12
+CATEGORIES = ["GTL", "GCI", "GHS", "GPA", "FWMI"]
+ROUNDS = 2
+
+BATCH = 50_000
+
+ENDPOINTS = [
+    "/analytics/department-premium",
+    "/analytics/division-premiums",
+    "/analytics/plan-distribution",
+    "/analytics/plan-distribution?category=GHS",
+]
+
+
+def _insert_batches(conn, model, rows):
+    rows = iter(rows)
+    while batch := list(itertools.islice(rows, BATCH)):
+        conn.execute(insert(model), batch)
+
+
+def load_data(employees: int, seed: int = 0):
+    rng = random.Random(seed)
+    insurers = range(2, INSURERS + 2)
+    with engine.begin() as conn:
+        _insert_batches(conn, User, [
+            {"user_id": 1, "username": "admin", "password_hash": hash_password("admin123"), "role": "admin"},
+            *({"user_id": u, "username": f"insurer{u}", "password_hash": "x", "role": "insurer"} for u in insurers),
+        ])
+        _insert_batches(conn, PolicyCategory, (
+            {"category_id": i, "category_name": c} for i, c in enumerate(CATEGORIES, start=1)
+        ))
+        _insert_batches(conn, Plan, (
+            {"plan_id": p, "plan_name": f"Plan {p}", "insurer_id": insurers[p % INSURERS]}
+            for p in range(1, PLANS + 1)
+        ))
+        _insert_batches(conn, PlanTier, (
+            {"plan_id": p, "category_id": c, "sum_insured": rng.randint(3, 9) * 10000}
+            for p in range(1, PLANS + 1)
+            for c in range(1, len(CATEGORIES) + 1)
+            if rng.random() < 0.8
+        ))
+        _insert_batches(conn, BiddingRound, (
+            {"round_id": r, "round_name": f"Round {r}"} for r in range(1, ROUNDS + 1)
+        ))
+        # Not every insurer quotes every category
+        _insert_batches(conn, Bid, (
+            {"round_id": r, "insurer_id": u, "category_id": c, "premium": rng.randint(50, 900) + 0.5}
+            for r in range(1, ROUNDS + 1)
+            for u in insurers
+            for c in range(1, len(CATEGORIES) + 1)
+            if rng.random() < 0.9
+        ))
+        _insert_batches(conn, Employee, (
+            {
+                "employee_id": i,
+                "user_id": 1,
+                "employee_code": f"EE{i:06d}",
+                "department": f"Dept {rng.randrange(DEPARTMENTS):02d}" if i % 40 else None,
+                "age": rng.randint(20, 65),
+                "active": i % 97 != 0,
+            }
+            for i in range(1, employees + 1)
+        ))
+        _insert_batches(conn, EmployeePlan, (
+            {"employee_id": e, "plan_id": p}
+            for e in range(1, employees + 1)
+            for p in rng.sample(range(1, PLANS + 1), rng.randint(0, 2))
+        ))
+
+
+# ---------------------------
+# Reference numbers (pandas)
+# ---------------------------
+
+def expected(round_id=None, category=None):
+    with engine.connect() as conn:
+        tables = {
+            name: pd.read_sql_table(name, conn)
+            for name in ("employee", "employeeplan", "plan", "plantier", "policycategory", "bid")
+        }
+    emp = tables["employee"][tables["employee"]["active"].astype(bool)].copy()
+    emp["department"] = emp["department"].fillna(analytics_service.UNASSIGNED)
+    round_id = round_id or int(tables["bid"]["round_id"].max())
+
+    covered = (
+        emp.merge(tables["employeeplan"], on="employee_id")
+        .merge(tables["plan"], on="plan_id")
+        .merge(tables["plantier"], on="plan_id")
+        .merge(tables["policycategory"], on="category_id")
+    )
+    bids = tables["bid"][tables["bid"]["round_id"] == round_id]
+    priced = covered.merge(bids, how="left", on=["insurer_id", "category_id"])
+    premium = priced.groupby(["department", "category_name"])["premium"].sum().unstack(fill_value=0.0)
+    headcount = emp.groupby("department").size()
+
+    plans = emp.merge(tables["employeeplan"], on="employee_id").merge(tables["plan"], on="plan_id")
+    if category is not None:
+        tier_plans = covered.loc[covered["category_name"] == category, "plan_id"].unique()
+        plans = plans[plans["plan_id"].isin(tier_plans)]
+    distribution = plans.groupby(["department", "plan_name"])["employee_id"].nunique().unstack(fill_value=0)
+    return premium, headcount, distribution
+
+
+def check_series(client, headers):
+    premium, headcount, distribution = expected()
+    totals = premium.sum(axis=1)
+
+    got = client.get("/analytics/department-premium", headers=headers).json()
+    assert got["departments"] == sorted(headcount.index), got["departments"]
+    assert got["headcount"] == headcount.reindex(got["departments"]).tolist()
+    assert all(abs(a - b) < 0.01 for a, b in zip(got["premium"], totals.reindex(got["departments"]).fillna(0)))
+
+    got = client.get("/analytics/division-premiums", headers=headers).json()
+    assert got["departments"] == sorted(premium.index) and got["categories"] == sorted(premium.columns)
+    for category in got["categories"]:
+        assert all(abs(a - b) < 0.01 for a, b in zip(got["premium"][category], premium[category]))
+    assert all(abs(a - b) < 0.01 for a, b in zip(got["total"], totals))
+
+    got = client.get("/analytics/plan-distribution", headers=headers).json()
+    assert got["departments"] == sorted(distribution.index) and got["plans"] == sorted(distribution.columns)
+    for plan in got["plans"]:
+        assert got["headcount"][plan] == distribution[plan].tolist(), plan
+
+    _, _, ghs = expected(category="GHS")
+    got = client.get("/analytics/plan-distribution?category=GHS", headers=headers).json()
+    assert got["plans"] == sorted(ghs.columns) and len(got["plans"]) < len(distribution.columns)
+    for plan in got["plans"]:
+        assert got["headcount"][plan] == ghs[plan].reindex(got["departments"], fill_value=0).tolist(), plan
+
+    for path in ("/analytics/department-premium?round_id=999", "/analytics/plan-distribution?category=XYZ"):
+        assert client.get(path, headers=headers).status_code == 404, path
+    print("series equal the pandas recomputation from the raw tables OK")
+
+
+def set_premium(bid_id: int, premium: float, commit: bool = True):
+    with Session(engine) as session:
+        bid = session.get(Bid, bid_id)
+        bid.premium = premium
+        session.add(bid)
+        if commit:
+            session.commit()
+        else:
+            session.flush()
+            session.rollback()
+
+
+def check_invalidation(client, headers):
+    path = "/analytics/division-premiums"
+    before = client.get(path, headers=headers).json()
+    with count_queries() as statements:
+        cached = client.get(path, headers=headers)
+    assert cached.json() == before and not statements, statements
+
+    with Session(engine) as session:
+        bid = session.exec(select(Bid).where(Bid.round_id == before["round_id"]).order_by(Bid.bid_id)).first()
+        old = bid.premium
+    set_premium(bid.bid_id, old + 1000, commit=False)
+    with count_queries() as statements:
+        assert client.get(path, headers=headers).json() == before
+    assert not statements, statements
+
+    set_premium(bid.bid_id, old + 1000)
+    after = client.get(path, headers=headers).json()
+    assert sum(after["total"]) > sum(before["total"]), "committed bid change not seen"
+    set_premium(bid.bid_id, old)
+    assert client.get(path, headers=headers).json() == before
+    print("cached without SQL; commit -> new numbers, rollback -> cached OK")
+
+
+# ---------------------------
+# Timing
+# ---------------------------
+
+def _latencies(client, path, headers, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        r = client.get(path, headers=headers)
+        samples.append(time.perf_counter() - start)
+        assert r.status_code in (200, 304), (path, r.status_code)
+    return percentiles(samples)
+
+
+def run(client, headers, repeat):
+    print(f"\n{'endpoint':<56} {'first':>9} {'cached p50':>11} {'304 p50':>9}")
+    for path in ENDPOINTS:
+        for fmt in ("json", "png"):
+            url = f"{path}{'&' if '?' in path else '?'}format={fmt}"
+            analytics_service.series_cache.invalidate()
+            analytics_service.chart_cache.invalidate()
+            with timer() as first:
+                r = client.get(url, headers=headers)
+            assert r.status_code == 200, (url, r.status_code)
+            if fmt == "png":
+                assert r.headers["content-type"] == "image/png" and r.content[:4] == b"\x89PNG"
+            cached = _latencies(client, url, headers, repeat)
+            with count_queries() as statements:
+                revalidate = _latencies(client, url, {**headers, "If-None-Match": r.headers["ETag"]}, repeat)
+            assert not statements, statements
+            print(f"{url:<56} {first['seconds'] * 1000:7.1f}ms {cached['p50_ms']:9.2f}ms "
+                  f"{revalidate['p50_ms']:7.2f}ms")
+    svg = client.get("/analytics/department-premium?format=svg", headers=headers)
+    assert svg.headers["content-type"].startswith("image/svg+xml") and b"<svg" in svg.content[:500]
+
+
+async def check_render_off_loop(headers, concurrent):
+    pool = analytics_service.render_pool
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        # a fresh data version, so nothing is cached
+        analytics_service.chart_cache.invalidate()
+        url = "/analytics/division-premiums?format=png"
+        completed = pool.stats()["completed"]
+
+        pings = []
+
+        async def ping_while(task):
+            while not task.done():
+                start = time.perf_counter()
+                assert (await client.get("/")).status_code == 200
+                pings.append(time.perf_counter() - start)
+                await asyncio.sleep(0.01)
+
+        renders = asyncio.gather(*(client.get(url, headers=headers) for _ in range(concurrent)))
+        task = asyncio.ensure_future(renders)
+        with timer() as render:
+            await ping_while(task)
+            responses = await task
+        assert all(r.status_code == 200 for r in responses)
+        assert len({r.content for r in responses}) == 1
+        assert pool.stats()["completed"] == completed + 1, pool.stats()
+
+    worst = max(pings) * 1000
+    print(f"\n{concurrent} concurrent cold PNG requests: one render, {render['seconds'] * 1000:.0f}ms; "
+          f"{len(pings)} other requests meanwhile, slowest {worst:.1f}ms")
+    assert len(pings) >= 3 and worst < render["seconds"] * 1000 / 2, pings
+    print("renders shared, event loop free while drawing OK")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--employees", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--concurrent", type=int, default=8)
+    args = parser.parse_args()
+
+    reset_database()
+    with timer() as load:
+        load_data(args.employees)
+    print(f"{args.employees} employees loaded in {load['seconds']:.1f}s")
+
+    with TestClient(app) as client:
+        r = client.post("/auth/login", data={"username": "admin", "password": "admin123"})
+        r.raise_for_status()
+        headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+        # start the render processes outside the timings
+        client.get("/analytics/plan-distribution?format=png", headers=headers)
+
+        check_series(client, headers)
+        check_invalidation(client, headers)
+        run(client, headers, args.repeat)
+        asyncio.run(check_render_off_loop(headers, args.concurrent))
+        print(f"\nanalytics metrics: {client.get('/admin/metrics', headers=headers).json()['analytics']}")
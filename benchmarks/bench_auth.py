@@ -0,0 +1,78 @@
+# file: benchmarks/bench_auth.py
+"""
+Authenticated request throughput, principal cache on vs off.
+
+    python -m benchmarks.bench_auth [--requests 2000]
+
+Also checks that a role change is picked up straight away and that a
+password change revokes older tokens.
+"""
+import argparse
+
+from benchmarks._common import count_queries, engine, reset_database, timer
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from app.auth.auth_service import hash_password, principal_cache
+from app.main import app
+from app.models import User
+from app.seed import seed_data
+
+
+def login(client, username, password):
+    r = client.post("/auth/login", data={"username": username, "password": password})
+    r.raise_for_status()
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+def _update_user(username, **fields):
+    with Session(engine) as session:
+        user = session.exec(select(User).where(User.username == username)).one()
+        for key, value in fields.items():
+            setattr(user, key, value)
+        session.add(user)
+        session.commit()
+
+
+def check_invalidation(client):
+    headers = login(client, "emp001", "emp001pass")
+    client.get("/test-auth/check", headers=headers)
+
+    with count_queries() as statements:
+        client.get("/test-auth/check", headers=headers)
+    assert not statements, statements
+
+    _update_user("emp001", role="admin")
+    assert client.get("/test-auth/check", headers=headers).json()["role"] == "admin"
+
+    _update_user("emp001", password_hash=hash_password("new-pass"))
+    assert client.get("/test-auth/check", headers=headers).status_code == 401
+    headers = login(client, "emp001", "new-pass")
+    assert client.get("/test-auth/check", headers=headers).status_code == 200
+    print("cached hit needs no SQL, role/password invalidation OK")
+
+
+def run(client, requests):
+    headers = login(client, "admin", "admin123")
+    print(f"\n{'cache':>5} {'req/s':>8}")
+    for enabled in (False, True):
+        principal_cache.enabled = enabled
+        principal_cache.invalidate()
+        with timer() as t:
+            for _ in range(requests):
+                client.get("/test-auth/check", headers=headers)
+        print(f"{'on' if enabled else 'off':>5} {requests / t['seconds']:>8.0f}")
+    print("\n", principal_cache.stats())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    reset_database()
+    seed_data()
+    with TestClient(app) as client:
+        check_invalidation(client)
+        run(client, args.requests)
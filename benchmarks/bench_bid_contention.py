@@ -0,0 +1,112 @@
+# file: benchmarks/bench_bid_contention.py
+"""
+Concurrent bid revisions near the deadline.
+
+    python -m benchmarks.bench_bid_contention [--threads 16] [--revisions 400] [--bids 4]
+
+Each revision reads a bid and raises its premium by 1, as an insurer
+tweaking a quote would. Times compare-and-swap (update_bid with the
+version read) and counts its retried conflicts, next to the plain
+read-then-write update the service used before, which loses
+revisions. tests/test_bid_contention.py checks that every revision
+lands once, that idempotent retries create one bid, and the deadline.
+"""
+import argparse
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks._common import engine, reset_database, timer
+
+from sqlalchemy import insert
+from sqlmodel import Session, select, update
+
+from app.models import Bid, BiddingRound, PolicyCategory, User
+from app.services import insurer_service as svc
+
+INSURER = 1
+START_PREMIUM = 1000.0
+
+
+def load_data(bids: int):
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{"user_id": INSURER, "username": "insurer", "password_hash": "x", "role": "insurer"}])
+        conn.execute(insert(PolicyCategory), [
+            {"category_id": c, "category_name": f"CAT{c}"} for c in range(1, bids + 2)
+        ])
+        conn.execute(insert(BiddingRound), [{"round_id": 1, "round_name": "Round 1", "end_date": "2999-12-31"}])
+        conn.execute(insert(Bid), [
+            {"bid_id": b, "round_id": 1, "insurer_id": INSURER, "category_id": b, "premium": START_PREMIUM}
+            for b in range(1, bids + 1)
+        ])
+
+
+def reset_bids(bids: int):
+    with engine.begin() as conn:
+        conn.execute(update(Bid).where(Bid.bid_id <= bids).values(premium=START_PREMIUM, version=1))
+
+
+def read_bid(bid_id: int) -> Bid:
+    with Session(engine) as session:
+        return session.get(Bid, bid_id)
+
+
+def cas_revision(bid_id: int, stats: dict, lock: threading.Lock):
+    bid = read_bid(bid_id)
+    premium, version = bid.premium, bid.version
+    while True:
+        result = svc.update_bid(bid_id, premium + 1, INSURER, version)
+        if result.get("error") != svc.VERSION_CONFLICT:
+            assert "error" not in result, result
+            return
+        with lock:
+            stats["conflicts"] += 1
+        premium, version = result["current"]["premium"], result["current"]["version"]
+
+
+def plain_revision(bid_id: int):
+    """The old update_bid: read, then overwrite."""
+    with Session(engine) as session:
+        bid = session.get(Bid, bid_id)
+        time.sleep(0)   # let other threads in between read and write, as requests would
+        bid.premium = bid.premium + 1
+        session.commit()
+
+
+def final_bids(bids: int):
+    with Session(engine) as session:
+        return session.exec(select(Bid).where(Bid.bid_id <= bids).order_by(Bid.bid_id)).all()
+
+
+def run(threads: int, revisions: int, bids: int):
+    reset_database()
+    load_data(bids)
+    rng = random.Random(0)
+    targets = [rng.randint(1, bids) for _ in range(revisions)]
+    print(f"{revisions} revisions over {bids} bids from {threads} threads\n")
+
+    # plain read-then-write
+    with ThreadPoolExecutor(threads) as pool, timer() as t:
+        list(pool.map(plain_revision, targets))
+    applied = sum(int(b.premium - START_PREMIUM) for b in final_bids(bids))
+    print(f"plain update       {t['seconds']:6.2f}s  {applied}/{revisions} revisions kept, "
+          f"{revisions - applied} lost")
+
+    # compare-and-swap with retry
+    reset_bids(bids)
+    stats, lock = {"conflicts": 0}, threading.Lock()
+    with ThreadPoolExecutor(threads) as pool, timer() as t:
+        list(pool.map(lambda b: cas_revision(b, stats, lock), targets))
+    applied = sum(int(b.premium - START_PREMIUM) for b in final_bids(bids))
+    print(f"compare-and-swap   {t['seconds']:6.2f}s  {applied}/{revisions} revisions kept, "
+          f"{stats['conflicts']} conflicts retried")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--revisions", type=int, default=400)
+    parser.add_argument("--bids", type=int, default=4)
+    args = parser.parse_args()
+    run(args.threads, args.revisions, args.bids)
@@ -0,0 +1,192 @@
+# file: benchmarks/bench_bids.py
+"""
+Bid comparison benchmark: 50 insurers x 20 categories x 10 rounds.
+
+    python -m benchmarks.bench_bids [--insurers 50] [--categories 20] [--rounds 10] [--employees 20000]
+
+Times compare_bids (one windowed query per round) against the same
+comparison assembled in Python from the raw bid rows, with one headcount
+query per category. Fails (AssertionError) if ranks, package order or
+the cheapest mix disagree.
+"""
+import argparse
+import itertools
+import random
+import time
+from collections import defaultdict
+
+from benchmarks._common import count_queries, engine, percentiles, reset_database
+
+from sqlalchemy import func, insert
+from sqlmodel import Session, select
+
+from app.models import (
+    Bid, BiddingRound, CoverageCube, Employee, EmployeePlan, Plan, PlanTier, PolicyCategory, User,
+)
+from app.services import coverage_report, coverage_snapshot
+from app.services.bidding_service import compare_bids
+
+PLANS = 20
+BATCH = 50_000
+
+
+def _insert_batches(conn, model, rows):
+    rows = iter(rows)
+    while batch := list(itertools.islice(rows, BATCH)):
+        conn.execute(insert(model), batch)
+
+
+def load_data(insurers: int, categories: int, rounds: int, employees: int, seed: int = 0):
+    rng = random.Random(seed)
+    with engine.begin() as conn:
+        _insert_batches(conn, User, (
+            {"user_id": u, "username": f"insurer{u}", "password_hash": "x", "role": "insurer"}
+            for u in range(1, insurers + 1)
+        ))
+        _insert_batches(conn, PolicyCategory, (
+            {"category_id": c, "category_name": f"CAT{c:02d}"} for c in range(1, categories + 1)
+        ))
+        _insert_batches(conn, BiddingRound, (
+            {"round_id": r, "round_name": f"Round {r}"} for r in range(1, rounds + 1)
+        ))
+        # most insurers quote every category, some skip a few
+        _insert_batches(conn, Bid, (
+            {
+                "round_id": r, "insurer_id": u, "category_id": c,
+                "premium": round(rng.uniform(50, 500), 2),
+            }
+            for r in range(1, rounds + 1)
+            for u in range(1, insurers + 1)
+            for c in range(1, categories + 1)
+            if u % 5 or rng.random() < 0.8
+        ))
+        _insert_batches(conn, Plan, (
+            {"plan_id": p, "plan_name": f"Plan {p}"} for p in range(1, PLANS + 1)
+        ))
+        _insert_batches(conn, PlanTier, (
+            {"plan_id": p, "category_id": c, "sum_insured": 10000}
+            for p in range(1, PLANS + 1)
+            for c in range(1, categories + 1)
+            if rng.random() < 0.5
+        ))
+        _insert_batches(conn, Employee, (
+            {"employee_id": i, "user_id": 1, "employee_code": f"EE{i:06d}"}
+            for i in range(1, employees + 1)
+        ))
+        _insert_batches(conn, EmployeePlan, (
+            {"employee_id": e, "plan_id": rng.randint(1, PLANS)} for e in range(1, employees + 1)
+        ))
+        coverage_snapshot.rebuild(conn)
+        coverage_report.rebuild(conn)
+
+
+def python_comparison(round_id: int):
+    """
+    The same output assembled in Python from the raw rows (the old
+    compare_bids loop), with one headcount query per category.
+    """
+    with Session(engine) as session:
+        rows = session.exec(
+            select(Bid, User, PolicyCategory)
+            .join(User, User.user_id == Bid.insurer_id)
+            .join(PolicyCategory, PolicyCategory.category_id == Bid.category_id)
+            .where(Bid.round_id == round_id)
+        ).all()
+        required = session.exec(select(func.count()).select_from(PolicyCategory)).one()
+
+        by_category = defaultdict(list)
+        for bid, insurer, category in rows:
+            by_category[category.category_name].append({
+                "bid_id": bid.bid_id, "insurer_id": bid.insurer_id, "insurer": insurer.username,
+                "category_id": bid.category_id, "category": category.category_name,
+                "premium": bid.premium,
+            })
+        headcount = {}
+        for quotes in by_category.values():
+            category_id = quotes[0]["category_id"]
+            headcount[category_id] = session.exec(
+                select(CoverageCube.headcount)
+                .where(CoverageCube.cuboid == "category", CoverageCube.category_id == category_id)
+            ).first() or 0
+
+    bids, packages, mix = [], {}, {}
+    for name in sorted(by_category):
+        quotes = sorted(by_category[name], key=lambda q: (q["premium"], q["insurer_id"]))
+        best = quotes[0]["premium"]
+        for position, q in enumerate(quotes, start=1):
+            tied = bids and bids[-1]["category_id"] == q["category_id"] and bids[-1]["premium"] == q["premium"]
+            q["rank"] = bids[-1]["rank"] if tied else position
+            q["best_premium"] = best
+            q["above_best"] = q["premium"] - best
+            q["headcount"] = headcount[q["category_id"]]
+            q["projected_cost"] = q["premium"] * q["headcount"]
+            bids.append(q)
+            package = packages.setdefault(q["insurer_id"], {
+                "insurer_id": q["insurer_id"], "insurer": q["insurer"],
+                "categories_quoted": 0, "projected_cost": 0.0,
+            })
+            package["categories_quoted"] += 1
+            package["projected_cost"] += q["projected_cost"]
+        mix[quotes[0]["category_id"]] = quotes[0]
+    for package in packages.values():
+        package["complete"] = package["categories_quoted"] == required
+    packages = sorted(packages.values(), key=lambda p: (not p["complete"], p["projected_cost"], p["insurer_id"]))
+    return {
+        "bids": bids,
+        "packages": packages,
+        "cheapest_package": packages[0] if packages and packages[0]["complete"] else None,
+        "cheapest_mix": {"projected_cost": sum(b["projected_cost"] for b in mix.values())},
+    }
+
+
+def time_calls(fn, rounds, repeat):
+    samples = []
+    for _ in range(repeat):
+        for r in range(1, rounds + 1):
+            start = time.perf_counter()
+            fn(r)
+            samples.append(time.perf_counter() - start)
+    return percentiles(samples)
+
+
+def run(insurers, categories, rounds, employees, repeat):
+    reset_database()
+    load_data(insurers, categories, rounds, employees)
+    with Session(engine) as session:
+        bids = session.exec(select(func.count()).select_from(Bid)).one()
+    print(f"{bids} bids, {insurers} insurers x {categories} categories x {rounds} rounds, "
+          f"{employees} employees\n")
+
+    for r in range(1, rounds + 1):
+        result, expected = compare_bids(r), python_comparison(r)
+        assert [(b["bid_id"], b["rank"]) for b in result["bids"]] \
+            == [(b["bid_id"], b["rank"]) for b in expected["bids"]], r
+        assert [p["insurer_id"] for p in result["packages"]] \
+            == [p["insurer_id"] for p in expected["packages"]], r
+        assert round(result["cheapest_mix"]["projected_cost"], 2) \
+            == round(expected["cheapest_mix"]["projected_cost"], 2), r
+
+    with count_queries() as engine_queries:
+        compare_bids(1)
+    with count_queries() as python_queries:
+        python_comparison(1)
+
+    engine_times = time_calls(compare_bids, rounds, repeat)
+    python_times = time_calls(python_comparison, rounds, repeat)
+    print(f"{'':24} {'p50 ms':>8} {'p99 ms':>8} {'queries':>8}")
+    print(f"{'compare_bids (SQL)':24} {engine_times['p50_ms']:8.2f} {engine_times['p99_ms']:8.2f} "
+          f"{len(engine_queries):8}")
+    print(f"{'python assembly':24} {python_times['p50_ms']:8.2f} {python_times['p99_ms']:8.2f} "
+          f"{len(python_queries):8}")
+    print("\nSQL comparison matches Python assembly OK")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--insurers", type=int, default=50)
+    parser.add_argument("--categories", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--employees", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    run(args.insurers, args.categories, args.rounds, args.employees, args.repeat)
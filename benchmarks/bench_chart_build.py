@@ -0,0 +1,168 @@
+# file: benchmarks/bench_chart_build.py
+"""
+Incremental chart builds (the build graph in analytics/generate_charts.py).
+
+    python -m benchmarks.bench_chart_build [--workers N]
+
+Works on values-only copies of the workbooks in a temporary directory
+(formulas replaced by their values, so the copies can be edited and
+saved with openpyxl), with its own workbook cache and output directory.
+Times a full build, a run with nothing changed, and runs after editing
+single cells. Fails (AssertionError) unless:
+- a run with nothing changed draws no chart,
+- an edited cell redraws exactly the charts that declare its column,
+- --only / --force and a deleted PNG behave,
+- every chart declares every source column its numbers depend on
+  (changing any undeclared column leaves its data unchanged).
+"""
+import argparse
+import shutil
+import tempfile
+from pathlib import Path
+
+from benchmarks._common import timer
+
+import openpyxl
+import pandas as pd
+
+from analytics import generate_charts as gc
+from analytics import workbooks
+
+
+def values_only_copy(src: Path, dst: Path):
+    book = openpyxl.load_workbook(src, data_only=True)
+    book.save(dst)
+
+
+def edit_cell(path: Path, sheet, header_row: int, column: str, row: int, value):
+    """Set `column` of data row `row` (0-based, as pandas reads it)."""
+    book = openpyxl.load_workbook(path)
+    ws = book[sheet]
+    names = [str(c.value).strip() if c.value is not None else "" for c in ws[header_row + 1]]
+    ws.cell(row=header_row + 2 + row, column=names.index(column) + 1, value=value)
+    book.save(path)
+
+
+def build(data_dir, out_dir, workers, **kwargs):
+    with timer() as t:
+        result = gc.generate(data_dir, out_dir, workers, **kwargs)
+    return set(result["rendered"]), t["seconds"], result
+
+
+def declared(items, source, column):
+    return {
+        c.path for c in items
+        if source in c.inputs and (c.inputs[source] is None or column in c.inputs[source])
+    }
+
+
+# ---------------------------
+# Declared inputs
+# ---------------------------
+
+def _equal(a, b):
+    if isinstance(a, tuple):
+        return len(a) == len(b) and all(_equal(x, y) for x, y in zip(a, b))
+    if isinstance(a, dict):
+        return a.keys() == b.keys() and all(_equal(a[k], b[k]) for k in a)
+    if isinstance(a, (pd.Series, pd.DataFrame)):
+        return a.equals(b)
+    return a == b
+
+
+def _perturb(series: pd.Series) -> pd.Series:
+    if pd.api.types.is_bool_dtype(series):
+        return ~series
+    if pd.api.types.is_numeric_dtype(series):
+        return series.fillna(0) + 1
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series + pd.Timedelta(days=1)
+    return series.astype(str) + "_X"
+
+
+def check_declarations(data_dir):
+    sources = gc.load_sources(data_dir)
+    base = {c.path: c for c in gc.charts(gc.aggregate(sources))}
+    checked = 0
+    for source in ("general", "div"):
+        for column in sources[source].columns:
+            changed = dict(sources)
+            changed[source] = sources[source].assign(**{column: _perturb(sources[source][column])})
+            try:
+                after = {c.path: c for c in gc.charts(gc.aggregate(changed))}
+            except (KeyError, ValueError, TypeError):
+                after = {}
+            moved = {path for path, c in base.items() if path not in after or not _equal(c.data, after[path].data)}
+            missing = moved - declared(base.values(), source, column)
+            assert not missing, f"{source}:{column} changes {sorted(missing)} but they do not declare it"
+            checked += 1
+    print(f"{checked} source columns: every chart declares the columns its numbers depend on OK")
+
+
+# ---------------------------
+# Runs
+# ---------------------------
+
+def run(workers):
+    tmp = Path(tempfile.mkdtemp(prefix="tcx3901-charts-"))
+    workbooks.CACHE_DIR = tmp / "cache"
+    data_dir, out_dir = tmp / "data", tmp / "charts"
+    data_dir.mkdir()
+    try:
+        for name in (gc.BREAKDOWN, gc.RATES):
+            values_only_copy(gc.DATA_DIR / name, data_dir / name)
+        original = gc.load_sources(gc.DATA_DIR)
+        for source in ("general", "div"):
+            pd.testing.assert_frame_equal(gc.load_sources(data_dir)[source], original[source], check_dtype=False)
+        items = gc.charts(gc.aggregate(original))
+
+        rows = []
+        drawn, seconds, _ = build(data_dir, out_dir, workers)
+        assert len(drawn) == len(items), (len(drawn), len(items))
+        rows.append(("full build", drawn, seconds))
+
+        drawn, seconds, _ = build(data_dir, out_dir, workers)
+        assert not drawn, drawn
+        rows.append(("nothing changed", drawn, seconds))
+
+        edit_cell(data_dir / gc.BREAKDOWN, "General", 0, "Age Grp", 0, 25)
+        drawn, seconds, _ = build(data_dir, out_dir, workers)
+        assert drawn == declared(items, "general", "Age Grp") == {"age_distribution.png"}, drawn
+        rows.append(("General: one Age Grp cell", drawn, seconds))
+
+        edit_cell(data_dir / gc.BREAKDOWN, "Div", 2, "HC", 0, 99)
+        drawn, seconds, _ = build(data_dir, out_dir, workers)
+        assert drawn == declared(items, "div", "HC"), drawn
+        rows.append(("Div: one HC cell", drawn, seconds))
+
+        edit_cell(data_dir / gc.BREAKDOWN, "General", 0, "GHS Premium with GST", 0, 1234.5)
+        drawn, seconds, _ = build(data_dir, out_dir, workers)
+        assert drawn == declared(items, "general", "GHS Premium with GST"), drawn
+        rows.append(("General: one GHS premium cell", drawn, seconds))
+
+        drawn, seconds, _ = build(data_dir, out_dir, workers, only=["department_*_grouped_*"])
+        assert not drawn, drawn
+        drawn, seconds, _ = build(data_dir, out_dir, workers, only=["department_*_grouped_*"], force=True)
+        assert drawn == {c.path for c in items if c.path.endswith("_grouped_headcount_chart.png")}, drawn
+        rows.append(("--only 'department_*_grouped_*' --force", drawn, seconds))
+
+        (out_dir / "age_distribution.png").unlink()
+        drawn, seconds, _ = build(data_dir, out_dir, workers)
+        assert drawn == {"age_distribution.png"}, drawn
+        rows.append(("deleted one PNG", drawn, seconds))
+
+        print(f"{'run':<42} {'drawn':>6} {'seconds':>8}")
+        for name, drawn, seconds in rows:
+            print(f"{name:<42} {len(drawn):>6} {seconds:8.2f}")
+        print("incremental runs draw exactly the affected charts OK\n")
+
+        check_declarations(data_dir)
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+    run(args.workers)
@@ -0,0 +1,224 @@
+# file: benchmarks/bench_charts.py
+"""
+Wall time of the full chart set (analytics/generate_charts.py).
+
+    python -m benchmarks.bench_charts [--workers N]
+
+Times the numbers behind the charts the way the notebook produced them
+(each cell re-reading its sheet, per-row apply, a loop per department)
+against load_sources() + aggregate(), then renders the whole set once
+in-process and once in a pool of N processes (default: one per CPU, at
+least 2). Charts go to a temporary directory, data/charts is left alone.
+Fails (AssertionError) unless the vectorized tables equal the
+notebook-style ones and the rate comparison adds up to the workbook's
+own "Total (Before GST)" row.
+"""
+import argparse
+import os
+import tempfile
+from pathlib import Path
+
+from benchmarks._common import timer
+
+import pandas as pd
+from pandas.testing import assert_frame_equal, assert_series_equal
+
+from analytics.generate_charts import (
+    BREAKDOWN, BUCKETS, DATA_DIR, PACKAGES, PLAN_TIERS, PREMIUM_GST, RATES, VALID_PLANS,
+    aggregate, charts, load_sources, render_all,
+)
+
+
+# ---------------------------
+# Notebook-style reference
+# ---------------------------
+# Same numbers as data/previow.ipynb, cell by cell: every cell reads
+# its own sheet and works row by row / department by department.
+
+def _read(sheet):
+    df = pd.read_excel(DATA_DIR / BREAKDOWN, sheet_name=sheet, header=2 if sheet == "Div" else 0)
+    df.columns = df.columns.str.strip()
+    for col in PACKAGES:
+        df[col] = df[col].astype(str).str.upper().str.strip()
+    if sheet == "Div":
+        df = df[df["Dept"] != "Grand Total"]
+    return df
+
+
+def legacy_tier_premium():
+    df = _read("General")
+    out = {}
+    for pkg in PACKAGES:
+        df[f"{pkg} Premium"] = pd.to_numeric(df[f"{pkg} Premium"], errors="coerce")
+        sums = df[df[pkg] != "NAN"].groupby(pkg)[f"{pkg} Premium"].sum()
+        for plan, value in sums.items():
+            out[(pkg, plan)] = value
+    return pd.Series(out)
+
+
+def legacy_department(premium_cols):
+    df = _read("General")
+    is_plan = lambda value: value in PLAN_TIERS  # noqa: E731
+    df["FWMI_flag"] = df["GHS"].apply(lambda v: "FWMI" in v) | df["GMM"].apply(lambda v: "FWMI" in v)
+    premium, headcount = {}, {}
+    for dept in df["Dept"].unique():
+        dept_df = df[df["Dept"] == dept]
+        row_p, row_h = {}, {}
+        for pkg in PACKAGES:
+            mask = dept_df[pkg].apply(is_plan)
+            if pkg in ("GHS", "GMM"):
+                mask &= ~dept_df["FWMI_flag"]
+            row_h[pkg] = sum(mask)
+            row_p[pkg] = pd.to_numeric(dept_df.loc[mask, premium_cols[pkg]], errors="coerce").fillna(0).sum()
+        flagged = dept_df[dept_df["FWMI_flag"]]
+        row_h["FWMI"] = len(flagged)
+        row_p["FWMI"] = sum(pd.to_numeric(flagged[premium_cols[p]], errors="coerce").fillna(0).sum()
+                            for p in ("GHS", "GMM"))
+        premium[dept], headcount[dept] = row_p, row_h
+    return {"premium": pd.DataFrame(premium).T[BUCKETS], "headcount": pd.DataFrame(headcount).T[BUCKETS]}
+
+
+def legacy_division():
+    df = _read("Div")
+    df["FWMI_flag"] = (df["GHS"] == "FWMI") | (df["GMM"] == "FWMI")
+    premium, headcount = {}, {}
+    for dept in df["Dept"].unique():
+        dept_df = df[df["Dept"] == dept]
+        row_p, row_h = {}, {}
+        for pkg in PACKAGES:
+            mask = dept_df[pkg].isin(PLAN_TIERS)
+            row_h[pkg] = dept_df.loc[mask, "HC"].sum()
+            row_p[pkg] = dept_df.loc[mask, PREMIUM_GST[pkg]].sum()
+        row_h["FWMI"] = dept_df.loc[dept_df["FWMI_flag"], "HC"].sum()
+        row_p["FWMI"] = dept_df.loc[dept_df["FWMI_flag"], [PREMIUM_GST["GHS"], PREMIUM_GST["GMM"]]].sum().sum()
+        premium[dept], headcount[dept] = row_p, row_h
+    return {"premium": pd.DataFrame(premium).T[BUCKETS], "headcount": pd.DataFrame(headcount).T[BUCKETS]}
+
+
+def legacy_headcount():
+    df = _read("General")
+    long = df.melt(id_vars=["Dept"], value_vars=PACKAGES, var_name="Package", value_name="Plan")
+    long = long[long.apply(lambda r: r["Plan"] in VALID_PLANS.get(r["Package"], []), axis=1)]
+    hc = long.groupby(["Dept", "Package", "Plan"], as_index=False).size()
+    rows = []
+    for dept in sorted(df["Dept"].unique()):
+        for pkg, plans in VALID_PLANS.items():
+            for plan in plans:
+                val = hc.loc[(hc["Dept"] == dept) & (hc["Package"] == pkg) & (hc["Plan"] == plan), "size"]
+                rows.append((dept, pkg, plan, int(val.iloc[0]) if not val.empty else 0))
+    return pd.DataFrame(rows, columns=["Department", "Package", "Plan", "Headcount"]).set_index(
+        ["Department", "Package", "Plan"])["Headcount"]
+
+
+def legacy_employment_package():
+    df = _read("General")
+    df["Employment Type"] = df["Employment Type"].astype(str).str.upper().str.strip()
+    types = ["SINGAPOREAN", "SINGAPORE PR", "LONG TERM VISIT PASS", "S PASS", "WORK PERMIT"]
+    records = {}
+    for pkg in BUCKETS:
+        for emp in types:
+            if pkg == "FWMI":
+                mask = df["Employment Type"].eq(emp) & (df["GHS"].eq("FWMI") | df["GMM"].eq("FWMI"))
+            else:
+                mask = df["Employment Type"].eq(emp) & df[pkg].isin(VALID_PLANS[pkg])
+            records.setdefault(pkg, {})[emp] = df[mask].shape[0]
+    return pd.DataFrame(records).T
+
+
+def legacy_division_totals():
+    df = _read("Div")
+    totals, plans = {}, {}
+    for div in df["Dept"].unique():
+        sub = df[df["Dept"] == div].copy()
+        for col in PREMIUM_GST.values():
+            sub[col] = pd.to_numeric(sub[col], errors="coerce").fillna(0)
+        totals[div] = sum(sub[col].sum() for col in PREMIUM_GST.values())
+        plans[div] = {pkg: sub.loc[sub[col] > 0, "HC"].sum() for pkg, col in PREMIUM_GST.items()}
+    return pd.Series(totals), pd.DataFrame(plans).T
+
+
+def legacy_tables():
+    premium_cols = {p: f"{p} Premium" for p in PACKAGES}
+    division_total, division_plans = legacy_division_totals()
+    return {
+        "tier_premium": legacy_tier_premium(),
+        "department": legacy_department(premium_cols),
+        "department_gst": legacy_department(PREMIUM_GST),
+        "division": legacy_division(),
+        "headcount": legacy_headcount(),
+        "employment_package": legacy_employment_package(),
+        "division_total": division_total,
+        "division_plans": division_plans,
+    }
+
+
+# ---------------------------
+# Checks
+# ---------------------------
+
+def _same(new, old, name):
+    if isinstance(new, dict):
+        for key in new:
+            _same(new[key], old[key], f"{name}.{key}")
+    elif isinstance(new, pd.Series):
+        assert_series_equal(new, old, check_dtype=False, check_names=False, check_index_type=False, obj=name)
+    else:
+        assert_frame_equal(new, old, check_dtype=False, check_names=False, check_index_type=False,
+                           check_column_type=False, obj=name)
+
+
+def check(tables, legacy):
+    for name, old in legacy.items():
+        new = tables[name]
+        if name == "tier_premium":
+            old = old.sort_index()
+        _same(new, old, name)
+    print(f"{len(legacy)} tables equal to the notebook-style ones OK")
+
+    raw = pd.read_excel(DATA_DIR / RATES, header=None)
+    total = raw[raw[0].astype(str).str.strip() == "Total (Before GST)"].iloc[0]
+    insurers = raw.iloc[0].ffill().astype(str).str.split(" - ").str[0]
+    for idx in raw.columns[raw.iloc[1].astype(str).str.strip() == "Premium before GST"]:
+        column = f"{insurers[idx]} Before GST"
+        assert abs(tables["rates"][column].sum() - float(total[idx])) < 0.01, (column, total[idx])
+    print("rate comparison adds up to the workbook totals OK")
+
+
+# ---------------------------
+# Timing
+# ---------------------------
+
+def run(workers):
+    with timer() as old:
+        legacy = legacy_tables()
+    with timer() as load:
+        sources = load_sources()
+    with timer() as agg:
+        tables = aggregate(sources)
+        items = charts(tables)
+    check(tables, legacy)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with timer() as serial:
+            render_all(items, Path(tmp) / "serial", workers=1)
+        with timer() as pooled:
+            render_all(items, Path(tmp) / "pool", workers=workers)
+        files = sorted(p.relative_to(Path(tmp) / "pool") for p in (Path(tmp) / "pool").rglob("*.png"))
+        assert len(files) == len(items), (len(files), len(items))
+
+    numbers = load["seconds"] + agg["seconds"]
+    print(f"\n{len(items)} charts, {os.cpu_count()} CPU(s)")
+    print(f"{'numbers, notebook style (read per cell, row loops)':<52} {old['seconds']:8.2f}s")
+    print(f"{'numbers, load once + vectorized aggregate':<52} {numbers:8.2f}s"
+          f"  (load {load['seconds']:.2f}s, aggregate {agg['seconds'] * 1000:.0f}ms)")
+    print(f"{'render, in-process':<52} {serial['seconds']:8.2f}s")
+    print(f"{f'render, pool of {workers}':<52} {pooled['seconds']:8.2f}s")
+    print(f"{'total wall time, in-process':<52} {numbers + serial['seconds']:8.2f}s")
+    print(f"{f'total wall time, pool of {workers}':<52} {numbers + pooled['seconds']:8.2f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=max(2, os.cpu_count() or 1))
+    args = parser.parse_args()
+    run(args.workers)
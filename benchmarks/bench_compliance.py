@@ -0,0 +1,180 @@
+# file: benchmarks/bench_compliance.py
+"""
+Compliance engine benchmark at 100k employees.
+
+    python -m benchmarks.bench_compliance [--employees 100000] [--changed 100]
+
+Reports a full run, paging through and streaming the violations, and an
+incremental run after a few link/tier/employee changes. Fails
+(AssertionError) if the incremental result differs from a full
+re-evaluation. For scale, the per-employee query loop the engine
+replaces is timed on a sample and extrapolated.
+"""
+import argparse
+import itertools
+import random
+
+from benchmarks._common import engine, reset_database, timer
+
+from sqlalchemy import insert
+from sqlmodel import Session, delete, select
+
+from app.models import Employee, EmployeePlan, Plan, PlanTier, PolicyCategory, User
+from app.services import compliance_service as cs
+
+PLANS = 100
+CATEGORIES = ["GTL", "GCI", "GHS", "GPA", "FWMI"]
+PASS_TYPES = ["WP", "S-Pass", "EP", None]
+PASS_WEIGHTS = [4, 2, 1, 3]
+
+BATCH = 50_000
+
+
+def _insert_batches(conn, model, rows):
+    rows = iter(rows)
+    while batch := list(itertools.islice(rows, BATCH)):
+        conn.execute(insert(model), batch)
+
+
+def _employee_rows(rng, first_id, count):
+    for i in range(first_id, first_id + count):
+        yield {
+            "employee_id": i,
+            "user_id": 1,
+            "employee_code": f"EE{i:06d}",
+            "name": f"Employee {i}",
+            "pass_type": rng.choices(PASS_TYPES, PASS_WEIGHTS)[0],
+        }
+
+
+def load_data(employees: int, seed: int = 0):
+    rng = random.Random(seed)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{"user_id": 1, "username": "admin", "password_hash": "x", "role": "admin"}])
+        _insert_batches(conn, PolicyCategory, (
+            {"category_id": i, "category_name": c} for i, c in enumerate(CATEGORIES, start=1)
+        ))
+        _insert_batches(conn, Plan, (
+            {"plan_id": p, "plan_name": f"Plan {p}"} for p in range(1, PLANS + 1)
+        ))
+        # FWMI from 30k to 90k; every 10th plan has no FWMI tier at all
+        _insert_batches(conn, PlanTier, (
+            {"plan_id": p, "category_id": c, "sum_insured": rng.randint(3, 9) * 10000}
+            for p in range(1, PLANS + 1)
+            for c in range(1, len(CATEGORIES) + 1)
+            if not (CATEGORIES[c - 1] == "FWMI" and p % 10 == 0)
+        ))
+        _insert_batches(conn, Employee, _employee_rows(rng, 1, employees))
+        _insert_batches(conn, EmployeePlan, (
+            {"employee_id": e, "plan_id": p}
+            for e in range(1, employees + 1)
+            for p in rng.sample(range(1, PLANS + 1), rng.randint(1, 2))
+        ))
+        cs.add_default_rules(conn)
+    # A second category for WP, to exercise rules per category
+    cs.set_rule("WP", "GHS", 50000)
+
+
+def naive_check(sample: int) -> float:
+    """Seconds per employee for one-query-per-employee evaluation."""
+    rules = {(r["pass_type"], r["category"]): r["min_sum_insured"] for r in cs.list_rules()}
+    with Session(engine) as session, timer() as t:
+        employees = session.exec(select(Employee).limit(sample)).all()
+        for emp in employees:
+            tiers = session.exec(
+                select(PolicyCategory.category_name, PlanTier.sum_insured)
+                .join(PlanTier, PlanTier.category_id == PolicyCategory.category_id)
+                .join(EmployeePlan, EmployeePlan.plan_id == PlanTier.plan_id)
+                .where(EmployeePlan.employee_id == emp.employee_id)
+            ).all()
+            for (pass_type, category), minimum in rules.items():
+                if pass_type == emp.pass_type:
+                    best = max((s for c, s in tiers if c == category), default=None)
+                    _ = best is None or best < minimum
+    return t["seconds"] / len(employees)
+
+
+def make_changes(employees: int, changed: int, seed: int = 1):
+    """Link swaps, one tier change and new employees, through the app's paths."""
+    rng = random.Random(seed)
+    with Session(engine) as session:
+        for emp_id in rng.sample(range(1, employees + 1), changed):
+            session.exec(delete(EmployeePlan).where(EmployeePlan.employee_id == emp_id))
+            session.add(EmployeePlan(employee_id=emp_id, plan_id=rng.randint(1, PLANS)))
+        session.commit()
+
+        tier = session.exec(
+            select(PlanTier).where(PlanTier.plan_id == 1, PlanTier.category_id == CATEGORIES.index("FWMI") + 1)
+        ).one()
+        tier.sum_insured = 20000 if tier.sum_insured >= 60000 else 80000
+        session.add(tier)
+        session.commit()
+
+        session.exec(insert(Employee), params=list(_employee_rows(rng, employees + 1, changed)))
+        session.commit()
+
+
+def stored_matches_full_evaluation() -> bool:
+    with engine.connect() as conn:
+        stored = set(conn.execute(select(*[
+            getattr(cs.ComplianceViolation, c) for c in cs.VIOLATION_COLUMNS
+        ])).all())
+        fresh = set(conn.execute(cs._violations_query()).all())
+    return stored == fresh
+
+
+def run(employees: int, changed: int):
+    reset_database()
+    with timer() as t:
+        load_data(employees)
+    print(f"Loaded {employees} employees in {t['seconds']:.1f}s")
+
+    per_employee = naive_check(min(2000, employees))
+    print(f"per-employee queries   ~{per_employee * employees:8.2f}s (extrapolated)")
+
+    with timer() as t:
+        run_info = cs.run_compliance("full")
+    print(f"full run               {t['seconds']:8.2f}s  "
+          f"{run_info['employees_checked']} employees, {run_info['violations']} violations")
+
+    with timer() as t:
+        pages, after = 0, None
+        while True:
+            page = cs.list_violations(after, 1000)
+            pages += 1
+            if page["next_cursor"] is None:
+                break
+            after = cs.parse_cursor(page["next_cursor"])
+    print(f"page through (1000)    {t['seconds']:8.2f}s  {pages} pages")
+
+    with timer() as t:
+        streamed = sum(1 for _ in cs.iter_violations())
+    print(f"stream all             {t['seconds']:8.2f}s  {streamed} rows")
+
+    with timer() as t:
+        make_changes(employees, changed)
+    print(f"\n{changed} link swaps + 1 tier change + {changed} new employees "
+          f"committed in {t['seconds']:.2f}s")
+
+    with timer() as t:
+        run_info = cs.run_compliance("incremental")
+    print(f"incremental run        {t['seconds']:8.2f}s  "
+          f"{run_info['employees_checked']} employees re-checked, {run_info['violations']} violations")
+
+    assert run_info["mode"] == "incremental", run_info
+    assert stored_matches_full_evaluation(), "incremental result differs from a full run"
+    print("incremental result matches full evaluation OK")
+
+    cs.set_rule("S-Pass", "FWMI", 70000)
+    run_info = cs.run_compliance("incremental")
+    assert run_info["mode"] == "full", "rule change must force a full run"
+    assert stored_matches_full_evaluation()
+    print("rule change forces full run OK")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--employees", type=int, default=100_000)
+    parser.add_argument("--changed", type=int, default=100)
+    args = parser.parse_args()
+    run(args.employees, args.changed)
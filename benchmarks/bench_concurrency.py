@@ -0,0 +1,75 @@
+# file: benchmarks/bench_concurrency.py
+"""
+Sync Session vs AsyncSession under concurrent clients.
+
+    python -m benchmarks.bench_concurrency [--clients 50 200 1000] [--requests 2000]
+
+Both endpoints run the same employee-coverage lookup (one query with a
+warm reference cache). The sync one goes through FastAPI's threadpool,
+the async one through the AsyncSession dependency.
+"""
+import argparse
+import asyncio
+
+from benchmarks._common import reset_database, timer
+
+import httpx
+from fastapi import Depends, FastAPI
+
+from app.database.database import get_async_session
+from app.seed import seed_data
+from app.services.employee_service import (
+    get_employee_coverage,
+    get_employee_coverage_async,
+)
+
+bench_app = FastAPI()
+
+
+@bench_app.get("/sync")
+def sync_coverage():
+    return get_employee_coverage("emp001")
+
+
+@bench_app.get("/async")
+async def async_coverage(session=Depends(get_async_session)):
+    return await get_employee_coverage_async(session, "emp001")
+
+
+async def _run(path, clients, requests):
+    transport = httpx.ASGITransport(app=bench_app)
+    limits = httpx.Limits(max_connections=None)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", limits=limits) as client:
+        semaphore = asyncio.Semaphore(clients)
+
+        async def one():
+            async with semaphore:
+                r = await client.get(path)
+                return r.status_code
+
+        return await asyncio.gather(*(one() for _ in range(requests)))
+
+
+async def run(client_counts, requests):
+    # One event loop for the whole run: the async pool is bound to it
+    print(f"{'clients':>7} {'sync req/s':>11} {'async req/s':>12}")
+    for clients in client_counts:
+        rates = []
+        for path in ("/sync", "/async"):
+            n = max(requests, clients)
+            with timer() as t:
+                codes = await _run(path, clients, n)
+            assert codes.count(200) == n, set(codes)
+            rates.append(n / t["seconds"])
+        print(f"{clients:>7} {rates[0]:>11.0f} {rates[1]:>12.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, nargs="+", default=[50, 200, 1000])
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    reset_database()
+    seed_data()
+    asyncio.run(run(args.clients, args.requests))
@@ -0,0 +1,56 @@
+# file: benchmarks/bench_coverage.py
+"""
+Coverage lookup benchmark.
+
+    python -m benchmarks.bench_coverage [--requests 2000]
+
+Latency is reported with the reference-data cache on and off. The
+query-count and snapshot checks are in tests/test_coverage.py.
+"""
+import argparse
+import time
+
+from benchmarks._common import percentiles, reset_database
+
+from app.seed import seed_data
+from app.services.coverage_service import get_category_limits
+from app.services.employee_service import (
+    get_employee_coverage,
+    get_ward_class_and_limits,
+)
+from app.services.reference_cache import reference_cache
+
+LOOKUPS = {
+    "coverage/plan/1": lambda: get_category_limits(1),
+    "employee coverage": lambda: get_employee_coverage("emp001"),
+    "ward class": lambda: get_ward_class_and_limits("emp001"),
+}
+
+
+def run(requests):
+    print(f"\n{'lookup':<20} {'cache':>5} {'p50 ms':>8} {'p99 ms':>8}")
+    for name, lookup in LOOKUPS.items():
+        for enabled in (False, True):
+            reference_cache.enabled = enabled
+            reference_cache.invalidate()
+            samples = []
+            for _ in range(requests):
+                start = time.perf_counter()
+                lookup()
+                samples.append(time.perf_counter() - start)
+            stats = percentiles(samples)
+            print(
+                f"{name:<20} {'on' if enabled else 'off':>5} "
+                f"{stats['p50_ms']:>8.3f} {stats['p99_ms']:>8.3f}"
+            )
+    print("\n", reference_cache.stats())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    reset_database()
+    seed_data()
+    run(args.requests)
@@ -0,0 +1,207 @@
+# file: benchmarks/bench_coverage_report.py
+"""
+Coverage report cube benchmark at 100k employees.
+
+    python -m benchmarks.bench_coverage_report [--employees 100000] [--changed 100] [--repeat 50]
+
+Reports the full cube build, report latency per slice against the
+GROUP BY over the source tables it replaces, and the commit cost of
+keeping the cube current for small changes and for a 1000-employee
+import chunk. Fails (AssertionError) if a slice differs from the
+source tables or the maintained cube from a full recomputation.
+"""
+import argparse
+import itertools
+import random
+import time
+
+from benchmarks._common import engine, percentiles, reset_database, timer
+
+from sqlalchemy import func, insert
+from sqlmodel import Session, delete, select
+
+from app.models import Employee, EmployeePlan, Plan, PlanTier, PolicyCategory, User
+from app.services import coverage_report as cr
+from app.services import coverage_snapshot
+
+PLANS = 100
+INSURERS = 10
+DEPARTMENTS = 20
+CATEGORIES = ["GTL", "GCI", "GHS", "GPA", "FWMI"]
+
+BATCH = 50_000
+
+SLICES = [
+    ("by category", dict(by=["category"])),
+    ("by category, department", dict(by=["category", "department"])),
+    ("by insurer", dict(by=["insurer"])),
+    ("by plan, FWMI only", dict(by=["plan"], category="FWMI")),
+    ("one department by category", dict(by=["category"], department="Dept 3")),
+]
+
+
+def _insert_batches(conn, model, rows):
+    rows = iter(rows)
+    while batch := list(itertools.islice(rows, BATCH)):
+        conn.execute(insert(model), batch)
+
+
+def load_data(employees: int, seed: int = 0):
+    rng = random.Random(seed)
+    with engine.begin() as conn:
+        _insert_batches(conn, User, (
+            {"user_id": u, "username": f"insurer{u}", "password_hash": "x", "role": "insurer"}
+            for u in range(1, INSURERS + 1)
+        ))
+        _insert_batches(conn, PolicyCategory, (
+            {"category_id": i, "category_name": c} for i, c in enumerate(CATEGORIES, start=1)
+        ))
+        _insert_batches(conn, Plan, (
+            {"plan_id": p, "plan_name": f"Plan {p}", "insurer_id": p % INSURERS + 1}
+            for p in range(1, PLANS + 1)
+        ))
+        _insert_batches(conn, PlanTier, (
+            {"plan_id": p, "category_id": c, "sum_insured": rng.randint(3, 9) * 10000}
+            for p in range(1, PLANS + 1)
+            for c in range(1, len(CATEGORIES) + 1)
+            if rng.random() < 0.9
+        ))
+        _insert_batches(conn, Employee, (
+            {
+                "employee_id": i,
+                "user_id": 1,
+                "employee_code": f"EE{i:06d}",
+                "name": f"Employee {i}",
+                "department": f"Dept {rng.randrange(DEPARTMENTS)}" if i % 50 else None,
+            }
+            for i in range(1, employees + 1)
+        ))
+        _insert_batches(conn, EmployeePlan, (
+            {"employee_id": e, "plan_id": p}
+            for e in range(1, employees + 1)
+            for p in rng.sample(range(1, PLANS + 1), rng.randint(1, 2))
+        ))
+        coverage_snapshot.rebuild(conn)
+
+
+def live_report(by, category=None, department=None):
+    """The same numbers straight from the source tables."""
+    dims = {
+        "category": PolicyCategory.category_name,
+        "department": Employee.department,
+        "insurer": Plan.insurer_id,
+        "plan": Plan.plan_id,
+    }
+    columns = [dims[d] for d in by]
+    stmt = (
+        select(*columns, func.count(func.distinct(Employee.employee_id)), func.sum(PlanTier.sum_insured))
+        .select_from(Employee)
+        .join(EmployeePlan, EmployeePlan.employee_id == Employee.employee_id)
+        .join(Plan, Plan.plan_id == EmployeePlan.plan_id)
+        .join(PlanTier, PlanTier.plan_id == Plan.plan_id)
+        .join(PolicyCategory, PolicyCategory.category_id == PlanTier.category_id)
+        .group_by(*columns)
+    )
+    if category is not None:
+        stmt = stmt.where(PolicyCategory.category_name == category)
+    if department is not None:
+        stmt = stmt.where(Employee.department == department)
+    with Session(engine) as session:
+        return session.exec(stmt).all()
+
+
+def time_calls(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return percentiles(samples)
+
+
+def make_changes(employees: int, changed: int, seed: int = 1):
+    """Link swaps, department moves, a tier change and a deleted employee."""
+    rng = random.Random(seed)
+    timings = []
+    with Session(engine) as session:
+        for emp_id in rng.sample(range(1, employees + 1), changed):
+            start = time.perf_counter()
+            session.exec(delete(EmployeePlan).where(EmployeePlan.employee_id == emp_id))
+            session.add(EmployeePlan(employee_id=emp_id, plan_id=rng.randint(1, PLANS)))
+            employee = session.get(Employee, emp_id)
+            employee.department = f"Dept {rng.randrange(DEPARTMENTS)}"
+            session.add(employee)
+            session.commit()
+            timings.append(time.perf_counter() - start)
+
+        tier = session.exec(select(PlanTier).where(PlanTier.plan_id == 1)).first()
+        tier.sum_insured += 5000
+        session.add(tier)
+        with timer() as t:
+            session.commit()
+        tier_seconds = t["seconds"]
+
+        session.exec(delete(EmployeePlan).where(EmployeePlan.employee_id == 2))
+        session.exec(delete(Employee).where(Employee.employee_id == 2))
+        session.commit()
+
+        # what one import chunk commits
+        new_ids = range(employees + 1, employees + 1001)
+        session.exec(insert(Employee), params=[
+            {"employee_id": i, "user_id": 1, "employee_code": f"EE{i:06d}", "department": "Dept 1"}
+            for i in new_ids
+        ])
+        session.exec(insert(EmployeePlan), params=[
+            {"employee_id": i, "plan_id": rng.randint(1, PLANS)} for i in new_ids
+        ])
+        with timer() as t:
+            session.commit()
+        chunk_seconds = t["seconds"]
+    return percentiles(timings), tier_seconds, chunk_seconds
+
+
+def check_slices():
+    for name, kwargs in SLICES:
+        report = cr.coverage_report(**kwargs)
+        live = live_report(**kwargs)
+        assert sorted((r["headcount"], round(r["total_sum_insured"])) for r in report["rows"]) \
+            == sorted((h, round(t)) for *_, h, t in live), f"{name}: cube differs from source"
+
+
+def run(employees: int, changed: int, repeat: int):
+    reset_database()
+    with timer() as t:
+        load_data(employees)
+    print(f"Loaded {employees} employees in {t['seconds']:.1f}s")
+
+    with engine.begin() as conn, timer() as t:
+        cells = cr.rebuild(conn)
+    print(f"full cube build            {t['seconds']:8.2f}s  {cells} cells\n")
+
+    check_slices()
+    print(f"{'slice':30} {'cube p50':>10} {'live p50':>10}")
+    for name, kwargs in SLICES:
+        cube = time_calls(lambda: cr.coverage_report(**kwargs), repeat)
+        source = time_calls(lambda: live_report(**kwargs), max(1, repeat // 10))
+        print(f"{name:30} {cube['p50_ms']:8.2f}ms {source['p50_ms']:8.1f}ms")
+
+    commit, tier_seconds, chunk_seconds = make_changes(employees, changed)
+    print(f"\nlink swap + department move commit p50 {commit['p50_ms']:.1f}ms p99 {commit['p99_ms']:.1f}ms")
+    print(f"tier change commit (plan 1 members)   {tier_seconds * 1000:.1f}ms")
+    print(f"1000 new employees + links commit     {chunk_seconds * 1000:.1f}ms")
+
+    check_slices()
+
+    with engine.connect() as conn:
+        drifted = cr.drift(conn)
+    assert drifted == 0, f"{drifted} cube cells differ from a full recomputation"
+    print("incrementally maintained cube matches full recomputation OK")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--employees", type=int, default=100_000)
+    parser.add_argument("--changed", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    run(args.employees, args.changed, args.repeat)
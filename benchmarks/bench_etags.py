@@ -0,0 +1,140 @@
+# file: benchmarks/bench_etags.py
+"""
+Conditional GET with ETags on reference and coverage endpoints.
+
+    python -m benchmarks.bench_etags [--requests 1000]
+
+For each endpoint, times full responses against revalidations that end
+in 304. Fails (AssertionError) unless:
+- a matching If-None-Match gets 304 without a single SQL statement,
+- a committed write to the endpoint's tables changes the ETag and the
+  next revalidation returns the new data, while a rolled-back write
+  and writes to unrelated tables keep it,
+- an employee's ETag is not accepted for another employee's coverage.
+Prints the 304 ratio from /admin/metrics at the end.
+"""
+import argparse
+
+from benchmarks._common import count_queries, engine, reset_database, timer
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.auth.auth_service import hash_password
+from app.main import app
+from app.models import BiddingRound, Employee, EmployeePlan, PlanTier, User
+from app.seed import seed_data
+
+ENDPOINTS = {
+    # path: (login, password)
+    "/coverage/plan/1": None,
+    "/insurer/categories": ("aia", "aia123"),
+    "/employee/me/coverage": ("emp001", "emp001pass"),
+    "/employee/me/ward": ("emp001", "emp001pass"),
+}
+
+
+def login(client, username, password):
+    r = client.post("/auth/login", data={"username": username, "password": password})
+    r.raise_for_status()
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+def add_second_employee():
+    with Session(engine) as session:
+        user = User(username="emp002", password_hash=hash_password("emp002pass"), role="employee")
+        session.add(user)
+        session.flush()
+        employee = Employee(user_id=user.user_id, employee_code="EE002", name="Second Employee")
+        session.add(employee)
+        session.flush()
+        session.add(EmployeePlan(employee_id=employee.employee_id, plan_id=2))
+        session.commit()
+
+
+def set_sum_insured(tier_id: int, value: float, commit: bool = True):
+    with Session(engine) as session:
+        tier = session.get(PlanTier, tier_id)
+        tier.sum_insured = value
+        session.add(tier)
+        if commit:
+            session.commit()
+        else:
+            session.flush()
+            session.rollback()
+
+
+def add_unrelated_round():
+    with Session(engine) as session:
+        session.add(BiddingRound(round_name="Unrelated"))
+        session.commit()
+
+
+def check(client, headers):
+    for path, auth in ENDPOINTS.items():
+        h = headers[auth]
+        first = client.get(path, headers=h)
+        assert first.status_code == 200 and "ETag" in first.headers, (path, first.status_code)
+        etag = first.headers["ETag"]
+
+        with count_queries() as statements:
+            again = client.get(path, headers={**h, "If-None-Match": etag})
+        assert again.status_code == 304 and again.headers["ETag"] == etag, (path, again.status_code)
+        assert not statements, (path, statements)
+
+        set_sum_insured(1, 12345.0, commit=False)
+        add_unrelated_round()
+        assert client.get(path, headers={**h, "If-None-Match": etag}).status_code == 304, path
+
+        with Session(engine) as session:
+            old = session.get(PlanTier, 1).sum_insured
+        set_sum_insured(1, old + 1)
+        changed = client.get(path, headers={**h, "If-None-Match": etag})
+        assert changed.status_code == 200 and changed.headers["ETag"] != etag, path
+        if path == "/coverage/plan/1":
+            assert changed.json() != first.json(), changed.text
+        print(f"{path:<24} 304 without SQL, write -> new ETag, rollback/unrelated -> same OK")
+
+    mine = client.get("/employee/me/coverage", headers=headers[("emp001", "emp001pass")])
+    theirs = client.get(
+        "/employee/me/coverage",
+        headers={**headers[("emp002", "emp002pass")], "If-None-Match": mine.headers["ETag"]},
+    )
+    assert theirs.status_code == 200 and theirs.json() != mine.json()
+    print("another employee's ETag is not accepted OK")
+
+
+def run(client, headers, requests):
+    print(f"\n{'':24} {'200 req/s':>10} {'304 req/s':>10}")
+    for path, auth in ENDPOINTS.items():
+        h = headers[auth]
+        etag = client.get(path, headers=h).headers["ETag"]
+        with timer() as full:
+            for _ in range(requests):
+                client.get(path, headers=h)
+        with timer() as revalidate:
+            for _ in range(requests):
+                client.get(path, headers={**h, "If-None-Match": etag})
+        print(f"{path:<24} {requests / full['seconds']:>10.0f} {requests / revalidate['seconds']:>10.0f}")
+
+    metrics = client.get("/admin/metrics", headers=headers[("admin", "admin123")]).json()["etags"]
+    print()
+    for family, counts in metrics["families"].items():
+        print(f"{family:<10} responses={counts['responses']} conditional={counts['conditional']} "
+              f"304={counts['not_modified']} ratio={counts['not_modified_ratio']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=1000)
+    args = parser.parse_args()
+
+    reset_database()
+    seed_data()
+    add_second_employee()
+    with TestClient(app) as client:
+        credentials = [("aia", "aia123"), ("emp001", "emp001pass"), ("emp002", "emp002pass"), ("admin", "admin123")]
+        headers = {c: login(client, *c) for c in credentials}
+        headers[None] = {}
+        check(client, headers)
+        run(client, headers, args.requests)
@@ -0,0 +1,106 @@
+# file: benchmarks/bench_import.py
+"""
+Employee import benchmark: 1k / 10k / 100k rows.
+
+    python -m benchmarks.bench_import [--chunk-size 1000] [--sizes 1000 10000]
+    python -m benchmarks.bench_import --stream csv     # file-based, reports peak RSS
+
+In --stream mode every size runs in a fresh process so the reported
+peak RSS belongs to that import alone.
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import tempfile
+
+from benchmarks._common import engine, reset_database, timer
+
+import numpy as np
+import pandas as pd
+from sqlmodel import Session
+
+from app.models import User, Plan
+from app.services.import_service import (
+    IMPORT_CHUNK_SIZE,
+    import_employees_dataframe,
+    import_employees_file,
+)
+
+
+def make_sheet(rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    plan_ids = np.where(rng.random(rows) < 0.5, "1", "1,2")
+    return pd.DataFrame({
+        "Employee Code": [f"EE{i:06d}" for i in range(rows)],
+        "Name": [f"Employee {i}" for i in range(rows)],
+        "Department": rng.choice(["HR", "Sales", "Ops", "Finance"], rows),
+        "Age": rng.integers(20, 65, rows),
+        "Gender": rng.choice(["Male", "Female"], rows),
+        "Plan IDs": plan_ids,
+    })
+
+
+def write_sheet(rows: int, fmt: str) -> str:
+    fd, path = tempfile.mkstemp(suffix=f".{fmt}")
+    os.close(fd)
+    sheet = make_sheet(rows)
+    if fmt == "csv":
+        sheet.to_csv(path, index=False)
+    else:
+        sheet.to_excel(path, sheet_name="General", index=False)
+    return path
+
+
+def seed_reference_data():
+    with Session(engine) as session:
+        session.add(User(user_id=1, username="admin", password_hash="x", role="admin"))
+        session.add(Plan(plan_id=1, plan_name="Plan A"))
+        session.add(Plan(plan_id=2, plan_name="Plan B"))
+        session.commit()
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _stream_one(path, chunk_size, out):
+    with Session(engine) as session, timer() as t:
+        result = import_employees_file(session, path, path, chunk_size=chunk_size)
+    out.put((t["seconds"], result["employees_created"], len(result["errors"]), _peak_rss_mb()))
+
+
+def run(sizes, chunk_size, stream=None):
+    print(f"{'rows':>8} {'seconds':>9} {'rows/s':>10} {'errors':>7} {'peak MB':>8}")
+    for rows in sizes:
+        reset_database()
+        seed_reference_data()
+
+        if stream:
+            path = write_sheet(rows, stream)
+            ctx = multiprocessing.get_context("spawn")
+            out = ctx.Queue()
+            proc = ctx.Process(target=_stream_one, args=(path, chunk_size, out))
+            proc.start()
+            seconds, created, errors, peak = out.get()
+            proc.join()
+            os.remove(path)
+        else:
+            sheet = make_sheet(rows)
+            with Session(engine) as session, timer() as t:
+                result = import_employees_dataframe(session, sheet, chunk_size=chunk_size)
+            seconds, created = t["seconds"], result["employees_created"]
+            errors, peak = len(result["errors"]), _peak_rss_mb()
+
+        assert created == rows
+        print(f"{rows:>8} {seconds:>9.2f} {rows / seconds:>10.0f} {errors:>7} {peak:>8.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE)
+    parser.add_argument("--stream", choices=["csv", "xlsx"])
+    args = parser.parse_args()
+    run(args.sizes, args.chunk_size, args.stream)
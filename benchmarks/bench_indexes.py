@@ -0,0 +1,204 @@
+# file: benchmarks/bench_indexes.py
+"""
+Index benchmark for the hot lookups.
+
+    python -m benchmarks.bench_indexes [--employees 100000] [--bids 1000000] [--repeat 20]
+
+Builds the pre-index schema (tables without the declared indexes), loads
+the data, times every hot query, then runs the migration
+(sync_indexes) and times them again. That each query's plan uses its
+index is checked in tests/test_indexes.py.
+"""
+import argparse
+import itertools
+import random
+
+from benchmarks._common import engine, percentiles, reset_database, timer
+
+from sqlalchemy import insert, inspect
+from sqlmodel import Session, SQLModel, select
+
+from app.database.migrations import sync_indexes
+from app.models import (
+    Bid, BiddingRound, Employee, EmployeePlan, Plan, PlanTier, PolicyCategory, User,
+)
+from app.services import coverage_snapshot
+from app.services.employee_service import EMPLOYEE_FIELDS, _employees_query
+from app.services.reference_cache import _plans_query
+
+INSURERS = 1000
+PLANS = 100
+DEPARTMENTS = [f"Dept {i}" for i in range(20)]
+CATEGORIES = ["GTL", "GCI", "GHS", "GPA", "FWMI", "GMM", "GP", "SP", "DENTAL", "MATERNITY"]
+
+BATCH = 50_000
+
+
+# ---------------------------
+# Data
+# ---------------------------
+
+def _insert_batches(conn, model, rows):
+    rows = iter(rows)
+    while batch := list(itertools.islice(rows, BATCH)):
+        conn.execute(insert(model), batch)
+
+
+def load_data(employees: int, bids: int, seed: int = 0):
+    rng = random.Random(seed)
+    rounds = -(-bids // (INSURERS * len(CATEGORIES)))
+
+    with engine.begin() as conn:
+        _insert_batches(conn, User, (
+            {"user_id": i, "username": f"insurer{i:04d}", "password_hash": "x", "role": "insurer"}
+            for i in range(1, INSURERS + 1)
+        ))
+        _insert_batches(conn, User, (
+            {"user_id": INSURERS + i, "username": f"emp{i:06d}", "password_hash": "x", "role": "employee"}
+            for i in range(1, employees + 1)
+        ))
+        _insert_batches(conn, Employee, (
+            {
+                "employee_id": i,
+                "user_id": INSURERS + i,
+                "employee_code": f"EE{i:06d}",
+                "name": f"Employee {i}",
+                "department": rng.choice(DEPARTMENTS),
+                "age": rng.randint(20, 64),
+                "gender": rng.choice(["Male", "Female"]),
+            }
+            for i in range(1, employees + 1)
+        ))
+        _insert_batches(conn, PolicyCategory, (
+            {"category_id": i, "category_name": name}
+            for i, name in enumerate(CATEGORIES, start=1)
+        ))
+        _insert_batches(conn, Plan, (
+            {"plan_id": p, "plan_name": f"Plan {p}", "insurer_id": rng.randint(1, INSURERS)}
+            for p in range(1, PLANS + 1)
+        ))
+        _insert_batches(conn, PlanTier, (
+            {"plan_id": p, "category_id": c, "sum_insured": rng.randint(1, 100) * 1000}
+            for p in range(1, PLANS + 1)
+            for c in range(1, len(CATEGORIES) + 1)
+        ))
+        _insert_batches(conn, EmployeePlan, (
+            {"employee_id": e, "plan_id": p}
+            for e in range(1, employees + 1)
+            for p in rng.sample(range(1, PLANS + 1), rng.randint(1, 2))
+        ))
+        _insert_batches(conn, BiddingRound, (
+            {"round_id": r, "round_name": f"Round {r}"} for r in range(1, rounds + 1)
+        ))
+        _insert_batches(conn, Bid, itertools.islice((
+            {"round_id": r, "insurer_id": i, "category_id": c, "premium": rng.uniform(5, 50)}
+            for r in range(1, rounds + 1)
+            for i in range(1, INSURERS + 1)
+            for c in range(1, len(CATEGORIES) + 1)
+        ), bids))
+
+        # Core inserts bypass the session hooks
+        coverage_snapshot.rebuild(conn)
+
+    return rounds
+
+
+def drop_declared_indexes():
+    """Recreate the schema as it was before the models declared indexes."""
+    with engine.begin() as conn:
+        existing = {
+            ix["name"]
+            for table in inspect(conn).get_table_names()
+            for ix in inspect(conn).get_indexes(table)
+        }
+        for table in SQLModel.metadata.sorted_tables:
+            for index in table.indexes:
+                if index.name in existing:
+                    index.drop(conn)
+
+
+# ---------------------------
+# Hot queries
+# ---------------------------
+
+def hot_queries(employees: int, rounds: int):
+    """name -> (table, index the plan must use, statement factory)."""
+    rnd = random.Random(1)
+    emp = lambda: rnd.randint(1, employees)
+    page_columns = list(EMPLOYEE_FIELDS)
+    return {
+        "user by username": ("user", "ix_user_username",
+            lambda: select(User).where(User.username == f"emp{emp():06d}")),
+        "employee coverage": ("employeecoveragesnapshot", "ix_coveragesnapshot_user",
+            lambda: coverage_snapshot.coverage_rows_query(f"emp{emp():06d}")),
+        "employee by user": ("employee", "ix_employee_user_id",
+            lambda: select(Employee.employee_id).where(Employee.user_id == INSURERS + emp())),
+        "employee by code": ("employee", "ix_employee_employee_code",
+            lambda: select(Employee.employee_id).where(Employee.employee_code == f"EE{emp():06d}")),
+        "department page": ("employee", "ix_employee_department_id",
+            lambda: _employees_query(page_columns, emp(), 100, rnd.choice(DEPARTMENTS), None)),
+        "employees on plan": ("employeeplan", "ix_employeeplan_plan_id",
+            lambda: select(EmployeePlan.employee_id).where(EmployeePlan.plan_id == rnd.randint(1, PLANS))),
+        "plan tiers": ("plantier", "uq_plantier_plan_category",
+            lambda: _plans_query([rnd.randint(1, PLANS)])),
+        "category by name": ("policycategory", "ix_policycategory_category_name",
+            lambda: select(PolicyCategory).where(PolicyCategory.category_name == rnd.choice(CATEGORIES))),
+        "bids for round": ("bid", "uq_bid_round_insurer_category",
+            lambda: select(Bid).where(Bid.round_id == rnd.randint(1, rounds))),
+        "bids by insurer": ("bid", "ix_bid_insurer_id",
+            lambda: select(Bid).where(Bid.insurer_id == rnd.randint(1, INSURERS))),
+    }
+
+
+def time_queries(queries, repeat: int):
+    results = {}
+    with Session(engine) as session:
+        for name, (_, _, make) in queries.items():
+            samples = []
+            for _ in range(repeat):
+                stmt = make()
+                with timer() as t:
+                    session.exec(stmt).all()
+                samples.append(t["seconds"])
+            results[name] = percentiles(samples)
+    return results
+
+
+# ---------------------------
+# Main
+# ---------------------------
+
+def run(employees: int, bids: int, repeat: int):
+    reset_database()
+    drop_declared_indexes()
+
+    with timer() as t:
+        rounds = load_data(employees, bids)
+    print(f"Loaded {employees} employees, {bids} bids in {t['seconds']:.1f}s")
+
+    queries = hot_queries(employees, rounds)
+    before = time_queries(queries, repeat)
+
+    with timer() as t:
+        report = sync_indexes(engine)
+    created = [name for name, status in report.items() if status == "created"]
+    print(f"Migration created {len(created)} indexes in {t['seconds']:.1f}s")
+
+    after = time_queries(queries, repeat)
+    print(f"\n{'query':<20} {'before p50':>11} {'after p50':>10} {'before p99':>11} {'after p99':>10} {'speedup':>8}")
+    for name in queries:
+        b, a = before[name], after[name]
+        print(
+            f"{name:<20} {b['p50_ms']:>9.2f}ms {a['p50_ms']:>8.3f}ms "
+            f"{b['p99_ms']:>9.2f}ms {a['p99_ms']:>8.3f}ms {b['p50_ms'] / a['p50_ms']:>7.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--employees", type=int, default=100_000)
+    parser.add_argument("--bids", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    run(args.employees, args.bids, args.repeat)
@@ -0,0 +1,177 @@
+# file: benchmarks/bench_leaderboard.py
+"""
+Live leaderboard fan-out with the in-process broker.
+
+    python -m benchmarks.bench_leaderboard [--subscribers 500] [--revisions 300] [--insurers 50] [--categories 20] [--interval 0.02]
+
+Subscribes N in-process clients to one round (as the SSE endpoint does),
+then revises bids through insurer_service from a thread pool while the
+clients apply the snapshot and deltas to their own copy of the
+ranking. Reports the broker's fan-out time per revision, commit-to-client
+latency (the simulated clients parse JSON on the same CPU, so this is
+an upper bound), queries per revision with and without subscribers, and
+what polling /compare once per revision would cost instead.
+tests/test_leaderboard.py checks the single load per round, identical
+deltas for every subscriber, that slow subscribers are dropped and that
+a round is forgotten after its last subscriber.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks._common import count_queries, engine, percentiles, reset_database
+
+from sqlalchemy import insert
+
+from app.models import Bid, BiddingRound, PolicyCategory, User
+from app.services import insurer_service as svc
+from app.services.bidding_service import compare_bids
+from app.services.leaderboard import leaderboard_broker
+
+ROUND = 1
+
+
+def load_data(insurers: int, categories: int, seed: int = 0):
+    rng = random.Random(seed)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"user_id": u, "username": f"insurer{u}", "password_hash": "x", "role": "insurer"}
+            for u in range(1, insurers + 1)
+        ])
+        conn.execute(insert(PolicyCategory), [
+            {"category_id": c, "category_name": f"CAT{c:02d}"} for c in range(1, categories + 1)
+        ])
+        conn.execute(insert(BiddingRound), [{"round_id": ROUND, "round_name": "Live", "end_date": "2999-12-31"}])
+        conn.execute(insert(Bid), [
+            {"round_id": ROUND, "insurer_id": u, "category_id": c, "premium": round(rng.uniform(50, 500), 2)}
+            for u in range(1, insurers + 1)
+            for c in range(1, categories + 1)
+        ])
+        return [
+            (bid_id, (bid_id - 1) // categories + 1)
+            for bid_id in range(1, insurers * categories + 1)
+        ]
+
+
+class Client:
+    """What a browser would keep: bid_id -> [premium, rank]."""
+
+    def __init__(self, queue):
+        self.queue = queue
+        self.view = {}
+        self.deltas = 0
+
+    async def run(self, latencies, committed_at):
+        while (message := await self.queue.get()) is not None:
+            received = time.perf_counter()
+            event = json.loads(message)
+            if event["type"] == "snapshot":
+                for category in event["categories"]:
+                    for bid in category["bids"]:
+                        self.view[bid["bid_id"]] = [bid["premium"], bid["rank"]]
+                continue
+            bid = event["bid"]
+            self.view[bid["bid_id"]] = [bid["premium"], bid["rank"]]
+            for moved in event["ranks"]:
+                self.view[moved["bid_id"]][1] = moved["rank"]
+            self.deltas += 1
+            latencies.append(received - committed_at[(bid["bid_id"], bid["version"])])
+
+
+def revise(bids, revisions, seed, versions, interval=0.0):
+    """`versions`: bid_id -> current version, kept up to date (bids start at 1)."""
+    rng = random.Random(seed)
+    for bid_id, insurer_id in rng.choices(bids, k=revisions):
+        result = svc.update_bid(bid_id, round(rng.uniform(50, 500), 2), insurer_id, versions.get(bid_id, 1))
+        assert "error" not in result, result
+        versions[bid_id] = result["version"]
+        time.sleep(interval)
+
+
+async def run_async(subscribers, revisions, bids, interval):
+    loop = asyncio.get_running_loop()
+    pool = ThreadPoolExecutor(4)
+    committed_at = {}
+    versions = {}
+    svc.BID_LISTENERS.insert(0, lambda changed: committed_at.update(
+        ((b["bid_id"], b["version"]), time.perf_counter()) for b in changed
+    ))
+
+    with count_queries() as alone:
+        await loop.run_in_executor(pool, revise, bids, revisions, 1, versions)
+
+    start = time.perf_counter()
+    queues = await asyncio.gather(*(leaderboard_broker.subscribe(ROUND) for _ in range(subscribers)))
+    subscribe_seconds = time.perf_counter() - start
+
+    latencies = []
+    clients = [Client(q) for q in queues]
+    tasks = [asyncio.create_task(c.run(latencies, committed_at)) for c in clients]
+    while any(not c.queue.empty() for c in clients):
+        await asyncio.sleep(0.01)
+
+    fan_out_samples = []
+    fan_out = leaderboard_broker._fan_out
+
+    def timed_fan_out(changed):
+        t = time.perf_counter()
+        fan_out(changed)
+        fan_out_samples.append(time.perf_counter() - t)
+
+    leaderboard_broker._fan_out = timed_fan_out
+    with count_queries() as watched:
+        start = time.perf_counter()
+        await loop.run_in_executor(pool, revise, bids, revisions, 2, versions, interval)
+        while any(not c.queue.empty() for c in clients):
+            await asyncio.sleep(0.01)
+        seconds = time.perf_counter() - start
+    pool.shutdown()
+
+    for queue in queues:
+        leaderboard_broker.unsubscribe(ROUND, queue)
+    for task in tasks:
+        task.cancel()
+
+    compare_samples = []
+    for _ in range(20):
+        t = time.perf_counter()
+        compare_bids(ROUND)
+        compare_samples.append(time.perf_counter() - t)
+    compare = percentiles(compare_samples)
+
+    broker_times = percentiles(fan_out_samples)
+    latency = percentiles(latencies)
+    deliveries = clients[0].deltas * subscribers
+    print(f"subscribe {subscribers} clients      {subscribe_seconds * 1000:8.1f} ms  "
+          f"({leaderboard_broker.stats['loads']} round load)")
+    print(f"{revisions} revisions, {deliveries} deliveries  {seconds:8.2f} s")
+    print(f"broker fan-out per revision     p50 {broker_times['p50_ms']:.2f} ms  p99 {broker_times['p99_ms']:.2f} ms")
+    print(f"commit -> client latency        p50 {latency['p50_ms']:.2f} ms  p99 {latency['p99_ms']:.2f} ms"
+          f"  (clients parse on the same CPU)")
+    print(f"queries per revision            {len(watched) / revisions:.1f} with {subscribers} subscribers, "
+          f"{len(alone) / revisions:.1f} with none")
+    print(f"polling /compare instead        {subscribers} queries and "
+          f"~{compare['p50_ms'] * subscribers / 1000:.1f} s of DB time per revision "
+          f"(compare_bids p50 {compare['p50_ms']:.1f} ms)")
+
+
+def run(subscribers, revisions, insurers, categories, interval):
+    reset_database()
+    bids = load_data(insurers, categories)
+    print(f"{insurers} insurers x {categories} categories, {subscribers} subscribers, "
+          f"one revision every {interval * 1000:.0f} ms\n")
+    asyncio.run(run_async(subscribers, revisions, bids, interval))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--subscribers", type=int, default=500)
+    parser.add_argument("--revisions", type=int, default=300)
+    parser.add_argument("--insurers", type=int, default=50)
+    parser.add_argument("--categories", type=int, default=20)
+    parser.add_argument("--interval", type=float, default=0.02, help="seconds between revisions")
+    args = parser.parse_args()
+    run(args.subscribers, args.revisions, args.insurers, args.categories, args.interval)
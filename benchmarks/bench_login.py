@@ -0,0 +1,83 @@
+# file: benchmarks/bench_login.py
+"""
+Login throughput (logins/s) for different login pool sizes.
+
+    python -m benchmarks.bench_login [--logins 200] [--clients 32] [--pools 1 2 4 8]
+
+Set BCRYPT_ROUNDS to benchmark another bcrypt cost. Also checks that a
+hash made with another cost is upgraded on login.
+"""
+import argparse
+import asyncio
+
+from benchmarks._common import engine, reset_database, timer
+
+import httpx
+from passlib.context import CryptContext
+from sqlmodel import Session, select
+
+from app.auth import auth_service
+from app.main import app
+from app.models import User
+from app.seed import seed_data
+
+
+async def _login(client):
+    r = await client.post("/auth/login", data={"username": "admin", "password": "admin123"})
+    return r.status_code
+
+
+async def _burst(logins, clients):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        semaphore = asyncio.Semaphore(clients)
+
+        async def one():
+            async with semaphore:
+                return await _login(client)
+
+        return await asyncio.gather(*(one() for _ in range(logins)))
+
+
+def check_rehash():
+    weaker = CryptContext(schemes=["bcrypt"], bcrypt__default_rounds=4)
+    with Session(engine) as session:
+        user = session.exec(select(User).where(User.username == "admin")).one()
+        user.password_hash = weaker.hash("admin123")
+        session.add(user)
+        session.commit()
+
+    asyncio.run(_burst(1, 1))
+
+    with Session(engine) as session:
+        user = session.exec(select(User).where(User.username == "admin")).one()
+        rounds = int(user.password_hash.split("$")[2])
+    assert rounds == auth_service.BCRYPT_ROUNDS, rounds
+    print(f"rehash on login OK (4 -> {rounds} rounds)")
+
+
+def run(logins, clients, pools):
+    print(f"\n{'workers':>7} {'logins/s':>9} {'avg wait ms':>12} {'max wait ms':>12} {'503s':>5}")
+    for workers in pools:
+        pool = auth_service.configure_login_pool(workers, max_pending=clients)
+        with timer() as t:
+            codes = asyncio.run(_burst(logins, clients))
+        stats = pool.stats()
+        print(
+            f"{workers:>7} {codes.count(200) / t['seconds']:>9.1f} "
+            f"{stats['avg_queue_wait_ms']:>12} {stats['max_queue_wait_ms']:>12} "
+            f"{codes.count(503):>5}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--pools", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    reset_database()
+    seed_data()
+    check_rehash()
+    run(args.logins, args.clients, args.pools)
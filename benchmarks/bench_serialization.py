@@ -0,0 +1,183 @@
+# file: benchmarks/bench_serialization.py
+"""
+Response serialization for 10k-row responses.
+
+    python -m benchmarks.bench_serialization [--rows 10000] [--repeat 10]
+
+Part 1 times the serializers alone on the same 10k bids:
+- ORM objects through jsonable_encoder + json.dumps (what a plain
+  `return bids` did),
+- validation against the slim BidRead schema + pydantic-core dump
+  (what response_model=List[BidRead] does),
+- orjson on dicts from a column-only select (FastJSONResponse).
+Part 2 times the endpoints end to end through the app against the
+previous implementations (ORM select + default encoder, json.dumps
+NDJSON). Fails (AssertionError) if any new response differs from the
+old one once parsed.
+"""
+import argparse
+import itertools
+import json
+import random
+import time
+from types import SimpleNamespace
+from typing import List, Optional
+
+from benchmarks._common import engine, percentiles, reset_database
+
+from fastapi import Depends, FastAPI
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from pydantic import TypeAdapter
+from sqlalchemy import insert
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.auth.auth_service import get_current_user
+from app.database.database import get_async_session
+from app.main import app
+from app.models import Bid, BiddingRound, BidRead, Employee, PolicyCategory, User
+from app.responses import dumps
+from app.services.bidding_service import get_bids_for_round
+from app.services.employee_service import EMPLOYEE_FIELDS, iter_employees, list_employees_page
+
+BATCH = 50_000
+INSURERS = 50
+
+
+def _insert_batches(conn, model, rows):
+    rows = iter(rows)
+    while batch := list(itertools.islice(rows, BATCH)):
+        conn.execute(insert(model), batch)
+
+
+def load_data(rows: int, seed: int = 0):
+    rng = random.Random(seed)
+    categories = -(-rows // INSURERS)
+    with engine.begin() as conn:
+        _insert_batches(conn, User, (
+            {"user_id": u, "username": f"user{u}", "password_hash": "x", "role": "insurer"}
+            for u in range(1, INSURERS + 1)
+        ))
+        _insert_batches(conn, PolicyCategory, (
+            {"category_id": c, "category_name": f"CAT{c:04d}"} for c in range(1, categories + 1)
+        ))
+        _insert_batches(conn, BiddingRound, [{"round_id": 1, "round_name": "Round 1"}])
+        _insert_batches(conn, Bid, itertools.islice((
+            {"round_id": 1, "insurer_id": u, "category_id": c, "premium": round(rng.uniform(50, 500), 2)}
+            for c in range(1, categories + 1)
+            for u in range(1, INSURERS + 1)
+        ), rows))
+        _insert_batches(conn, Employee, (
+            {
+                "employee_id": i, "user_id": 1, "employee_code": f"EE{i:06d}", "name": f"Employee {i}",
+                "department": rng.choice(["Finance", "HR", "IT", "Ops"]), "age": rng.randint(21, 65),
+                "gender": rng.choice("MF"), "pass_type": rng.choice([None, "WP", "S-Pass", "EP"]),
+            }
+            for i in range(1, rows + 1)
+        ))
+
+
+# ---------------------------
+# Previous implementations
+# ---------------------------
+
+legacy = FastAPI()
+
+
+@legacy.get("/bidding/round/{round_id}/bids")
+async def legacy_bids(round_id: int, session: AsyncSession = Depends(get_async_session)):
+    result = await session.exec(select(Bid).where(Bid.round_id == round_id))
+    return result.all()
+
+
+@legacy.get("/employee/")
+def legacy_employees(limit: int = 100, format: str = "json"):
+    columns = list(EMPLOYEE_FIELDS)
+    if format == "ndjson":
+        return StreamingResponse(
+            (json.dumps(row) + "\n" for row in iter_employees(columns)),
+            media_type="application/x-ndjson",
+        )
+    return list_employees_page(columns, None, limit)
+
+
+# ---------------------------
+# Timing
+# ---------------------------
+
+def time_it(fn, repeat):
+    fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return percentiles(samples)
+
+
+def serializers(repeat):
+    with Session(engine) as session:
+        orm_rows = session.exec(select(Bid).where(Bid.round_id == 1)).all()
+        session.expunge_all()
+    dict_rows = get_bids_for_round(1)
+    adapter = TypeAdapter(List[BidRead])
+
+    cases = {
+        "jsonable_encoder + json (ORM)": lambda: json.dumps(jsonable_encoder(orm_rows)).encode(),
+        "response_model BidRead (ORM)": lambda: adapter.dump_json(adapter.validate_python(orm_rows, from_attributes=True)),
+        "orjson (column dicts)": lambda: dumps(dict_rows),
+    }
+    outputs = {name: json.loads(fn()) for name, fn in cases.items()}
+    baseline = sorted(outputs["jsonable_encoder + json (ORM)"], key=lambda b: b["bid_id"])
+    for name, output in outputs.items():
+        assert sorted(output, key=lambda b: b["bid_id"]) == baseline, name
+
+    print(f"serializers, {len(dict_rows)} bids{'':12} {'p50 ms':>8} {'p99 ms':>8}")
+    for name, fn in cases.items():
+        t = time_it(fn, repeat)
+        print(f"  {name:36} {t['p50_ms']:8.2f} {t['p99_ms']:8.2f}")
+
+
+def endpoints(repeat, rows):
+    def parse(response):
+        response.raise_for_status()
+        if response.headers["content-type"].startswith("application/x-ndjson"):
+            return [json.loads(line) for line in response.text.splitlines()]
+        body = response.json()
+        return sorted(body, key=lambda b: b["bid_id"]) if isinstance(body, list) else body
+
+    paths = {
+        f"GET /bidding/round/1/bids ({rows} bids)": "/bidding/round/1/bids",
+        "GET /employee/?limit=1000": "/employee/?limit=1000",
+        f"GET /employee/?format=ndjson ({rows} rows)": "/employee/?format=ndjson",
+    }
+    admin = SimpleNamespace(user_id=1, username="admin", role="admin", password_version="")
+    app.dependency_overrides[get_current_user] = lambda: admin
+    try:
+        with TestClient(app) as new, TestClient(legacy) as old:
+            print(f"\nendpoints{'':32} {'before ms':>10} {'after ms':>10}")
+            for name, path in paths.items():
+                assert parse(new.get(path)) == parse(old.get(path)), name
+                before = time_it(lambda: old.get(path), repeat)
+                after = time_it(lambda: new.get(path), repeat)
+                print(f"  {name:38} {before['p50_ms']:10.1f} {after['p50_ms']:10.1f}")
+    finally:
+        app.dependency_overrides.pop(get_current_user, None)
+    print("\nnew responses match the previous ones OK")
+
+
+def run(rows, repeat):
+    reset_database()
+    load_data(rows)
+    serializers(repeat)
+    endpoints(repeat, rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    run(args.rows, args.repeat)
@@ -0,0 +1,289 @@
+# file: benchmarks/bench_simulation.py
+"""
+Premium cost simulation throughput (app/services/simulation_service.py).
+
+    python -m benchmarks.bench_simulation [--employees 50000] [--scenarios 10000]
+
+Loads a round's model at the given workforce size and reports scenarios
+per second: the batched engine (encode + evaluate), the same scenarios
+priced employee by employee (one NumPy pass over every employee,
+category and carrier per scenario), a full carrier grid, and the
+POST /simulation endpoint end to end. Fails (AssertionError) unless:
+- every scenario costs the same as the per-employee pricing,
+- the current cost per department equals /analytics/department-premium,
+- "move GHS to insurer X" and "+10% for 60+" match hand computations,
+- a cached model runs no SQL and a committed bid change is picked up.
+"""
+import argparse
+import itertools
+import random
+
+from benchmarks._common import count_queries, engine, reset_database, timer
+
+import numpy as np
+from fastapi.testclient import TestClient
+from sqlalchemy import func, insert
+from sqlmodel import Session, select
+
+from app.auth.auth_service import hash_password
+from app.main import app
+from app.models import (
+    AgeBandChange, Bid, BiddingRound, Employee, EmployeePlan, Plan, PlanTier, PolicyCategory,
+    PremiumChange, Scenario, ScenarioGrid, SimulationRequest, User,
+)
+from app.services import simulation_service as sim
+from app.services.analytics_service import UNASSIGNED
+
+INSURERS = 6
+PLANS = 40
+DEPARTMENTS = 12
+CATEGORIES = ["GTL", "GCI", "GHS", "GPA", "FWMI"]
+ROUND = 1
+
+BATCH = 50_000
+
+
+def _insert_batches(conn, model, rows):
+    rows = iter(rows)
+    while batch := list(itertools.islice(rows, BATCH)):
+        conn.execute(insert(model), batch)
+
+
+def load_data(employees: int, seed: int = 0):
+    rng = random.Random(seed)
+    insurers = range(2, INSURERS + 2)
+    with engine.begin() as conn:
+        _insert_batches(conn, User, [
+            {"user_id": 1, "username": "admin", "password_hash": hash_password("admin123"), "role": "admin"},
+            *({"user_id": u, "username": f"insurer{u}", "password_hash": "x", "role": "insurer"} for u in insurers),
+        ])
+        _insert_batches(conn, PolicyCategory, (
+            {"category_id": i, "category_name": c} for i, c in enumerate(CATEGORIES, start=1)
+        ))
+        _insert_batches(conn, Plan, (
+            {"plan_id": p, "plan_name": f"Plan {p}", "insurer_id": insurers[p % INSURERS]}
+            for p in range(1, PLANS + 1)
+        ))
+        _insert_batches(conn, PlanTier, (
+            {"plan_id": p, "category_id": c, "sum_insured": rng.randint(3, 9) * 10000}
+            for p in range(1, PLANS + 1)
+            for c in range(1, len(CATEGORIES) + 1)
+            if rng.random() < 0.8
+        ))
+        _insert_batches(conn, BiddingRound, [{"round_id": ROUND, "round_name": "Renewal"}])
+        # The last insurer does not quote FWMI
+        _insert_batches(conn, Bid, (
+            {"round_id": ROUND, "insurer_id": u, "category_id": c, "premium": rng.randint(50, 900) + 0.25}
+            for u in insurers
+            for c in range(1, len(CATEGORIES) + 1)
+            if not (u == insurers[-1] and CATEGORIES[c - 1] == "FWMI")
+        ))
+        _insert_batches(conn, Employee, (
+            {
+                "employee_id": i,
+                "user_id": 1,
+                "employee_code": f"EE{i:06d}",
+                "department": f"Dept {rng.randrange(DEPARTMENTS):02d}" if i % 40 else None,
+                "age": rng.randint(19, 68) if i % 200 else None,
+                "active": i % 97 != 0,
+            }
+            for i in range(1, employees + 1)
+        ))
+        _insert_batches(conn, EmployeePlan, (
+            {"employee_id": e, "plan_id": p}
+            for e in range(1, employees + 1)
+            for p in rng.sample(range(1, PLANS + 1), rng.randint(0, 2))
+        ))
+
+
+def random_scenarios(model, count: int, seed: int = 1):
+    rng = random.Random(seed)
+    insurers = [i for i in model.insurers if i is not None]
+    out = []
+    for _ in range(count):
+        out.append(Scenario(
+            carriers={c: rng.choice(insurers) for c in rng.sample(model.categories, rng.randint(0, 2))},
+            premium_changes=[
+                PremiumChange(
+                    pct=rng.uniform(-10, 15),
+                    category=rng.choice([None, *model.categories]),
+                    insurer_id=rng.choice([None, *insurers]),
+                )
+                for _ in range(rng.randint(0, 2))
+            ],
+            age_changes=[
+                AgeBandChange(band=rng.choice(sim.AGE_BANDS), pct=rng.uniform(0, 20),
+                              category=rng.choice([None, *model.categories]))
+                for _ in range(rng.randint(0, 1))
+            ],
+        ))
+    return out
+
+
+# ---------------------------
+# Per-employee pricing
+# ---------------------------
+
+class Coverage:
+    """One row per (active employee, plan, category): the unreduced workforce."""
+
+    def __init__(self, model):
+        department = func.coalesce(Employee.department, UNASSIGNED)
+        with Session(engine) as session:
+            rows = session.exec(
+                select(department, Employee.age, PolicyCategory.category_name, Plan.insurer_id)
+                .select_from(Employee)
+                .join(EmployeePlan, EmployeePlan.employee_id == Employee.employee_id)
+                .join(Plan, Plan.plan_id == EmployeePlan.plan_id)
+                .join(PlanTier, PlanTier.plan_id == Plan.plan_id)
+                .join(PolicyCategory, PolicyCategory.category_id == PlanTier.category_id)
+                .where(Employee.active)
+            ).all()
+        departments = {d: i for i, d in enumerate(model.departments)}
+        categories = {c: i for i, c in enumerate(model.categories)}
+        insurers = {u: i for i, u in enumerate(model.insurers)}
+        self.department = np.array([departments[r[0]] for r in rows])
+        self.band = sim.age_band(np.array([np.nan if r[1] is None else r[1] for r in rows], dtype=float))
+        self.category = np.array([categories[r[2]] for r in rows])
+        self.insurer = np.array([insurers[r[3]] for r in rows])
+        self.shape = (len(model.departments), len(model.categories))
+
+    def price(self, model, batch, s):
+        """[department, category] cost of scenario s."""
+        moved = batch.carrier[s][self.category]
+        carrier = np.where(moved >= 0, moved, self.insurer)
+        cost = (model.premium[carrier, self.category]
+                * batch.price[s][carrier, self.category]
+                * batch.age[s][self.band, self.category])
+        flat = np.bincount(self.department * self.shape[1] + self.category, cost, self.shape[0] * self.shape[1])
+        return flat.reshape(self.shape)
+
+
+# ---------------------------
+# Checks
+# ---------------------------
+
+def check(client, headers, model, coverage):
+    batch = sim.encode_scenarios(model, random_scenarios(model, 300, seed=7))
+    costs = sim.evaluate(model, batch)
+    for s in range(len(costs)):
+        np.testing.assert_allclose(costs[s], coverage.price(model, batch, s), rtol=1e-9, atol=1e-6)
+    print(f"{len(costs)} random scenarios equal per-employee pricing OK")
+
+    current = client.get(f"/simulation/round/{ROUND}", headers=headers).json()
+    analytics = client.get(f"/analytics/department-premium?round_id={ROUND}", headers=headers).json()
+    assert current["departments"] == analytics["departments"]
+    np.testing.assert_allclose(current["baseline"]["by_department"], analytics["premium"], atol=0.01)
+    print("current cost per department equals /analytics/department-premium OK")
+
+    ghs = model.categories.index("GHS")
+    covered_ghs = model.headcount[:, :, ghs, :].sum()
+    for target in [i for i in model.insurers if i is not None][:3]:
+        result = client.post(f"/simulation/round/{ROUND}", headers=headers, json={
+            "scenarios": [{"carriers": {"GHS": target}}],
+        }).json()
+        base = result["baseline"]
+        expected = base["total"] - base["by_category"][ghs] + covered_ghs * model.premium[model.insurers.index(target), ghs]
+        assert abs(result["scenarios"][0]["total"] - expected) < 0.01, (result["scenarios"][0], expected)
+
+    old = (coverage.band == sim.AGE_BANDS.index("60+"))
+    old_cost = sum(model.premium[coverage.insurer[old], coverage.category[old]])
+    result = client.post(f"/simulation/round/{ROUND}", headers=headers, json={
+        "scenarios": [{"age_changes": [{"band": "60+", "pct": 10}]}],
+    }).json()
+    assert abs(result["scenarios"][0]["change"] - old_cost * 0.1) < 0.01, (result["scenarios"][0], old_cost)
+    print("'move GHS to X' and '+10% for 60+' match hand computations OK")
+
+    fwmi_gap = client.post(f"/simulation/round/{ROUND}", headers=headers, json={
+        "scenarios": [{"carriers": {"FWMI": model.insurers[-1]}}],
+    }).json()["scenarios"][0]
+    assert fwmi_gap["unpriced"] == model.headcount[:, :, model.categories.index("FWMI"), :].sum()
+    for body, status in [({"scenarios": [{"carriers": {"XYZ": 2}}]}, 400), ({"scenarios": []}, 400)]:
+        assert client.post(f"/simulation/round/{ROUND}", headers=headers, json=body).status_code == status
+    assert client.get("/simulation/round/999", headers=headers).status_code == 404
+
+    request = SimulationRequest(scenarios=random_scenarios(model, 10))
+    with count_queries() as statements:
+        sim.simulate(ROUND, request)
+    assert not statements, statements
+    with Session(engine) as session:
+        bid = session.exec(select(Bid).order_by(Bid.bid_id)).first()
+        bid.premium += 100
+        session.add(bid)
+        session.commit()
+    after = sim.simulate(ROUND, request)
+    assert after["baseline"]["total"] > current["baseline"]["total"], "bid change not picked up"
+    print("cached model runs no SQL, committed bid change picked up OK")
+
+
+# ---------------------------
+# Throughput
+# ---------------------------
+
+def run(client, headers, scenarios: int):
+    with timer() as load:
+        sim.model_cache.invalidate()
+        model = sim.get_model(ROUND)
+    coverage = Coverage(model)
+    check(client, headers, model, coverage)
+    model = sim.get_model(ROUND)
+
+    print(f"\n{model.employees} active employees, {len(coverage.category)} employee-categories covered; "
+          f"model {model.headcount.shape} loaded in {load['seconds'] * 1000:.0f}ms")
+    print(f"{'':44} {'scenarios':>10} {'seconds':>9} {'scenarios/s':>12}")
+
+    def row(label, count, seconds):
+        print(f"{label:<44} {count:>10} {seconds:9.3f} {count / seconds:12,.0f}")
+
+    specs = random_scenarios(model, scenarios)
+    with timer() as encode:
+        batch = sim.encode_scenarios(model, specs)
+    with timer() as evaluate:
+        sim.evaluate(model, batch)
+    row("engine: encode + evaluate", scenarios, encode["seconds"] + evaluate["seconds"])
+    row("engine: evaluate only", scenarios, evaluate["seconds"])
+
+    sample = min(scenarios, 200)
+    with timer() as per_employee:
+        for s in range(sample):
+            coverage.price(model, batch, s)
+    row("per employee, one scenario at a time", sample, per_employee["seconds"])
+
+    grid = ScenarioGrid(carriers={c: [None, *[i for i in model.insurers if i is not None]] for c in model.categories})
+    with timer() as full_grid:
+        grid_batch = sim.encode_grid(model, grid)
+        sim.evaluate(model, grid_batch)
+    options = len(next(iter(grid.carriers.values())))
+    row(f"engine: every carrier mix ({options}^{len(model.categories)})",
+        len(grid_batch.carrier), full_grid["seconds"])
+
+    body = {"scenarios": [s.model_dump() for s in specs[:2000]], "top": 10}
+    with timer() as api:
+        r = client.post(f"/simulation/round/{ROUND}", headers=headers, json=body)
+    assert r.status_code == 200 and r.json()["evaluated"] == 2000
+    row("POST /simulation, top 10", 2000, api["seconds"])
+
+    body = {"grid": grid.model_dump(), "top": 5}
+    with timer() as api:
+        r = client.post(f"/simulation/round/{ROUND}", headers=headers, json=body)
+    best = r.json()["scenarios"][0]
+    row("POST /simulation, carrier grid, top 5", r.json()["evaluated"], api["seconds"])
+    print(f"\ncheapest fully priced carrier mix: {best['name']} "
+          f"({best['change']:+,.2f}, {best['change_pct']:+.1f}% vs current)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--employees", type=int, default=50_000)
+    parser.add_argument("--scenarios", type=int, default=10_000)
+    args = parser.parse_args()
+
+    reset_database()
+    with timer() as load:
+        load_data(args.employees)
+    print(f"{args.employees} employees loaded in {load['seconds']:.1f}s")
+
+    with TestClient(app) as client:
+        r = client.post("/auth/login", data={"username": "admin", "password": "admin123"})
+        r.raise_for_status()
+        run(client, {"Authorization": f"Bearer {r.json()['access_token']}"}, args.scenarios)
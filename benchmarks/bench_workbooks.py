@@ -0,0 +1,138 @@
+# file: benchmarks/bench_workbooks.py
+"""
+Arrow cache for the Excel workbooks (analytics/workbooks.py).
+
+    python -m benchmarks.bench_workbooks [--repeat 20]
+
+For every workbook sheet in data/, times pd.read_excel against the
+first cached read (parse + convert) and later memory-mapped reads, with
+the cache in a temporary directory. Fails (AssertionError) unless:
+- a cached sheet equals read_excel's frame (mixed text/number columns
+  as text),
+- touching a workbook without changing it only re-hashes it, and an
+  edited workbook is converted again and returns the new values.
+"""
+import argparse
+import os
+import shutil
+import statistics
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from benchmarks._common import timer
+
+import openpyxl
+import pandas as pd
+from pandas.testing import assert_frame_equal
+
+from analytics import workbooks
+from analytics.generate_charts import load_sources
+from analytics.workbooks import DATA_DIR, cache_stats, read_sheet
+
+SHEETS = [
+    # (workbook, sheet, header row)
+    ("cleaned_insurance_dataset.xlsx", 0, 0),
+    ("headcount_per_plan.xlsx", 0, 0),
+    ("headcount_corrected.xlsx", 0, 0),
+    ("premium_comparison_clean.xlsx", 0, 0),
+    ("Breakdown to divisions.xlsx", "General", 0),
+    ("Breakdown to divisions.xlsx", "Div", 2),
+    ("Rate Comparison.xlsx", 0, None),
+]
+
+
+def _median_ms(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def _expected(df):
+    # What the cache promises: mixed text/number columns come back as text
+    df = df.copy()
+    for col in df.columns[df.dtypes == object]:
+        df[col] = df[col].where(df[col].isna(), df[col].astype(str)).astype("str")
+    return df
+
+
+def compare(cache_dir, repeat):
+    print(f"{'sheet':<44} {'read_excel':>11} {'convert':>9} {'cached':>9} {'alloc KB':>9} {'frame KB':>9}")
+    for name, sheet, header in SHEETS:
+        path = DATA_DIR / name
+        with timer() as first:
+            cached = read_sheet(path, sheet, header, cache_dir=cache_dir)
+        reference = pd.read_excel(path, sheet_name=sheet, header=header)
+        assert_frame_equal(cached, _expected(reference), check_dtype=False, obj=f"{name}:{sheet}")
+
+        excel_ms = _median_ms(lambda: pd.read_excel(path, sheet_name=sheet, header=header), max(2, repeat // 5))
+        cached_ms = _median_ms(lambda: read_sheet(path, sheet, header, cache_dir=cache_dir), repeat)
+
+        # Python-side allocations of a cached read: columns mapped from
+        # the cache file do not show up here
+        tracemalloc.start()
+        frame = read_sheet(path, sheet, header, cache_dir=cache_dir)
+        allocated = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        size = frame.memory_usage(index=False).sum()
+
+        label = f"{name}:{sheet}"
+        print(f"{label:<44} {excel_ms:9.1f}ms {first['seconds'] * 1000:7.1f}ms {cached_ms:7.2f}ms "
+              f"{allocated / 1024:9.0f} {size / 1024:9.0f}")
+    print("cached sheets equal read_excel OK")
+
+
+def check_staleness(cache_dir):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "headcount_per_plan.xlsx"
+        shutil.copy(DATA_DIR / "headcount_per_plan.xlsx", path)
+
+        before = read_sheet(path, cache_dir=cache_dir)
+        converted = cache_stats.converted
+
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        assert_frame_equal(read_sheet(path, cache_dir=cache_dir), before)
+        assert cache_stats.converted == converted and cache_stats.rehashed >= 1, cache_stats.stats()
+        hits = cache_stats.hits
+        read_sheet(path, cache_dir=cache_dir)
+        assert cache_stats.hits == hits + 1, "new mtime not recorded"
+        print("touched workbook: re-hashed, not converted OK")
+
+        book = openpyxl.load_workbook(path)
+        book.active["D2"] = 12345
+        book.save(path)
+        after = read_sheet(path, cache_dir=cache_dir)
+        assert cache_stats.converted == converted + 1, cache_stats.stats()
+        assert after.loc[0, "Headcount"] == 12345 and before.loc[0, "Headcount"] != 12345
+        print("edited workbook: converted again, new values OK")
+
+
+def charts_load(repeat):
+    workbooks.clear_cache()
+    with timer() as cold:
+        load_sources()
+    warm_ms = _median_ms(load_sources, repeat)
+    print(f"\nanalytics load_sources(): first {cold['seconds'] * 1000:.0f}ms, cached {warm_ms:.1f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    cache_dir = Path(tempfile.mkdtemp(prefix="tcx3901-workbooks-"))
+    try:
+        compare(cache_dir, args.repeat)
+        check_staleness(cache_dir)
+    finally:
+        shutil.rmtree(cache_dir)
+    workbooks.CACHE_DIR = Path(tempfile.mkdtemp(prefix="tcx3901-workbooks-"))
+    try:
+        charts_load(args.repeat)
+    finally:
+        shutil.rmtree(workbooks.CACHE_DIR)
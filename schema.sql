@@ -0,0 +1,222 @@
+-- Generated from the models: python -m app.database.migrations schema mysql > schema.sql
+-- Existing databases are upgraded with: python -m app.database.migrations upgrade
+
+CREATE TABLE biddinground (
+	round_id INTEGER NOT NULL AUTO_INCREMENT, 
+	round_name VARCHAR(255) NOT NULL, 
+	start_date VARCHAR(255), 
+	end_date VARCHAR(255), 
+	PRIMARY KEY (round_id)
+);
+
+CREATE TABLE compliancedirty (
+	employee_id INTEGER NOT NULL AUTO_INCREMENT, 
+	marked_at DATETIME NOT NULL, 
+	PRIMARY KEY (employee_id)
+);
+
+CREATE TABLE compliancerun (
+	run_id INTEGER NOT NULL AUTO_INCREMENT, 
+	mode VARCHAR(255) NOT NULL, 
+	status VARCHAR(255) NOT NULL, 
+	employees_checked INTEGER NOT NULL, 
+	violations INTEGER NOT NULL, 
+	max_employee_id INTEGER NOT NULL, 
+	rules_hash VARCHAR(255) NOT NULL, 
+	started_at DATETIME NOT NULL, 
+	finished_at DATETIME, 
+	PRIMARY KEY (run_id)
+);
+
+CREATE TABLE complianceviolation (
+	employee_id INTEGER NOT NULL, 
+	rule_id INTEGER NOT NULL, 
+	pass_type VARCHAR(255) NOT NULL, 
+	category_id INTEGER NOT NULL, 
+	coverage FLOAT, 
+	min_sum_insured FLOAT NOT NULL, 
+	PRIMARY KEY (employee_id, rule_id)
+);
+
+CREATE INDEX ix_complianceviolation_category_id ON complianceviolation (category_id);
+
+CREATE TABLE coveragecube (
+	cube_id INTEGER NOT NULL AUTO_INCREMENT, 
+	cell VARCHAR(400) NOT NULL, 
+	cuboid VARCHAR(50) NOT NULL, 
+	category_id INTEGER, 
+	department VARCHAR(255), 
+	insurer_id INTEGER, 
+	plan_id INTEGER, 
+	headcount INTEGER NOT NULL, 
+	total_sum_insured FLOAT NOT NULL, 
+	PRIMARY KEY (cube_id)
+);
+
+CREATE INDEX ix_coveragecube_slice ON coveragecube (cuboid, category_id, department, insurer_id, plan_id);
+
+CREATE UNIQUE INDEX uq_coveragecube_cell_key ON coveragecube (cell);
+
+CREATE TABLE employeecoveragesnapshot (
+	snapshot_id INTEGER NOT NULL AUTO_INCREMENT, 
+	employee_id INTEGER NOT NULL, 
+	user_id INTEGER NOT NULL, 
+	employee_name VARCHAR(255), 
+	employee_code VARCHAR(255) NOT NULL, 
+	department VARCHAR(255), 
+	plan_id INTEGER NOT NULL, 
+	plan_name VARCHAR(255) NOT NULL, 
+	insurer_id INTEGER, 
+	tier_id INTEGER, 
+	category_id INTEGER, 
+	category_name VARCHAR(255), 
+	sum_insured FLOAT, 
+	PRIMARY KEY (snapshot_id)
+);
+
+CREATE INDEX ix_coveragesnapshot_category ON employeecoveragesnapshot (category_id);
+
+CREATE INDEX ix_coveragesnapshot_employee ON employeecoveragesnapshot (employee_id);
+
+CREATE INDEX ix_coveragesnapshot_plan ON employeecoveragesnapshot (plan_id);
+
+CREATE INDEX ix_coveragesnapshot_user ON employeecoveragesnapshot (user_id, employee_id, plan_id, tier_id);
+
+CREATE TABLE importjob (
+	job_id INTEGER NOT NULL AUTO_INCREMENT, 
+	filename VARCHAR(255) NOT NULL, 
+	file_path VARCHAR(255) NOT NULL, 
+	chunk_size INTEGER NOT NULL, 
+	status VARCHAR(255) NOT NULL, 
+	rows_processed INTEGER NOT NULL, 
+	employees_created INTEGER NOT NULL, 
+	plan_links_created INTEGER NOT NULL, 
+	error_count INTEGER NOT NULL, 
+	errors TEXT, 
+	created_at DATETIME NOT NULL, 
+	started_at DATETIME, 
+	finished_at DATETIME, 
+	PRIMARY KEY (job_id)
+);
+
+CREATE TABLE policycategory (
+	category_id INTEGER NOT NULL AUTO_INCREMENT, 
+	category_name VARCHAR(255) NOT NULL, 
+	PRIMARY KEY (category_id)
+);
+
+CREATE UNIQUE INDEX ix_policycategory_category_name ON policycategory (category_name);
+
+CREATE TABLE user (
+	user_id INTEGER NOT NULL AUTO_INCREMENT, 
+	username VARCHAR(255) NOT NULL, 
+	password_hash VARCHAR(255) NOT NULL, 
+	`role` VARCHAR(255) NOT NULL, 
+	PRIMARY KEY (user_id)
+);
+
+CREATE UNIQUE INDEX ix_user_username ON user (username);
+
+CREATE TABLE bid (
+	bid_id INTEGER NOT NULL AUTO_INCREMENT, 
+	round_id INTEGER NOT NULL, 
+	insurer_id INTEGER NOT NULL, 
+	category_id INTEGER NOT NULL, 
+	premium FLOAT NOT NULL, 
+	version INTEGER NOT NULL DEFAULT 1, 
+	PRIMARY KEY (bid_id), 
+	FOREIGN KEY(round_id) REFERENCES biddinground (round_id), 
+	FOREIGN KEY(insurer_id) REFERENCES user (user_id), 
+	FOREIGN KEY(category_id) REFERENCES policycategory (category_id)
+);
+
+CREATE INDEX ix_bid_category_id ON bid (category_id);
+
+CREATE INDEX ix_bid_insurer_id ON bid (insurer_id);
+
+CREATE UNIQUE INDEX uq_bid_round_insurer_category ON bid (round_id, insurer_id, category_id);
+
+CREATE TABLE bidsubmission (
+	submission_id INTEGER NOT NULL AUTO_INCREMENT, 
+	insurer_id INTEGER NOT NULL, 
+	idempotency_key VARCHAR(100) NOT NULL, 
+	request_hash VARCHAR(64) NOT NULL, 
+	response TEXT NOT NULL, 
+	created_at DATETIME NOT NULL, 
+	PRIMARY KEY (submission_id), 
+	FOREIGN KEY(insurer_id) REFERENCES user (user_id)
+);
+
+CREATE UNIQUE INDEX uq_bidsubmission_insurer_key ON bidsubmission (insurer_id, idempotency_key);
+
+CREATE TABLE compliancerule (
+	rule_id INTEGER NOT NULL AUTO_INCREMENT, 
+	pass_type VARCHAR(255) NOT NULL, 
+	category_id INTEGER NOT NULL, 
+	min_sum_insured FLOAT NOT NULL, 
+	PRIMARY KEY (rule_id), 
+	FOREIGN KEY(category_id) REFERENCES policycategory (category_id)
+);
+
+CREATE UNIQUE INDEX uq_compliancerule_pass_category ON compliancerule (pass_type, category_id);
+
+CREATE TABLE employee (
+	employee_id INTEGER NOT NULL AUTO_INCREMENT, 
+	user_id INTEGER NOT NULL, 
+	employee_code VARCHAR(255) NOT NULL, 
+	name VARCHAR(255), 
+	department VARCHAR(255), 
+	age INTEGER, 
+	gender VARCHAR(255), 
+	pass_type VARCHAR(255), 
+	active BOOL NOT NULL DEFAULT 1, 
+	PRIMARY KEY (employee_id), 
+	FOREIGN KEY(user_id) REFERENCES user (user_id)
+);
+
+CREATE INDEX ix_employee_department_id ON employee (department, employee_id);
+
+CREATE UNIQUE INDEX ix_employee_employee_code ON employee (employee_code);
+
+CREATE INDEX ix_employee_user_id ON employee (user_id);
+
+CREATE TABLE plan (
+	plan_id INTEGER NOT NULL AUTO_INCREMENT, 
+	plan_name VARCHAR(255) NOT NULL, 
+	insurer_id INTEGER, 
+	PRIMARY KEY (plan_id), 
+	FOREIGN KEY(insurer_id) REFERENCES user (user_id)
+);
+
+CREATE INDEX ix_plan_insurer_id ON plan (insurer_id);
+
+CREATE TABLE employeeplan (
+	employee_id INTEGER NOT NULL, 
+	plan_id INTEGER NOT NULL, 
+	PRIMARY KEY (employee_id, plan_id), 
+	FOREIGN KEY(employee_id) REFERENCES employee (employee_id), 
+	FOREIGN KEY(plan_id) REFERENCES plan (plan_id)
+);
+
+CREATE INDEX ix_employeeplan_plan_id ON employeeplan (plan_id);
+
+CREATE TABLE plantier (
+	tier_id INTEGER NOT NULL AUTO_INCREMENT, 
+	plan_id INTEGER NOT NULL, 
+	category_id INTEGER NOT NULL, 
+	sum_insured FLOAT, 
+	PRIMARY KEY (tier_id), 
+	FOREIGN KEY(plan_id) REFERENCES plan (plan_id), 
+	FOREIGN KEY(category_id) REFERENCES policycategory (category_id)
+);
+
+CREATE INDEX ix_plantier_category_id ON plantier (category_id);
+
+CREATE UNIQUE INDEX uq_plantier_plan_category ON plantier (plan_id, category_id);
+
+CREATE TABLE schema_version (
+	version INTEGER NOT NULL, 
+	name VARCHAR(200) NOT NULL, 
+	applied_at DATETIME NOT NULL, 
+	PRIMARY KEY (version)
+);
@@ -0,0 +1,68 @@
+# file: tests/conftest.py
+"""
+Tests run against a throwaway SQLite database: DATABASE_URL is pointed
+at a temp file before the app is imported, so local.db (or a database
+set in the environment) is never touched.
+
+    python -m pytest -q
+"""
+import os
+import tempfile
+
+_tmpdir = tempfile.mkdtemp(prefix="tcx3901-test-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmpdir}/test.db"
+# Tests start compliance runs themselves
+os.environ["COMPLIANCE_INTERVAL"] = "0"
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from benchmarks._common import engine, reset_database  # noqa: E402
+from app.auth.auth_service import invalidate_user  # noqa: E402
+from app.main import app  # noqa: E402
+from app.seed import seed_data  # noqa: E402
+from app.services.etags import invalidate_etags  # noqa: E402
+from app.services.reference_cache import invalidate_reference_data  # noqa: E402
+
+
+@pytest.fixture
+def db():
+    """A fresh schema with the seed data; in-process caches forgotten."""
+    reset_database()
+    seed_data()
+    invalidate_reference_data()
+    invalidate_user()
+    invalidate_etags()
+
+
+@pytest.fixture(scope="session")
+def _app():
+    # One startup/shutdown per run: shutdown stops the module-level pools
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def client(_app, db):
+    return _app
+
+
+@pytest.fixture
+def admin_headers(client):
+    r = client.post("/auth/login", data={"username": "admin", "password": "admin123"})
+    r.raise_for_status()
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+@pytest.fixture
+def foreign_keys():
+    """SQLite enforces foreign keys only when asked to, per connection."""
+    def enable(dbapi_connection, connection_record):
+        dbapi_connection.execute("PRAGMA foreign_keys=ON")
+
+    engine.dispose()
+    event.listen(engine, "connect", enable)
+    yield
+    event.remove(engine, "connect", enable)
+    engine.dispose()
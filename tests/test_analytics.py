@@ -0,0 +1,68 @@
+"""/analytics endpoints: JSON series, PNG/SVG charts, render pool errors."""
+import os
+
+import pytest
+
+from app.services import analytics_service
+
+PATHS = ["/analytics/department-premium", "/analytics/division-premiums", "/analytics/plan-distribution"]
+
+
+@pytest.fixture
+def analytics(client, admin_headers):
+    # Data versions start over with each fresh database
+    analytics_service.series_cache.invalidate()
+    analytics_service.chart_cache.invalidate()
+    return client, admin_headers
+
+
+@pytest.mark.parametrize("path", PATHS)
+def test_json(analytics, path):
+    client, headers = analytics
+    r = client.get(f"{path}?format=json", headers=headers)
+    assert r.status_code == 200, r.text
+    assert "departments" in r.json()
+
+
+@pytest.mark.parametrize("fmt, media_type, magic", [("png", "image/png", b"\x89PNG"), ("svg", "image/svg+xml", b"<svg")])
+def test_charts(analytics, fmt, media_type, magic):
+    client, headers = analytics
+    r = client.get(f"/analytics/division-premiums?format={fmt}", headers=headers)
+    assert r.status_code == 200, r.text
+    assert r.headers["content-type"].startswith(media_type)
+    assert magic in r.content[:500]
+
+
+def test_admin_only(analytics):
+    client, _ = analytics
+    r = client.post("/auth/login", data={"username": "emp001", "password": "emp001pass"})
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    assert client.get(PATHS[0], headers=headers).status_code == 403
+
+
+def test_busy_render_pool_is_a_503(analytics, monkeypatch):
+    client, headers = analytics
+    monkeypatch.setattr(analytics_service.render_pool, "max_pending", 0)
+    r = client.get("/analytics/department-premium?format=png", headers=headers)
+    assert r.status_code == 503 and r.headers["Retry-After"] == "1"
+    # JSON does not need the render pool
+    assert client.get("/analytics/department-premium", headers=headers).status_code == 200
+
+
+def test_dead_render_worker_is_a_503_then_recovers(analytics, monkeypatch):
+    client, headers = analytics
+    pool = analytics_service.render_pool
+    submit = pool.submit
+
+    async def crash(fn, *args):
+        return await submit(os._exit, 1)
+
+    restarts = pool.stats()["restarts"]
+    monkeypatch.setattr(pool, "submit", crash)
+    r = client.get("/analytics/department-premium?format=png", headers=headers)
+    assert r.status_code == 503 and r.headers["Retry-After"] == "1"
+    assert pool.stats()["restarts"] == restarts + 1
+
+    monkeypatch.undo()
+    r = client.get("/analytics/department-premium?format=png", headers=headers)
+    assert r.status_code == 200 and r.content[:4] == b"\x89PNG"
@@ -0,0 +1,112 @@
+"""Principal cache invalidation: role/password changes, rehash on login."""
+import asyncio
+
+from passlib.hash import bcrypt
+from sqlmodel import Session, select
+
+from benchmarks._common import count_queries, engine
+
+from app.auth import auth_service
+from app.auth.auth_service import create_access_token, hash_password, principal_cache, token_claims
+from app.models import User
+from app.services.cache import MISSING, TTLCache
+
+
+def login(client, username, password):
+    r = client.post("/auth/login", data={"username": username, "password": password})
+    r.raise_for_status()
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+def _update_user(username, **fields):
+    with Session(engine) as session:
+        user = session.exec(select(User).where(User.username == username)).one()
+        for key, value in fields.items():
+            setattr(user, key, value)
+        session.add(user)
+        session.commit()
+
+
+def test_cached_principal_needs_no_sql(client):
+    headers = login(client, "emp001", "emp001pass")
+    client.get("/test-auth/check", headers=headers)
+    with count_queries() as statements:
+        assert client.get("/test-auth/check", headers=headers).status_code == 200
+    assert not statements, statements
+
+
+def test_role_change_is_seen_straight_away(client):
+    headers = login(client, "emp001", "emp001pass")
+    assert client.get("/test-auth/check", headers=headers).json()["role"] == "employee"
+
+    _update_user("emp001", role="admin")
+    assert client.get("/test-auth/check", headers=headers).json()["role"] == "admin"
+
+
+def test_password_change_revokes_older_tokens(client):
+    headers = login(client, "emp001", "emp001pass")
+    assert client.get("/test-auth/check", headers=headers).status_code == 200
+
+    _update_user("emp001", password_hash=hash_password("new-pass"))
+    assert client.get("/test-auth/check", headers=headers).status_code == 401
+    headers = login(client, "emp001", "new-pass")
+    assert client.get("/test-auth/check", headers=headers).status_code == 200
+
+
+def test_rehash_on_login_revokes_older_tokens(client):
+    # A hash made with a different cost is upgraded on the next login
+    _update_user("emp001", password_hash=bcrypt.using(rounds=4).hash("emp001pass"))
+    with Session(engine) as session:
+        user = session.exec(select(User).where(User.username == "emp001")).one()
+        old = {"Authorization": f"Bearer {create_access_token(token_claims(user))}"}
+    assert client.get("/test-auth/check", headers=old).status_code == 200
+
+    new = login(client, "emp001", "emp001pass")
+    with Session(engine) as session:
+        stored = session.exec(select(User).where(User.username == "emp001")).one().password_hash
+    assert not stored.startswith("$2b$04$"), stored
+    assert client.get("/test-auth/check", headers=old).status_code == 401
+    assert client.get("/test-auth/check", headers=new).status_code == 200
+
+
+def test_load_racing_with_a_change_is_not_cached(client):
+    class Result:
+        def __init__(self, user):
+            self.user = user
+
+        def first(self):
+            return self.user
+
+    class RacingSession:
+        """Returns the row as read, then commits a change before the cache is filled."""
+        async def exec(self, statement):
+            with Session(engine) as session:
+                user = session.exec(select(User).where(User.username == "emp001")).one()
+                session.expunge(user)
+            _update_user("emp001", role="admin")
+            return Result(user)
+
+    principal_cache.invalidate()
+    principal = asyncio.run(auth_service._load_principal(RacingSession(), "emp001"))
+    assert principal.role == "employee"
+    assert principal_cache.get("emp001") is MISSING
+
+    headers = login(client, "emp001", "emp001pass")
+    assert client.get("/test-auth/check", headers=headers).json()["role"] == "admin"
+
+
+def test_ttl_cache_skips_values_loaded_before_an_invalidation():
+    cache = TTLCache("test")
+    generation = cache.generation
+    cache.invalidate("other")
+    cache.set("key", "stale", generation)
+    assert cache.get("key") is MISSING
+
+    def loader():
+        cache.invalidate("key")
+        return "stale"
+
+    assert cache.get_or_load("key", loader) == "stale"
+    assert cache.get("key") is MISSING
+    assert cache.get_or_load("key", lambda: "fresh") == "fresh"
+    assert cache.get("key") == "fresh"
@@ -0,0 +1,69 @@
+# file: tests/test_bid_contention.py
+"""
+Hundreds of concurrent bid revisions near the deadline: compare-and-swap
+keeps every one, idempotent retries create one bid, and nothing lands
+after end_date.
+"""
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlmodel import Session, select, update
+
+from benchmarks._common import engine, reset_database
+from benchmarks.bench_bid_contention import INSURER, START_PREMIUM, cas_revision, final_bids, load_data
+from app.models import Bid, BiddingRound, BidItem
+from app.services import insurer_service as svc
+
+THREADS = 16
+REVISIONS = 400
+BIDS = 4
+
+
+@pytest.fixture
+def bids():
+    reset_database()
+    load_data(BIDS)
+    rng = random.Random(0)
+    return [rng.randint(1, BIDS) for _ in range(REVISIONS)]
+
+
+def test_every_revision_lands_once(bids):
+    stats, lock = {"conflicts": 0}, threading.Lock()
+    with ThreadPoolExecutor(THREADS) as pool:
+        list(pool.map(lambda b: cas_revision(b, stats, lock), bids))
+
+    for bid in final_bids(BIDS):
+        revisions = bids.count(bid.bid_id)
+        assert bid.premium == START_PREMIUM + revisions, bid
+        assert bid.version == 1 + revisions, bid
+
+
+def test_concurrent_retries_with_one_key_create_one_bid(bids):
+    category = BIDS + 1
+    with ThreadPoolExecutor(THREADS) as pool:
+        responses = list(pool.map(
+            lambda _: svc.submit_bid(INSURER, category, 1, 500.0, idempotency_key="retry-1"),
+            range(THREADS * 4),
+        ))
+    assert "error" not in responses[0], responses[0]
+    assert all(r == responses[0] for r in responses)
+    with Session(engine) as session:
+        assert len(session.exec(select(Bid).where(Bid.category_id == category)).all()) == 1
+
+
+def test_nothing_lands_after_end_date(bids):
+    with engine.begin() as conn:
+        conn.execute(update(BiddingRound).where(BiddingRound.round_id == 1).values(end_date="2000-01-01"))
+    before = [(b.premium, b.version) for b in final_bids(BIDS)]
+    versions = {b.bid_id: b.version for b in final_bids(BIDS)}
+
+    with ThreadPoolExecutor(THREADS) as pool:
+        results = list(pool.map(lambda b: svc.update_bid(b, 1.0, INSURER, versions[b]), bids[:100]))
+        results += list(pool.map(
+            lambda b: svc.submit_bids(INSURER, 1, [BidItem(category_id=b, premium=1.0, version=versions[b])]),
+            range(1, BIDS + 1),
+        ))
+    assert all(r.get("error") == svc.ROUND_CLOSED for r in results), results[:3]
+    assert [(b.premium, b.version) for b in final_bids(BIDS)] == before
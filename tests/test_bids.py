@@ -0,0 +1,87 @@
+# file: tests/test_bids.py
+"""Bid submission errors and the round deadline (insurer_service)."""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlmodel import Session, select, update
+
+from benchmarks._common import engine
+from app.models import BiddingRound, BidItem, PolicyCategory, User
+from app.services import insurer_service as svc
+
+
+def _ids():
+    with Session(engine) as session:
+        insurer = session.exec(select(User.user_id).where(User.username == "aia")).one()
+        gpa = session.exec(select(PolicyCategory.category_id).where(PolicyCategory.category_name == "GPA")).one()
+    return insurer, gpa
+
+
+def _set_round(**dates):
+    with engine.begin() as conn:
+        conn.execute(update(BiddingRound).where(BiddingRound.round_id == 1).values(**dates))
+
+
+def _in_an_hour(hours: int, separator: str) -> str:
+    return (datetime.now(svc.BIDDING_TZ) + timedelta(hours=hours)).strftime(f"%Y-%m-%d{separator}%H:%M:%S")
+
+
+@pytest.fixture
+def open_round(db):
+    _set_round(start_date=None, end_date=None)
+
+
+def test_duplicate_bid(open_round):
+    insurer, gpa = _ids()
+    assert "error" not in svc.submit_bid(insurer, gpa, 1, 10.0)
+    assert svc.submit_bid(insurer, gpa, 1, 11.0)["error"] == svc.DUPLICATE_BID
+
+
+def test_unknown_category_is_not_a_duplicate(open_round, foreign_keys):
+    insurer, _ = _ids()
+    assert svc.submit_bid(insurer, 9999, 1, 10.0)["error"] == svc.CATEGORY_NOT_FOUND
+    assert svc.submit_bid(insurer, 9999, 999, 10.0)["error"] == svc.CATEGORY_NOT_FOUND
+
+
+def test_unknown_round(open_round):
+    insurer, gpa = _ids()
+    assert svc.submit_bid(insurer, gpa, 999, 10.0)["error"] == svc.ROUND_NOT_FOUND
+
+
+@pytest.mark.parametrize("separator", ["T", " "])
+def test_end_date_with_time(open_round, separator):
+    insurer, gpa = _ids()
+    _set_round(end_date=_in_an_hour(-1, separator))
+    assert svc.submit_bid(insurer, gpa, 1, 10.0)["error"] == svc.ROUND_CLOSED
+
+    _set_round(end_date=_in_an_hour(1, separator))
+    assert "error" not in svc.submit_bid(insurer, gpa, 1, 10.0)
+
+
+def test_start_date_with_time(open_round):
+    insurer, gpa = _ids()
+    _set_round(start_date=_in_an_hour(1, " "))
+    assert svc.submit_bid(insurer, gpa, 1, 10.0)["error"] == svc.ROUND_CLOSED
+
+
+def test_revision_without_version_is_refused(open_round):
+    insurer, gpa = _ids()
+    bid = svc.submit_bid(insurer, gpa, 1, 10.0)
+    result = svc.submit_bids(insurer, 1, [BidItem(category_id=gpa, premium=11.0)])
+    assert result["error"] == svc.VERSION_REQUIRED
+    result = svc.submit_bids(insurer, 1, [BidItem(category_id=gpa, premium=11.0, version=bid["version"])])
+    assert "error" not in result, result
+
+
+def test_put_needs_a_version(client, open_round):
+    insurer, gpa = _ids()
+    bid = svc.submit_bid(insurer, gpa, 1, 10.0)
+    r = client.post("/auth/login", data={"username": "aia", "password": "aia123"})
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    url = f"/insurer/bid/{bid['bid_id']}?premium=11"
+
+    assert client.put(url, headers=headers).status_code == 428
+    assert client.put(url, headers={**headers, "If-Match": "soon"}).status_code == 400
+    r = client.put(url, headers={**headers, "If-Match": f'"{bid["version"]}"'})
+    assert r.status_code == 200 and r.json()["version"] == bid["version"] + 1, r.text
+    assert client.put(f"{url}&version={bid['version']}", headers=headers).status_code == 409
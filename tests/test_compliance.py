@@ -0,0 +1,40 @@
+# file: tests/test_compliance.py
+"""Compliance runs happen on schedule; reading violations never writes."""
+from sqlalchemy import func
+from sqlmodel import Session, select
+
+from benchmarks._common import count_queries, engine
+from app.models import ComplianceRun, Employee
+from app.services.compliance_service import ComplianceScheduler
+
+
+def _runs():
+    with Session(engine) as session:
+        return session.exec(select(func.count()).select_from(ComplianceRun)).one()
+
+
+def test_fwmi_page_is_read_only(client, admin_headers):
+    with count_queries() as statements:
+        r = client.get("/admin/fwmi/non-compliant", headers=admin_headers)
+    assert r.status_code == 200 and r.json()["checked_at"] is None
+    writes = [s for s in statements if not s.lstrip().upper().startswith("SELECT")]
+    assert not writes, writes
+    assert _runs() == 0
+
+    client.post("/admin/compliance/run", headers=admin_headers)
+    assert client.get("/admin/fwmi/non-compliant", headers=admin_headers).json()["checked_at"]
+
+
+def test_scheduler_runs_only_when_something_changed(db):
+    scheduler = ComplianceScheduler(interval=0)
+    assert scheduler.run_pending()          # no run yet
+    assert not scheduler.run_pending()
+    assert _runs() == 1
+
+    with Session(engine) as session:
+        employee = session.exec(select(Employee)).first()
+        employee.pass_type = "WP"
+        session.add(employee)
+        session.commit()
+    assert scheduler.run_pending()
+    assert scheduler.stats()["runs"] == 2 and _runs() == 2
@@ -0,0 +1,102 @@
+# file: tests/test_coverage.py
+"""
+Coverage lookups: SQL statements per call (no N+1), reference-cache
+invalidation, and the coverage snapshot kept in step with its sources.
+"""
+import pytest
+from sqlmodel import Session, delete, select, update
+
+from benchmarks._common import count_queries, engine
+from app.models import EmployeePlan, Plan, PlanTier
+from app.services import coverage_snapshot
+from app.services.coverage_service import get_category_limits
+from app.services.employee_service import get_employee_coverage, get_ward_class_and_limits
+from app.services.reference_cache import reference_cache
+
+LOOKUPS = {
+    "coverage/plan/1": lambda: get_category_limits(1),
+    "employee coverage": lambda: get_employee_coverage("emp001"),
+    "ward class": lambda: get_ward_class_and_limits("emp001"),
+}
+
+# SELECT statements per call: (cold cache, warm cache)
+EXPECTED_QUERIES = {
+    "coverage/plan/1": (1, 0),
+    "employee coverage": (1, 1),   # coverage snapshot, no cache needed
+    "ward class": (1, 1),
+}
+
+
+def _selects(lookup):
+    with count_queries() as statements:
+        result = lookup()
+    assert "error" not in result, result
+    return len([s for s in statements if s.lstrip().upper().startswith("SELECT")])
+
+
+def _coverage():
+    return get_employee_coverage("emp001")
+
+
+def _snapshot_drift():
+    with engine.connect() as conn:
+        return coverage_snapshot.drift(conn)
+
+
+@pytest.mark.parametrize("name", LOOKUPS)
+def test_query_count(db, name):
+    reference_cache.invalidate()
+    lookup = LOOKUPS[name]
+    assert (_selects(lookup), _selects(lookup)) == EXPECTED_QUERIES[name]
+
+
+def test_committed_tier_change_is_visible(db):
+    get_category_limits(1)
+    with Session(engine) as session:
+        tier = session.exec(select(PlanTier).where(PlanTier.plan_id == 1)).first()
+        tier.sum_insured += 1
+        session.add(tier)
+        session.commit()
+        expected = tier.sum_insured
+
+    assert get_category_limits(1)[0]["sum_insured"] == expected
+
+
+def test_snapshot_follows_orm_and_bulk_writes(db):
+    assert _snapshot_drift() == 0
+
+    # ORM update of a tier
+    with Session(engine) as session:
+        tier = session.exec(select(PlanTier).where(PlanTier.plan_id == 2)).first()
+        tier.sum_insured = 123456
+        session.add(tier)
+        session.commit()
+    assert any(c["sum_insured"] == 123456 for c in _coverage()["coverage"])
+
+    # Bulk update of a plan
+    with Session(engine) as session:
+        session.exec(update(Plan).where(Plan.plan_id == 2).values(plan_name="Plan B v2"))
+        session.commit()
+    assert "Plan B v2" in [p["plan_name"] for p in _coverage()["plans"]]
+
+    # Bulk delete of links plus ORM insert (as PUT /employee/{id} does)
+    with Session(engine) as session:
+        session.exec(delete(EmployeePlan).where(EmployeePlan.employee_id == 1))
+        session.add(EmployeePlan(employee_id=1, plan_id=2))
+        session.commit()
+    assert [p["plan_id"] for p in _coverage()["plans"]] == [2]
+
+    # Rolled back change leaves the snapshot alone
+    with Session(engine) as session:
+        session.exec(delete(EmployeePlan).where(EmployeePlan.employee_id == 1))
+        session.rollback()
+    assert [p["plan_id"] for p in _coverage()["plans"]] == [2]
+
+    # ORM delete of the last links
+    with Session(engine) as session:
+        for link in session.exec(select(EmployeePlan)).all():
+            session.delete(link)
+        session.commit()
+    assert _coverage() == {"error": "No plan assigned"}
+
+    assert _snapshot_drift() == 0
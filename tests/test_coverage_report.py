@@ -0,0 +1,51 @@
+# file: tests/test_coverage_report.py
+"""Incremental maintenance of the coverage report cube."""
+from sqlmodel import Session, select
+
+from benchmarks._common import engine
+from app.models import Employee, EmployeePlan
+from app.models.coverage_cube import CoverageCube
+from app.services import coverage_report
+
+
+def _drift():
+    with engine.connect() as conn:
+        return coverage_report.drift(conn)
+
+
+def _grand_total():
+    with Session(engine) as session:
+        return session.exec(select(CoverageCube).where(CoverageCube.cuboid == "")).one()
+
+
+def test_orm_changes_keep_the_cube_in_sync(db):
+    assert _drift() == 0
+    with Session(engine) as session:
+        employee = session.exec(select(Employee)).first()
+        employee.department = "Moved"
+        session.add(employee)
+        link = session.exec(select(EmployeePlan).where(EmployeePlan.employee_id == employee.employee_id)).first()
+        session.delete(link)
+        session.commit()
+    assert _drift() == 0
+
+
+def test_deltas_from_the_same_base_both_apply(db):
+    # Two commits that read the cube before either wrote: each delta adds
+    # to the stored cell rather than overwriting it with its own total.
+    before = _grand_total()
+    cell = ((), ())
+    new_cell = (("department",), ("Nowhere",))
+    with engine.begin() as conn:
+        coverage_report.apply_delta(conn, {}, {cell: (1, 100.0), new_cell: (1, 5.0)})
+        coverage_report.apply_delta(conn, {}, {cell: (2, 50.0), new_cell: (1, 5.0)})
+    after = _grand_total()
+    assert after.headcount == before.headcount + 3
+    assert round(after.total_sum_insured - before.total_sum_insured, 2) == 150.0
+
+    report = coverage_report.coverage_report(by=["department"], department="Nowhere")
+    assert [(r["headcount"], r["total_sum_insured"]) for r in report["rows"]] == [(2, 10.0)]
+
+    with engine.begin() as conn:
+        coverage_report.apply_delta(conn, {new_cell: (2, 10.0)}, {})
+    assert coverage_report.coverage_report(by=["department"], department="Nowhere")["rows"] == []
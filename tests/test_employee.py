@@ -0,0 +1,14 @@
+# file: tests/test_employee.py
+"""POST /employee/ error mapping."""
+
+
+def test_duplicate_code_is_a_conflict(client):
+    body = {"employee_code": "EE001", "user_id": 1}
+    r = client.post("/employee/", json=body)
+    assert r.status_code == 409 and r.json()["detail"] == "Employee code already exists"
+
+
+def test_unknown_user_is_not_reported_as_a_duplicate(client, foreign_keys):
+    r = client.post("/employee/", json={"employee_code": "NEW001", "user_id": 9999})
+    assert r.status_code == 400, r.text
+    assert client.post("/employee/", json={"employee_code": "NEW001", "user_id": 1}).status_code == 200
@@ -0,0 +1,47 @@
+# file: tests/test_employee_listing.py
+"""GET /employee/ keyset pagination and ?fields= selection."""
+import pytest
+from sqlalchemy import insert
+
+from benchmarks._common import engine
+from app.models import Employee
+
+
+@pytest.fixture
+def employees(client):
+    with engine.begin() as conn:
+        conn.execute(insert(Employee), [
+            {"user_id": 1, "employee_code": f"T{i:03d}", "name": f"Test {i}", "department": "Ops"}
+            for i in range(5)
+        ])
+    return client.get("/employee/", params={"limit": 1000}).json()["items"]
+
+
+def test_single_field_is_the_cursor_only(client, employees):
+    r = client.get("/employee/", params={"fields": "employee_id", "limit": 2})
+    assert r.status_code == 200, r.text
+    page = r.json()
+    assert page["items"] == [{"employee_id": e["employee_id"]} for e in employees[:2]]
+    assert page["next_cursor"] == employees[1]["employee_id"]
+
+
+def test_fields_and_pages_cover_every_employee(client, employees):
+    seen, after = [], None
+    while True:
+        params = {"fields": "name", "limit": 2, **({"after": after} if after else {})}
+        page = client.get("/employee/", params=params).json()
+        seen += page["items"]
+        if page["next_cursor"] is None:
+            break
+        after = page["next_cursor"]
+    assert seen == [{"employee_id": e["employee_id"], "name": e["name"]} for e in employees]
+
+
+def test_ndjson_export_with_one_field(client, employees):
+    r = client.get("/employee/", params={"fields": "employee_id", "format": "ndjson"})
+    assert r.status_code == 200, r.text
+    assert len(r.text.splitlines()) == len(employees)
+
+
+def test_unknown_field_is_rejected(client):
+    assert client.get("/employee/", params={"fields": "salary"}).status_code == 400
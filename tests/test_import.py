@@ -0,0 +1,83 @@
+# file: tests/test_import.py
+"""Batched employee imports (app/services/import_service.py)."""
+import time
+
+import pandas as pd
+import pytest
+from sqlmodel import Session, select
+
+from benchmarks._common import engine
+from app.models import Employee, EmployeePlan
+from app.services.import_service import import_employees_dataframe
+
+
+def _sheet(rows):
+    return pd.DataFrame(rows, columns=["Employee Code", "Name", "Department", "Age", "Gender", "Plan IDs"])
+
+
+def _links(code):
+    with Session(engine) as session:
+        return session.exec(
+            select(EmployeePlan.plan_id)
+            .join(Employee, Employee.employee_id == EmployeePlan.employee_id)
+            .where(Employee.employee_code == code)
+            .order_by(EmployeePlan.plan_id)
+        ).all()
+
+
+def test_repeated_plan_id_links_once(db):
+    sheet = _sheet([
+        ["N001", "A", "Ops", 30, "F", "1,1"],
+        ["N002", "B", "Ops", 31, "M", "1, 2,1"],
+    ])
+    with Session(engine) as session:
+        result = import_employees_dataframe(session, sheet)
+    assert result["employees_created"] == 2 and result["errors"] == []
+    assert result["plan_links_created"] == 3
+    assert _links("N001") == [1] and _links("N002") == [1, 2]
+
+
+@pytest.mark.parametrize("returning", [True, False], ids=["returning", "no-returning"])
+def test_links_go_to_the_right_employees(db, monkeypatch, returning):
+    # no-returning is the MySQL path: executemany, then ids by code
+    monkeypatch.setattr(
+        engine.dialect, "insert_executemany_returning_sort_by_parameter_order", returning
+    )
+    sheet = _sheet([[f"N{i:03d}", f"E{i}", "Ops", 30, "F", str(i % 2 + 1)] for i in range(25)])
+    with Session(engine) as session:
+        result = import_employees_dataframe(session, sheet, chunk_size=10)
+    assert result["employees_created"] == 25
+    for i in range(25):
+        assert _links(f"N{i:03d}") == [i % 2 + 1]
+
+
+def test_taken_codes_are_rejected_in_large_chunks(db):
+    # more codes than one IN (...) lookup binds
+    sheet = _sheet([[f"N{i:05d}", f"E{i}", "Ops", 30, "F", None] for i in range(2500)])
+    with Session(engine) as session:
+        assert import_employees_dataframe(session, sheet.iloc[::2])["employees_created"] == 1250
+    with Session(engine) as session:
+        result = import_employees_dataframe(session, sheet, chunk_size=2500)
+    assert result["employees_created"] == 1250
+    assert len(result["errors"]) == 1250
+    assert {e["errors"][0] for e in result["errors"]} == {"Employee Code already exists"}
+
+
+def _run_upload(client, filename, content: bytes):
+    job = client.post("/import/employees", files={"file": (filename, content)}).json()
+    for _ in range(200):
+        job = client.get(f"/import/jobs/{job['job_id']}").json()
+        if job["status"] not in ("queued", "running"):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"import job did not finish: {job}")
+
+
+@pytest.mark.parametrize("filename, content, message", [
+    ("empty.csv", b"", "File read error: the CSV file is empty"),
+    ("staff.txt", b"not a workbook", "File read error: not an Excel workbook or a .csv file"),
+])
+def test_unreadable_upload_fails_with_a_format_error(client, filename, content, message):
+    job = _run_upload(client, filename, content)
+    assert job["status"] == "failed"
+    assert job["errors"][0].startswith(message), job["errors"]
@@ -0,0 +1,59 @@
+# file: tests/test_indexes.py
+"""
+Every hot lookup is answered through its index once the index migration
+(sync_indexes) has run on a database built without them.
+"""
+import re
+
+import pytest
+
+from benchmarks._common import engine, reset_database
+from benchmarks.bench_indexes import drop_declared_indexes, hot_queries, load_data
+from app.database.migrations import sync_indexes
+
+EMPLOYEES = 2000
+BIDS = 20_000
+
+
+def _compiled(stmt) -> str:
+    return str(stmt.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+
+
+def explain(stmt):
+    """Query plan rows as dicts (SQLite EXPLAIN QUERY PLAN or MySQL EXPLAIN)."""
+    prefix = "EXPLAIN QUERY PLAN " if engine.dialect.name == "sqlite" else "EXPLAIN "
+    with engine.connect() as conn:
+        return [dict(row._mapping) for row in conn.exec_driver_sql(prefix + _compiled(stmt))]
+
+
+def uses_index(plan, table: str, index: str) -> bool:
+    if engine.dialect.name == "sqlite":
+        # e.g. "SEARCH user USING COVERING INDEX ix_user_username (username=?)"
+        pattern = re.compile(rf"^SEARCH {table}\b.* INDEX {index}\b")
+        return any(pattern.match(row["detail"]) for row in plan)
+    return any(row["table"] == table and row["key"] == index for row in plan)
+
+
+@pytest.fixture(scope="module")
+def migrated():
+    reset_database()
+    drop_declared_indexes()
+    rounds = load_data(EMPLOYEES, BIDS)
+    report = sync_indexes(engine)
+    # SQLite's EXPLAIN does not reload a schema cached before the migration
+    engine.dispose()
+    return report, hot_queries(EMPLOYEES, rounds)
+
+
+def test_migration_creates_every_declared_index(migrated):
+    report, _ = migrated
+    assert not [name for name, status in report.items() if status not in ("created", "exists")], report
+    assert "created" in report.values()
+
+
+@pytest.mark.parametrize("name", list(hot_queries(1, 1)))
+def test_hot_query_uses_its_index(migrated, name):
+    _, queries = migrated
+    table, index, make = queries[name]
+    plan = explain(make())
+    assert uses_index(plan, table, index), plan
@@ -0,0 +1,134 @@
+"""
+The live leaderboard broker, in process: one load per round, the same
+deltas for every subscriber, slow subscribers dropped, rounds forgotten
+after their last subscriber.
+"""
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from benchmarks._common import count_queries, reset_database
+from benchmarks.bench_leaderboard import ROUND, load_data, revise
+from app.services import insurer_service as svc
+from app.services import leaderboard
+from app.services.bidding_service import compare_bids
+from app.services.leaderboard import LeaderboardBroker
+
+INSURERS = 5
+CATEGORIES = 3
+
+
+@pytest.fixture
+def bids():
+    reset_database()
+    return load_data(INSURERS, CATEGORIES)
+
+
+@pytest.fixture
+def broker(monkeypatch):
+    """A broker of its own, fed by insurer_service like the app's."""
+    broker = LeaderboardBroker()
+    monkeypatch.setattr(svc, "BID_LISTENERS", [broker.publish])
+    return broker
+
+
+async def _revise(bids, revisions, versions, seed=1):
+    # From another thread, as the sync endpoints do; fan-outs queued by
+    # the commits run before this await returns
+    with ThreadPoolExecutor(1) as pool:
+        await asyncio.get_running_loop().run_in_executor(pool, revise, bids, revisions, seed, versions)
+
+
+def _drain(queue):
+    messages = []
+    while not queue.empty():
+        messages.append(queue.get_nowait())
+    return messages
+
+
+def _view(messages):
+    """What a browser would keep: bid_id -> [premium, rank]."""
+    view = {}
+    for event in map(json.loads, messages):
+        if event["type"] == "snapshot":
+            for category in event["categories"]:
+                for bid in category["bids"]:
+                    view[bid["bid_id"]] = [bid["premium"], bid["rank"]]
+            continue
+        view[event["bid"]["bid_id"]] = [event["bid"]["premium"], event["bid"]["rank"]]
+        for moved in event["ranks"]:
+            view[moved["bid_id"]][1] = moved["rank"]
+    return view
+
+
+def test_round_is_loaded_once_for_all_subscribers(bids, broker):
+    async def scenario():
+        queues = await asyncio.gather(*(broker.subscribe(ROUND) for _ in range(20)))
+        assert broker.stats["loads"] == 1, broker.stats
+        snapshots = {q.get_nowait() for q in queues}
+        assert len(snapshots) == 1
+        assert await broker.subscribe(999) is None
+
+    asyncio.run(scenario())
+
+
+def test_subscribers_get_the_same_deltas(bids, broker):
+    async def scenario():
+        versions = {}
+        with count_queries() as alone:
+            await _revise(bids, 30, versions, seed=1)
+        queues = [await broker.subscribe(ROUND) for _ in range(5)]
+        with count_queries() as watched:
+            await _revise(bids, 30, versions, seed=2)
+        # no per-subscriber queries: a revision costs what it costs unwatched
+        assert len(watched) == len(alone), (len(watched), len(alone))
+        return [_drain(q) for q in queues]
+
+    messages = asyncio.run(scenario())
+    assert all(m == messages[0] for m in messages)
+    assert len(messages[0]) == 1 + 30
+    expected = {b["bid_id"]: [b["premium"], b["rank"]] for b in compare_bids(ROUND)["bids"]}
+    assert _view(messages[0]) == expected
+
+
+def test_slow_subscriber_is_dropped(bids, broker, monkeypatch):
+    monkeypatch.setattr(leaderboard, "SUBSCRIBER_QUEUE_SIZE", 4)
+
+    async def scenario():
+        reader = await broker.subscribe(ROUND)
+        stalled = await broker.subscribe(ROUND)     # never read
+        received = _drain(reader)
+        versions = {}
+        for seed in range(10):
+            await _revise(bids, 1, versions, seed)
+            received += _drain(reader)
+        return received, stalled
+
+    received, stalled = asyncio.run(scenario())
+    assert broker.stats["dropped_subscribers"] == 1, broker.stats
+    assert stalled.full() and list(stalled._queue)[-1] is None
+    assert len(received) == 1 + 10
+    assert broker.subscriber_count(ROUND) == 1
+
+
+def test_round_is_dropped_after_the_last_unsubscribe(bids, broker):
+    async def scenario():
+        queues = [await broker.subscribe(ROUND) for _ in range(3)]
+        for queue in queues:
+            broker.unsubscribe(ROUND, queue)
+        assert not broker.rounds and broker.subscriber_count() == 0
+
+        published = broker.stats["published"]
+        await _revise(bids, 3, {})
+        assert broker.stats["published"] == published
+
+        # the next subscriber loads the round again, with the new premiums
+        queue = await broker.subscribe(ROUND)
+        assert broker.stats["loads"] == 2
+        return _drain(queue)
+
+    messages = asyncio.run(scenario())
+    expected = {b["bid_id"]: [b["premium"], b["rank"]] for b in compare_bids(ROUND)["bids"]}
+    assert _view(messages) == expected
@@ -0,0 +1,46 @@
+# file: tests/test_migrations.py
+"""Versioned migrations (app/database/migrations.py)."""
+import pytest
+from sqlalchemy import create_engine, inspect
+
+from app.database import database, migrations
+
+
+def _schema(engine):
+    inspector = inspect(engine)
+    schema = {}
+    for table in inspector.get_table_names():
+        columns = {c["name"]: c["nullable"] for c in inspector.get_columns(table)}
+        indexes = {ix["name"]: bool(ix["unique"]) for ix in inspector.get_indexes(table)}
+        schema[table] = (columns, indexes)
+    return schema
+
+
+def test_step_by_step_upgrade_matches_a_new_database(tmp_path):
+    fresh = create_engine(f"sqlite:///{tmp_path}/fresh.db")
+    migrations.upgrade(fresh)
+
+    stepped = create_engine(f"sqlite:///{tmp_path}/stepped.db")
+    assert [m.version for m in migrations.upgrade(stepped, 1)] == [1]
+    migrations.upgrade(stepped)
+
+    assert _schema(stepped) == _schema(fresh)
+    for engine in (fresh, stepped):
+        assert migrations.check_schema(engine) == migrations.head()
+
+
+def test_check_mode_sets_up_an_unversioned_database(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path}/new.db")
+    monkeypatch.setattr(database, "DB_STARTUP_MODE", "check")
+    monkeypatch.setattr(database, "engine", engine)
+
+    database.init_db()
+    assert migrations.check_schema(engine) == migrations.head()
+
+    # a versioned database that is behind still refuses to start
+    with engine.begin() as conn:
+        conn.execute(migrations.schema_version.delete().where(
+            migrations.schema_version.c.version == migrations.head()
+        ))
+    with pytest.raises(migrations.SchemaVersionError):
+        database.init_db()
@@ -0,0 +1,25 @@
+# file: tests/test_simulation.py
+"""Renewal simulation endpoints (/simulation)."""
+
+
+def test_oversized_grid_is_rejected(client, admin_headers):
+    model = client.get("/simulation/round/1", headers=admin_headers).json()
+    categories = model["categories"]
+    # 2**63 scenarios: an int64 product would wrap around to a negative count
+    assert len(categories) >= 5
+    sizes = [2 ** 13, 2 ** 13, 2 ** 13, 2 ** 12, 2 ** 12]
+    grid = {"carriers": {c: [None] * n for c, n in zip(categories, sizes)}}
+
+    r = client.post("/simulation/round/1", json={"grid": grid}, headers=admin_headers)
+    assert r.status_code == 400, r.text
+    assert "at most" in r.json()["detail"]
+
+
+def test_grid_of_current_and_every_insurer(client, admin_headers):
+    model = client.get("/simulation/round/1", headers=admin_headers).json()
+    category = model["categories"][0]
+    grid = {"carriers": {category: [None, *sorted(int(i) for i in model["bids"])]}}
+
+    r = client.post("/simulation/round/1", json={"grid": grid}, headers=admin_headers)
+    assert r.status_code == 200, r.text
+    assert len(r.json()["scenarios"]) == len(grid["carriers"][category])